@@ -557,7 +557,14 @@ def create_app(config_class=None):
             logger.info("V5 observability middleware registered successfully")
         except Exception as e:
             logger.warning(f"V5 observability middleware failed to initialize: {e}")
-        
+
+        # Register SQL profiler (debug by default; SQL_PROFILER_ENABLED overrides)
+        try:
+            from middleware.sql_profiler import SQLProfilerMiddleware
+            SQLProfilerMiddleware(app)
+        except Exception as e:
+            logger.warning(f"SQL profiler middleware failed to initialize: {e}")
+
     except ImportError as e:
         logger.warning(f"Could not import v5 middleware: {e}")
     except Exception as e:
@@ -573,7 +580,7 @@ def create_app(config_class=None):
     
     # Register v5 API blueprints with feature flag controls
     try:
-        from utils.feature_flags_v5 import FeatureFlagsV5
+        from utils.feature_flags_v5 import feature_flags_v5
         from cache.redis_manager_v5 import get_redis_manager_v5
         from database.connection_manager import get_connection_manager
         from database.unified_connection_manager import UnifiedConnectionManager
@@ -600,8 +607,12 @@ def create_app(config_class=None):
                 logger.warning(f"Redis manager initialization failed: {e}")
                 redis_manager_v5 = None
 
-            # 3. Initialize feature flags (without Redis dependency)
-            feature_flags_v5 = FeatureFlagsV5()
+            # 3. Feature flags: the shared instance follows Redis-published changes when available
+            if redis_manager_v5 is not None and os.getenv("FEATURE_FLAGS_REDIS_SYNC", "true").lower() == "true":
+                try:
+                    feature_flags_v5.attach_redis(redis_manager_v5)
+                except Exception as e:
+                    logger.warning(f"Feature flags will not follow shared changes: {e}")
             logger.info("Feature flags initialized")
 
             # 4. Verify all services are ready
@@ -622,7 +633,16 @@ def create_app(config_class=None):
                     logger.warning("Database pool monitoring failed to initialize")
             except Exception as e:
                 logger.warning(f"Failed to initialize database pool monitoring: {e}")
-                
+
+            # 6. In-process revocation filter (thread starts lazily in each worker)
+            if redis_manager_v5 is not None:
+                try:
+                    from services.auth.revocation_filter import install_revocation_filter
+                    if install_revocation_filter(redis_manager_v5, connection_manager_v5):
+                        logger.info("Session revocation filter installed")
+                except Exception as e:
+                    logger.warning(f"Failed to install session revocation filter: {e}")
+
         except Exception as e:
             logger.error(f"Failed to initialize v5 services: {e}")
             raise RuntimeError(f"Critical service initialization failed: {e}") from e
@@ -855,10 +875,11 @@ def create_app(config_class=None):
         
         # Register v5 metrics API
         try:
-            from routes.v5.metrics_v5 import metrics_v5, init_services as init_metrics_services
+            from routes.v5.metrics_v5 import metrics_v5, prometheus_bp, init_services as init_metrics_services
             # Initialize metrics services
             init_metrics_services(redis_manager_v5, feature_flags_v5)
             app.register_blueprint(metrics_v5)
+            app.register_blueprint(prometheus_bp)     # /metrics
             logger.info("V5 metrics API blueprint registered successfully")
         except ImportError as e:
             logger.warning(f"Could not import v5 metrics API blueprint: {e}")
@@ -0,0 +1,9 @@
+"""
+Seeded load benchmarks for the v5 hot paths.
+
+    docker compose -f benchmarks/docker-compose.yml up -d
+    python -m benchmarks.seed            # deterministic dataset into the bench DB/Redis
+    python -m benchmarks.run             # scenarios vs. benchmarks/baselines/{queries,latency}.json
+
+See benchmarks/run.py for options and the regression rules.
+"""
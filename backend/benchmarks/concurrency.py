@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Concurrency Benchmark
+
+Checks that slow Postgres and Redis calls do not block a gevent worker. It
+patches the process the same way config/gunicorn.conf.py does, registers
+the psycopg2 wait callback from post_fork, then runs --concurrency greenlets
+that each hold a pool connection through one slow call:
+
+  postgres   SELECT pg_sleep(--sleep) through UnifiedConnectionManager
+  redis      BLPOP on an empty key with a --sleep timeout
+
+With cooperative I/O the whole batch finishes in about one call's time per
+pool-sized wave; blocking I/O takes --concurrency times as long. A probe
+slower than 1.5x the cooperative expectation (plus 100 ms) fails, and any
+failure exits with status 1. Pass --blocking to run without the wait
+callback and see the difference.
+
+Usage:
+    python -m benchmarks.concurrency
+    python -m benchmarks.concurrency --concurrency 100 --pool-size 20
+    python -m benchmarks.concurrency --blocking --probe postgres
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse
+import math
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import gevent
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.seed import DEFAULT_DATABASE_URL, DEFAULT_REDIS_URL
+
+
+def postgres_probe(database_url: str, pool_size: int, sleep: float):
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = "0"
+    from sqlalchemy import text
+
+    from database.unified_connection_manager import UnifiedConnectionManager
+
+    manager = UnifiedConnectionManager(database_url)
+    if not manager.connect():
+        sys.exit(f"could not connect to {database_url}")
+
+    def call():
+        with manager.session_scope() as session:
+            session.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": sleep})
+
+    return call, manager.disconnect
+
+
+def redis_probe(redis_url: str, pool_size: int, sleep: float):
+    import redis
+
+    client = redis.Redis.from_url(redis_url, max_connections=pool_size)
+
+    def call():
+        client.blpop(f"bench:concurrency:{uuid.uuid4().hex}", timeout=sleep)
+
+    return call, client.close
+
+
+def measure(call, concurrency: int) -> float:
+    call()  # open a connection before timing
+    started = time.perf_counter()
+    greenlets = [gevent.spawn(call) for _ in range(concurrency)]
+    gevent.joinall(greenlets, raise_error=True)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--probe", action="append", choices=("postgres", "redis"),
+                        help="run only these probes (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=50, help="slow calls started at once")
+    parser.add_argument("--pool-size", type=int, help="connections per probe (default: --concurrency)")
+    parser.add_argument("--sleep", type=float, default=0.5, help="seconds each call waits on the server")
+    parser.add_argument("--blocking", action="store_true", help="do not install the psycopg2 wait callback")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL))
+    parser.add_argument("--redis-url", default=os.getenv("BENCH_REDIS_URL", DEFAULT_REDIS_URL))
+    args = parser.parse_args()
+
+    if not args.blocking:
+        from database.gevent_support import make_psycopg_green
+
+        make_psycopg_green()
+
+    pool_size = min(args.pool_size or args.concurrency, args.concurrency)
+    expected = math.ceil(args.concurrency / pool_size) * args.sleep
+    probes = {"postgres": (postgres_probe, args.database_url), "redis": (redis_probe, args.redis_url)}
+
+    failed = False
+    print(f"{'probe':<10}{'calls':>7}{'pool':>6}{'elapsed':>10}{'expected':>10}{'serial':>10}")
+    for name in args.probe or list(probes):
+        build, url = probes[name]
+        call, close = build(url, pool_size, args.sleep)
+        try:
+            elapsed = measure(call, args.concurrency)
+        finally:
+            close()
+        slow = elapsed > expected * 1.5 + 0.1
+        failed |= slow
+        print(f"{name:<10}{args.concurrency:>7}{pool_size:>6}{elapsed:>9.2f}s{expected:>9.2f}s"
+              f"{args.concurrency * args.sleep:>9.2f}s{'  BLOCKING' if slow else ''}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
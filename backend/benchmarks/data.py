@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Deterministic benchmark dataset.
+
+Rows are generated from a seed only (no clock, no network), so two seeds of
+the same size produce byte-identical tables. Locations cluster around the
+metro areas the app actually serves, weighted by listing density, with a
+normal spread that thins out toward the suburbs; a small share is scattered
+nationally so radius filters see sparse areas too.
+"""
+
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+# (city, state, latitude, longitude, weight, spread in degrees)
+METROS = [
+    ("Miami Beach", "FL", 25.7907, -80.1300, 30, 0.08),
+    ("Boca Raton", "FL", 26.3683, -80.1289, 12, 0.10),
+    ("Brooklyn", "NY", 40.6250, -73.9600, 35, 0.06),
+    ("Lakewood", "NJ", 40.0821, -74.2097, 15, 0.05),
+    ("Los Angeles", "CA", 34.0736, -118.4004, 18, 0.12),
+    ("Chicago", "IL", 42.0134, -87.6900, 8, 0.08),
+    ("Baltimore", "MD", 39.3600, -76.7000, 6, 0.06),
+    ("Dallas", "TX", 32.9200, -96.7900, 4, 0.10),
+]
+NATIONAL_SHARE = 0.03
+US_BOUNDS = ((25.0, 48.5), (-123.0, -70.0))
+
+KOSHER_CATEGORIES = [("Meat", 40), ("Dairy", 35), ("Pareve", 20), ("Fish", 5)]
+AGENCIES = ["ORB", "KM", "KDM", "OU", "Star-K", "CRC"]
+LISTING_TYPES = ["Restaurant", "Bakery", "Pizza", "Cafe", "Catering", "Grill"]
+NAME_WORDS = [
+    "Shalom", "Jerusalem", "Golden", "Bagel", "Grill", "Deli", "Pita", "Sushi",
+    "Cafe", "Garden", "Kosher", "Kitchen", "Express", "Market", "Bistro", "Place",
+]
+HOURS_TEMPLATES = [
+    "Sun-Thu: 11:00 AM - 10:00 PM\nFri: 11:00 AM - 2:00 PM\nSat: Closed",
+    "Mon-Fri: 7:00 AM - 3:00 PM",
+    "Sun-Thu: 5:00 PM - 1:00 AM\nSat: 8:00 PM - 1:00 AM",
+    "Daily: 6:00 AM - 11:00 PM",
+    "Sun-Thu: 8:00 AM - 9:00 PM\nFri: 8:00 AM - 3:00 PM",
+]
+DENOMINATIONS = ["Orthodox", "Chabad", "Modern Orthodox", "Sephardic", "Conservative"]
+STORE_TYPES = ["Kosher grocery", "Judaica", "Books", "Bakery", "Butcher"]
+REVIEW_PHRASES = [
+    "great food", "friendly staff", "long wait", "fresh and tasty", "a bit pricey",
+    "perfect for shabbos", "clean and quick", "would come back",
+]
+
+# Every timestamp is offset from this fixed point so reseeding is reproducible
+EPOCH = datetime(2025, 1, 1)
+
+
+@dataclass(frozen=True)
+class DatasetSize:
+    restaurants: int = 5000
+    synagogues: int = 1000
+    mikvahs: int = 250
+    stores: int = 1000
+    reviews_per_restaurant: int = 4
+    users: int = 50
+
+
+def _weighted(rng: random.Random, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights)[0]
+
+
+def random_location(rng: random.Random) -> Tuple[str, str, float, float]:
+    """(city, state, latitude, longitude) drawn from the metro mix."""
+    if rng.random() < NATIONAL_SHARE:
+        (lat_lo, lat_hi), (lng_lo, lng_hi) = US_BOUNDS
+        return "Elsewhere", "US", round(rng.uniform(lat_lo, lat_hi), 6), round(rng.uniform(lng_lo, lng_hi), 6)
+    city, state, lat, lng, _, spread = rng.choices(METROS, weights=[m[4] for m in METROS])[0]
+    return city, state, round(rng.gauss(lat, spread), 6), round(rng.gauss(lng, spread), 6)
+
+
+def _name(rng: random.Random, suffix: str) -> str:
+    return f"{rng.choice(NAME_WORDS)} {rng.choice(NAME_WORDS)} {suffix}"
+
+
+def _common(rng: random.Random, index: int, suffix: str) -> Dict:
+    city, state, lat, lng = random_location(rng)
+    created = EPOCH - timedelta(days=rng.randint(0, 900), minutes=rng.randint(0, 1439))
+    return {
+        "id": index,
+        "name": _name(rng, suffix),
+        "address": f"{rng.randint(1, 9999)} {rng.choice(NAME_WORDS)} St",
+        "city": city,
+        "state": state,
+        "zip_code": f"{rng.randint(10000, 99999)}",
+        "phone_number": f"({rng.randint(200, 989)}) 555-{rng.randint(0, 9999):04d}",
+        "latitude": lat,
+        "longitude": lng,
+        "created_at": created,
+        "updated_at": created,
+    }
+
+
+def generate_restaurants(rng: random.Random, count: int) -> List[Dict]:
+    rows = []
+    for index in range(1, count + 1):
+        row = _common(rng, index, rng.choice(LISTING_TYPES))
+        category = _weighted(rng, KOSHER_CATEGORIES)
+        review_count = int(rng.paretovariate(1.5)) * 3
+        row.update({
+            "certifying_agency": rng.choice(AGENCIES),
+            "kosher_category": category,
+            "listing_type": rng.choice(LISTING_TYPES).lower(),
+            "hours_of_operation": rng.choice(HOURS_TEMPLATES),
+            "status": "active" if rng.random() < 0.95 else "inactive",
+            "rating": round(rng.uniform(2.5, 5.0), 1),
+            "review_count": review_count,
+            "google_rating": round(rng.uniform(3.0, 5.0), 1),
+            "google_review_count": review_count * 4,
+            "price_range": rng.choice(["$", "$$", "$$$"]),
+            "is_cholov_yisroel": category == "Dairy" and rng.random() < 0.7,
+            "is_pas_yisroel": category in ("Meat", "Pareve") and rng.random() < 0.4,
+            "view_count": rng.randint(0, 5000),
+            "share_count": rng.randint(0, 200),
+            "favorite_count": rng.randint(0, 500),
+            "submission_status": "approved",
+            "short_description": f"{category} {row['name']}",
+        })
+        rows.append(row)
+    return rows
+
+
+def generate_synagogues(rng: random.Random, count: int) -> List[Dict]:
+    rows = []
+    for index in range(1, count + 1):
+        row = _common(rng, index, "Shul")
+        row.update({
+            "denomination": rng.choice(DENOMINATIONS),
+            "has_daily_minyan": rng.random() < 0.6,
+            "rating": round(rng.uniform(3.5, 5.0), 2),
+            "is_active": True,
+        })
+        rows.append(row)
+    return rows
+
+
+def generate_mikvahs(rng: random.Random, count: int) -> List[Dict]:
+    rows = []
+    for index in range(1, count + 1):
+        row = _common(rng, index, "Mikvah")
+        row.update({
+            "mikvah_type": rng.choice(["women", "men", "keilim"]),
+            "requires_appointment": rng.random() < 0.8,
+            "is_active": True,
+            "status": "active",
+        })
+        rows.append(row)
+    return rows
+
+
+def generate_stores(rng: random.Random, count: int) -> List[Dict]:
+    rows = []
+    for index in range(1, count + 1):
+        row = _common(rng, index, "Market")
+        row.update({
+            "store_type": rng.choice(STORE_TYPES),
+            "kosher_certification": rng.choice(AGENCIES),
+            "business_hours": rng.choice(HOURS_TEMPLATES),
+            "has_delivery": rng.random() < 0.4,
+            "status": "active",
+        })
+        rows.append(row)
+    return rows
+
+
+def generate_reviews(rng: random.Random, restaurants: List[Dict], per_restaurant: int) -> List[Dict]:
+    rows = []
+    for restaurant in restaurants:
+        # Skewed: a few popular places carry most reviews
+        for _ in range(min(int(rng.expovariate(1 / per_restaurant)) if per_restaurant else 0, 50)):
+            created = restaurant["created_at"] + timedelta(days=rng.randint(1, 400))
+            rows.append({
+                "id": f"bench-review-{len(rows) + 1}",
+                "restaurant_id": restaurant["id"],
+                "user_id": f"bench-user-{rng.randint(1, 5000)}",
+                "user_name": rng.choice(NAME_WORDS),
+                "rating": rng.randint(1, 5),
+                "content": ", ".join(rng.sample(REVIEW_PHRASES, 2)),
+                "status": "approved" if rng.random() < 0.9 else "pending",
+                "created_at": created,
+                "updated_at": created,
+                "verified_purchase": False,
+                "helpful_count": rng.randint(0, 20),
+                "report_count": 0,
+            })
+    return rows
+
+
+def bench_user_email(index: int) -> str:
+    return f"bench-user-{index}@bench.jewgo.test"
+
+
+def generate_dataset(size: DatasetSize, seed: int) -> Dict[str, List[Dict]]:
+    """All benchmark rows keyed by table name; one RNG stream per table."""
+    restaurants = generate_restaurants(random.Random(f"{seed}:restaurants"), size.restaurants)
+    return {
+        "restaurants": restaurants,
+        "shuls": generate_synagogues(random.Random(f"{seed}:shuls"), size.synagogues),
+        "mikvah": generate_mikvahs(random.Random(f"{seed}:mikvah"), size.mikvahs),
+        "stores": generate_stores(random.Random(f"{seed}:stores"), size.stores),
+        "reviews": generate_reviews(random.Random(f"{seed}:reviews"), restaurants, size.reviews_per_restaurant),
+    }
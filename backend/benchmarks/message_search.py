@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Message Search Benchmark
+
+Seeds shtetl_messages in the benchmark database with millions of generated
+messages, then compares the old search (five '%term%' ILIKE predicates with
+OFFSET) with ShtetlMessageService.search_messages after
+database/migrations/add_shtetl_message_search_vector.sql:
+
+  legacy    the pre-migration ILIKE query, first page and tenth page
+  fts       search_messages, first page and tenth page via its cursor
+
+Each is timed for a rare, a common and a two-word term in the largest store
+and in a typical one. Message words follow a skewed distribution, and a few
+stores hold most messages, so both sparse and dense matches are measured.
+
+Only the shtetl_messages table is rebuilt. The target must be a local
+database whose name ends in "_bench" (see benchmarks/docker-compose.yml).
+
+Usage:
+    python -m benchmarks.message_search
+    python -m benchmarks.message_search --messages 5000000 --iterations 50
+    python -m benchmarks.message_search --skip-seed
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.run import percentile
+from benchmarks.seed import DEFAULT_DATABASE_URL, DEFAULT_REDIS_URL, check_target, split_sql_statements
+from services.shtetl_message_service import ShtetlMessageService
+
+MIGRATION = backend_dir / "database" / "migrations" / "add_shtetl_message_search_vector.sql"
+SEED_BATCH = 250_000
+PAGE_SIZE = 20
+PAGES = 10
+
+# Columns search_messages reads, as in create_shtetl_messages_table
+TABLE_SQL = """
+DROP TABLE IF EXISTS shtetl_messages;
+CREATE TABLE shtetl_messages (
+    id SERIAL PRIMARY KEY,
+    message_id VARCHAR(100) UNIQUE NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    store_id VARCHAR(100) NOT NULL,
+    store_name VARCHAR(255) NOT NULL,
+    sender_user_id VARCHAR(100) NOT NULL,
+    sender_name VARCHAR(255) NOT NULL,
+    recipient_user_id VARCHAR(100) NOT NULL,
+    recipient_name VARCHAR(255) NOT NULL,
+    subject VARCHAR(255),
+    message_text TEXT NOT NULL,
+    keywords VARCHAR(500),
+    message_status VARCHAR(20) NOT NULL DEFAULT 'sent'
+);
+CREATE INDEX idx_shtetl_messages_store_date ON shtetl_messages (store_id, created_at);
+"""
+
+# Ordered most to least frequent: WORDS_SQL draws the first words far more often
+VOCABULARY = (
+    "the is for order please thanks when can you this have we pickup shabbos delivery kosher "
+    "available price friday today tomorrow week sunday store question size hechsher challah "
+    "meat dairy pareve chicken brisket cholent kugel babka rugelach bagels lox salmon wine "
+    "grape juice matzah pesach sukkot esrog lulav menorah candles tallis tefillin mezuzah "
+    "siddur machzor seforim yarmulke kiddush cup platter catering party bar mitzvah wedding "
+    "bris sheva brachos gift basket purim mishloach manos hamantaschen honey cake apples "
+    "rosh hashanah yom kippur break fast shavuos cheesecake blintzes latkes sufganiyot "
+    "chanukah dreidel gelt tu bishvat fruit tray refund exchange receipt invoice discount "
+    "coupon gemach loan return deposit stroller crib simcha dress suit sheitel repair "
+    "alteration tailor cholov yisroel pas shmura glatt mashgiach certificate vaad supervision "
+    "allergy nut gluten sugar vegan frozen fresh bakery butcher grocery judaica books "
+    "address parking hours closed open early late holiday schedule delayed tracking shipped"
+).split()
+RARE_TERM = "mashgiach"
+COMMON_TERM = "kosher"
+PHRASE_TERM = '"honey cake"'
+
+LEGACY_SEARCH_SQL = """
+    SELECT * FROM shtetl_messages
+    WHERE store_id = %s
+    AND (
+        subject ILIKE %s OR
+        message_text ILIKE %s OR
+        sender_name ILIKE %s OR
+        recipient_name ILIKE %s OR
+        keywords ILIKE %s
+    )
+    ORDER BY created_at DESC
+    LIMIT %s OFFSET %s
+"""
+
+# `count` vocabulary words, skewed towards the front by power(random(), 3);
+# references g so it is re-evaluated for every generated row
+WORDS_SQL = """(
+    SELECT string_agg(words[1 + floor(power(random(), 3) * array_length(words, 1))::int], ' ')
+    FROM generate_series(1, {count}) w WHERE g > 0
+)"""
+
+
+class BenchDB:
+    """The execute_query interface ShtetlMessageService expects, over one psycopg2 connection."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute_query(self, query, params=None, fetch_one=False, fetch_all=False):
+        with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, params)
+            if fetch_one:
+                return cursor.fetchone()
+            if fetch_all:
+                return cursor.fetchall()
+            return None
+
+
+def seed_messages(connection, messages: int, stores: int, seed_value: int) -> None:
+    """Rebuild shtetl_messages with `messages` rows spread over `stores` stores, then migrate."""
+    with connection.cursor() as cursor:
+        for statement in split_sql_statements(TABLE_SQL):
+            cursor.execute(statement)
+        cursor.execute("SELECT setseed(%s)", (seed_value / 2**31,))
+        for start in range(1, messages + 1, SEED_BATCH):
+            end = min(start + SEED_BATCH - 1, messages)
+            cursor.execute(
+                f"""
+                INSERT INTO shtetl_messages (
+                    message_id, created_at, store_id, store_name, sender_user_id, sender_name,
+                    recipient_user_id, recipient_name, subject, message_text, keywords
+                )
+                SELECT 'msg-' || g,
+                       NOW() - mod(g, 730) * INTERVAL '1 day' - mod(g, 1440) * INTERVAL '1 minute',
+                       'store-' || s, 'Store ' || s,
+                       'user-' || mod(g, 50000), 'Customer ' || mod(g, 50000),
+                       'owner-' || s, 'Owner ' || s,
+                       {WORDS_SQL.format(count="3 + mod(g, 4)")},
+                       {WORDS_SQL.format(count="12 + mod(g, 40)")},
+                       {WORDS_SQL.format(count="2")}
+                FROM (
+                    SELECT g, 1 + floor(power(random(), 4) * %(stores)s)::int AS s, %(words)s::text[] AS words
+                    FROM generate_series(%(start)s, %(end)s) g
+                ) generated
+                """,
+                {"stores": stores, "words": VOCABULARY, "start": start, "end": end},
+            )
+            print(f"  seeded {end:,} / {messages:,} messages", flush=True)
+        started = time.perf_counter()
+        for statement in split_sql_statements(MIGRATION.read_text()):
+            cursor.execute(statement)
+        print(f"  migration (generated column + GIN index): {time.perf_counter() - started:.1f}s")
+        cursor.execute("VACUUM ANALYZE shtetl_messages")
+
+
+def pick_stores(connection):
+    """The store with the most messages and the median store."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT store_id FROM shtetl_messages GROUP BY store_id ORDER BY COUNT(*) DESC")
+        stores = [row[0] for row in cursor.fetchall()]
+    return {"largest": stores[0], "typical": stores[len(stores) // 2]}
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def legacy_times(db, store_id, term):
+    pattern = f"%{term.strip(chr(34))}%"
+    params = (store_id, pattern, pattern, pattern, pattern, pattern, PAGE_SIZE)
+    first, _ = timed(lambda: db.execute_query(LEGACY_SEARCH_SQL, params + (0,), fetch_all=True))
+    last, _ = timed(lambda: db.execute_query(LEGACY_SEARCH_SQL, params + (PAGE_SIZE * (PAGES - 1),), fetch_all=True))
+    return first, last
+
+
+def fts_times(service, store_id, term):
+    first, results = timed(lambda: service.search_messages(store_id, term, limit=PAGE_SIZE))
+    last = first
+    for _ in range(PAGES - 1):
+        cursor = service.next_search_cursor(results, PAGE_SIZE)
+        if cursor is None:
+            break
+        last, results = timed(lambda: service.search_messages(store_id, term, limit=PAGE_SIZE, cursor=cursor))
+    return first, last
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--messages", type=int, default=2_000_000)
+    parser.add_argument("--stores", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=20, help="samples per term, store and query")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the existing shtetl_messages table")
+    args = parser.parse_args()
+
+    check_target(args.database_url, DEFAULT_REDIS_URL)
+    connection = psycopg2.connect(args.database_url)
+    connection.autocommit = True
+    try:
+        if not args.skip_seed:
+            print(f"Seeding {args.messages:,} messages across {args.stores} stores")
+            seed_messages(connection, args.messages, args.stores, args.seed)
+        db = BenchDB(connection)
+        service = ShtetlMessageService(db, cache_manager=None, config=None)
+
+        print(f"\n{'store':<9}{'term':<14}{'query':<8}{'p50 page 1':>12}{'p95 page 1':>12}{'p50 page 10':>13}")
+        for store_label, store_id in pick_stores(connection).items():
+            for term in (RARE_TERM, COMMON_TERM, PHRASE_TERM):
+                for label, measure in (("legacy", lambda: legacy_times(db, store_id, term)),
+                                       ("fts", lambda: fts_times(service, store_id, term))):
+                    samples = [measure() for _ in range(args.iterations)]
+                    firsts = sorted(first for first, _ in samples)
+                    lasts = [last for _, last in samples]
+                    print(f"{store_label:<9}{term:<14}{label:<8}"
+                          f"{statistics.median(firsts):>10.2f}ms{percentile(firsts, 95):>10.2f}ms"
+                          f"{statistics.median(lasts):>11.2f}ms")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
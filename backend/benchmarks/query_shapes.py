@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Query Shape Benchmark
+
+Measures what the compiled-statement cache and server-side prepared
+statements save on the repository's hot restaurant queries (list, geo list,
+detail, count), against the seeded benchmark database:
+
+  python    time to build and compile the statement, with SQLAlchemy's
+            compiled cache disabled vs a PreparedStatementCache shape hit
+  planning  Postgres "Planning Time" from EXPLAIN ANALYZE for the plain
+            statement vs EXECUTE of the prepared one, after enough runs for
+            Postgres to settle on a generic plan
+
+Each shape is built with a different filter value per iteration, the way
+requests arrive, so only the shape repeats.
+
+Usage:
+    python -m benchmarks.seed
+    python -m benchmarks.query_shapes
+    python -m benchmarks.query_shapes --iterations 500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import func, text
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.seed import DEFAULT_DATABASE_URL
+from database.prepared_statements import PreparedStatementCache
+from database.repositories.entity_repository_v5 import EntityRepositoryV5
+from database.unified_connection_manager import UnifiedConnectionManager
+
+AGENCIES = ["ORB", "KM", "KDM", "OU", "Star-K"]
+GENERIC_PLAN_RUNS = 6
+
+
+def shapes(repo: EntityRepositoryV5, session, i: int):
+    """The hot shapes for iteration `i`, each with its own parameter values."""
+    model = repo.get_model_class("restaurants")
+    mapping = repo.get_entity_mapping("restaurants")
+    filters = {"agency": AGENCIES[i % len(AGENCIES)], "ratingMin": 1 + i % 4}
+    geo = dict(filters, latitude=25.76 + i % 10 * 0.01, longitude=-80.19, radius=10)
+
+    listing = repo._apply_filters(session.query(model), model, filters, mapping)
+    listing = repo._apply_sorting(listing, model, "created_at_desc", filters).offset(i % 5 * 20).limit(20)
+
+    geo_listing = repo._apply_geospatial_filter(
+        repo._apply_filters(session.query(model), model, geo, mapping), model, geo
+    )
+    distance = repo._build_distance_expression(model, geo["latitude"], geo["longitude"])
+    if distance is not None:
+        geo_listing = geo_listing.add_columns(distance.label("distance_meters"))
+    geo_listing = repo._apply_sorting(geo_listing, model, "distance_asc", geo).limit(20)
+
+    detail = session.query(model).filter(model.id == 1 + i % 500).limit(1)
+    count = repo._apply_filters(session.query(func.count(model.id)), model, filters, mapping)
+    return {"list": listing, "geo_list": geo_listing, "detail": detail, "count": count}
+
+
+def python_times(repo, session, dialect, iterations: int):
+    """Median microseconds to build+compile each shape, uncached vs shape-cached."""
+    cache = PreparedStatementCache(enabled=True)
+    uncached, cached = {}, {}
+    for i in range(iterations):
+        for name, query in shapes(repo, session, i).items():
+            statement = query.statement
+            started = time.perf_counter()
+            statement.compile(dialect=dialect)
+            uncached.setdefault(name, []).append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            shape, key = cache.shape_for(statement, dialect)
+            if shape is not None:
+                shape.compiled.construct_params(extracted_parameters=key.bindparams)
+            cached.setdefault(name, []).append(time.perf_counter() - started)
+    return {name: (statistics.median(uncached[name]) * 1e6, statistics.median(cached[name]) * 1e6)
+            for name in uncached}
+
+
+def planning_ms(session, sql: str) -> float:
+    plan = session.execute(text("EXPLAIN (ANALYZE, FORMAT JSON) " + sql)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Planning Time"]
+
+
+def planning_times(repo, session, dialect, iterations: int):
+    """Median planning milliseconds per shape, plain statement vs prepared EXECUTE."""
+    cache = PreparedStatementCache(enabled=True)
+    plain, prepared = {}, {}
+    for i in range(max(iterations, GENERIC_PLAN_RUNS * 2)):
+        for name, query in shapes(repo, session, i).items():
+            literal = query.statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}).string
+            plain.setdefault(name, []).append(planning_ms(session, literal.replace("%%", "%")))
+
+            execute = cache._prepare(session, query)
+            if execute is None:
+                continue
+            compiled = execute.compile(dialect=dialect, compile_kwargs={"literal_binds": True}).string
+            if i >= GENERIC_PLAN_RUNS:
+                prepared.setdefault(name, []).append(planning_ms(session, compiled))
+            else:
+                session.execute(execute).all()
+    return {name: (statistics.median(plain[name]),
+                   statistics.median(prepared[name]) if name in prepared else None)
+            for name in plain}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200, help="samples per shape")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL))
+    args = parser.parse_args()
+
+    manager = UnifiedConnectionManager(args.database_url)
+    if not manager.connect():
+        sys.exit(f"cannot connect to {args.database_url}; run benchmarks/docker-compose.yml and benchmarks.seed")
+    repo = EntityRepositoryV5(manager)
+    dialect = manager.engine.dialect
+    try:
+        with manager.read_scope() as session:
+            compile_us = python_times(repo, session, dialect, args.iterations)
+            plan_ms = planning_times(repo, session, dialect, max(args.iterations // 10, 1))
+    finally:
+        manager.disconnect()
+
+    print(f"{'shape':<10}{'compile':>10}{'cached':>10}{'plan':>10}{'prepared':>10}")
+    for name, (uncached, cached) in compile_us.items():
+        plain, prepared = plan_ms[name]
+        prepared_text = f"{prepared:>8.3f}ms" if prepared is not None else f"{'n/a':>10}"
+        print(f"{name:<10}{uncached:>8.1f}us{cached:>8.1f}us{plain:>8.3f}ms{prepared_text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Benchmark Runner
+
+Runs the v5 hot-path scenarios (benchmarks/scenarios.py) in-process against
+the full application wired to the seeded benchmark database and Redis, and
+records per scenario:
+
+  p50/p95/p99 latency   wall time through the WSGI stack (no network)
+  queries_per_request   SQL statements executed, counted at the engine
+
+Results are compared with two baselines:
+
+  benchmarks/baselines/queries.json   queries per request; the same on every
+                                      machine, so it belongs in git
+  benchmarks/baselines/latency.json   latency percentiles; machine-specific,
+                                      kept local (not committed)
+
+A scenario regresses when its p95 or p99 grows by more than
+--latency-threshold (and by more than the --min-delta-ms noise floor), when
+it issues more queries per request than the baseline plus --query-tolerance,
+or when any response has an unexpected status. Any regression exits with
+status 1. With --require-query-baseline a missing query baseline, or a
+scenario missing from it, is a failure too. Nothing runs the benchmarks in
+CI yet: they need the PostGIS/Redis stack from benchmarks/docker-compose.yml.
+
+Baselines are only comparable for the same dataset, so each one records the
+seed manifest and a mismatch is refused rather than compared.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --scenario distance_sort --scenario search
+    python -m benchmarks.run --update-baseline   # then commit baselines/queries.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.scenarios import SCENARIOS, SCENARIOS_BY_NAME, Scenario
+from benchmarks.seed import DEFAULT_DATABASE_URL, DEFAULT_REDIS_URL
+
+DEFAULT_BASELINE = backend_dir / "benchmarks" / "baselines" / "latency.json"
+DEFAULT_QUERY_BASELINE = backend_dir / "benchmarks" / "baselines" / "queries.json"
+PERCENTILES = (50, 95, 99)
+QUERY_KEYS = ("queries_per_request", "max_queries_per_request")
+
+
+class QueryCounter:
+    """Counts SQL statements per thread via the engine-wide cursor event."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def install(self) -> None:
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        event.listen(Engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs) -> None:
+        self._local.count = getattr(self._local, "count", 0) + 1
+
+    def reset(self) -> None:
+        self._local.count = 0
+
+    @property
+    def count(self) -> int:
+        return getattr(self._local, "count", 0)
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(len(sorted_values) * percent / 100.0))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies_ms: List[float], query_counts: List[int], unexpected: Dict[str, int]) -> Dict:
+    latencies = sorted(latencies_ms)
+    queries = sorted(query_counts)
+    result = {f"p{p}_ms": round(percentile(latencies, p), 3) for p in PERCENTILES}
+    result.update({
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "requests": len(latencies),
+        "queries_per_request": percentile(queries, 50),
+        "max_queries_per_request": queries[-1] if queries else 0,
+        "unexpected_status": unexpected,
+    })
+    return result
+
+
+def run_scenario(client, scenario: Scenario, manifest: Dict, counter: QueryCounter, seed: int,
+                 iterations: Optional[int] = None) -> Dict:
+    rng = random.Random(f"{seed}:{scenario.name}")
+    latencies, query_counts, unexpected = [], [], {}
+    total = iterations or scenario.iterations
+    for index in range(scenario.warmup + total):
+        method, path, kwargs = scenario.build(rng, manifest)
+        counter.reset()
+        start = time.perf_counter()
+        response = client.open(path, method=method, **kwargs)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if index < scenario.warmup:
+            continue
+        latencies.append(elapsed_ms)
+        query_counts.append(counter.count)
+        if response.status_code not in scenario.expected_status:
+            unexpected[str(response.status_code)] = unexpected.get(str(response.status_code), 0) + 1
+    return summarize(latencies, query_counts, unexpected)
+
+
+def compare(results: Dict, baseline: Dict, latency_threshold: float = 0.2,
+            min_delta_ms: float = 2.0, query_tolerance: float = 0,
+            require_query_baseline: bool = False) -> List[str]:
+    """Human-readable regressions of `results` against `baseline` (empty when none).
+
+    Latency and query counts are each checked only where the baseline has
+    them; with `require_query_baseline` a scenario without a query count fails.
+    """
+    regressions = []
+    for name, current in results.items():
+        if current.get("unexpected_status"):
+            regressions.append(f"{name}: unexpected status codes {current['unexpected_status']}")
+        previous = baseline.get(name) or {}
+        for key in ("p95_ms", "p99_ms"):
+            if key not in previous:
+                continue
+            limit = previous[key] * (1 + latency_threshold)
+            if current[key] > limit and current[key] - previous[key] > min_delta_ms:
+                regressions.append(
+                    f"{name}: {key} {current[key]:.1f} ms > {limit:.1f} ms "
+                    f"(baseline {previous[key]:.1f} ms +{latency_threshold:.0%})"
+                )
+        if "queries_per_request" not in previous:
+            if require_query_baseline:
+                regressions.append(f"{name}: no query-count baseline")
+        elif current["queries_per_request"] > previous["queries_per_request"] + query_tolerance:
+            regressions.append(
+                f"{name}: {current['queries_per_request']} queries/request "
+                f"(baseline {previous['queries_per_request']})"
+            )
+    return regressions
+
+
+def read_baseline(path: Path, manifest: Dict, update: bool = False) -> Optional[Dict]:
+    """Scenarios of the baseline at `path`, or None when there is none for this dataset."""
+    if not path.exists():
+        return None
+    saved = json.loads(path.read_text())
+    if saved["dataset"] != manifest:
+        if not update:
+            sys.exit(f"baseline {path} was recorded for dataset {saved['dataset']}, "
+                     f"not {manifest}; reseed to match or pass --update-baseline")
+        return None
+    return saved["scenarios"]
+
+
+def load_baselines(latency_path: Path, query_path: Path, manifest: Dict,
+                   update: bool = False, require_query_baseline: bool = False) -> Dict:
+    """Per-scenario baseline: local latency figures overlaid with the committed query counts."""
+    latency = read_baseline(latency_path, manifest, update) or {}
+    queries = read_baseline(query_path, manifest, update)
+    if queries is None:
+        if require_query_baseline and not update:
+            sys.exit(f"no query baseline for this dataset at {query_path}; record one with "
+                     f"--update-baseline on the benchmark stack and commit it")
+        queries = {}
+    return {
+        name: dict({k: v for k, v in latency.get(name, {}).items() if k not in QUERY_KEYS}, **queries.get(name, {}))
+        for name in set(latency) | set(queries)
+    }
+
+
+def write_baselines(latency_path: Path, query_path: Path, report: Dict, baseline: Dict) -> None:
+    """Merge `report` into both baselines; only query counts go into the committed one."""
+    merged = dict(baseline, **report["scenarios"])
+    for path, scenarios in (
+        (latency_path, merged),
+        (query_path, {name: {key: row[key] for key in QUERY_KEYS if key in row} for name, row in merged.items()}),
+    ):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(dict(report, scenarios=scenarios), indent=2, sort_keys=True) + "\n")
+        print(f"baseline written to {path}")
+
+
+def load_manifest(database_url: str) -> Dict:
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT manifest FROM bench_manifest WHERE id = 1")).scalar_one()
+    finally:
+        engine.dispose()
+
+
+def create_bench_app(database_url: str, redis_url: str):
+    # The app reads its configuration from the environment at import time
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["REDIS_URL"] = redis_url
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-jwt-secret")
+    os.environ.setdefault("SECRET_KEY", "bench-secret")
+    from app_factory_full import create_app
+
+    app = create_app()
+    app.testing = True
+    return app
+
+
+def print_table(results: Dict, baseline: Dict) -> None:
+    print(f"{'scenario':<22}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}  vs baseline p95")
+    for name, row in results.items():
+        previous = baseline.get(name)
+        delta = f"{(row['p95_ms'] / previous['p95_ms'] - 1):+.0%}" if previous and previous.get("p95_ms") else "-"
+        print(f"{name:<22}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+              f"{row['queries_per_request']:>9}  {delta}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS_BY_NAME),
+                        help="run only these scenarios (repeatable)")
+    parser.add_argument("--iterations", type=int, help="override timed requests per scenario")
+    parser.add_argument("--seed", type=int, default=1, help="request sequence seed")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="local latency baseline")
+    parser.add_argument("--query-baseline", type=Path, default=DEFAULT_QUERY_BASELINE,
+                        help="committed queries-per-request baseline")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--require-query-baseline", action="store_true",
+                        help="fail when the query baseline or a scenario in it is missing")
+    parser.add_argument("--latency-threshold", type=float, default=0.2, help="allowed p95/p99 growth (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="ignore latency changes below this")
+    parser.add_argument("--query-tolerance", type=float, default=0, help="allowed extra queries per request")
+    parser.add_argument("--output", type=Path, help="also write results JSON here")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL))
+    parser.add_argument("--redis-url", default=os.getenv("BENCH_REDIS_URL", DEFAULT_REDIS_URL))
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.database_url)
+    counter = QueryCounter()
+    counter.install()
+    app = create_bench_app(args.database_url, args.redis_url)
+    client = app.test_client()
+
+    scenarios = [SCENARIOS_BY_NAME[name] for name in args.scenario] if args.scenario else SCENARIOS
+    results = {
+        scenario.name: run_scenario(client, scenario, manifest, counter, args.seed, args.iterations)
+        for scenario in scenarios
+    }
+    report = {"dataset": manifest, "request_seed": args.seed, "scenarios": results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    baseline = load_baselines(args.baseline, args.query_baseline, manifest, args.update_baseline,
+                              args.require_query_baseline)
+    print_table(results, baseline)
+
+    if args.update_baseline:
+        write_baselines(args.baseline, args.query_baseline, report, baseline)
+        return
+
+    if not baseline:
+        print(f"no baseline at {args.query_baseline} or {args.baseline}; run with --update-baseline to record one")
+    regressions = compare(results, baseline, args.latency_threshold, args.min_delta_ms, args.query_tolerance,
+                          require_query_baseline=args.require_query_baseline)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
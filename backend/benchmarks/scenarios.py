@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark scenarios for the v5 hot paths.
+
+Each scenario turns a seeded RNG into a request, so a run replays the same
+request sequence against the same seeded dataset. Inputs are drawn from the
+dataset manifest (row counts, bench user count) rather than from the tables,
+which keeps request generation out of the timed section.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Tuple
+
+from benchmarks.data import METROS, NAME_WORDS, bench_user_email
+
+BENCH_PASSWORD = "Bench-Passw0rd!"
+
+# (method, path, extra test-client kwargs)
+Request = Tuple[str, str, Dict]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    build: Callable[[random.Random, Dict], Request]
+    expected_status: FrozenSet[int] = frozenset({200})
+    warmup: int = 10
+    iterations: int = 200
+    description: str = ""
+
+
+def _near_metro(rng: random.Random) -> Tuple[float, float]:
+    _, _, lat, lng, _, spread = rng.choice(METROS)
+    return round(rng.gauss(lat, spread / 2), 5), round(rng.gauss(lng, spread / 2), 5)
+
+
+def _client_ip(rng: random.Random) -> str:
+    return f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+
+
+def _list(entity_type: str) -> Callable[[random.Random, Dict], Request]:
+    def build(rng, manifest):
+        return "GET", f"/api/v5/{entity_type}?limit=20&page={rng.randint(1, 5)}", {}
+    return build
+
+
+def _distance_sort(rng, manifest):
+    lat, lng = _near_metro(rng)
+    return "GET", f"/api/v5/restaurants?latitude={lat}&longitude={lng}&sort=distance_asc&limit=20", {}
+
+
+def _radius_filter(rng, manifest):
+    lat, lng = _near_metro(rng)
+    return "GET", f"/api/v5/restaurants?latitude={lat}&longitude={lng}&maxDistanceMi=10&limit=20", {}
+
+
+def _search(rng, manifest):
+    return "GET", f"/api/v5/search/?q={rng.choice(NAME_WORDS).lower()}&limit=20", {}
+
+
+def _restaurant_detail(rng, manifest):
+    return "GET", f"/api/v5/restaurants/{rng.randint(1, manifest['restaurants'])}", {}
+
+
+def _login(rng, manifest):
+    # A fresh client address per attempt keeps the per-IP login limit out of the measurement
+    body = {"email": bench_user_email(rng.randint(1, manifest["users"])), "password": BENCH_PASSWORD}
+    return "POST", "/api/v5/auth/login", {"json": body, "headers": {"X-Forwarded-For": _client_ip(rng)}}
+
+
+def _rate_limited_login(rng, manifest):
+    # One address, so after the warmup exhausts its budget every request is rejected
+    body = {"email": bench_user_email(1), "password": "wrong-password"}
+    return "POST", "/api/v5/auth/login", {"json": body, "headers": {"X-Forwarded-For": "10.255.255.254"}}
+
+
+SCENARIOS = [
+    Scenario("list_restaurants", _list("restaurants"), description="First pages of the restaurant list"),
+    Scenario("list_synagogues", _list("synagogues")),
+    Scenario("list_mikvahs", _list("mikvahs")),
+    Scenario("list_stores", _list("stores")),
+    Scenario("distance_sort", _distance_sort, description="Nearest restaurants to a point in a metro"),
+    Scenario("radius_filter", _radius_filter, description="Restaurants within 10 miles"),
+    Scenario("search", _search, description="Unified search for a common name word"),
+    Scenario("restaurant_detail", _restaurant_detail, description="Entity detail by id"),
+    Scenario("auth_login", _login, iterations=50, description="Password login (includes bcrypt verify)"),
+    # Warmup exceeds the login limit even with the 10x development allowance
+    Scenario("rate_limited_login", _rate_limited_login, expected_status=frozenset({429}), warmup=120,
+             description="Rejection path once the per-IP login budget is spent"),
+]
+
+SCENARIOS_BY_NAME = {scenario.name: scenario for scenario in SCENARIOS}
@@ -0,0 +1,23 @@
+-- Benchmark-only schema pieces not covered by the ORM models or the repo migrations.
+-- Applied by benchmarks/seed.py after Base.metadata.create_all and before the migrations.
+
+-- Minimal users table; database/migrations/consolidate_auth_schema.sql adds the rest
+CREATE TABLE IF NOT EXISTS users (
+    id VARCHAR(50) PRIMARY KEY,
+    email VARCHAR(255) UNIQUE NOT NULL,
+    name VARCHAR(255),
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- create_all emits the TypeDecorator's TEXT impl; production stores a multirange
+ALTER TABLE restaurants
+    ALTER COLUMN hours_week_ranges TYPE int4multirange USING hours_week_ranges::int4multirange;
+
+-- Identifies the dataset a baseline was recorded against
+CREATE TABLE IF NOT EXISTS bench_manifest (
+    id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    manifest JSONB NOT NULL,
+    seeded_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
@@ -20,6 +20,7 @@ import redis.sentinel
 from redis.connection import ConnectionPool
 
 from utils.logging_config import get_logger
+from utils.process_lifecycle import register_fork_resource
 
 logger = get_logger(__name__)
 
@@ -86,6 +87,7 @@ class RedisManagerV5:
         }
         
         self._initialize_client()
+        register_fork_resource(self)
     
     def _load_config(self, config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         """Load and validate Redis configuration."""
@@ -255,6 +257,25 @@ class RedisManagerV5:
         """Get the Redis client instance."""
         return self.redis_client
     
+    def reset_after_fork(self):
+        """Forget connections inherited from the parent process; new ones open lazily."""
+        pool = getattr(self.redis_client, 'connection_pool', None)
+        if pool is not None:
+            pool.reset()
+    
+    def prewarm(self, target: int):
+        """Open up to `target` pooled connections ahead of the first request."""
+        pool = getattr(self.redis_client, 'connection_pool', None)
+        if pool is None:
+            return
+        connections = []
+        try:
+            for _ in range(min(target, pool.max_connections)):
+                connections.append(pool.get_connection('PING'))
+        finally:
+            for connection in connections:
+                pool.release(connection)
+    
     def set(
         self,
         key: str,
@@ -650,6 +671,10 @@ class RedisManagerV5:
         """Build full Redis key with prefix."""
         key_prefix = self.KEY_PREFIXES.get(prefix, f"{prefix}_v5:")
         return f"{key_prefix}{key}"
+
+    def build_key(self, key: str, prefix: str = 'cache') -> str:
+        """Get the full Redis key a prefixed cache key is stored under."""
+        return self._build_key(prefix, key)
     
     def get_info(self) -> Dict[str, Any]:
         """Get Redis server information."""
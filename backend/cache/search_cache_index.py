@@ -0,0 +1,245 @@
+"""
+Reverse index for search cache entries.
+
+Records, at write time, which entities and which geo cells each cached search
+result covers. Invalidation can then delete only the entries affected by an
+entity change instead of SCANning and dropping the whole search keyspace.
+
+Index layout (Redis sets of full cache keys):
+    search_idx:entity:{entity_type}:{entity_id}  entries that contain the entity
+    search_idx:geo:{entity_type}:{cell}          entries whose area covers the cell
+    search_idx:geo:{entity_type}:all             entries with no location bound
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+EntityRef = Tuple[str, Any]
+
+
+class SearchCacheIndex:
+    """Entity/geo-cell reverse index for targeted search cache invalidation."""
+
+    INDEX_PREFIX = 'search_idx:'
+
+    # Geo cells are a plain lat/lng grid; 1 degree is ~111km of latitude
+    DEFAULT_CELL_SIZE_DEG = 1.0
+
+    # Searches covering more cells than this are indexed as unbounded
+    MAX_CELLS_PER_ENTRY = 64
+
+    # Keep index sets slightly longer than the entries they point to
+    INDEX_TTL_GRACE = 60
+
+    KM_PER_DEGREE_LAT = 111.32
+
+    def __init__(
+        self,
+        redis_client=None,
+        cell_size_deg: float = DEFAULT_CELL_SIZE_DEG,
+        max_cells: int = MAX_CELLS_PER_ENTRY
+    ):
+        self.redis_client = redis_client
+        self.cell_size_deg = cell_size_deg
+        self.max_cells = max_cells
+
+        self.stats = {
+            'entries_indexed': 0,
+            'entries_invalidated': 0,
+            'errors': 0
+        }
+
+    @staticmethod
+    def normalize_entity_type(entity_type: str) -> str:
+        """Normalize singular channel names ('restaurant') to collection names ('restaurants')."""
+        entity_type = (entity_type or '').strip().lower()
+        if entity_type and not entity_type.endswith('s'):
+            entity_type = f"{entity_type}s"
+        return entity_type
+
+    def cell_for(self, latitude: float, longitude: float) -> str:
+        """Get the grid cell id containing a coordinate."""
+        row = math.floor((float(latitude) + 90.0) / self.cell_size_deg)
+        col = math.floor((float(longitude) + 180.0) / self.cell_size_deg)
+        return f"{row}:{col}"
+
+    def cells_for_radius(self, latitude: float, longitude: float, radius_km: float) -> Optional[List[str]]:
+        """
+        Get all grid cells intersecting the bounding box of a search radius.
+
+        Returns:
+            List of cell ids, or None when the area is too large to index
+            cell-by-cell (the entry is then treated as unbounded).
+        """
+        latitude = float(latitude)
+        longitude = float(longitude)
+        radius_km = max(float(radius_km), 0.0)
+
+        lat_delta = radius_km / self.KM_PER_DEGREE_LAT
+        cos_lat = math.cos(math.radians(min(abs(latitude) + lat_delta, 89.9)))
+        lng_delta = radius_km / (self.KM_PER_DEGREE_LAT * max(cos_lat, 1e-6))
+
+        min_lat = max(latitude - lat_delta, -90.0)
+        max_lat = min(latitude + lat_delta, 89.999999)
+        min_lng = longitude - lng_delta
+        max_lng = longitude + lng_delta
+
+        min_row, min_col = (int(part) for part in self.cell_for(min_lat, max(min_lng, -180.0)).split(':'))
+        max_row, max_col = (int(part) for part in self.cell_for(max_lat, min(max_lng, 179.999999)).split(':'))
+
+        cell_count = (max_row - min_row + 1) * (max_col - min_col + 1)
+        if cell_count > self.max_cells or min_lng < -180.0 or max_lng >= 180.0:
+            return None
+
+        return [
+            f"{row}:{col}"
+            for row in range(min_row, max_row + 1)
+            for col in range(min_col, max_col + 1)
+        ]
+
+    def _entity_key(self, entity_type: str, entity_id: Any) -> str:
+        return f"{self.INDEX_PREFIX}entity:{self.normalize_entity_type(entity_type)}:{entity_id}"
+
+    def _geo_key(self, entity_type: str, cell: str) -> str:
+        return f"{self.INDEX_PREFIX}geo:{self.normalize_entity_type(entity_type)}:{cell}"
+
+    def index_keys_for_entry(
+        self,
+        entity_types: Iterable[str],
+        entity_refs: Iterable[EntityRef],
+        location: Optional[Dict[str, Any]] = None
+    ) -> Set[str]:
+        """Compute the index sets a cached search entry belongs to."""
+        index_keys = {
+            self._entity_key(entity_type, entity_id)
+            for entity_type, entity_id in entity_refs
+            if entity_id is not None
+        }
+
+        cells = None
+        if location and location.get('latitude') is not None and location.get('longitude') is not None:
+            cells = self.cells_for_radius(
+                location['latitude'],
+                location['longitude'],
+                location.get('radius', 0)
+            )
+
+        for entity_type in entity_types:
+            if cells is None:
+                index_keys.add(self._geo_key(entity_type, 'all'))
+            else:
+                index_keys.update(self._geo_key(entity_type, cell) for cell in cells)
+
+        return index_keys
+
+    def record(
+        self,
+        cache_key: str,
+        entity_types: Iterable[str],
+        entity_refs: Iterable[EntityRef],
+        location: Optional[Dict[str, Any]] = None,
+        ttl: Optional[int] = None
+    ) -> bool:
+        """
+        Index a cached search entry by the entities and area it covers.
+
+        Args:
+            cache_key: Full Redis key of the cached entry
+            entity_types: Entity collections the search ran against
+            entity_refs: (entity_type, entity_id) pairs contained in the results
+            location: Optional {'latitude', 'longitude', 'radius'} (radius in km)
+            ttl: TTL of the cached entry in seconds
+
+        Returns:
+            True if the entry was indexed, False otherwise
+        """
+        if not self.redis_client:
+            return False
+
+        try:
+            index_keys = self.index_keys_for_entry(entity_types, entity_refs, location)
+            if not index_keys:
+                return False
+
+            pipe = self.redis_client.pipeline(transaction=False)
+            for index_key in index_keys:
+                pipe.sadd(index_key, cache_key)
+                if ttl:
+                    pipe.expire(index_key, int(ttl) + self.INDEX_TTL_GRACE)
+            pipe.execute()
+
+            self.stats['entries_indexed'] += 1
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to index search cache entry {cache_key}: {e}")
+            self.stats['errors'] += 1
+            return False
+
+    def invalidate(self, changes: Iterable[Dict[str, Any]]) -> int:
+        """
+        Delete every cached search entry affected by a batch of entity changes.
+
+        Args:
+            changes: Dicts with 'entity_type', 'entity_id' and optional
+                'latitude'/'longitude' of the changed entity
+
+        Returns:
+            Number of cache entries deleted
+        """
+        if not self.redis_client:
+            return 0
+
+        index_keys: Set[str] = set()
+        for change in changes:
+            entity_type = change.get('entity_type')
+            if not entity_type:
+                continue
+
+            if change.get('entity_id') is not None:
+                index_keys.add(self._entity_key(entity_type, change['entity_id']))
+
+            index_keys.add(self._geo_key(entity_type, 'all'))
+
+            latitude = change.get('latitude')
+            longitude = change.get('longitude')
+            if latitude is not None and longitude is not None:
+                try:
+                    index_keys.add(self._geo_key(entity_type, self.cell_for(latitude, longitude)))
+                except (TypeError, ValueError):
+                    pass
+
+        if not index_keys:
+            return 0
+
+        try:
+            sorted_index_keys = sorted(index_keys)
+            cache_keys = self.redis_client.sunion(sorted_index_keys)
+
+            pipe = self.redis_client.pipeline(transaction=False)
+            cache_keys = list(cache_keys or [])
+            for i in range(0, len(cache_keys), 500):
+                pipe.delete(*cache_keys[i:i + 500])
+            pipe.delete(*sorted_index_keys)
+            results = pipe.execute()
+
+            # Last result is the index set deletion
+            deleted = sum(int(result or 0) for result in results[:-1])
+
+            self.stats['entries_invalidated'] += deleted
+            return deleted
+
+        except Exception as e:
+            logger.error(f"Failed to invalidate indexed search cache entries: {e}")
+            self.stats['errors'] += 1
+            return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics."""
+        return dict(self.stats)
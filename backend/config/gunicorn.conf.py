@@ -1,8 +1,19 @@
+# The gevent worker only monkey-patches after fork, but preload_app imports the
+# application (its locks, threads, SQLAlchemy pool and Redis clients) in the
+# master first. Patch before anything else so all of it is cooperative.
+from gevent import monkey
+
+monkey.patch_all()
+
 import multiprocessing
 import os
 
 # Gunicorn configuration file for JewGo Backend
 # Updated for new file structure for production deployment
+# Shared Prometheus samples across workers; must be set before prometheus_client
+# is imported, which happens when preload_app loads the application
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/dev/shm/jewgo-prometheus")
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
 # Get port from environment variable or use default
 port = int(os.environ.get("PORT", 5000))
 # Server socket
@@ -45,3 +56,28 @@ worker_exit_on_app_exit = True
 # Graceful shutdown settings
 graceful_timeout = 30
 preload_app = True
+
+
+
+def on_starting(server):
+    """Start each master run with an empty Prometheus sample directory."""
+    from monitoring.prometheus_exposition import prepare_multiprocess_dir
+
+    prepare_multiprocess_dir(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges from the aggregated /metrics output."""
+    from monitoring.prometheus_exposition import mark_worker_dead
+
+    mark_worker_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    """Give the worker its own cooperative database and Redis connections."""
+    from database.gevent_support import make_psycopg_green
+    from utils.process_lifecycle import after_fork
+
+    # Green first, so connections opened by POOL_PREWARM_CONNECTIONS are cooperative
+    make_psycopg_green()
+    after_fork()
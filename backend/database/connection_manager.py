@@ -71,6 +71,10 @@ class DatabaseConnectionManager:
         """Get session context manager."""
         return self._unified_manager.session_scope()
     
+    def read_scope(self, statement_timeout_ms: Optional[int] = None):
+        """Get read-only session context manager."""
+        return self._unified_manager.read_scope(statement_timeout_ms)
+    
     def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None):
         """Execute a query."""
         return self._unified_manager.execute_query(query, params)
@@ -18,6 +18,7 @@ from sqlalchemy import create_engine, event, text, MetaData
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
 from utils.logging_config import get_logger
+from utils.process_lifecycle import install_idle_liveness_check, prewarm_engine, register_fork_resource
 
 logger = get_logger(__name__)
 
@@ -62,7 +63,7 @@ class DatabaseManagerV5:
             'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '20')),
             'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', '30')),
             'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', '3600')),
-            'pool_pre_ping': True,
+            'pool_pre_ping': False,  # idle liveness check instead, see _setup_engine
             'echo': os.environ.get('DB_ECHO', 'false').lower() == 'true',
             'isolation_level': 'READ_COMMITTED',
             'connect_timeout': 10,
@@ -94,6 +95,7 @@ class DatabaseManagerV5:
         # Initialize components
         self._setup_engine()
         self._setup_event_listeners()
+        register_fork_resource(self)
         
     def _setup_engine(self):
         """Setup SQLAlchemy engine with optimized configuration."""
@@ -124,6 +126,8 @@ class DatabaseManagerV5:
                 connect_args=connect_args,
                 future=True  # Use SQLAlchemy 2.0 style
             )
+            if not self.config['pool_pre_ping']:
+                install_idle_liveness_check(self.engine)
             
             # Create session factory
             self.SessionLocal = sessionmaker(
@@ -153,6 +157,11 @@ class DatabaseManagerV5:
             
             logger.debug("Database connection established")
         
+        @event.listens_for(self.engine, "do_connect")
+        def on_do_connect(dialect, conn_rec, cargs, cparams):
+            """Name connections after the process that opens them, not the preloading master."""
+            cparams['application_name'] = f'jewgo_v5_{os.getpid()}'
+        
         @event.listens_for(self.engine, "close")
         def on_close(dbapi_connection, connection_record):
             """Handle connection closures."""
@@ -499,6 +508,17 @@ class DatabaseManagerV5:
             logger.error(f"Error getting mikvahs for geocoding: {e}")
             return []
 
+    def reset_after_fork(self):
+        """Forget connections inherited from the parent process; new ones open lazily."""
+        if self.engine:
+            self.engine.dispose(close=False)
+        self._connection_stats['active_connections'] = 0
+    
+    def prewarm(self, target: int):
+        """Open up to `target` pooled connections ahead of the first request."""
+        if self.engine:
+            prewarm_engine(self.engine, min(target, self.config['pool_size']))
+    
     def close(self):
         """Close database connections and cleanup."""
         if self.engine:
@@ -8,8 +8,21 @@ This module provides advanced connection pooling with:
 - Connection lifecycle management
 - Performance monitoring
 - Load balancing across multiple database instances
+- Primary/replica routing with replication lag awareness
 - Connection warming and preloading
 
+The first database URL is the primary and any further URLs are read
+replicas. Writes (session_scope/get_session) always go to the primary.
+Reads (read_scope/get_read_session) go to the replica with the fewest
+connections currently checked out, among replicas whose health check passed
+and whose replay lag is within max_replica_lag_seconds. With no such
+replica they go to the primary. Replica lag is sampled at least twice per
+max_replica_lag_seconds, independently of the slower full health check, and
+a sample's age counts towards the lag so a stale sample cannot keep a
+replica that stopped replaying in rotation. After a write commits, reads from the same
+context (request or greenlet) stay on the primary for read_your_writes_seconds
+so callers see their own writes.
+
 Author: JewGo Development Team
 Version: 1.0
 Last Updated: 2025-01-15
@@ -18,6 +31,7 @@ Last Updated: 2025-01-15
 import time
 import threading
 import random
+from contextvars import ContextVar
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Union
 from dataclasses import dataclass, asdict
@@ -28,9 +42,13 @@ from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 
 from utils.logging_config import get_logger
+from utils.process_lifecycle import install_idle_liveness_check, prewarm_engine, register_fork_resource
 
 logger = get_logger(__name__)
 
+# Monotonic deadline until which reads in this context must use the primary
+_primary_pinned_until: ContextVar[float] = ContextVar('db_primary_pinned_until', default=0.0)
+
 
 @dataclass
 class ConnectionHealth:
@@ -42,6 +60,8 @@ class ConnectionHealth:
     error_count: int = 0
     success_count: int = 0
     last_error: Optional[str] = None
+    replication_lag_seconds: Optional[float] = None
+    lag_sampled_at: Optional[float] = None  # time.monotonic() of the lag sample
 
     def get_success_rate(self) -> float:
         """Get connection success rate."""
@@ -68,9 +88,29 @@ class PoolMetrics:
 class ConnectionHealthChecker:
     """Manages connection health checks."""
     
-    def __init__(self, check_interval: int = 30, timeout: int = 5):
+    # Seconds behind the primary; 0 when fully replayed, since an idle primary
+    # would otherwise make the last replay timestamp look ever older
+    REPLICA_LAG_QUERY = """
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+        END
+    """
+    
+    def __init__(self, check_interval: int = 30, timeout: int = 5,
+                 max_replica_lag_seconds: Optional[float] = None,
+                 lag_check_interval: Optional[float] = None):
         self.check_interval = check_interval
         self.timeout = timeout
+        self.max_replica_lag_seconds = max_replica_lag_seconds
+        # Replicas are re-checked often enough for a lag limit to mean anything
+        if lag_check_interval is None:
+            lag_check_interval = check_interval
+            if max_replica_lag_seconds:
+                lag_check_interval = min(check_interval, max_replica_lag_seconds / 2)
+        self.lag_check_interval = lag_check_interval
+        self.replica_ids = set()
         self.health_status = {}
         self.lock = threading.RLock()
         self.running = False
@@ -102,27 +142,45 @@ class ConnectionHealthChecker:
         logger.info("Connection health checker stopped")
 
     def _health_check_loop(self, engines: List[Engine]):
-        """Main health check loop."""
+        """Main health check loop.
+
+        Replicas are checked every lag_check_interval, everything else every
+        check_interval.
+        """
+        next_check = {}
+        tick = self.lag_check_interval if self.replica_ids else self.check_interval
         while self.running:
             try:
+                now = time.monotonic()
                 for i, engine in enumerate(engines):
-                    self._check_engine_health(f"engine_{i}", engine)
+                    engine_id = f"engine_{i}"
+                    if now < next_check.get(engine_id, 0.0):
+                        continue
+                    self._check_engine_health(engine_id, engine)
+                    interval = self.lag_check_interval if engine_id in self.replica_ids else self.check_interval
+                    next_check[engine_id] = now + interval
                 
-                time.sleep(self.check_interval)
+                time.sleep(tick)
             except Exception as e:
                 logger.error(f"Health check loop error: {e}")
-                time.sleep(self.check_interval)
+                time.sleep(tick)
 
     def _check_engine_health(self, engine_id: str, engine: Engine):
         """Check health of a specific engine."""
         start_time = time.time()
         
         try:
+            lag = None
             with engine.connect() as conn:
-                # Use a random health check query
-                query = random.choice(self.health_queries)
-                result = conn.execute(text(query))
-                result.fetchone()  # Consume result
+                if engine_id in self.replica_ids:
+                    lag = conn.execute(text(self.REPLICA_LAG_QUERY)).scalar()
+                    # No replay timestamp yet while behind: lag is unknown
+                    lag = float('inf') if lag is None else float(lag)
+                else:
+                    # Use a random health check query
+                    query = random.choice(self.health_queries)
+                    result = conn.execute(text(query))
+                    result.fetchone()  # Consume result
             
             response_time = (time.time() - start_time) * 1000
             
@@ -141,6 +199,8 @@ class ConnectionHealthChecker:
                 health.response_time_ms = response_time
                 health.success_count += 1
                 health.last_error = None
+                health.replication_lag_seconds = lag
+                health.lag_sampled_at = time.monotonic() if lag is not None else None
                 
         except Exception as e:
             response_time = (time.time() - start_time) * 1000
@@ -174,9 +234,17 @@ class ConnectionHealthChecker:
             return self.health_status.copy()
 
     def is_engine_healthy(self, engine_id: str) -> bool:
-        """Check if an engine is healthy."""
+        """Check if an engine is healthy (for a replica: and not lagging too far behind)."""
         health = self.get_health_status(engine_id)
-        return health.is_healthy if health else False
+        if not health or not health.is_healthy:
+            return False
+        lag = health.replication_lag_seconds
+        if lag is None or self.max_replica_lag_seconds is None:
+            return True
+        if health.lag_sampled_at is not None:
+            # The replica may have stopped replaying right after the sample
+            lag += time.monotonic() - health.lag_sampled_at
+        return lag <= self.max_replica_lag_seconds
 
 
 class LoadBalancer:
@@ -185,6 +253,7 @@ class LoadBalancer:
     def __init__(self, strategy: str = 'round_robin'):
         self.strategy = strategy
         self.engines = []
+        self.engine_ids = []
         self.engine_weights = {}
         self.current_index = 0
         self.lock = threading.RLock()
@@ -198,10 +267,11 @@ class LoadBalancer:
             'health_based': self._health_based
         }
 
-    def add_engine(self, engine: Engine, weight: int = 1):
-        """Add an engine to the load balancer."""
+    def add_engine(self, engine: Engine, weight: int = 1, engine_id: Optional[str] = None):
+        """Add an engine to the load balancer under its health checker id."""
         with self.lock:
             self.engines.append(engine)
+            self.engine_ids.append(engine_id or f"engine_{len(self.engines) - 1}")
             self.engine_weights[len(self.engines) - 1] = weight
             logger.info(f"Added engine to load balancer with weight {weight}")
 
@@ -223,7 +293,7 @@ class LoadBalancer:
             if health_checker:
                 healthy_engines = []
                 for i, engine in enumerate(self.engines):
-                    if health_checker.is_engine_healthy(f"engine_{i}"):
+                    if health_checker.is_engine_healthy(self.engine_ids[i]):
                         healthy_engines.append((i, engine))
                 
                 if healthy_engines:
@@ -246,7 +316,7 @@ class LoadBalancer:
         if health_checker:
             healthy_engines = []
             for i, engine in enumerate(self.engines):
-                if health_checker.is_engine_healthy(f"engine_{i}"):
+                if health_checker.is_engine_healthy(self.engine_ids[i]):
                     healthy_engines.append(engine)
             
             if healthy_engines:
@@ -267,7 +337,7 @@ class LoadBalancer:
         healthy_engines = []
         
         for i, engine in enumerate(self.engines):
-            if not health_checker or health_checker.is_engine_healthy(f"engine_{i}"):
+            if not health_checker or health_checker.is_engine_healthy(self.engine_ids[i]):
                 weight = self.engine_weights.get(i, 1)
                 total_weight += weight
                 healthy_engines.append((engine, weight))
@@ -288,13 +358,26 @@ class LoadBalancer:
         return healthy_engines[-1][0]  # Fallback
 
     def _least_connections(self, health_checker: Optional[ConnectionHealthChecker] = None) -> Engine:
-        """Least connections load balancing."""
+        """Least connections load balancing, by connections currently checked out of each pool."""
         if not self.engines:
             return None
         
-        # This would require connection tracking per engine
-        # For now, fallback to round-robin
-        return self._round_robin(health_checker)
+        candidates = [
+            engine for i, engine in enumerate(self.engines)
+            if not health_checker or health_checker.is_engine_healthy(self.engine_ids[i])
+        ]
+        if not candidates:
+            return self._round_robin(health_checker)
+        
+        # Random tie-break so idle replicas share load instead of the first one taking it all
+        return min(candidates, key=lambda engine: (self._in_flight(engine), random.random()))
+
+    @staticmethod
+    def _in_flight(engine: Engine) -> int:
+        try:
+            return engine.pool.checkedout()
+        except Exception:
+            return 0
 
     def _health_based(self, health_checker: Optional[ConnectionHealthChecker] = None) -> Engine:
         """Health-based load balancing."""
@@ -306,8 +389,8 @@ class LoadBalancer:
         best_score = -1
         
         for i, engine in enumerate(self.engines):
-            health = health_checker.get_health_status(f"engine_{i}")
-            if health and health.is_healthy:
+            health = health_checker.get_health_status(self.engine_ids[i])
+            if health and health_checker.is_engine_healthy(self.engine_ids[i]):
                 # Score based on success rate and response time
                 success_rate = health.get_success_rate()
                 response_time_score = max(0, 1 - (health.response_time_ms / 1000))  # Normalize to 0-1
@@ -321,7 +404,11 @@ class LoadBalancer:
 
 
 class EnhancedConnectionPool:
-    """Enhanced connection pool with advanced features."""
+    """Enhanced connection pool with advanced features.
+    
+    database_urls[0] is the primary; the rest are read replicas. A
+    health_check_interval of 0 disables the background health checker.
+    """
     
     def __init__(self, 
                  database_urls: Union[str, List[str]],
@@ -329,8 +416,10 @@ class EnhancedConnectionPool:
                  max_overflow: int = 30,
                  pool_timeout: int = 30,
                  pool_recycle: int = 3600,
-                 load_balance_strategy: str = 'round_robin',
-                 health_check_interval: int = 30):
+                 load_balance_strategy: str = 'least_connections',
+                 health_check_interval: int = 30,
+                 max_replica_lag_seconds: float = 5.0,
+                 read_your_writes_seconds: Optional[float] = None):
         
         # Handle single URL or multiple URLs
         if isinstance(database_urls, str):
@@ -342,12 +431,18 @@ class EnhancedConnectionPool:
         self.max_overflow = max_overflow
         self.pool_timeout = pool_timeout
         self.pool_recycle = pool_recycle
+        self.read_your_writes_seconds = (
+            max_replica_lag_seconds if read_your_writes_seconds is None else read_your_writes_seconds
+        )
         
         # Initialize components
         self.engines = []
         self.session_factories = []
+        self.primary_engine = None
+        # Balances reads across replicas only; writes never go through it
         self.load_balancer = LoadBalancer(load_balance_strategy)
-        self.health_checker = ConnectionHealthChecker(health_check_interval)
+        self.health_checker = ConnectionHealthChecker(health_check_interval,
+                                                      max_replica_lag_seconds=max_replica_lag_seconds)
         self.metrics = PoolMetrics()
         self.lock = threading.RLock()
         
@@ -357,6 +452,7 @@ class EnhancedConnectionPool:
         
         self._initialize_engines()
         self._start_health_checking()
+        register_fork_resource(self)
 
     def _initialize_engines(self):
         """Initialize database engines."""
@@ -369,20 +465,26 @@ class EnhancedConnectionPool:
                     max_overflow=self.max_overflow,
                     pool_timeout=self.pool_timeout,
                     pool_recycle=self.pool_recycle,
-                    pool_pre_ping=True,
                     echo=False,
                     connect_args={
                         'connect_timeout': 10,
                         'application_name': f'jewgo_app_pool_{i}'
-                    }
+                    } if url.startswith('postgres') else {}
                 )
                 
+                install_idle_liveness_check(engine)
+                
                 # Create session factory
                 session_factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
                 
+                engine_id = f"engine_{len(self.engines)}"
                 self.engines.append(engine)
                 self.session_factories.append(session_factory)
-                self.load_balancer.add_engine(engine)
+                if i == 0:
+                    self.primary_engine = engine
+                else:
+                    self.load_balancer.add_engine(engine, engine_id=engine_id)
+                    self.health_checker.replica_ids.add(engine_id)
                 
                 # Add event listeners
                 self._setup_engine_events(engine, i)
@@ -422,34 +524,61 @@ class EnhancedConnectionPool:
 
     def _start_health_checking(self):
         """Start health checking."""
-        if self.engines:
+        if self.engines and self.health_checker.check_interval > 0:
             self.health_checker.start(self.engines)
 
+    def _session_for(self, engine: Engine) -> Session:
+        return self.session_factories[self.engines.index(engine)]()
+
     def get_session(self) -> Session:
-        """Get a database session from the load balancer."""
-        engine = self.load_balancer.get_engine(self.health_checker)
-        if not engine:
+        """Get a database session on the primary, for writes."""
+        if self.primary_engine is None:
+            raise RuntimeError("Primary database engine not available")
+        return self._session_for(self.primary_engine)
+
+    def get_read_session(self) -> Session:
+        """Get a database session for reads: a current replica if there is one, else the primary."""
+        return self._session_for(self._select_read_engine())
+
+    def _select_read_engine(self) -> Engine:
+        if self.load_balancer.engines and time.monotonic() >= _primary_pinned_until.get():
+            if any(self.health_checker.is_engine_healthy(engine_id) for engine_id in self.load_balancer.engine_ids):
+                engine = self.load_balancer.get_engine(self.health_checker)
+                if engine is not None:
+                    return engine
+        if self.primary_engine is None:
             raise RuntimeError("No healthy database engines available")
-        
-        # Find corresponding session factory
-        engine_index = self.engines.index(engine)
-        session_factory = self.session_factories[engine_index]
-        
-        return session_factory()
+        return self.primary_engine
+
+    def pin_to_primary(self, seconds: Optional[float] = None):
+        """Send reads in the current context to the primary for `seconds` (read-your-writes)."""
+        seconds = self.read_your_writes_seconds if seconds is None else seconds
+        _primary_pinned_until.set(max(_primary_pinned_until.get(), time.monotonic() + seconds))
 
     @contextmanager
     def session_scope(self):
-        """Get a session context manager."""
+        """Get a session context manager on the primary."""
         session = self.get_session()
         try:
             yield session
             session.commit()
+            if self.load_balancer.engines:
+                self.pin_to_primary()
         except Exception:
             session.rollback()
             raise
         finally:
             session.close()
 
+    @contextmanager
+    def read_scope(self, use_primary: bool = False):
+        """Get a session context manager for pure reads; it is never committed."""
+        session = self.get_session() if use_primary else self.get_read_session()
+        try:
+            yield session
+        finally:
+            session.close()
+
     def warm_connections(self, num_connections: int = None):
         """Warm up connections in the pool."""
         if not self.warm_connections_enabled:
@@ -466,11 +595,30 @@ class EnhancedConnectionPool:
                 except Exception as e:
                     logger.warning(f"Failed to warm connection: {e}")
 
+    def reset_after_fork(self):
+        """Forget inherited connections and restart the health checker in this process."""
+        self.lock = threading.RLock()
+        for engine in self.engines:
+            engine.dispose(close=False)
+        # The parent's checker thread did not survive the fork
+        was_running = self.health_checker.running
+        self.health_checker.running = False
+        self.health_checker.thread = None
+        self.health_checker.lock = threading.RLock()
+        if was_running:
+            self._start_health_checking()
+
+    def prewarm(self, target: int):
+        """Open up to `target` pooled connections per engine."""
+        for engine in self.engines:
+            prewarm_engine(engine, min(target, self.pool_size))
+
     def get_pool_status(self) -> Dict[str, Any]:
         """Get comprehensive pool status."""
         with self.lock:
             status = {
                 'engines': len(self.engines),
+                'replicas': list(self.load_balancer.engine_ids),
                 'metrics': asdict(self.metrics),
                 'load_balancer_strategy': self.load_balancer.strategy,
                 'health_status': {}
@@ -538,15 +686,19 @@ def get_enhanced_connection_pool() -> EnhancedConnectionPool:
         database_url = os.getenv('DATABASE_URL')
         if not database_url:
             raise ValueError("DATABASE_URL environment variable is required")
+        replica_urls = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+        read_your_writes = os.getenv('DB_READ_YOUR_WRITES_SECONDS')
         
         _enhanced_pool = EnhancedConnectionPool(
-            database_urls=database_url,
+            database_urls=[database_url] + replica_urls,
             pool_size=int(os.getenv('DB_POOL_SIZE', '20')),
             max_overflow=int(os.getenv('DB_MAX_OVERFLOW', '30')),
             pool_timeout=int(os.getenv('DB_POOL_TIMEOUT', '30')),
             pool_recycle=int(os.getenv('DB_POOL_RECYCLE', '3600')),
-            load_balance_strategy=os.getenv('DB_LOAD_BALANCE_STRATEGY', 'round_robin'),
-            health_check_interval=int(os.getenv('DB_HEALTH_CHECK_INTERVAL', '30'))
+            load_balance_strategy=os.getenv('DB_LOAD_BALANCE_STRATEGY', 'least_connections'),
+            health_check_interval=int(os.getenv('DB_HEALTH_CHECK_INTERVAL', '30')),
+            max_replica_lag_seconds=float(os.getenv('DB_MAX_REPLICA_LAG_SECONDS', '5')),
+            read_your_writes_seconds=float(read_your_writes) if read_your_writes else None
         )
         
         # Warm connections on startup
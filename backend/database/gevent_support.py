@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Cooperative psycopg2 I/O under gevent.
+
+Gunicorn's gevent worker monkey-patches sockets, so Redis and HTTP clients
+yield to the hub while they wait. psycopg2 talks to libpq in C, though, and
+a query blocks the whole worker process unless psycopg2 is given a wait
+callback. This module registers one (the same loop psycogreen ships) that
+waits on the connection's socket through gevent, so a slow query parks only
+the greenlet that issued it.
+
+The callback is process-global and has to be registered in every worker;
+config/gunicorn.conf.py does this in post_fork. Call make_psycopg_green()
+from any other entry point that runs the app under gevent.
+
+Notes:
+    psycopg2 rejects COPY and large objects while a wait callback is set.
+    A connection must not be shared between greenlets; the SQLAlchemy pool
+    already hands each checkout to a single caller.
+"""
+
+from typing import Optional
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def gevent_active() -> bool:
+    """Whether the stdlib socket module has been patched by gevent."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+
+def gevent_wait_callback(conn, timeout: Optional[float] = None) -> None:
+    """Drive an asynchronous psycopg2 operation, yielding to the hub while it waits."""
+    from gevent.socket import wait_read, wait_write
+    from psycopg2 import OperationalError, extensions
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            return
+        if state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise OperationalError(f"Bad result from poll: {state!r}")
+
+
+def make_psycopg_green() -> bool:
+    """Register the gevent wait callback with psycopg2; returns whether it is installed."""
+    try:
+        from psycopg2 import extensions
+    except ImportError:
+        return False
+    if extensions.get_wait_callback() is gevent_wait_callback:
+        return True
+    if not gevent_active():
+        logger.warning("gevent is not patched in; leaving psycopg2 blocking")
+        return False
+    extensions.set_wait_callback(gevent_wait_callback)
+    logger.info("psycopg2 wait callback installed; database I/O is cooperative")
+    return True
@@ -32,7 +32,7 @@ from sqlalchemy import (
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, sessionmaker
-from utils.hours import HoursFormatter
+from utils.hours_formatter import HoursFormatter
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
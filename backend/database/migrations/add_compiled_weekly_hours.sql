@@ -0,0 +1,22 @@
+-- Migration: Compiled weekly hours for indexed "open now" filtering
+-- Purpose: Store each restaurant's hours once, compiled by utils.weekly_hours into
+--          local minute-of-week ranges (Monday 00:00 = 0, week = 10080 minutes),
+--          plus the timezone they are local to. "Open now" then becomes
+--          hours_timezone = :tz AND hours_week_ranges @> :minute_of_week
+-- Requires PostgreSQL 14+ (multiranges)
+
+ALTER TABLE restaurants ADD COLUMN IF NOT EXISTS hours_week_ranges int4multirange;
+ALTER TABLE restaurants ADD COLUMN IF NOT EXISTS hours_timezone TEXT;
+
+-- Note: CREATE INDEX CONCURRENTLY cannot run inside a transaction
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_restaurants_hours_week_ranges
+    ON restaurants USING gist (hours_week_ranges)
+    WHERE hours_week_ranges IS NOT NULL;
+
+-- Backfill existing rows afterwards (new writes are compiled by the ORM):
+--   python scripts/compile_restaurant_hours.py
+
+-- Rollback:
+-- DROP INDEX CONCURRENTLY IF EXISTS idx_restaurants_hours_week_ranges;
+-- ALTER TABLE restaurants DROP COLUMN IF EXISTS hours_timezone;
+-- ALTER TABLE restaurants DROP COLUMN IF EXISTS hours_week_ranges;
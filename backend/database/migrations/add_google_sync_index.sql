@@ -0,0 +1,15 @@
+-- Migration: Index restaurants by Google sync freshness
+-- Purpose: Let the Google Places sync pipeline select stale rows incrementally
+--          (oldest last_google_sync_at first) without scanning the table
+
+-- The ORM model already declares this column; make sure the live schema has it
+ALTER TABLE restaurants ADD COLUMN IF NOT EXISTS last_google_sync_at TIMESTAMP;
+
+-- Note: CREATE INDEX CONCURRENTLY cannot run inside a transaction
+-- Matches: WHERE status = 'active' ORDER BY last_google_sync_at ASC NULLS FIRST, id
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_restaurants_google_sync_stale
+    ON restaurants (last_google_sync_at ASC NULLS FIRST, id)
+    WHERE status = 'active';
+
+-- Rollback:
+-- DROP INDEX CONCURRENTLY IF EXISTS idx_restaurants_google_sync_stale;
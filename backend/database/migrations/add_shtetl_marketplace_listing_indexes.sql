@@ -0,0 +1,72 @@
+-- Shtetl marketplace listing indexes
+-- Supports ShtetlMarketplaceService.get_listings: keyset pagination over the
+-- community sort order, radius search on a stored geography column, and
+-- trigram indexes for the ILIKE filters.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS postgis;
+
+-- Sort order index. Matches the ORDER BY in get_listings column for column,
+-- with id as the tie-breaker the keyset cursor needs, so a page is an index
+-- range scan that stops after LIMIT rows instead of a sort of every match.
+CREATE INDEX IF NOT EXISTS idx_shtetl_listing_order ON shtetl_marketplace (
+    status,
+    is_gemach DESC,
+    community_verified DESC,
+    rabbi_endorsed DESC,
+    kosher_verified DESC,
+    is_featured DESC,
+    created_at DESC,
+    id DESC
+);
+
+-- Geography column (if it doesn't exist)
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'shtetl_marketplace' AND column_name = 'geog'
+    ) THEN
+        ALTER TABLE shtetl_marketplace ADD COLUMN geog geography(Point, 4326);
+    END IF;
+END $$;
+
+-- Populate the geography column from latitude/longitude
+UPDATE shtetl_marketplace
+SET geog = ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography
+WHERE latitude IS NOT NULL
+  AND longitude IS NOT NULL
+  AND geog IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_shtetl_geog_gist ON shtetl_marketplace USING GIST (geog);
+
+-- Keep geog in sync when latitude/longitude change
+CREATE OR REPLACE FUNCTION update_shtetl_marketplace_geog()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL THEN
+        NEW.geog = ST_SetSRID(ST_MakePoint(NEW.longitude, NEW.latitude), 4326)::geography;
+    ELSE
+        NEW.geog = NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_update_shtetl_marketplace_geog ON shtetl_marketplace;
+CREATE TRIGGER trigger_update_shtetl_marketplace_geog
+    BEFORE INSERT OR UPDATE OF latitude, longitude ON shtetl_marketplace
+    FOR EACH ROW
+    EXECUTE FUNCTION update_shtetl_marketplace_geog();
+
+-- Trigram indexes for the '%term%' ILIKE filters, which a btree cannot serve
+CREATE INDEX IF NOT EXISTS idx_shtetl_title_trgm ON shtetl_marketplace USING gin (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_shtetl_description_trgm ON shtetl_marketplace USING gin (description gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_shtetl_keywords_trgm ON shtetl_marketplace USING gin (keywords gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_shtetl_city_trgm ON shtetl_marketplace USING gin (city gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_shtetl_state_trgm ON shtetl_marketplace USING gin (state gin_trgm_ops);
+
+COMMENT ON INDEX idx_shtetl_listing_order IS 'Keyset pagination for get_listings community sort order';
+COMMENT ON INDEX idx_shtetl_geog_gist IS 'Radius search for get_listings (ST_DWithin on geog)';
+
+ANALYZE shtetl_marketplace;
@@ -0,0 +1,150 @@
+# !/usr/bin/env python3
+"""Database Migration: Shtetl Message Unread Counters.
+===================================================
+Adds shtetl_message_counters, holding the unread ('sent') message count per
+recipient and per store. Statement-level triggers on shtetl_messages keep
+the counters in step inside the same transaction as every insert, status
+change and delete, so ShtetlMessageService reads one row instead of
+counting messages.
+Also adds (owner, created_at, id) indexes for keyset pagination of the
+recipient inbox and store message lists.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "add_shtetl_message_counters"
+down_revision = "create_shtetl_messages_table"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create unread counters, their triggers, and keyset indexes."""
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS shtetl_message_counters (
+            scope VARCHAR(20) NOT NULL,          -- 'recipient' or 'store'
+            owner_id VARCHAR(100) NOT NULL,      -- recipient_user_id or store_id
+            unread_count INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (scope, owner_id)
+        )
+    """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION shtetl_message_counter_add(
+            p_scope VARCHAR, p_owner_id VARCHAR, p_delta INTEGER
+        ) RETURNS VOID AS $$
+        BEGIN
+            INSERT INTO shtetl_message_counters (scope, owner_id, unread_count)
+            VALUES (p_scope, p_owner_id, GREATEST(p_delta, 0))
+            ON CONFLICT (scope, owner_id) DO UPDATE
+            SET unread_count = GREATEST(shtetl_message_counters.unread_count + p_delta, 0),
+                updated_at = NOW();
+        END;
+        $$ LANGUAGE plpgsql;
+    """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION update_shtetl_message_counters()
+        RETURNS TRIGGER AS $$
+        DECLARE
+            removed TEXT := $s$SELECT recipient_user_id, store_id, -1 AS delta
+                               FROM old_rows WHERE message_status = 'sent'$s$;
+            added TEXT := $s$SELECT recipient_user_id, store_id, 1 AS delta
+                             FROM new_rows WHERE message_status = 'sent'$s$;
+            change RECORD;
+        BEGIN
+            -- Each transition table exists only for the events that have it
+            FOR change IN EXECUTE format(
+                $s$
+                SELECT counter.scope, counter.owner_id, SUM(sent.delta)::INTEGER AS delta
+                FROM (%s) sent
+                CROSS JOIN LATERAL (VALUES ('recipient', sent.recipient_user_id),
+                                           ('store', sent.store_id)) AS counter(scope, owner_id)
+                GROUP BY counter.scope, counter.owner_id
+                HAVING SUM(sent.delta) <> 0
+                ORDER BY counter.scope, counter.owner_id
+                $s$,
+                CASE TG_OP
+                    WHEN 'INSERT' THEN added
+                    WHEN 'DELETE' THEN removed
+                    ELSE removed || ' UNION ALL ' || added
+                END
+            )
+            LOOP
+                -- One net delta per counter, applied in key order, so
+                -- concurrent multi-row writes lock counters in the same order.
+                PERFORM shtetl_message_counter_add(change.scope, change.owner_id, change.delta);
+            END LOOP;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """
+    )
+    # Statement-level, so each write locks its counters in one ordered pass.
+    # A trigger with transition tables can only fire on one event.
+    op.execute(
+        """
+        DROP TRIGGER IF EXISTS trigger_update_shtetl_message_counters ON shtetl_messages;
+        DROP TRIGGER IF EXISTS trigger_shtetl_message_counters_insert ON shtetl_messages;
+        DROP TRIGGER IF EXISTS trigger_shtetl_message_counters_update ON shtetl_messages;
+        DROP TRIGGER IF EXISTS trigger_shtetl_message_counters_delete ON shtetl_messages;
+        CREATE TRIGGER trigger_shtetl_message_counters_insert
+            AFTER INSERT ON shtetl_messages
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT
+            EXECUTE FUNCTION update_shtetl_message_counters();
+        CREATE TRIGGER trigger_shtetl_message_counters_update
+            AFTER UPDATE ON shtetl_messages
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT
+            EXECUTE FUNCTION update_shtetl_message_counters();
+        CREATE TRIGGER trigger_shtetl_message_counters_delete
+            AFTER DELETE ON shtetl_messages
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT
+            EXECUTE FUNCTION update_shtetl_message_counters();
+    """
+    )
+    # Backfill from existing messages
+    op.execute(
+        """
+        INSERT INTO shtetl_message_counters (scope, owner_id, unread_count)
+        SELECT 'recipient', recipient_user_id, COUNT(*)
+        FROM shtetl_messages WHERE message_status = 'sent'
+        GROUP BY recipient_user_id
+        UNION ALL
+        SELECT 'store', store_id, COUNT(*)
+        FROM shtetl_messages WHERE message_status = 'sent'
+        GROUP BY store_id
+        ON CONFLICT (scope, owner_id) DO UPDATE SET unread_count = EXCLUDED.unread_count
+    """
+    )
+    op.create_index(
+        "idx_shtetl_messages_recipient_keyset",
+        "shtetl_messages",
+        ["recipient_user_id", "created_at", "id"],
+    )
+    op.create_index(
+        "idx_shtetl_messages_store_keyset",
+        "shtetl_messages",
+        ["store_id", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    """Drop unread counters, their triggers, and keyset indexes."""
+    op.drop_index("idx_shtetl_messages_store_keyset", "shtetl_messages")
+    op.drop_index("idx_shtetl_messages_recipient_keyset", "shtetl_messages")
+    for event in ("insert", "update", "delete"):
+        op.execute(
+            f"DROP TRIGGER IF EXISTS trigger_shtetl_message_counters_{event} ON shtetl_messages"
+        )
+    op.execute("DROP FUNCTION IF EXISTS update_shtetl_message_counters()")
+    op.execute(
+        "DROP FUNCTION IF EXISTS shtetl_message_counter_add(VARCHAR, VARCHAR, INTEGER)"
+    )
+    op.execute("DROP TABLE IF EXISTS shtetl_message_counters")
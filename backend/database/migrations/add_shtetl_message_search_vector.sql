@@ -0,0 +1,27 @@
+-- Full-text search for shtetl messages
+-- Replaces ShtetlMessageService.search_messages' five '%term%' ILIKE scans with
+-- a weighted tsvector column and a GIN index scoped by store.
+-- Adding a STORED generated column rewrites the table; run it off-peak.
+
+-- Lets a GIN index lead with the scalar store_id
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+-- Weights: subject (A) > keywords and participant names (B) > body (C)
+ALTER TABLE shtetl_messages ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', COALESCE(subject, '')), 'A') ||
+        setweight(to_tsvector('english', COALESCE(keywords, '')), 'B') ||
+        setweight(to_tsvector('english', COALESCE(sender_name, '') || ' ' || COALESCE(recipient_name, '')), 'B') ||
+        setweight(to_tsvector('english', COALESCE(message_text, '')), 'C')
+    ) STORED;
+
+-- One index answers "this store's messages matching the query"
+CREATE INDEX IF NOT EXISTS idx_shtetl_messages_store_search
+    ON shtetl_messages USING gin (store_id, search_vector);
+
+-- The unweighted expression index from create_shtetl_messages_table matched no query
+DROP INDEX IF EXISTS idx_shtetl_messages_search_vector;
+
+COMMENT ON INDEX idx_shtetl_messages_store_search IS 'Store-scoped full-text search for search_messages';
+
+ANALYZE shtetl_messages;
@@ -0,0 +1,27 @@
+-- Create store_products table for store inventory
+-- Each row is a product a store sells, with its price and the units in stock.
+-- StoreServiceV5 reserves stock with one conditional multi-row decrement per
+-- order; the CHECK constraint is the backstop against overselling.
+
+CREATE TABLE IF NOT EXISTS store_products (
+    id SERIAL PRIMARY KEY,
+    store_id INTEGER NOT NULL REFERENCES stores(id) ON DELETE CASCADE,
+    sku VARCHAR(100),
+    name VARCHAR(255) NOT NULL,
+    category VARCHAR(100),
+    subcategory VARCHAR(100),
+    price NUMERIC(10, 2) NOT NULL,
+    stock_quantity INTEGER NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL DEFAULT 'active', -- active, archived
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+
+    CONSTRAINT ck_store_products_stock_quantity CHECK (stock_quantity >= 0),
+    CONSTRAINT uq_store_products_store_sku UNIQUE (store_id, sku)
+);
+
+-- Store inventory listings and order pricing filter on store and status
+CREATE INDEX IF NOT EXISTS idx_store_products_store_status ON store_products(store_id, status, id);
+
+COMMENT ON TABLE store_products IS 'Products sold by stores, with price and units in stock';
+COMMENT ON COLUMN store_products.stock_quantity IS 'Units available; decremented atomically at checkout';
@@ -6,6 +6,7 @@ Models are separated from business logic to follow single responsibility princip
 from datetime import datetime, timezone
 from sqlalchemy import (
     Boolean,
+    CheckConstraint,
     Column,
     DateTime,
     Float,
@@ -13,12 +14,20 @@ from sqlalchemy import (
     String,
     Text,
     ForeignKey,
+    Index,
+    UniqueConstraint,
     ARRAY,
     Numeric,
+    cast,
+    event,
+    inspect,
 )
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import INT4MULTIRANGE, JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import TypeDecorator
+from utils.hours import lookup_timezone
+from utils.weekly_hours import compile_restaurant_hours
 # SQLAlchemy Base
 Base = declarative_base()
 
@@ -26,6 +35,19 @@ def utc_now():
     """Get current UTC time for SQLAlchemy defaults."""
     return datetime.now(timezone.utc)
 
+
+class WeekMinuteRanges(TypeDecorator):
+    """int4multirange of minute-of-week ranges, exchanged as its text literal.
+
+    psycopg2 has no multirange adapter, so values are bound as text and cast.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def bind_expression(self, bindvalue):
+        return cast(bindvalue, INT4MULTIRANGE)
+
 class Restaurant(Base):
     """Optimized Restaurant model for SQLAlchemy (consolidated table).
     This model represents the main restaurants table in the JewGo database.
@@ -76,7 +98,9 @@ class Restaurant(Base):
     hours_of_operation = Column(Text)  # Optional (check every 7 days)
     hours_json = Column(JSONB)  # JSONB for structured hours data
     hours_last_updated = Column(DateTime)  # Track when hours were last updated
-    timezone = Column(Text)  # Based on geolocation or ORB data
+    timezone = Column(Text)  # Resolved from coordinates at write time (utils.hours.lookup_timezone)
+    hours_week_ranges = Column(WeekMinuteRanges)  # Compiled hours (utils.weekly_hours), local minutes of week
+    hours_timezone = Column(Text)  # Timezone hours_week_ranges is local to
     latitude = Column(Float)  # Based on geocoded address
     longitude = Column(Float)  # Based on geocoded address
     formatted_address = Column(Text)  # Formatted address from Google
@@ -153,6 +177,39 @@ class Restaurant(Base):
     
     def __repr__(self):
         return f"<Restaurant(id={self.id}, name='{self.name}', city='{self.city}')>"
+
+
+_HOURS_SOURCE_FIELDS = ("hours_json", "hours_of_operation", "timezone")
+
+
+@event.listens_for(Restaurant, "before_insert")
+@event.listens_for(Restaurant, "before_update")
+def _compile_restaurant_hours(mapper, connection, target):
+    """Resolve the timezone from coordinates and recompile hours_week_ranges.
+
+    Both run only when their inputs change, so reads never need a polygon
+    lookup or an hours parse.
+    """
+    state = inspect(target)
+
+    def changed(field):
+        return state.attrs[field].history.has_changes()
+
+    moved = state.persistent and not changed("timezone") and (
+        changed("latitude") or changed("longitude")
+    )
+    if not target.timezone or moved:
+        resolved = lookup_timezone(target.latitude, target.longitude)
+        if resolved:
+            target.timezone = resolved
+
+    if state.persistent and not any(changed(field) for field in _HOURS_SOURCE_FIELDS):
+        return
+    target.hours_week_ranges, target.hours_timezone = compile_restaurant_hours(
+        target.hours_json, target.hours_of_operation, target.timezone
+    )
+
+
 class Order(Base):
     """Order model for tracking customer orders.
     This model represents customer orders placed through the JewGo platform.
@@ -545,4 +602,34 @@ class Store(Base):
         return f"<Store(id={self.id}, name='{self.name}', city='{self.city}')>"
 
 
+class StoreProduct(Base):
+    """Product sold by a store, with its price and the units in stock.
+    StoreServiceV5 reserves stock with conditional decrements; the CHECK
+    constraint keeps stock_quantity from ever going negative.
+    """
+    __tablename__ = "store_products"
+    __table_args__ = (
+        CheckConstraint("stock_quantity >= 0", name="ck_store_products_stock_quantity"),
+        UniqueConstraint("store_id", "sku", name="uq_store_products_store_sku"),
+        Index("idx_store_products_store_status", "store_id", "status", "id"),
+    )
+    
+    # System fields
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, default=utc_now, nullable=False)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now, nullable=False)
+    
+    store_id = Column(Integer, ForeignKey("stores.id", ondelete="CASCADE"), nullable=False)
+    sku = Column(String(100))
+    name = Column(String(255), nullable=False)
+    category = Column(String(100))
+    subcategory = Column(String(100))
+    price = Column(Numeric(10, 2), nullable=False)
+    stock_quantity = Column(Integer, default=0, nullable=False)
+    status = Column(String(20), default="active", nullable=False)  # active, archived
+    
+    def __repr__(self):
+        return f"<StoreProduct(id={self.id}, store_id={self.store_id}, stock={self.stock_quantity})>"
+
+
 # NextAuth.js legacy models removed; using PostgreSQL auth tables exclusively
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Server-side prepared statements for hot repository query shapes.
+
+SQLAlchemy already caches the compiled SQL of every statement by its shape.
+Literal values are extracted as bound parameters, so two listing requests
+that differ only in filter values share one compiled form. Postgres, however,
+still parses and plans each statement on every execution. The psycopg2
+driver has no automatic prepare threshold, so the listing, detail and count
+queries are prepared explicitly here:
+
+    PREPARE jg_<hash> AS SELECT ... WHERE status = $1 ... LIMIT $2
+    EXECUTE jg_<hash>('active', 20)
+
+Each shape is compiled once per process and its SQL is rewritten to $n
+placeholders. It is PREPAREd once per database connection; the names are
+tracked in the pooled connection's info dict, which starts empty on
+reconnect. After five executions Postgres may switch a prepared statement
+to a generic plan and skip planning entirely.
+
+Anything that cannot be prepared runs through the normal ORM path:
+non-Postgres databases, IN lists with expanding parameters, eager-loaded
+relations (callers keep those on query.all()), and connections that already
+hold DB_PREPARED_MAX_PER_CONNECTION statements.
+
+Prepared statements live in the server session. Disable them with
+DB_PREPARED_STATEMENTS=false when connecting through PgBouncer in
+transaction or statement pooling mode, or through anything that issues
+DISCARD ALL between clients.
+
+Configuration (environment):
+    DB_PREPARED_STATEMENTS            default: true
+    DB_PREPARED_MAX_PER_CONNECTION    default: 100
+    DB_PREPARED_SHAPE_CACHE_SIZE      default: 500
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import bindparam, select, text
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_PYFORMAT_TOKEN = re.compile(r"%%|%\(([^)]+)\)s")
+_CONNECTION_INFO_KEY = 'prepared_statements'
+
+
+class PreparedShape(NamedTuple):
+    """A statement shape compiled once and rewritten for PREPARE."""
+
+    name: str
+    sql: str
+    compiled: Any
+    parameter_names: Tuple[str, ...]
+
+
+def to_numbered_placeholders(sql: str) -> Tuple[str, Tuple[str, ...]]:
+    """Rewrite pyformat SQL (`%(name)s`) to `$n` placeholders; returns SQL and names in `$n` order."""
+    names: List[str] = []
+
+    def replace(match):
+        name = match.group(1)
+        if name is None:
+            return '%'
+        if name not in names:
+            names.append(name)
+        return f"${names.index(name) + 1}"
+
+    return _PYFORMAT_TOKEN.sub(replace, sql), tuple(names)
+
+
+class PreparedStatementCache:
+    """Runs ORM queries through per-connection server-side prepared statements."""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        max_per_connection: Optional[int] = None,
+        max_shapes: Optional[int] = None,
+    ):
+        if enabled is None:
+            enabled = os.getenv('DB_PREPARED_STATEMENTS', 'true').lower() == 'true'
+        self.enabled = enabled
+        self.max_per_connection = max_per_connection or int(os.getenv('DB_PREPARED_MAX_PER_CONNECTION', '100'))
+        self.max_shapes = max_shapes or int(os.getenv('DB_PREPARED_SHAPE_CACHE_SIZE', '500'))
+        self._shapes: "OrderedDict[Any, Optional[PreparedShape]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'compiles': 0, 'prepares': 0, 'fallbacks': 0}
+
+    def all(self, session, query) -> List[Any]:
+        """Equivalent of query.all(): entities for single-entity queries, rows otherwise."""
+        textual = self._prepare(session, query)
+        if textual is None:
+            return query.all()
+        entities = [description['expr'] for description in query.column_descriptions]
+        result = session.execute(select(*entities).from_statement(textual))
+        return result.scalars().all() if len(entities) == 1 else result.all()
+
+    def first(self, session, query) -> Any:
+        """Equivalent of query.first()."""
+        rows = self.all(session, query.limit(1))
+        return rows[0] if rows else None
+
+    def scalar(self, session, query) -> Any:
+        """Equivalent of query.scalar() for single-row aggregate queries such as counts."""
+        textual = self._prepare(session, query)
+        if textual is None:
+            return query.scalar()
+        return session.execute(textual).scalar()
+
+    def shape_for(self, statement, dialect) -> Tuple[Optional[PreparedShape], Any]:
+        """Compiled shape for `statement` (None if it cannot be prepared) and its cache key."""
+        cache_key = statement._generate_cache_key()
+        if cache_key is None:
+            return None, None
+        lookup = (dialect.name, cache_key.key)
+        with self._lock:
+            if lookup in self._shapes:
+                self._shapes.move_to_end(lookup)
+                self.stats['hits'] += 1
+                return self._shapes[lookup], cache_key
+
+        # Compiling with the cache key lets later statements of the same shape
+        # substitute their own values via construct_params(extracted_parameters=...)
+        compiled = statement.compile(dialect=dialect, cache_key=cache_key)
+        shape = None
+        if 'POSTCOMPILE' not in compiled.string and compiled.positional is False:
+            sql, names = to_numbered_placeholders(compiled.string)
+            name = 'jg_' + hashlib.sha1(sql.encode('utf-8')).hexdigest()[:16]
+            shape = PreparedShape(name, sql, compiled, names)
+
+        with self._lock:
+            self.stats['compiles'] += 1
+            self._shapes[lookup] = shape
+            while len(self._shapes) > self.max_shapes:
+                self._shapes.popitem(last=False)
+        return shape, cache_key
+
+    def _prepare(self, session, query) -> Optional[Any]:
+        """PREPARE the query's shape on this connection if needed; returns the EXECUTE statement."""
+        if not self.enabled:
+            return None
+        dialect = session.get_bind().dialect
+        if dialect.name != 'postgresql':
+            return None
+
+        shape, cache_key = self.shape_for(query.statement, dialect)
+        if shape is None:
+            self.stats['fallbacks'] += 1
+            return None
+
+        connection = session.connection()
+        prepared = connection.connection.info.setdefault(_CONNECTION_INFO_KEY, set())
+        if shape.name not in prepared:
+            if len(prepared) >= self.max_per_connection:
+                self.stats['fallbacks'] += 1
+                return None
+            try:
+                # A savepoint keeps an unpreparable shape from aborting the caller's transaction
+                with connection.begin_nested():
+                    connection.exec_driver_sql(f"PREPARE {shape.name} AS {shape.sql}")
+            except Exception as e:
+                logger.warning("Could not prepare statement; using the ORM path", statement=shape.name, error=str(e))
+                with self._lock:
+                    self._shapes[(dialect.name, cache_key.key)] = None
+                self.stats['fallbacks'] += 1
+                return None
+            prepared.add(shape.name)
+            self.stats['prepares'] += 1
+
+        values = shape.compiled.construct_params(extracted_parameters=cache_key.bindparams)
+        binds = []
+        for position, name in enumerate(shape.parameter_names):
+            original = shape.compiled.binds.get(name)
+            binds.append(bindparam(f"p{position}", values[name], type_=original.type if original is not None else None))
+        placeholders = ', '.join(f":p{position}" for position in range(len(binds)))
+        textual = text(f"EXECUTE {shape.name}({placeholders})" if binds else f"EXECUTE {shape.name}")
+        return textual.bindparams(*binds)
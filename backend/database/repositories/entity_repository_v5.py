@@ -17,6 +17,7 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.types import UserDefinedType
 
 from database.base_repository import BaseRepository
+from database.prepared_statements import PreparedStatementCache
 from database.unified_connection_manager import UnifiedConnectionManager
 from utils.logging_config import get_logger
 
@@ -138,6 +139,9 @@ class EntityRepositoryV5(BaseRepository):
         # PostGIS availability will be detected lazily on first use
         self._postgis_available = None
         self._postgis_check_attempted = False
+
+        # Server-side prepared statements for the hot list/detail/count shapes
+        self.prepared_statements = PreparedStatementCache()
     
     def _load_models(self):
         """Load and cache SQLAlchemy model classes."""
@@ -192,6 +196,11 @@ class EntityRepositoryV5(BaseRepository):
         """Get entity mapping configuration."""
         return self.ENTITY_MAPPINGS.get(entity_type)
     
+    def _read_scope(self):
+        """Read-only session (no commit) when the connection manager supports it."""
+        read_scope = getattr(self.connection_manager, 'read_scope', None)
+        return read_scope() if read_scope else self.connection_manager.session_scope()
+    
     def _get_entities_with_distance_pagination(
         self,
         entity_type: str,
@@ -234,10 +243,11 @@ class EntityRepositoryV5(BaseRepository):
                 logger.error(f"No mapping for entity type: {entity_type}")
                 return [], None, None
 
-            with self.connection_manager.session_scope() as session:
+            with self._read_scope() as session:
                 query = session.query(model_class)
 
-                if include_relations and mapping.get('relations'):
+                eager_load = bool(include_relations and mapping.get('relations'))
+                if eager_load:
                     for relation in mapping['relations']:
                         if hasattr(model_class, relation):
                             query = query.options(joinedload(getattr(model_class, relation)))
@@ -264,7 +274,8 @@ class EntityRepositoryV5(BaseRepository):
                 query = self._apply_sorting(query, model_class, sort_key, filters)
 
                 offset = (page - 1) * limit
-                rows = query.offset(offset).limit(limit).all()
+                query = query.offset(offset).limit(limit)
+                rows = query.all() if eager_load else self.prepared_statements.all(session, query)
 
                 result_entities: List[Dict[str, Any]] = []
 
@@ -310,11 +321,7 @@ class EntityRepositoryV5(BaseRepository):
                         for entity_dict in result_entities:
                             entity_dict.setdefault('distance', None)
 
-                count_query = session.query(model_class)
-                count_query = self._apply_filters(count_query, model_class, filters, mapping)
-                if geospatial_enabled:
-                    count_query = self._apply_geospatial_filter(count_query, model_class, filters)
-                total_count = count_query.count()
+                total_count = self._count(session, model_class, filters, mapping)
 
                 has_next = offset + limit < total_count
                 has_prev = page > 1
@@ -368,10 +375,11 @@ class EntityRepositoryV5(BaseRepository):
                 logger.error(f"No mapping for entity type: {entity_type}")
                 return [], None, None, 0
 
-            with self.connection_manager.session_scope() as session:
+            with self._read_scope() as session:
                 query = session.query(model_class)
 
-                if include_relations and mapping.get('relations'):
+                eager_load = bool(include_relations and mapping.get('relations'))
+                if eager_load:
                     for relation in mapping['relations']:
                         if hasattr(model_class, relation):
                             query = query.options(joinedload(getattr(model_class, relation)))
@@ -400,7 +408,8 @@ class EntityRepositoryV5(BaseRepository):
                 )
                 query = self._apply_sorting(query, model_class, sort_key, filters)
 
-                rows = query.limit(limit + 1).all()
+                query = query.limit(limit + 1)
+                rows = query.all() if eager_load else self.prepared_statements.all(session, query)
                 has_next = len(rows) > limit
                 if has_next:
                     rows = rows[:limit]
@@ -491,16 +500,17 @@ class EntityRepositoryV5(BaseRepository):
             if not mapping:
                 return None
             
-            with self.connection_manager.session_scope() as session:
+            with self._read_scope() as session:
                 query = session.query(model_class).filter(model_class.id == entity_id)
                 
                 # Apply eager loading if relations requested
-                if include_relations and mapping.get('relations'):
+                eager_load = bool(include_relations and mapping.get('relations'))
+                if eager_load:
                     for relation in mapping['relations']:
                         if hasattr(model_class, relation):
                             query = query.options(joinedload(getattr(model_class, relation)))
                 
-                entity = query.first()
+                entity = query.first() if eager_load else self.prepared_statements.first(session, query)
                 
                 if not entity:
                     return None
@@ -762,17 +772,20 @@ class EntityRepositoryV5(BaseRepository):
             if not mapping:
                 return 0
             
-            with self.connection_manager.session_scope() as session:
-                query = session.query(func.count(model_class.id))
-                query = self._apply_filters(query, model_class, filters, mapping)
-                if mapping.get('geospatial') and filters and filters.get('latitude') and filters.get('longitude'):
-                    query = self._apply_geospatial_filter(query, model_class, filters)
-                
-                return query.scalar() or 0
+            with self._read_scope() as session:
+                return self._count(session, model_class, filters, mapping)
                 
         except Exception as e:
             logger.error(f"Error getting {entity_type} count: {e}")
             return 0
+
+    def _count(self, session, model_class, filters: Optional[Dict[str, Any]], mapping: Dict[str, Any]) -> int:
+        """Count matching rows; one statement shape shared by every count path."""
+        query = session.query(func.count(model_class.id))
+        query = self._apply_filters(query, model_class, filters, mapping)
+        if mapping.get('geospatial') and filters and filters.get('latitude') and filters.get('longitude'):
+            query = self._apply_geospatial_filter(query, model_class, filters)
+        return self.prepared_statements.scalar(session, query) or 0
     
     def _apply_filters(
         self,
@@ -831,7 +844,12 @@ class EntityRepositoryV5(BaseRepository):
             if filters.get('hoursFilter') and hasattr(model_class, 'hours_json'):
                 hours_filter = filters.get('hoursFilter')
                 
-                if hours_filter == 'openNow':
+                if hours_filter == 'openNow' and hasattr(model_class, 'hours_week_ranges'):
+                    # Indexed containment test against hours compiled at write time
+                    from services.open_now_service import open_now_service
+                    timezones = open_now_service.get_compiled_timezones(query.session)
+                    query = query.filter(open_now_service.build_open_now_filter(timezones))
+                elif hours_filter == 'openNow':
                     # Filter by 'open_now' boolean directly from JSONB
                     query = query.filter(model_class.hours_json['open_now'].astext == 'true')
                 elif hours_filter in ['morning', 'afternoon', 'evening', 'lateNight']:
@@ -1404,7 +1422,7 @@ class EntityRepositoryV5(BaseRepository):
         all_results = []
         
         try:
-            with self.connection_manager.session_scope() as session:
+            with self._read_scope() as session:
                 # Search each entity type
                 for entity_type in valid_entity_types:
                     mapping = self.ENTITY_MAPPINGS[entity_type]
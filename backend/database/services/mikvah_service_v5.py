@@ -7,13 +7,13 @@ appointment scheduling, and specialized religious requirements.
 
 from typing import Any, Dict, List, Optional
 from datetime import datetime, timedelta
-import requests
 from flask import current_app
 from utils.logging_config import get_logger
 from database.repositories.entity_repository_v5 import EntityRepositoryV5
 from cache.redis_manager_v5 import RedisManagerV5
 from utils.feature_flags_v5 import FeatureFlagsV5
 from utils.distance import distance_km
+from utils.hebrew_calendar import get_hebrew_calendar
 
 logger = get_logger(__name__)
 
@@ -34,14 +34,12 @@ class MikvahServiceV5:
         self.feature_flags = feature_flags
         self.logger = logger.bind(service="mikvah_v5")
         
-        # External API configurations
-        self.hebcal_api_base = "https://www.hebcal.com/converter"
-        self.hebcal_timeout = 5
+        # In-process Jewish calendar (per-day table, no network calls)
+        self.jewish_calendar = get_hebrew_calendar()
         
         # Cache configurations
         self.cache_config = {
             'mikvah_details': {'ttl': 3600, 'prefix': 'mikvah_v5'},  # 1 hour
-            'jewish_calendar': {'ttl': 86400, 'prefix': 'jewish_cal'},  # 24 hours
             'mikvah_hours': {'ttl': 1800, 'prefix': 'mikvah_hours'},  # 30 minutes
             'appointments': {'ttl': 300, 'prefix': 'appointments'}  # 5 minutes
         }
@@ -622,31 +620,12 @@ class MikvahServiceV5:
             date = datetime.now()
             
         try:
-            cache_key = f"jewish_calendar:{date.strftime('%Y-%m-%d')}"
-            cached = self.redis_manager.get(
-                cache_key,
-                prefix=self.cache_config['jewish_calendar']['prefix']
-            )
-            if cached:
-                return cached
-                
             # Check if feature is enabled
             if not self.feature_flags.is_enabled('jewish_calendar_integration'):
                 return None
                 
-            # Call HebCal API
-            calendar_info = self._fetch_jewish_calendar_data(date)
-            
-            if calendar_info:
-                # Cache the result
-                self.redis_manager.set(
-                    cache_key,
-                    calendar_info,
-                    ttl=self.cache_config['jewish_calendar']['ttl'],
-                    prefix=self.cache_config['jewish_calendar']['prefix']
-                )
-                
-            return calendar_info
+            # Computed from the in-process calendar table; cheaper than a cache round trip
+            return self._build_jewish_calendar_data(date)
             
         except Exception as e:
             self.logger.exception("Failed to get Jewish calendar info", 
@@ -922,8 +901,8 @@ class MikvahServiceV5:
                               error=str(e))
             return []
 
-    def _fetch_jewish_calendar_data(self, date: datetime) -> Optional[Dict[str, Any]]:
-        """Fetch Jewish calendar data from HebCal API.
+    def _build_jewish_calendar_data(self, date: datetime) -> Optional[Dict[str, Any]]:
+        """Build Jewish calendar data from the in-process calendar.
         
         Args:
             date: Date to get calendar info for
@@ -932,34 +911,22 @@ class MikvahServiceV5:
             Jewish calendar information or None
         """
         try:
-            params = {
-                'gy': date.year,
-                'gm': date.month,
-                'gd': date.day,
-                'g2h': 1,
-                'cfg': 'json'
+            day = self.jewish_calendar.day(date)
+            events = [holiday.name for holiday in day.holidays]
+            if day.is_shabbat and day.parsha:
+                events.append(f"Parashat {day.parsha[0]}")
+            return {
+                'hebrew_date': day.hebrew.hebrew(),
+                'hebrew_year': day.hebrew.year,
+                'hebrew_month': day.hebrew.month_name,
+                'hebrew_day': day.hebrew.day,
+                'hebrew_month_name': day.hebrew.month_name_hebrew,
+                'is_holiday': bool(day.holidays),
+                'events': events
             }
-            
-            response = requests.get(
-                self.hebcal_api_base,
-                params=params,
-                timeout=self.hebcal_timeout
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    'hebrew_date': data.get('hebrew'),
-                    'hebrew_year': data.get('hy'),
-                    'hebrew_month': data.get('hm'),
-                    'hebrew_day': data.get('hd'),
-                    'hebrew_month_name': data.get('hebrew_month_name'),
-                    'is_holiday': data.get('events', []) != [],
-                    'events': data.get('events', [])
-                }
                 
         except Exception as e:
-            self.logger.warning("Failed to fetch Jewish calendar data", 
+            self.logger.warning("Failed to build Jewish calendar data", 
                               date=date.strftime('%Y-%m-%d'),
                               error=str(e))
             
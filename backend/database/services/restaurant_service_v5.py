@@ -14,6 +14,7 @@ from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
 from utils.logging_config import get_logger
+from utils.weekly_hours import is_open_at
 
 logger = get_logger(__name__)
 
@@ -225,9 +226,12 @@ class RestaurantServiceV5:
                     
                     logger.info(f"Restaurants with hours data: {restaurants_with_hours}")
                     
-                    # Count restaurants currently open using JSONB queries
+                    # Count restaurants currently open from compiled hours
+                    from services.open_now_service import open_now_service
                     restaurants_open_now = session.query(Restaurant).filter(
-                        Restaurant.hours_json['open_now'].astext == 'true'
+                        open_now_service.build_open_now_filter(
+                            open_now_service.get_compiled_timezones(session)
+                        )
                     ).count()
                             
                     logger.info(f"Restaurants currently open: {restaurants_open_now}")
@@ -1155,28 +1159,9 @@ class RestaurantServiceV5:
         return name
     
     def _is_restaurant_open(self, restaurant: Dict[str, Any]) -> Optional[bool]:
-        """Check if restaurant is currently open."""
+        """Check if restaurant is currently open (None when hours are unknown)."""
         try:
-            hours = restaurant.get('hours')
-            if not hours:
-                return None
-            
-            now = datetime.now()
-            day_name = now.strftime('%A').lower()
-            
-            day_hours = hours.get(day_name)
-            if not day_hours:
-                return None
-            
-            if day_hours.get('closed'):
-                return False
-            
-            if day_hours.get('open_24h'):
-                return True
-            
-            # Check time ranges (simplified)
-            # In a real implementation, you'd have more robust time parsing
-            return None
+            return is_open_at(restaurant)
             
         except Exception as e:
             logger.warning(f"Error checking if restaurant is open: {e}")
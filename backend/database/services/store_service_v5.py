@@ -9,6 +9,8 @@ from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP
 from flask import current_app
+from sqlalchemy import Integer, column, func, select, update, values
+from database.models import StoreProduct
 from utils.logging_config import get_logger
 from database.repositories.entity_repository_v5 import EntityRepositoryV5
 from cache.redis_manager_v5 import RedisManagerV5
@@ -400,6 +402,9 @@ class StoreServiceV5:
                            low_stock_only: bool = False) -> Dict[str, Any]:
         """Get store inventory with filtering options.
         
+        The store's product list and each product's stock are cached
+        separately, so a sale only evicts the products it touched.
+        
         Args:
             store_id: Store ID
             category: Product category filter
@@ -409,25 +414,16 @@ class StoreServiceV5:
             Store inventory data
         """
         try:
-            cache_key = f"inventory:{store_id}:{category or 'all'}:{low_stock_only}"
-            cached = self.redis_manager.get(
-                cache_key,
-                prefix=self.cache_config['store_inventory']['prefix']
-            )
-            if cached:
-                return cached
-                
-            # Get inventory from repository (would be separate inventory table)
-            inventory_filters = {'store_id': store_id}
+            products = self._get_store_product_list(store_id)
             if category:
-                inventory_filters['category'] = category
-            if low_stock_only:
-                inventory_filters['quantity__lte'] = self.ecommerce_config['inventory_low_threshold']
+                products = [product for product in products if product['category'] == category]
                 
-            # This would typically query a products/inventory table
-            inventory_items = []  # Placeholder - would get from repository
+            inventory_items = self._get_product_inventory([product['product_id'] for product in products])
+            if low_stock_only:
+                inventory_items = [item for item in inventory_items
+                                   if item['quantity'] <= self.ecommerce_config['inventory_low_threshold']]
             
-            inventory_data = {
+            return {
                 'store_id': store_id,
                 'total_items': len(inventory_items),
                 'categories': self._get_inventory_categories(inventory_items),
@@ -437,16 +433,6 @@ class StoreServiceV5:
                 'items': inventory_items
             }
             
-            # Cache the result
-            self.redis_manager.set(
-                cache_key,
-                inventory_data,
-                ttl=self.cache_config['store_inventory']['ttl'],
-                prefix=self.cache_config['store_inventory']['prefix']
-            )
-            
-            return inventory_data
-            
         except Exception as e:
             self.logger.exception("Failed to get store inventory", store_id=store_id, error=str(e))
             return {'store_id': store_id, 'items': [], 'total_items': 0}
@@ -462,29 +448,25 @@ class StoreServiceV5:
         Returns:
             True if successful, False otherwise
         """
-        try:
-            # Update product quantity (would typically update products table)
-            update_data = {
-                'quantity': quantity,
-                'updated_at': datetime.utcnow()
-            }
+        if quantity < 0:
+            self.logger.warning("Rejected negative inventory quantity", 
+                              store_id=store_id, 
+                              product_id=product_id,
+                              quantity=quantity)
+            return False
             
-            # Add stock status
-            if quantity == 0:
-                update_data['stock_status'] = 'out_of_stock'
-            elif quantity <= self.ecommerce_config['inventory_critical_threshold']:
-                update_data['stock_status'] = 'critical'
-            elif quantity <= self.ecommerce_config['inventory_low_threshold']:
-                update_data['stock_status'] = 'low'
-            else:
-                update_data['stock_status'] = 'in_stock'
-                
-            # This would update the products table
-            success = True  # Placeholder - would call repository
+        try:
+            with self.repository.connection_manager.session_scope() as session:
+                updated = session.execute(
+                    update(StoreProduct)
+                    .where(StoreProduct.id == product_id, StoreProduct.store_id == store_id)
+                    .values(stock_quantity=quantity, updated_at=func.now())
+                    .returning(StoreProduct.id)
+                ).first()
+            success = updated is not None
             
             if success:
-                # Invalidate inventory caches
-                self._invalidate_inventory_caches(store_id)
+                self._invalidate_inventory_caches(store_id, [product_id])
                 
                 # Send low stock alerts if needed
                 if quantity <= self.ecommerce_config['inventory_critical_threshold']:
@@ -493,7 +475,8 @@ class StoreServiceV5:
                 self.logger.info("Updated product inventory", 
                                store_id=store_id, 
                                product_id=product_id,
-                               quantity=quantity)
+                               quantity=quantity,
+                               stock_status=self._get_stock_status(quantity))
                 
             return success
             
@@ -508,6 +491,8 @@ class StoreServiceV5:
                              shipping_address: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Calculate order total with tax and shipping.
         
+        Prices for every product in the order are fetched in one query.
+        
         Args:
             store_id: Store ID
             items: List of order items with product_id and quantity
@@ -517,47 +502,37 @@ class StoreServiceV5:
             Order total breakdown
         """
         try:
-            subtotal = Decimal('0.00')
-            item_details = []
-            
-            # Calculate subtotal
-            for item in items:
-                # Get product price (would query products table)
-                product_price = Decimal('10.00')  # Placeholder
-                item_total = product_price * item['quantity']
-                subtotal += item_total
+            quantities = self._aggregate_order_items(items)
+        except (KeyError, TypeError, ValueError) as e:
+            return {'total': '0.00', 'error': f'Invalid order items: {e}'}
+            
+        try:
+            with self.repository.connection_manager.read_scope() as session:
+                products = {
+                    row.id: row for row in session.execute(
+                        select(StoreProduct.id, StoreProduct.name, StoreProduct.price)
+                        .where(
+                            StoreProduct.store_id == store_id,
+                            StoreProduct.status == 'active',
+                            StoreProduct.id.in_(list(quantities))
+                        )
+                    )
+                }
+            
+            unavailable = sorted(set(quantities) - set(products))
+            if unavailable:
+                return {
+                    'total': '0.00',
+                    'error': 'Products not available',
+                    'unavailable_product_ids': unavailable
+                }
                 
-                item_details.append({
-                    'product_id': item['product_id'],
-                    'quantity': item['quantity'],
-                    'unit_price': str(product_price),
-                    'total_price': str(item_total)
-                })
-            
-            # Calculate tax
-            tax_amount = subtotal * self.ecommerce_config['tax_rate']
-            tax_amount = tax_amount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-            
-            # Calculate shipping
-            shipping_cost = self._calculate_shipping_cost(store_id, subtotal, shipping_address)
-            
-            # Calculate total
-            total = subtotal + tax_amount + shipping_cost
-            
-            order_total = {
-                'subtotal': str(subtotal),
-                'tax_amount': str(tax_amount),
-                'tax_rate': str(self.ecommerce_config['tax_rate']),
-                'shipping_cost': str(shipping_cost),
-                'total': str(total),
-                'currency': self.ecommerce_config['default_currency'],
-                'items': item_details
-            }
+            order_total = self._build_order_total(store_id, quantities, products, shipping_address)
             
             self.logger.info("Calculated order total", 
                            store_id=store_id,
-                           items_count=len(items),
-                           total=str(total))
+                           items_count=len(quantities),
+                           total=order_total['total'])
             
             return order_total
             
@@ -567,6 +542,113 @@ class StoreServiceV5:
                                 error=str(e))
             return {'total': '0.00', 'error': 'Calculation failed'}
 
+    def reserve_inventory(self, store_id: int, items: List[Dict[str, Any]],
+                          shipping_address: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Reserve stock for every item of an order, all or nothing.
+        
+        One conditional UPDATE decrements every product that still has enough
+        stock and returns the prices the order is charged. If any product is
+        short the transaction is rolled back and nothing is reserved.
+        Concurrent checkouts of the same product queue on its row lock and
+        re-check the stock they see after the lock is granted, so the store
+        can never oversell.
+        
+        Args:
+            store_id: Store ID
+            items: List of order items with product_id and quantity
+            shipping_address: Shipping address for tax/shipping calculation
+            
+        Returns:
+            Reservation result with the order total, or the products that
+            could not be reserved
+        """
+        try:
+            quantities = self._aggregate_order_items(items)
+        except (KeyError, TypeError, ValueError) as e:
+            return {'success': False, 'error': 'invalid_items', 'message': str(e)}
+            
+        try:
+            with self.repository.connection_manager.session_scope() as session:
+                requested = self._requested_items_cte(quantities)
+                reserved = {
+                    row.id: row for row in session.execute(
+                        update(StoreProduct)
+                        .where(
+                            StoreProduct.id == requested.c.product_id,
+                            StoreProduct.id.in_(select(self._locked_products_cte(store_id, requested).c.id)),
+                            StoreProduct.status == 'active',
+                            StoreProduct.stock_quantity >= requested.c.quantity
+                        )
+                        .values(
+                            stock_quantity=StoreProduct.stock_quantity - requested.c.quantity,
+                            updated_at=func.now()
+                        )
+                        .returning(StoreProduct.id, StoreProduct.name, StoreProduct.price,
+                                   StoreProduct.stock_quantity)
+                    )
+                }
+                if len(reserved) < len(quantities):
+                    session.rollback()
+                    
+        except Exception as e:
+            self.logger.exception("Failed to reserve inventory", store_id=store_id, error=str(e))
+            return {'success': False, 'error': 'reservation_failed'}
+            
+        if len(reserved) < len(quantities):
+            unavailable = sorted(set(quantities) - set(reserved))
+            self.logger.info("Inventory reservation rejected", 
+                           store_id=store_id,
+                           unavailable_product_ids=unavailable)
+            return {'success': False, 'error': 'insufficient_stock', 'unavailable_product_ids': unavailable}
+            
+        self._invalidate_inventory_caches(store_id, list(reserved))
+        for product in reserved.values():
+            if product.stock_quantity <= self.ecommerce_config['inventory_critical_threshold']:
+                self._send_low_stock_alert(store_id, product.id, product.stock_quantity)
+                
+        self.logger.info("Reserved inventory", store_id=store_id, items_count=len(reserved))
+        
+        return {
+            'success': True,
+            'remaining_stock': {product_id: product.stock_quantity for product_id, product in reserved.items()},
+            'order_total': self._build_order_total(store_id, quantities, reserved, shipping_address)
+        }
+
+    def release_inventory(self, store_id: int, items: List[Dict[str, Any]]) -> bool:
+        """Return reserved stock for a cancelled or expired order.
+        
+        Args:
+            store_id: Store ID
+            items: List of order items with product_id and quantity
+            
+        Returns:
+            True if every product was restocked, False otherwise
+        """
+        try:
+            quantities = self._aggregate_order_items(items)
+            with self.repository.connection_manager.session_scope() as session:
+                requested = self._requested_items_cte(quantities)
+                released = session.execute(
+                    update(StoreProduct)
+                    .where(
+                        StoreProduct.id == requested.c.product_id,
+                        StoreProduct.id.in_(select(self._locked_products_cte(store_id, requested).c.id))
+                    )
+                    .values(
+                        stock_quantity=StoreProduct.stock_quantity + requested.c.quantity,
+                        updated_at=func.now()
+                    )
+                    .returning(StoreProduct.id)
+                ).scalars().all()
+                
+            self._invalidate_inventory_caches(store_id, released)
+            self.logger.info("Released inventory", store_id=store_id, items_count=len(released))
+            return len(released) == len(quantities)
+            
+        except Exception as e:
+            self.logger.exception("Failed to release inventory", store_id=store_id, error=str(e))
+            return False
+
     def get_store_analytics(self, store_id: int, date_range: Optional[Tuple[datetime, datetime]] = None) -> Dict[str, Any]:
         """Get store analytics and performance metrics.
         
@@ -850,6 +932,199 @@ class StoreServiceV5:
             self.logger.warning("Failed to calculate shipping cost", error=str(e))
             return Decimal('5.99')  # Default fallback
 
+    def _aggregate_order_items(self, items: List[Dict[str, Any]]) -> Dict[int, int]:
+        """Sum order item quantities per product.
+        
+        Args:
+            items: List of order items with product_id and quantity
+            
+        Returns:
+            Quantity per product ID, in product ID order
+            
+        Raises:
+            ValueError: If the order is empty or a quantity is not positive
+        """
+        quantities: Dict[int, int] = {}
+        for item in items:
+            product_id = int(item['product_id'])
+            quantity = int(item['quantity'])
+            if quantity <= 0:
+                raise ValueError(f"quantity for product {product_id} must be positive")
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+            
+        if not quantities:
+            raise ValueError("order has no items")
+            
+        return dict(sorted(quantities.items()))
+
+    def _requested_items_cte(self, quantities: Dict[int, int]):
+        """Build the (product_id, quantity) VALUES list of an order as a CTE."""
+        return values(
+            column('product_id', Integer),
+            column('quantity', Integer),
+            name='requested_items'
+        ).data(list(quantities.items())).cte('requested_items')
+
+    def _locked_products_cte(self, store_id: int, requested):
+        """Row-lock an order's products in ID order before they are updated.
+        
+        Taking the locks in a fixed order keeps two orders that share
+        products from deadlocking on each other.
+        """
+        return (
+            select(StoreProduct.id)
+            .where(
+                StoreProduct.store_id == store_id,
+                StoreProduct.id.in_(select(requested.c.product_id))
+            )
+            .order_by(StoreProduct.id)
+            .with_for_update()
+            .cte('locked_products')
+        )
+
+    def _build_order_total(self, store_id: int, quantities: Dict[int, int], products: Dict[int, Any],
+                           shipping_address: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Price an order from its quantities and the fetched product rows.
+        
+        Args:
+            store_id: Store ID
+            quantities: Quantity per product ID
+            products: Product rows with name and price, keyed by product ID
+            shipping_address: Shipping address
+            
+        Returns:
+            Order total breakdown
+        """
+        subtotal = Decimal('0.00')
+        item_details = []
+        
+        for product_id, quantity in quantities.items():
+            product_price = Decimal(products[product_id].price)
+            item_total = product_price * quantity
+            subtotal += item_total
+            
+            item_details.append({
+                'product_id': product_id,
+                'name': products[product_id].name,
+                'quantity': quantity,
+                'unit_price': str(product_price),
+                'total_price': str(item_total)
+            })
+        
+        # Calculate tax
+        tax_amount = subtotal * self.ecommerce_config['tax_rate']
+        tax_amount = tax_amount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        
+        # Calculate shipping
+        shipping_cost = self._calculate_shipping_cost(store_id, subtotal, shipping_address)
+        
+        # Calculate total
+        total = subtotal + tax_amount + shipping_cost
+        
+        return {
+            'subtotal': str(subtotal),
+            'tax_amount': str(tax_amount),
+            'tax_rate': str(self.ecommerce_config['tax_rate']),
+            'shipping_cost': str(shipping_cost),
+            'total': str(total),
+            'currency': self.ecommerce_config['default_currency'],
+            'items': item_details
+        }
+
+    def _get_stock_status(self, quantity: int) -> str:
+        """Classify a stock quantity against the inventory thresholds."""
+        if quantity == 0:
+            return 'out_of_stock'
+        if quantity <= self.ecommerce_config['inventory_critical_threshold']:
+            return 'critical'
+        if quantity <= self.ecommerce_config['inventory_low_threshold']:
+            return 'low'
+        return 'in_stock'
+
+    def _get_store_product_list(self, store_id: int) -> List[Dict[str, Any]]:
+        """Get the IDs and categories of a store's active products.
+        
+        Cached per store; stock changes do not invalidate it.
+        
+        Args:
+            store_id: Store ID
+            
+        Returns:
+            Product IDs with their categories, in product ID order
+        """
+        cache_key = f"store:{store_id}"
+        prefix = self.cache_config['store_inventory']['prefix']
+        cached = self.redis_manager.get(cache_key, prefix=prefix)
+        if cached is not None:
+            return cached
+            
+        with self.repository.connection_manager.read_scope() as session:
+            products = [
+                {'product_id': row.id, 'category': row.category}
+                for row in session.execute(
+                    select(StoreProduct.id, StoreProduct.category)
+                    .where(StoreProduct.store_id == store_id, StoreProduct.status == 'active')
+                    .order_by(StoreProduct.id)
+                )
+            ]
+            
+        self.redis_manager.set(
+            cache_key,
+            products,
+            ttl=self.cache_config['store_inventory']['ttl'],
+            prefix=prefix
+        )
+        return products
+
+    def _get_product_inventory(self, product_ids: List[int]) -> List[Dict[str, Any]]:
+        """Get stock for products, from per-product cache entries where possible.
+        
+        Products missing from the cache are fetched in one query and cached.
+        
+        Args:
+            product_ids: Product IDs
+            
+        Returns:
+            Inventory items in the order of product_ids
+        """
+        if not product_ids:
+            return []
+            
+        prefix = self.cache_config['store_inventory']['prefix']
+        keys = {product_id: f"product:{product_id}" for product_id in product_ids}
+        cached = self.redis_manager.mget(list(keys.values()), prefix=prefix)
+        items = {product_id: cached[key] for product_id, key in keys.items() if key in cached}
+        
+        missing = [product_id for product_id in product_ids if product_id not in items]
+        if missing:
+            with self.repository.connection_manager.read_scope() as session:
+                rows = session.execute(
+                    select(StoreProduct).where(StoreProduct.id.in_(missing))
+                ).scalars().all()
+                fetched = {
+                    product.id: {
+                        'product_id': product.id,
+                        'store_id': product.store_id,
+                        'sku': product.sku,
+                        'name': product.name,
+                        'category': product.category,
+                        'subcategory': product.subcategory,
+                        'price': str(product.price),
+                        'quantity': product.stock_quantity,
+                        'stock_status': self._get_stock_status(product.stock_quantity)
+                    }
+                    for product in rows
+                }
+                
+            items.update(fetched)
+            self.redis_manager.mset(
+                {keys[product_id]: item for product_id, item in fetched.items()},
+                ttl=self.cache_config['store_inventory']['ttl'],
+                prefix=prefix
+            )
+            
+        return [items[product_id] for product_id in product_ids if product_id in items]
+
     def _get_inventory_summary(self, store_id: int) -> Dict[str, Any]:
         """Get inventory summary for a store.
         
@@ -944,9 +1219,16 @@ class StoreServiceV5:
             store_id: Store ID
         """
         try:
-            # Archive inventory data
-            # This would typically update products table with archived status
-            self.logger.info("Archived store inventory", store_id=store_id)
+            with self.repository.connection_manager.session_scope() as session:
+                archived = session.execute(
+                    update(StoreProduct)
+                    .where(StoreProduct.store_id == store_id, StoreProduct.status == 'active')
+                    .values(status='archived', updated_at=func.now())
+                    .returning(StoreProduct.id)
+                ).scalars().all()
+                
+            self._invalidate_inventory_caches(store_id, archived, product_list_changed=True)
+            self.logger.info("Archived store inventory", store_id=store_id, products=len(archived))
         except Exception as e:
             self.logger.warning("Failed to archive store inventory", 
                               store_id=store_id,
@@ -1011,22 +1293,25 @@ class StoreServiceV5:
         except Exception as e:
             self.logger.warning("Failed to invalidate store caches", error=str(e))
 
-    def _invalidate_inventory_caches(self, store_id: int):
-        """Invalidate inventory-related caches for a store.
+    def _invalidate_inventory_caches(self, store_id: int, product_ids: List[int],
+                                     product_list_changed: bool = False):
+        """Invalidate the cached stock of the given products.
         
         Args:
             store_id: Store ID
+            product_ids: Products whose stock changed
+            product_list_changed: Also drop the store's cached product list
         """
         try:
-            patterns = [
-                f"inventory:*:{store_id}:*",
-                f"products:*:{store_id}:*"
-            ]
-            
-            for pattern in patterns:
-                self.redis_manager.delete_pattern(pattern)
+            prefix = self.cache_config['store_inventory']['prefix']
+            for product_id in product_ids:
+                self.redis_manager.delete(f"product:{product_id}", prefix=prefix)
+            if product_list_changed:
+                self.redis_manager.delete(f"store:{store_id}", prefix=prefix)
                 
-            self.logger.debug("Invalidated inventory caches", store_id=store_id)
+            self.logger.debug("Invalidated inventory caches", 
+                            store_id=store_id,
+                            product_ids=product_ids)
             
         except Exception as e:
             self.logger.warning("Failed to invalidate inventory caches", 
@@ -9,11 +9,14 @@ and location-based search with caching optimization.
 from __future__ import annotations
 
 import json
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Tuple
 from zoneinfo import ZoneInfo
 
+from utils.hebrew_calendar import get_hebrew_calendar
+from utils.hours import lookup_timezone
 from utils.logging_config import get_logger
+from utils.zmanim import shabbat_times, zmanim_for_day
 
 logger = get_logger(__name__)
 
@@ -57,23 +60,6 @@ class SynagogueServiceV5:
         'shabbat_mincha': {'default_time': '17:30', 'seasonal': True}
     }
     
-    # Jewish calendar API configuration
-    JEWISH_CALENDAR_CONFIG = {
-        'api_base_url': 'https://www.hebcal.com/hebcal',
-        'default_options': {
-            'v': 1,
-            'cfg': 'json',
-            'maj': 'on',   # Major holidays
-            'min': 'on',   # Minor holidays
-            'mod': 'on',   # Modern holidays
-            'nx': 'on',    # Rosh Chodesh
-            'year': 'now',
-            'month': 'x',  # Entire year
-            'ss': 'on',    # Sedra/Parsha
-            'mf': 'on',    # Molad and Rosh Chodesh
-        }
-    }
-    
     def __init__(self, repository=None, cache_manager=None, event_publisher=None):
         """Initialize synagogue service with dependencies."""
         self.repository = repository
@@ -88,21 +74,8 @@ class SynagogueServiceV5:
         
         self.event_publisher = event_publisher
         
-        # Jewish calendar service
-        self.jewish_calendar = None
-        self._init_jewish_calendar()
-    
-    def _init_jewish_calendar(self):
-        """Initialize Jewish calendar integration."""
-        try:
-            import requests
-            self.jewish_calendar_session = requests.Session()
-            self.jewish_calendar_session.headers.update({
-                'User-Agent': 'JewGo-Synagogue-Service/1.0'
-            })
-            logger.info("Jewish calendar integration initialized")
-        except ImportError:
-            logger.warning("requests library not available for Jewish calendar integration")
+        # In-process Jewish calendar (per-day table, no network calls)
+        self.jewish_calendar = get_hebrew_calendar()
     
     def get_entities(
         self,
@@ -682,28 +655,14 @@ class SynagogueServiceV5:
                     # Fallback to UTC
                     date = date.replace(tzinfo=timezone.utc)
             
-            # Check cache for prayer times
-            cache_key = f"prayer_times:{synagogue_id}:{date.date()}:{timezone_name}"
-            cached_times = self.cache_manager.get(cache_key, prefix='cache')
-            if cached_times:
-                return cached_times
-            
-            # Calculate prayer times
+            # Calculate prayer times (pure computation, no cache round trip needed)
             prayer_times = self._calculate_prayer_times(synagogue, date)
             
             # Get Jewish calendar information
-            jewish_calendar_info = self._get_jewish_calendar_info(date)
+            jewish_calendar_info = self._get_jewish_calendar_info(date, synagogue)
             if jewish_calendar_info:
                 prayer_times['jewish_calendar'] = jewish_calendar_info
             
-            # Cache result for 24 hours
-            self.cache_manager.set(
-                cache_key,
-                prayer_times,
-                ttl=24 * 3600,
-                prefix='cache'
-            )
-            
             return prayer_times
             
         except Exception as e:
@@ -770,7 +729,7 @@ class SynagogueServiceV5:
                     enhanced['todays_times'] = today_times
             
             # Add Jewish calendar information for today
-            today_jewish_info = self._get_jewish_calendar_info(datetime.now())
+            today_jewish_info = self._get_jewish_calendar_info(datetime.now(), synagogue)
             if today_jewish_info:
                 enhanced['jewish_calendar_today'] = today_jewish_info
             
@@ -918,10 +877,6 @@ class SynagogueServiceV5:
     def _calculate_prayer_times(self, synagogue: Dict[str, Any], date: datetime) -> Dict[str, Any]:
         """Calculate prayer times for synagogue and date."""
         try:
-            # This is a simplified implementation
-            # In a real system, you'd use a proper Jewish calendar library
-            # like pyluach or integrate with HebCal API
-            
             prayer_times = {}
             
             # Get basic times from synagogue services or use defaults
@@ -935,133 +890,76 @@ class SynagogueServiceV5:
                 else:
                     prayer_times[prayer] = config['default_time']
             
-            # Add seasonal adjustments (simplified)
-            if date.month in [11, 12, 1, 2]:  # Winter months
-                # Earlier candle lighting in winter
-                if 'kabbalat_shabbat' in prayer_times:
-                    # This would be calculated based on sunset times
-                    prayer_times['kabbalat_shabbat'] = '17:30'
-            else:  # Summer months
-                if 'kabbalat_shabbat' in prayer_times:
-                    prayer_times['kabbalat_shabbat'] = '19:00'
-            
-            return {
+            result = {
                 'date': date.date().isoformat(),
                 'times': prayer_times,
                 'timezone': str(date.tzinfo) if date.tzinfo else 'UTC',
                 'source': 'synagogue_schedule'
             }
             
-        except Exception as e:
-            logger.error(f"Error calculating prayer times: {e}")
-            return {'error': 'Calculation failed'}
-    
-    def _get_jewish_calendar_info(self, date: datetime) -> Optional[Dict[str, Any]]:
-        """Get Jewish calendar information for date."""
-        try:
-            # Check cache first
-            cache_key = f"jewish_calendar:{date.date()}"
-            cached_info = self.cache_manager.get(cache_key, prefix='cache')
-            if cached_info:
-                return cached_info
-            
-            # Try to fetch from HebCal API
-            if hasattr(self, 'jewish_calendar_session'):
-                params = self.JEWISH_CALENDAR_CONFIG['default_options'].copy()
-                params.update({
-                    'year': date.year,
-                    'month': date.month,
-                    'ss': 'on'  # Include sedra
-                })
+            location = self._get_location(synagogue, date)
+            if location:
+                latitude, longitude, tz_name = location
+                zmanim = zmanim_for_day(date.date(), latitude, longitude, tz_name)
+                result['zmanim'] = {name: self._format_clock(value) for name, value in zmanim.items()}
                 
-                try:
-                    response = self.jewish_calendar_session.get(
-                        self.JEWISH_CALENDAR_CONFIG['api_base_url'],
-                        params=params,
-                        timeout=5
-                    )
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        
-                        # Extract relevant information for the specific date
-                        calendar_info = self._parse_jewish_calendar_response(data, date)
-                        
-                        # Cache for 24 hours
-                        self.cache_manager.set(
-                            cache_key,
-                            calendar_info,
-                            ttl=24 * 3600,
-                            prefix='cache'
-                        )
-                        
-                        return calendar_info
-                        
-                except Exception as e:
-                    logger.warning(f"Error fetching Jewish calendar data: {e}")
+                # Kabbalat Shabbat follows this week's candle lighting unless the synagogue set a time
+                kabbalat_shabbat = services.get('kabbalat_shabbat')
+                if not (isinstance(kabbalat_shabbat, dict) and kabbalat_shabbat.get('time')):
+                    friday = date.date() + timedelta(days=(4 - date.weekday()) % 7)
+                    erev_shabbat = self.jewish_calendar.day(friday, israel=tz_name == 'Asia/Jerusalem')
+                    candles = shabbat_times(erev_shabbat, latitude, longitude, tz_name)['candle_lighting']
+                    if candles:
+                        prayer_times['kabbalat_shabbat'] = self._format_clock(candles)
             
-            return None
+            return result
             
         except Exception as e:
-            logger.error(f"Error getting Jewish calendar info: {e}")
-            return None
+            logger.error(f"Error calculating prayer times: {e}")
+            return {'error': 'Calculation failed'}
     
-    def _parse_jewish_calendar_response(self, data: Dict[str, Any], date: datetime) -> Dict[str, Any]:
-        """Parse Jewish calendar API response for specific date."""
+    def _get_jewish_calendar_info(self, date: datetime, synagogue: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Get Jewish calendar information for date, with candle lighting/havdalah for the synagogue's location."""
         try:
+            location = self._get_location(synagogue, date) if synagogue else None
+            israel = bool(location and location[2] == 'Asia/Jerusalem')
+            day = self.jewish_calendar.day(date, israel=israel)
+            
             calendar_info = {
-                'hebrew_date': None,
-                'parsha': None,
-                'holidays': [],
+                'hebrew_date': {'english': day.hebrew.english(), 'hebrew': day.hebrew.hebrew()},
+                'parsha': {'english': day.parsha[0], 'hebrew': day.parsha[1]} if day.parsha else None,
+                'holidays': [
+                    {'name': holiday.name, 'hebrew': holiday.hebrew, 'category': holiday.category}
+                    for holiday in day.holidays
+                ],
                 'candle_lighting': None,
                 'havdalah': None
             }
             
-            items = data.get('items', [])
-            target_date = date.date()
-            
-            for item in items:
-                item_date_str = item.get('date')
-                if not item_date_str:
-                    continue
-                
-                try:
-                    item_date = datetime.strptime(item_date_str, '%Y-%m-%d').date()
-                    if item_date == target_date:
-                        
-                        category = item.get('category')
-                        title = item.get('title')
-                        hebrew = item.get('hebrew')
-                        
-                        if category == 'parashat':
-                            calendar_info['parsha'] = {
-                                'english': title,
-                                'hebrew': hebrew
-                            }
-                        elif category in ['holiday', 'roshchodesh', 'fastday']:
-                            calendar_info['holidays'].append({
-                                'name': title,
-                                'hebrew': hebrew,
-                                'category': category
-                            })
-                        elif category == 'candles':
-                            calendar_info['candle_lighting'] = item.get('title')
-                        elif category == 'havdalah':
-                            calendar_info['havdalah'] = item.get('title')
-                        elif category == 'hebdate':
-                            calendar_info['hebrew_date'] = {
-                                'english': title,
-                                'hebrew': hebrew
-                            }
-                
-                except ValueError:
-                    continue
+            if location and (day.candle_lighting or day.havdalah):
+                times = shabbat_times(day, *location)
+                calendar_info['candle_lighting'] = self._format_clock(times['candle_lighting'])
+                calendar_info['havdalah'] = self._format_clock(times['havdalah'])
             
             return calendar_info
             
         except Exception as e:
-            logger.error(f"Error parsing Jewish calendar response: {e}")
-            return {'error': 'Parse failed'}
+            logger.error(f"Error getting Jewish calendar info: {e}")
+            return None
+    
+    def _get_location(self, synagogue: Dict[str, Any], date: datetime) -> Optional[Tuple[float, float, str]]:
+        """Latitude, longitude and timezone name used for zmanim, or None without coordinates."""
+        latitude = synagogue.get('latitude')
+        longitude = synagogue.get('longitude')
+        if latitude is None or longitude is None:
+            return None
+        
+        tz_name = getattr(date.tzinfo, 'key', None) or self._get_synagogue_timezone(synagogue)
+        return float(latitude), float(longitude), tz_name or 'UTC'
+    
+    @staticmethod
+    def _format_clock(value: Optional[datetime]) -> Optional[str]:
+        return value.strftime('%H:%M') if value else None
     
     def _get_synagogue_timezone(self, synagogue: Dict[str, Any]) -> Optional[str]:
         """Get timezone for synagogue based on location."""
@@ -1074,6 +972,10 @@ class SynagogueServiceV5:
         if not latitude or not longitude:
             return None
         
+        timezone_name = lookup_timezone(latitude, longitude)
+        if timezone_name:
+            return timezone_name
+        
         # Simple timezone mapping for major US cities
         # In production, use a proper timezone lookup service
         if -125 <= longitude <= -120:
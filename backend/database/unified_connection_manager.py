@@ -34,6 +34,7 @@ from sqlalchemy.exc import (
 )
 
 from utils.logging_config import get_logger
+from utils.process_lifecycle import install_idle_liveness_check, prewarm_engine, register_fork_resource
 
 logger = get_logger(__name__)
 
@@ -105,6 +106,7 @@ class ConnectionMetrics:
         self.total_queries = 0
         self.failed_queries = 0
         self.query_times = []
+        self.pool_wait_times = []
         self.connection_errors = []
         self._lock = threading.Lock()
     
@@ -128,6 +130,12 @@ class ConnectionMetrics:
             if len(self.query_times) > 1000:
                 self.query_times = self.query_times[-1000:]
     
+    def record_pool_wait(self, wait_time: float):
+        with self._lock:
+            self.pool_wait_times.append(wait_time)
+            if len(self.pool_wait_times) > 1000:
+                self.pool_wait_times = self.pool_wait_times[-1000:]
+    
     def record_error(self, error: Exception):
         with self._lock:
             self.connection_errors.append({
@@ -143,6 +151,7 @@ class ConnectionMetrics:
     def get_stats(self) -> Dict[str, Any]:
         with self._lock:
             avg_query_time = sum(self.query_times) / len(self.query_times) if self.query_times else 0
+            avg_pool_wait = sum(self.pool_wait_times) / len(self.pool_wait_times) if self.pool_wait_times else 0
             return {
                 'total_connections': self.connection_count,
                 'active_connections': self.active_connections,
@@ -150,6 +159,7 @@ class ConnectionMetrics:
                 'failed_queries': self.failed_queries,
                 'success_rate': (self.total_queries - self.failed_queries) / max(1, self.total_queries),
                 'average_query_time': avg_query_time,
+                'average_pool_wait': avg_pool_wait,
                 'recent_errors': self.connection_errors[-10:] if self.connection_errors else []
             }
 
@@ -188,6 +198,7 @@ class UnifiedConnectionManager:
         self._is_connected = False
         self._connection_lock = threading.Lock()
         self.metrics = ConnectionMetrics()
+        register_fork_resource(self)
         
         logger.info("Unified connection manager initialized")
     
@@ -214,11 +225,14 @@ class UnifiedConnectionManager:
                     max_overflow=ConfigManager.get_db_max_overflow(),
                     pool_timeout=ConfigManager.get_db_pool_timeout(),
                     pool_recycle=ConfigManager.get_db_pool_recycle(),
-                    pool_pre_ping=True,  # Validate connections before use
                     connect_args=connect_args,
+                    # Compiled SQL is cached per statement shape; size it for every hot shape
+                    query_cache_size=int(os.getenv('DB_QUERY_CACHE_SIZE', '500')),
                     echo=os.getenv('DB_ECHO', 'false').lower() == 'true',
                     future=True  # Use SQLAlchemy 2.0 style
                 )
+                # Validate connections that sat idle instead of pinging on every checkout
+                install_idle_liveness_check(self.engine)
                 
                 # Register event listeners
                 self._register_event_listeners()
@@ -256,6 +270,20 @@ class UnifiedConnectionManager:
             self.metrics.record_disconnection()
             logger.info("Database connection closed")
     
+    def reset_after_fork(self):
+        """Forget connections inherited from the parent process; new ones open lazily."""
+        self._connection_lock = threading.Lock()
+        if self.SessionLocal:
+            # Drop, don't close: closing would roll back on the parent's sockets
+            self.SessionLocal.registry.clear()
+        if self.engine:
+            self.engine.dispose(close=False)
+    
+    def prewarm(self, target: int):
+        """Open up to `target` pooled connections ahead of the first request."""
+        if self.is_connected():
+            prewarm_engine(self.engine, min(target, self.engine.pool.size()))
+    
     def is_connected(self) -> bool:
         """Check if database connection is active."""
         return self._is_connected and self.engine is not None
@@ -329,6 +357,66 @@ class UnifiedConnectionManager:
         finally:
             session.close()
     
+    @contextmanager
+    def read_scope(self, statement_timeout_ms: Optional[int] = None):
+        """
+        Context manager for read-only database sessions.
+        
+        Use this instead of session_scope() for pure reads. The transaction
+        begins READ ONLY with transaction-local statement and
+        idle-in-transaction timeouts, and it is never committed; closing the
+        session rolls it back. Pool wait and query time are recorded
+        separately. Inside an open session_scope() the enclosing
+        transaction is reused as is.
+        
+        Args:
+            statement_timeout_ms: Override PG_STATEMENT_TIMEOUT for this scope
+            
+        Yields:
+            Session: SQLAlchemy session object
+        """
+        if not self.is_connected():
+            if not self.connect():
+                raise RuntimeError("Failed to establish database connection")
+        
+        session = self.get_session()
+        if session.in_transaction():
+            yield session
+            return
+        
+        start_time = time.perf_counter()
+        query_start = None
+        try:
+            if self.engine.dialect.name == 'postgresql':
+                # psycopg2 folds this into the BEGIN it sends anyway
+                session.connection(execution_options={'postgresql_readonly': True})
+                query_start = time.perf_counter()
+                session.execute(text(self._read_only_settings(statement_timeout_ms)))
+            else:
+                session.connection()
+                query_start = time.perf_counter()
+            self.metrics.record_pool_wait(query_start - start_time)
+            
+            yield session
+            
+            self.metrics.record_query(time.perf_counter() - query_start, success=True)
+            
+        except Exception as e:
+            self.metrics.record_query(time.perf_counter() - (query_start or start_time), success=False)
+            self.metrics.record_error(e)
+            logger.error(f"Database read error: {e}")
+            
+            if isinstance(e, OperationalError) and self._is_connection_error(e):
+                logger.info("Attempting to reconnect to database")
+                session.close()
+                self.disconnect()
+                self.connect()
+            
+            raise
+            
+        finally:
+            session.close()
+    
     def get_session(self) -> Session:
         """
         Get a new database session.
@@ -352,7 +440,8 @@ class UnifiedConnectionManager:
         self, 
         query: str, 
         params: Optional[Dict[str, Any]] = None,
-        fetch_mode: str = 'all'
+        fetch_mode: str = 'all',
+        read_only: bool = False
     ) -> Union[List[Dict[str, Any]], Dict[str, Any], None]:
         """
         Execute a query with automatic session management.
@@ -361,11 +450,13 @@ class UnifiedConnectionManager:
             query: SQL query string
             params: Query parameters
             fetch_mode: 'all', 'one', or 'none' for different fetch modes
+            read_only: Run in read_scope() (no commit) instead of session_scope()
             
         Returns:
             Query results based on fetch_mode
         """
-        with self.session_scope() as session:
+        scope = self.read_scope() if read_only else self.session_scope()
+        with scope as session:
             result = session.execute(text(query), params or {})
             
             if fetch_mode == 'all':
@@ -474,6 +565,15 @@ class UnifiedConnectionManager:
         
         return connect_args
     
+    def _read_only_settings(self, statement_timeout_ms: Optional[int] = None) -> str:
+        """SET LOCAL statements for a read-only transaction (one round trip)."""
+        statement_timeout = int(statement_timeout_ms or ConfigManager.get_pg_statement_timeout())
+        idle_timeout = int(ConfigManager.get_pg_idle_tx_timeout())
+        return (
+            f"SET LOCAL statement_timeout = {statement_timeout}; "
+            f"SET LOCAL idle_in_transaction_session_timeout = {idle_timeout}"
+        )
+    
     def _register_event_listeners(self):
         """Register SQLAlchemy event listeners for monitoring and logging."""
         
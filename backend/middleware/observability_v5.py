@@ -14,10 +14,11 @@ import uuid
 import re
 from typing import Dict, Any
 from functools import wraps
-from collections import defaultdict
 
 from flask import g, request
 
+from monitoring.prometheus_exposition import observe_request
+from monitoring.request_metrics import get_request_metrics
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -54,7 +55,8 @@ class ObservabilityV5Middleware:
     
     def __init__(self, app=None):
         self.app = app
-        self.metrics = defaultdict(list)
+        # Shared by every instance (blueprints create their own middleware objects)
+        self.request_metrics = get_request_metrics()
         self.traces = []
         self.otel_tracer = None
         if app is not None:
@@ -227,35 +229,16 @@ class ObservabilityV5Middleware:
         getattr(logger, log_level)(f"Request completed | {json.dumps(response_info, default=str)}")
     
     def _collect_request_metrics(self, response, response_time_ms: float):
-        """Collect request metrics for monitoring."""
-        timestamp = time.time()
+        """Collect request metrics for monitoring (O(1), fixed memory)."""
+        # The app-level hook and blueprint hooks may both see the same request
+        if getattr(g, 'obs_metrics_recorded', False):
+            return
+        g.obs_metrics_recorded = True
         
-        metric_data = {
-            'timestamp': timestamp,
-            'trace_id': getattr(g, 'obs_trace_id', None),
-            'method': request.method,
-            'path': request.path,
-            'endpoint': request.endpoint or 'unknown',
-            'status_code': response.status_code,
-            'response_time_ms': response_time_ms,
-            'user_id': getattr(g, 'user_id', None),
-            'user_tier': getattr(g, 'rate_limit_tier', 'unknown'),
-            'content_length': response.content_length or 0,
-            'is_error': response.status_code >= 400,
-            'is_slow': response_time_ms > self.PERFORMANCE_THRESHOLDS['response_time_ms']['warning'],
-        }
-        
-        # Store metrics by endpoint
-        endpoint_key = f"{request.method}_{request.endpoint or 'unknown'}"
-        self.metrics[endpoint_key].append(metric_data)
-        
-        # Store overall metrics
-        self.metrics['overall'].append(metric_data)
-        
-        # Cleanup old metrics (keep last 1000 per endpoint)
-        for key in self.metrics:
-            if len(self.metrics[key]) > 1000:
-                self.metrics[key] = self.metrics[key][-1000:]
+        endpoint = request.endpoint or 'unknown'
+        self.request_metrics.record(f"{request.method}_{endpoint}", response.status_code, response_time_ms)
+        # Cross-worker totals for the Prometheus /metrics endpoint
+        observe_request(request.method, endpoint, response.status_code, response_time_ms / 1000.0)
     
     def _record_exception(self, exception):
         """Record exception details with PII masking."""
@@ -423,14 +406,12 @@ def record_custom_metric_v5(name: str, value: float, tags: Dict[str, str] = None
 
 
 def get_observability_stats_v5() -> Dict[str, Any]:
-    """Get observability statistics for v5."""
+    """Get observability statistics for v5 (merged from per-thread histograms)."""
     try:
         obs_middleware = ObservabilityV5Middleware()
+        snapshot = obs_middleware.request_metrics.snapshot()
         
-        # Calculate basic stats from metrics
-        total_requests = len(obs_middleware.metrics.get('overall', []))
-        
-        if total_requests == 0:
+        if snapshot['request_count'] == 0:
             return {
                 'total_requests': 0,
                 'average_response_time_ms': 0,
@@ -438,32 +419,21 @@ def get_observability_stats_v5() -> Dict[str, Any]:
                 'opentelemetry_enabled': obs_middleware.otel_tracer is not None
             }
         
-        overall_metrics = obs_middleware.metrics['overall']
-        response_times = [m['response_time_ms'] for m in overall_metrics]
-        errors = [m for m in overall_metrics if m['is_error']]
-        
         stats = {
-            'total_requests': total_requests,
-            'average_response_time_ms': sum(response_times) / len(response_times) if response_times else 0,
-            'p95_response_time_ms': sorted(response_times)[int(len(response_times) * 0.95)] if response_times else 0,
-            'error_rate_percent': (len(errors) / total_requests) * 100,
+            'total_requests': snapshot['request_count'],
+            'average_response_time_ms': snapshot['average_response_time_ms'],
+            'p50_response_time_ms': snapshot['p50_response_time_ms'],
+            'p90_response_time_ms': snapshot['p90_response_time_ms'],
+            'p95_response_time_ms': snapshot['p95_response_time_ms'],
+            'p99_response_time_ms': snapshot['p99_response_time_ms'],
+            'max_response_time_ms': snapshot['max_response_time_ms'],
+            'error_rate_percent': snapshot['error_rate_percent'],
+            'since': snapshot['since'],
             'opentelemetry_enabled': obs_middleware.otel_tracer is not None,
             'performance_thresholds': obs_middleware.PERFORMANCE_THRESHOLDS,
-            'endpoint_stats': {}
+            'endpoint_stats': snapshot['routes']
         }
         
-        # Calculate per-endpoint stats
-        for endpoint_key, metrics in obs_middleware.metrics.items():
-            if endpoint_key != 'overall' and metrics:
-                endpoint_response_times = [m['response_time_ms'] for m in metrics]
-                endpoint_errors = [m for m in metrics if m['is_error']]
-                
-                stats['endpoint_stats'][endpoint_key] = {
-                    'request_count': len(metrics),
-                    'average_response_time_ms': sum(endpoint_response_times) / len(endpoint_response_times),
-                    'error_rate_percent': (len(endpoint_errors) / len(metrics)) * 100 if metrics else 0
-                }
-        
         return stats
         
     except Exception as e:
@@ -0,0 +1,242 @@
+"""
+Per-request SQL profiler with N+1 detection.
+
+Engine-wide cursor events record every statement into the active
+QueryProfile: statement count, total DB time and a normalized fingerprint
+(literals and bind parameters replaced by ?, IN/VALUES lists collapsed), so
+the same query issued once per row shows up as one fingerprint with a high
+count. Fingerprints repeated at least `n_plus_one_threshold` times in one
+request are reported as likely N+1 patterns.
+
+Profiles nest: the middleware opens one per request and profile_queries()
+can wrap any block (tests use it to assert query budgets), and every active
+profile sees each statement.
+
+Configuration (environment):
+    SQL_PROFILER_ENABLED                 default: on when the app is in debug
+    SQL_PROFILER_N_PLUS_ONE_THRESHOLD    default: 5
+    SQL_PROFILER_SERVER_TIMING           default: on when the app is in debug
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from flask import Flask, Response, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_BIND_PARAMETER = re.compile(r"%\(\w+\)s|%s|(?<![:\w]):\w+|\$\d+|\?")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_ROWS = re.compile(r"(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """Normalize a SQL statement so executions differing only in values match."""
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _BIND_PARAMETER.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _IN_LIST.sub("IN (?)", normalized)
+    normalized = _VALUES_ROWS.sub(r"\1", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+class QueryProfile:
+    """Statements executed while the profile was active."""
+
+    def __init__(self, n_plus_one_threshold: int = DEFAULT_N_PLUS_ONE_THRESHOLD):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.count = 0
+        self.total_ms = 0.0
+        # fingerprint -> [executions, total ms]
+        self.fingerprints: Dict[str, List[float]] = {}
+
+    def record(self, statement: str, duration_ms: float) -> None:
+        self.count += 1
+        self.total_ms += duration_ms
+        key = fingerprint(statement)
+        entry = self.fingerprints.get(key)
+        if entry is None:
+            self.fingerprints[key] = [1, duration_ms]
+        else:
+            entry[0] += 1
+            entry[1] += duration_ms
+
+    def repeated(self, threshold: Optional[int] = None) -> List[Tuple[str, int, float]]:
+        """(fingerprint, executions, total ms) issued at least `threshold` times, most frequent first."""
+        threshold = threshold or self.n_plus_one_threshold
+        return sorted(
+            ((fp, int(count), total) for fp, (count, total) in self.fingerprints.items() if count >= threshold),
+            key=lambda item: -item[1],
+        )
+
+    def summary(self) -> Dict:
+        return {
+            'query_count': self.count,
+            'db_time_ms': round(self.total_ms, 3),
+            'distinct_statements': len(self.fingerprints),
+            'n_plus_one': [
+                {'fingerprint': fp, 'count': count, 'total_ms': round(total, 3)}
+                for fp, count, total in self.repeated()
+            ],
+        }
+
+
+_active_profiles: ContextVar[Tuple[QueryProfile, ...]] = ContextVar('sql_profiler_active', default=())
+_listeners_installed = False
+_install_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_profiles.get():
+        conn.info.setdefault('sql_profiler_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profiles = _active_profiles.get()
+    started = conn.info.get('sql_profiler_started')
+    if not profiles or not started:
+        return
+    duration_ms = (time.perf_counter() - started.pop()) * 1000
+    for profile in profiles:
+        profile.record(statement, duration_ms)
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute does not fire for failed statements
+    connection = exception_context.connection
+    if connection is not None:
+        started = connection.info.get('sql_profiler_started')
+        if started:
+            started.pop()
+
+
+def install_listeners() -> None:
+    """Attach the cursor hooks to every Engine (idempotent)."""
+    global _listeners_installed
+    with _install_lock:
+        if _listeners_installed:
+            return
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        _listeners_installed = True
+
+
+def start_profile(profile: QueryProfile):
+    """Activate `profile`; returns a token for stop_profile."""
+    install_listeners()
+    return _active_profiles.set(_active_profiles.get() + (profile,))
+
+
+def stop_profile(token) -> None:
+    _active_profiles.reset(token)
+
+
+@contextmanager
+def profile_queries(n_plus_one_threshold: int = DEFAULT_N_PLUS_ONE_THRESHOLD) -> Iterator[QueryProfile]:
+    """Profile every statement executed inside the block."""
+    profile = QueryProfile(n_plus_one_threshold)
+    token = start_profile(profile)
+    try:
+        yield profile
+    finally:
+        stop_profile(token)
+
+
+@contextmanager
+def assert_query_budget(max_queries: int, max_repeats: Optional[int] = None) -> Iterator[QueryProfile]:
+    """Fail if the block runs more than `max_queries` statements, or any one
+    fingerprint more than `max_repeats` times."""
+    with profile_queries() as profile:
+        yield profile
+    problems = []
+    if profile.count > max_queries:
+        problems.append(f"{profile.count} queries (budget {max_queries})")
+    if max_repeats is not None:
+        for fp, count, _ in profile.repeated(max_repeats + 1):
+            problems.append(f"{count}x (max {max_repeats}): {fp}")
+    assert not problems, "Query budget exceeded:\n  " + "\n  ".join(problems)
+
+
+class SQLProfilerMiddleware:
+    """Opens a QueryProfile per request and reports it after the response."""
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.app = app
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """Initialize the middleware with Flask app."""
+        self.app = app
+        self.enabled = _env_flag('SQL_PROFILER_ENABLED', app.debug)
+        if not self.enabled:
+            return
+        self.threshold = int(os.getenv('SQL_PROFILER_N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD))
+        self.server_timing = _env_flag('SQL_PROFILER_SERVER_TIMING', app.debug)
+        install_listeners()
+        self._register_middleware()
+        logger.info("SQL profiler middleware initialized", n_plus_one_threshold=self.threshold)
+
+    def _register_middleware(self) -> None:
+        """Register before/after request hooks for query profiling."""
+
+        @self.app.before_request
+        def _start_sql_profile():
+            g.sql_profile = QueryProfile(self.threshold)
+            g.sql_profile_token = start_profile(g.sql_profile)
+
+        @self.app.after_request
+        def _report_sql_profile(response: Response) -> Response:
+            profile = g.get('sql_profile')
+            if profile is None:
+                return response
+            for fp, count, total_ms in profile.repeated():
+                logger.warning(
+                    "Possible N+1 query pattern",
+                    endpoint=request.endpoint,
+                    path=request.path,
+                    executions=count,
+                    total_ms=round(total_ms, 2),
+                    fingerprint=fp[:500],
+                )
+            if self.server_timing:
+                metric = f'db;dur={profile.total_ms:.1f};desc="{profile.count} queries"'
+                existing = response.headers.get('Server-Timing')
+                response.headers['Server-Timing'] = f"{existing}, {metric}" if existing else metric
+            return response
+
+        @self.app.teardown_request
+        def _stop_sql_profile(exception):
+            token = g.pop('sql_profile_token', None)
+            if token is not None:
+                try:
+                    stop_profile(token)
+                except ValueError:
+                    # Token from a different context (e.g. streamed response); drop it
+                    _active_profiles.set(())
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Multi-process Prometheus exposition.
+
+Gunicorn runs several worker processes, so in-process registries only ever
+show one worker's numbers. When PROMETHEUS_MULTIPROC_DIR is set (the gunicorn
+config does this before the app is loaded), prometheus_client writes every
+counter and histogram sample to a per-process mmap file in that directory;
+any worker can then render the sum across all workers from those files.
+Without the variable, metrics stay in the default in-process registry.
+
+Rendering reads one small file per worker and metric type, and the result
+is cached for a short TTL so concurrent scrapes do not repeat the merge.
+"""
+
+import glob
+import os
+import threading
+import time
+from typing import Optional, Tuple
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        REGISTRY,
+        CollectorRegistry,
+        Counter,
+        Histogram,
+        generate_latest,
+        multiprocess,
+    )
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = 'text/plain; version=0.0.4; charset=utf-8'
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+MULTIPROC_DIR_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+RENDER_TTL_SECONDS = float(os.getenv('PROMETHEUS_RENDER_TTL_SECONDS', '1.0'))
+
+# Seconds; covers fast cache hits through slow report endpoints
+REQUEST_DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+if PROMETHEUS_AVAILABLE:
+    HTTP_REQUESTS = Counter(
+        'jewgo_http_requests_total',
+        'Total HTTP requests handled by v5 routes',
+        ['method', 'endpoint', 'status'],
+    )
+    HTTP_REQUEST_DURATION = Histogram(
+        'jewgo_http_request_duration_seconds',
+        'Latency of v5 HTTP requests',
+        ['method', 'endpoint'],
+        buckets=REQUEST_DURATION_BUCKETS,
+    )
+
+
+def multiprocess_dir() -> Optional[str]:
+    """Directory shared by all workers, or None when running single-process."""
+    return os.environ.get(MULTIPROC_DIR_ENV) or None
+
+
+def prepare_multiprocess_dir(path: str) -> None:
+    """Create `path` and drop sample files left over from a previous run.
+
+    Must run in the gunicorn master before any worker starts.
+    """
+    os.makedirs(path, exist_ok=True)
+    for stale in glob.glob(os.path.join(path, '*.db')):
+        os.remove(stale)
+
+
+def mark_worker_dead(pid: int) -> None:
+    """Retire a dead worker's live gauges; its counters keep counting toward totals."""
+    if PROMETHEUS_AVAILABLE and multiprocess_dir():
+        multiprocess.mark_process_dead(pid)
+
+
+def observe_request(method: str, endpoint: str, status_code: int, duration_seconds: float) -> None:
+    """Record one request in the shared (cross-worker) metrics."""
+    if not PROMETHEUS_AVAILABLE:
+        return
+    HTTP_REQUESTS.labels(method, endpoint, str(status_code)).inc()
+    HTTP_REQUEST_DURATION.labels(method, endpoint).observe(duration_seconds)
+
+
+def collect_metrics(path: Optional[str] = None) -> bytes:
+    """Render Prometheus text for all workers (or this process when not multi-process)."""
+    if not PROMETHEUS_AVAILABLE:
+        return b'# prometheus_client not available\n'
+    path = path or multiprocess_dir()
+    if not path:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=path)
+    return generate_latest(registry)
+
+
+_render_lock = threading.Lock()
+_rendered: Tuple[float, bytes] = (float('-inf'), b'')
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Cached exposition body and its content type for the /metrics endpoint."""
+    global _rendered
+    rendered_at, body = _rendered
+    if time.monotonic() - rendered_at < RENDER_TTL_SECONDS:
+        return body, CONTENT_TYPE_LATEST
+    with _render_lock:
+        rendered_at, body = _rendered
+        if time.monotonic() - rendered_at >= RENDER_TTL_SECONDS:
+            body = collect_metrics()
+            _rendered = (time.monotonic(), body)
+    return body, CONTENT_TYPE_LATEST
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Fixed-memory request metrics.
+
+Per-route, per-status latency histograms with log-linear buckets (HDR-style:
+fixed size, bounded relative error). Each OS thread records into its own
+shard without taking a lock; reads merge the shards. Shards are keyed by the
+real OS thread ident, so under the gevent worker all greenlets of a worker
+share one shard (they only switch on I/O, never inside record()). Recording
+is O(1), percentiles walk the fixed bucket array instead of sorting samples,
+and memory depends on the number of (route, status) series and OS threads,
+not on traffic.
+
+Aggregates are per process; each Gunicorn worker keeps its own registry.
+"""
+
+import math
+import sys
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, Optional, Tuple
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    # Unpatched even after monkey.patch_all(), which makes threading.get_ident
+    # (and threading.local) per greenlet
+    from gevent.monkey import get_original
+    _os_thread_ident = get_original("threading", "get_ident")
+except ImportError:
+    _os_thread_ident = threading.get_ident
+
+SeriesKey = Tuple[str, int]
+
+# Series beyond the per-shard limit are folded into this route name
+OVERFLOW_ROUTE = "__other__"
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram in milliseconds.
+
+    Bucket 0 holds values below MIN_MS; bucket i >= 1 covers
+    [MIN_MS * GROWTH**(i-1), MIN_MS * GROWTH**i); the last bucket also absorbs
+    everything above MAX_MS. Percentiles report the bucket's geometric midpoint,
+    so their relative error is at most about (GROWTH - 1) / 2.
+    """
+
+    MIN_MS = 0.01
+    MAX_MS = 600_000.0
+    GROWTH = 1.05
+    _LOG_GROWTH = math.log(GROWTH)
+    BUCKETS = int(math.ceil(math.log(MAX_MS / MIN_MS) / _LOG_GROWTH)) + 2
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * self.BUCKETS))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @classmethod
+    def bucket_for(cls, value_ms: float) -> int:
+        if value_ms < cls.MIN_MS:
+            return 0
+        return min(int(math.log(value_ms / cls.MIN_MS) / cls._LOG_GROWTH) + 1, cls.BUCKETS - 1)
+
+    @classmethod
+    def bucket_value(cls, index: int) -> float:
+        if index == 0:
+            return cls.MIN_MS / 2
+        return cls.MIN_MS * cls.GROWTH ** (index - 0.5)
+
+    def record(self, value_ms: float) -> None:
+        self.counts[self.bucket_for(value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        counts = self.counts
+        for index, value in enumerate(other.counts):
+            if value:
+                counts[index] += value
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent: float) -> float:
+        """Value at `percent` (0-100); 0.0 when empty."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * percent / 100.0))
+        seen = 0
+        for index, value in enumerate(self.counts):
+            seen += value
+            if seen >= rank:
+                return min(self.bucket_value(index), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class RequestMetrics:
+    """Per-OS-thread sharded registry of (route, status) latency histograms."""
+
+    def __init__(self, max_series_per_shard: int = 1000):
+        self.max_series_per_shard = max_series_per_shard
+        self.started_at = time.time()
+        # OS thread ident -> shard, replaced (never mutated) under _lock so
+        # record() can look up its shard without locking. Shards of exited
+        # threads are folded into _retired so thread churn does not grow memory
+        self._shards: Dict[int, Dict[SeriesKey, LatencyHistogram]] = {}
+        self._retired: Dict[SeriesKey, LatencyHistogram] = {}
+        # Only taken when a thread records its first request, and on reads
+        self._lock = threading.Lock()
+
+    def _shard(self) -> Dict[SeriesKey, LatencyHistogram]:
+        ident = _os_thread_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            with self._lock:
+                self._retire_dead_shards()
+                shard = self._shards.get(ident)
+                if shard is None:
+                    shard = {}
+                    self._shards = {**self._shards, ident: shard}
+        return shard
+
+    def _retire_dead_shards(self) -> None:
+        # sys._current_frames() is keyed by the idents of running OS threads
+        running = sys._current_frames().keys()
+        live = {}
+        for ident, shard in self._shards.items():
+            if ident in running:
+                live[ident] = shard
+            else:
+                _merge_into(self._retired, shard.items())
+        self._shards = live
+
+    def record(self, route: str, status_code: int, latency_ms: float) -> None:
+        """Record one request; lock-free and O(1)."""
+        shard = self._shard()
+        key = (route, status_code)
+        histogram = shard.get(key)
+        if histogram is None:
+            if len(shard) >= self.max_series_per_shard:
+                key = (OVERFLOW_ROUTE, status_code)
+                histogram = shard.get(key)
+            if histogram is None:
+                histogram = shard[key] = LatencyHistogram()
+        histogram.record(latency_ms)
+
+    def merged(self) -> Dict[SeriesKey, LatencyHistogram]:
+        """All series, merged across threads."""
+        merged: Dict[SeriesKey, LatencyHistogram] = {}
+        with self._lock:
+            self._retire_dead_shards()
+            _merge_into(merged, self._retired.items())
+            shards = list(self._shards.values())
+        for shard in shards:
+            # list() copies atomically even if the owner adds a series meanwhile
+            _merge_into(merged, list(shard.items()))
+        return merged
+
+    def snapshot(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> Dict:
+        """Overall and per-route aggregates."""
+        percentiles = tuple(percentiles)
+        overall = LatencyHistogram()
+        overall_errors = 0
+        routes: Dict[str, Dict] = {}
+        for (route, status_code), histogram in sorted(self.merged().items()):
+            overall.merge(histogram)
+            entry = routes.setdefault(route, {
+                "histogram": LatencyHistogram(), "errors": 0, "status_codes": {},
+            })
+            entry["histogram"].merge(histogram)
+            entry["status_codes"][str(status_code)] = histogram.count
+            if status_code >= 400:
+                entry["errors"] += histogram.count
+                overall_errors += histogram.count
+
+        stats = _summarize(overall, overall_errors, percentiles)
+        stats["since"] = self.started_at
+        stats["routes"] = {
+            route: dict(
+                _summarize(entry["histogram"], entry["errors"], percentiles),
+                status_codes=entry["status_codes"],
+            )
+            for route, entry in routes.items()
+        }
+        return stats
+
+    def reset(self) -> None:
+        with self._lock:
+            self._retired = {}
+            for shard in self._shards.values():
+                shard.clear()
+            self.started_at = time.time()
+
+
+def _merge_into(target: Dict[SeriesKey, LatencyHistogram], items) -> None:
+    for key, histogram in items:
+        merged = target.get(key)
+        if merged is None:
+            merged = target[key] = LatencyHistogram()
+        merged.merge(histogram)
+
+
+def _summarize(histogram: LatencyHistogram, errors: int, percentiles: Tuple[float, ...]) -> Dict:
+    stats = {
+        "request_count": histogram.count,
+        "error_count": errors,
+        "error_rate_percent": (errors / histogram.count) * 100 if histogram.count else 0,
+        "average_response_time_ms": histogram.mean,
+        "max_response_time_ms": histogram.max,
+    }
+    for percent in percentiles:
+        stats[f"p{percent:g}_response_time_ms"] = histogram.percentile(percent)
+    return stats
+
+
+_request_metrics: Optional[RequestMetrics] = None
+_request_metrics_lock = threading.Lock()
+
+
+def get_request_metrics() -> RequestMetrics:
+    """Process-wide request metrics registry."""
+    global _request_metrics
+    if _request_metrics is None:
+        with _request_metrics_lock:
+            if _request_metrics is None:
+                _request_metrics = RequestMetrics()
+    return _request_metrics
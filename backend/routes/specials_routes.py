@@ -366,15 +366,7 @@ def claim_special(special_id: UUID):
         if special.valid_from > now or special.valid_until < now:
             raise BadRequest("Special is not currently active")
         
-        # Check total claims limit
-        if special.max_claims_total:
-            total_claims = db.session.query(SpecialClaim).filter(
-                SpecialClaim.special_id == special.id
-            ).count()
-            if total_claims >= special.max_claims_total:
-                raise Conflict("Special has reached maximum claims limit")
-        
-        # Create claim via service (handles IntegrityError)
+        # Create claim via service; claim limits are enforced atomically there (raises Conflict)
         try:
             claim, redeem_code = create_claim(
                 special,
@@ -19,6 +19,7 @@ from services.auth.token_manager_v5 import TokenManagerV5
 from services.auth.cookies import set_auth, clear_auth
 from services.auth.jwks_manager import JWKSManager
 from services.auth.sessions import revoke_family
+from services.auth.password_pool import PasswordPoolSaturated
 from services.oauth_service_v5 import OAuthService, OAuthError
 from utils.postgres_auth import get_postgres_auth
 from utils.logging_config import get_logger
@@ -130,6 +131,11 @@ def login():
 
         return response
 
+    except PasswordPoolSaturated as e:
+        return jsonify({
+            'success': False,
+            'error': e.description
+        }), 503, {'Retry-After': str(e.retry_after)}
     except Exception as e:
         logger.error(f"Login error: {e}")
         return jsonify({
@@ -42,8 +42,7 @@ class SimpleEventPublisher:
 event_publisher = SimpleEventPublisher()
 
 # Initialize services with proper dependencies
-from utils.feature_flags_v5 import FeatureFlagsV5
-feature_flags = FeatureFlagsV5()
+feature_flags = feature_flags_v5
 restaurant_service = RestaurantServiceV5(entity_repository, cache_manager, event_publisher)  # OK
 synagogue_service = SynagogueServiceV5(entity_repository, cache_manager, event_publisher)    # OK
 mikvah_service = MikvahServiceV5(entity_repository, cache_manager, feature_flags)
@@ -195,7 +195,9 @@ def get_job_status(job_id: str):
             'timeout': job.timeout,
             'tags': job.tags,
             'result': job.result,
-            'error': job.error
+            'error': job.error,
+            'progress': job.progress,
+            'progress_message': job.progress_message
         }
         
         return jsonify({
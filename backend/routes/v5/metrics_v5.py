@@ -6,10 +6,12 @@ and analytics endpoints with real-time data processing and caching.
 Replaces: metrics_api.py, analytics_endpoints.py, and performance monitoring routes.
 """
 
-from flask import request, jsonify, g
+from flask import Blueprint, Response, request, jsonify, g
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from functools import wraps
+import hmac
+import os
 import time
 from utils.logging_config import get_logger
 from utils.blueprint_factory_v5 import BlueprintFactoryV5
@@ -31,6 +33,9 @@ metrics_v5 = BlueprintFactoryV5.create_blueprint(
     }
 )
 
+# Prometheus scrape endpoint at /metrics (outside the v5 prefix and middleware)
+prometheus_bp = Blueprint('prometheus_exposition', __name__)
+
 # Global service instances
 redis_manager = None
 feature_flags = None
@@ -196,6 +201,46 @@ def metrics_health():
         return jsonify({'error': 'Failed to get metrics health'}), 500
 
 
+@metrics_v5.route('/requests', methods=['GET'])
+@require_metrics_permission()
+def get_request_metrics_v5():
+    """Get live request latency/error aggregates for this process."""
+    try:
+        from middleware.observability_v5 import get_observability_stats_v5
+        
+        stats = get_observability_stats_v5()
+        route = request.args.get('route')
+        if route and 'endpoint_stats' in stats:
+            stats['endpoint_stats'] = {
+                key: value for key, value in stats['endpoint_stats'].items() if key == route
+            }
+        return jsonify(stats)
+        
+    except Exception as e:
+        logger.exception("Failed to get request metrics", error=str(e))
+        return jsonify({'error': 'Failed to get request metrics'}), 500
+
+
+@prometheus_bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus text exposition aggregated across all gunicorn workers."""
+    scrape_token = os.getenv('METRICS_SCRAPE_TOKEN')
+    if scrape_token:
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied, f"Bearer {scrape_token}"):
+            return jsonify({'error': 'Authentication required'}), 401
+    
+    try:
+        from monitoring.prometheus_exposition import render_metrics
+        
+        body, content_type = render_metrics()
+        return Response(body, content_type=content_type)
+        
+    except Exception as e:
+        logger.exception("Failed to render Prometheus metrics", error=str(e))
+        return Response("# metrics unavailable\n", status=500, content_type='text/plain')
+
+
 @metrics_v5.route('/<metric_name>', methods=['GET'])
 def get_metric(metric_name: str):
     """Get specific metric data."""
@@ -278,6 +323,10 @@ def metrics_dashboard():
             }
         }
         
+        # Live request aggregates from the observability histograms
+        from middleware.observability_v5 import get_observability_stats_v5
+        dashboard_data['requests'] = get_observability_stats_v5()
+        
         # Collect all metrics
         for metric_name in METRICS_CONFIG['metric_types']:
             try:
@@ -10,6 +10,7 @@ from flask import request, jsonify
 from typing import Dict, Any, List
 from datetime import datetime
 from utils.logging_config import get_logger
+from cache.search_cache_index import SearchCacheIndex
 from database.repositories.entity_repository_v5 import EntityRepositoryV5
 from database.services.restaurant_service_v5 import RestaurantServiceV5
 from database.services.synagogue_service_v5 import SynagogueServiceV5
@@ -42,6 +43,7 @@ services = {}
 redis_manager = None
 cursor_manager = None
 etag_manager = None
+search_cache_index = None
 
 # Search configuration
 SEARCH_CONFIG = {
@@ -72,12 +74,15 @@ SEARCH_CONFIG = {
 
 def init_services(connection_manager, redis_manager_instance):
     """Initialize service instances."""
-    global entity_repository, services, redis_manager, cursor_manager, etag_manager
+    global entity_repository, services, redis_manager, cursor_manager, etag_manager, search_cache_index
     
     entity_repository = EntityRepositoryV5(connection_manager)
     redis_manager = redis_manager_instance
     cursor_manager = CursorV5Manager()
     etag_manager = ETagV5Manager()
+    search_cache_index = SearchCacheIndex(
+        redis_manager_instance.get_client() if redis_manager_instance else None
+    )
     
     # Initialize entity services
     services = {
@@ -228,6 +233,29 @@ def execute_search(query: Dict[str, Any]) -> Dict[str, Any]:
     return results
 
 
+def cache_search_results(cache_key: str, results: Dict[str, Any], query: Dict[str, Any], ttl: int = 300):
+    """Cache search results and index the entry for targeted invalidation."""
+    if not redis_manager.set(cache_key, results, ttl=ttl, prefix='search'):
+        return
+    
+    if search_cache_index is None:
+        return
+    
+    entity_refs = [
+        (entity_type, item.get('id'))
+        for entity_type, entity_results in results.get('entities', {}).items()
+        for item in entity_results.get('data', [])
+        if isinstance(item, dict)
+    ]
+    search_cache_index.record(
+        redis_manager.build_key(cache_key, prefix='search'),
+        entity_types=query.get('entities', []),
+        entity_refs=entity_refs,
+        location=query.get('location'),
+        ttl=ttl
+    )
+
+
 def generate_facets(results: Dict[str, Any], query: Dict[str, Any]) -> Dict[str, Any]:
     """Generate search facets from results."""
     facets = {}
@@ -307,7 +335,7 @@ def unified_search():
             results['facets'] = generate_facets(results, query)
         
         # Cache results
-        redis_manager.set(cache_key, results, ttl=300, prefix='search')  # 5 minutes
+        cache_search_results(cache_key, results, query, ttl=300)  # 5 minutes
         
         return jsonify(results)
         
@@ -385,7 +413,7 @@ def entity_search(entity_type: str):
             results['facets'] = generate_facets(results, query)
         
         # Cache results
-        redis_manager.set(cache_key, results, ttl=300, prefix='search')  # 5 minutes
+        cache_search_results(cache_key, results, query, ttl=300)  # 5 minutes
         
         return jsonify(results)
         
@@ -14,6 +14,7 @@ from middleware.auth_decorators import auth_required
 from services.auth_service_v5 import AuthServiceV5
 from cache.redis_manager_v5 import get_redis_manager_v5
 from database.connection_manager import get_connection_manager
+from services.auth.revocation_filter import publish_revocations
 
 logger = get_logger(__name__)
 
@@ -273,6 +274,7 @@ def revoke_session(session_id: str):
             
             cursor.execute(revoke_query, (session_id, user_id))
             conn.commit()
+            publish_revocations(family_ids=[family_id], jtis=[current_jti])
             
             # Invalidate any cached tokens for this session
             if current_jti:
@@ -315,7 +317,7 @@ def revoke_all_sessions():
             
             # Get all active sessions for user
             query = """
-                SELECT id, current_jti 
+                SELECT id, family_id, current_jti 
                 FROM auth_sessions 
                 WHERE user_id = %s 
                 AND revoked_at IS NULL 
@@ -334,9 +336,10 @@ def revoke_all_sessions():
             
             # Revoke all sessions except current one
             revoked_count = 0
+            revoked_families = []
             revoked_tokens = []
             
-            for session_id, current_jti in sessions:
+            for session_id, family_id, current_jti in sessions:
                 # Skip current session
                 if current_jti == current_session_id:
                     continue
@@ -350,12 +353,14 @@ def revoke_all_sessions():
                 
                 cursor.execute(revoke_query, (session_id, user_id))
                 revoked_count += 1
+                revoked_families.append(family_id)
                 
                 # Collect tokens for invalidation
                 if current_jti:
                     revoked_tokens.append(current_jti)
             
             conn.commit()
+            publish_revocations(family_ids=revoked_families, jtis=revoked_tokens)
             
             # Invalidate all revoked tokens
             for token in revoked_tokens:
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Backfill Restaurant Timezones
+
+Fills restaurants.timezone from latitude/longitude (utils.hours.lookup_timezone)
+for rows that have none, and recompiles their hours so hours_timezone matches.
+New and moved restaurants are resolved at write time by the ORM; this covers
+existing rows and rows written with raw SQL. Runs in id order in small
+batches, one transaction per batch; safe to re-run.
+
+Usage:
+    python scripts/backfill_restaurant_timezones.py
+    python scripts/backfill_restaurant_timezones.py --all --batch-size 1000
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import create_engine, text
+
+from utils.hours import TIMEZONEFINDER_AVAILABLE, lookup_timezone
+from utils.weekly_hours import compile_restaurant_hours
+
+SELECT_BATCH = """
+    SELECT id, latitude, longitude, hours_json, hours_of_operation
+    FROM restaurants
+    WHERE id > :after
+      AND latitude IS NOT NULL AND longitude IS NOT NULL {missing}
+    ORDER BY id
+    LIMIT :batch_size
+"""
+
+UPDATE_BATCH = text("""
+    UPDATE restaurants AS r
+    SET timezone = v.timezone,
+        hours_week_ranges = CAST(v.ranges AS int4multirange),
+        hours_timezone = v.hours_tz
+    FROM jsonb_to_recordset(CAST(:rows AS jsonb))
+        AS v(id integer, timezone text, ranges text, hours_tz text)
+    WHERE r.id = v.id
+""")
+
+
+def backfill(engine, batch_size: int = 500, all_rows: bool = False) -> dict:
+    """Resolve timezones in batches; returns counts."""
+    select = text(SELECT_BATCH.format(missing="" if all_rows else "AND timezone IS NULL"))
+    stats = {"rows": 0, "resolved": 0, "unresolved": 0}
+    after = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(select, {"after": after, "batch_size": batch_size}).fetchall()
+            if not rows:
+                break
+            updates = []
+            for row in rows:
+                timezone = lookup_timezone(row.latitude, row.longitude)
+                if not timezone:
+                    stats["unresolved"] += 1
+                    continue
+                ranges, hours_tz = compile_restaurant_hours(row.hours_json, row.hours_of_operation, timezone)
+                updates.append({"id": row.id, "timezone": timezone, "ranges": ranges, "hours_tz": hours_tz})
+            if updates:
+                conn.execute(UPDATE_BATCH, {"rows": json.dumps(updates)})
+            stats["resolved"] += len(updates)
+        stats["rows"] += len(rows)
+        after = rows[-1].id
+        print(f"resolved through id {after} ({stats['rows']} rows)")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--all", action="store_true",
+                        help="re-resolve rows that already have a timezone")
+    args = parser.parse_args()
+
+    if not TIMEZONEFINDER_AVAILABLE:
+        sys.exit("timezonefinder is not installed")
+    database_url = os.environ.get("DATABASE_URL")
+    if not database_url:
+        sys.exit("DATABASE_URL is not set")
+
+    stats = backfill(create_engine(database_url), args.batch_size, args.all)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Job Queue Throughput Benchmark
+
+Measures enqueue, scheduled-job promotion and end-to-end execution throughput
+of the JobQueueManager against a local Redis. Uses a dedicated Redis DB and
+flushes it, so never point this at a shared instance.
+
+Usage:
+    REDIS_URL=redis://localhost:6379/15 python scripts/benchmark_job_queue.py --jobs 5000 --workers 4
+    python scripts/benchmark_job_queue.py --mode process --jobs 200 --cpu-work 200000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from cache.redis_manager_v5 import RedisManagerV5
+from services.job_queue_manager import ExecutionMode, JobPriority, JobQueueManager
+
+
+def noop_job(index: int) -> int:
+    """I/O-free job used to measure queue overhead."""
+    return index
+
+
+def cpu_job(iterations: int) -> int:
+    """CPU-bound job used to compare thread and process execution."""
+    total = 0
+    for i in range(iterations):
+        total = (total + i * i) % 1_000_003
+    return total
+
+
+def _wait_for_completion(manager: JobQueueManager, expected: int, timeout: float) -> float:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if manager.redis_client.zcard(manager.completed_queue) >= expected:
+            break
+        time.sleep(0.01)
+    return time.perf_counter() - started
+
+
+def run_benchmark(args) -> dict:
+    redis_url = args.redis_url or os.getenv('REDIS_URL', 'redis://localhost:6379/15')
+    redis_manager = RedisManagerV5({'url': redis_url})
+    if redis_manager.get_client() is None:
+        raise SystemExit(f"Redis not reachable at {redis_url}")
+    redis_manager.get_client().flushdb()
+
+    manager = JobQueueManager(redis_manager, process_pool_size=args.processes)
+    mode = ExecutionMode(args.mode)
+    job_name = 'bench_cpu' if args.cpu_work else 'bench_noop'
+    manager.register_job(job_name, cpu_job if args.cpu_work else noop_job, execution_mode=mode)
+    job_arg = (lambda i: args.cpu_work) if args.cpu_work else (lambda i: i)
+
+    results = {'redis_url': redis_url, 'jobs': args.jobs, 'workers': args.workers, 'mode': mode.value}
+
+    # 1. Enqueue throughput
+    started = time.perf_counter()
+    for i in range(args.jobs):
+        manager.enqueue_job(job_name, job_arg(i), priority=JobPriority.NORMAL)
+    elapsed = time.perf_counter() - started
+    results['enqueue_per_sec'] = round(args.jobs / elapsed, 1)
+
+    # 2. Promotion throughput (scheduled -> pending via Lua)
+    redis_client = manager.redis_client
+    redis_client.delete(manager.pending_queue)
+    pipe = redis_client.pipeline(transaction=False)
+    past = time.time() - 1
+    for i in range(args.jobs):
+        pipe.zadd(manager.scheduled_queue, {f"promote-{i}": past})
+    pipe.execute()
+    started = time.perf_counter()
+    promoted = manager.promote_due_jobs()
+    elapsed = time.perf_counter() - started
+    results['promoted'] = len(promoted)
+    results['promote_per_sec'] = round(len(promoted) / elapsed, 1) if elapsed else None
+    redis_client.delete(manager.pending_queue)
+    for key in redis_client.scan_iter(match=f"{manager.JOB_KEY_PREFIX}promote-*"):
+        redis_client.delete(key)
+
+    # 3. End-to-end execution throughput
+    for i in range(args.jobs):
+        manager.enqueue_job(job_name, job_arg(i))
+    started = time.perf_counter()
+    manager.start_workers(num_workers=args.workers)
+    elapsed = _wait_for_completion(manager, args.jobs, args.timeout)
+    manager.stop_workers()
+    completed = redis_client.zcard(manager.completed_queue)
+    results['completed'] = completed
+    results['execute_per_sec'] = round(completed / elapsed, 1) if elapsed else None
+
+    redis_client.flushdb()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JobQueueManager throughput against a local Redis")
+    parser.add_argument('--redis-url', help="Redis URL (default: $REDIS_URL or redis://localhost:6379/15)")
+    parser.add_argument('--jobs', type=int, default=2000, help="Number of jobs per phase")
+    parser.add_argument('--workers', type=int, default=4, help="Worker threads")
+    parser.add_argument('--mode', choices=[m.value for m in ExecutionMode], default=ExecutionMode.THREAD.value)
+    parser.add_argument('--processes', type=int, default=None, help="Process pool size for --mode process")
+    parser.add_argument('--cpu-work', type=int, default=0, help="Iterations of CPU work per job (0 = no-op jobs)")
+    parser.add_argument('--timeout', type=float, default=300.0, help="Seconds to wait for execution phase")
+    args = parser.parse_args()
+
+    print(json.dumps(run_benchmark(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Restaurant Status Microbenchmark
+
+Times open/closed status for a synthetic 1000-row listing under three
+timezone strategies:
+
+  cold       a new TimezoneFinder per row (the old behaviour; sampled and
+             extrapolated, since each construction reloads polygon data)
+  memoized   shared finder with the rounded-coordinate LRU (first listing)
+  persisted  timezone and compiled hours already on the row (the hot path)
+
+Usage:
+    python scripts/benchmark_restaurant_status.py --rows 1000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import utils.hours as hours
+from utils.restaurant_status import RestaurantStatusCalculator
+from utils.weekly_hours import compile_restaurant_hours
+
+# (latitude, longitude) of metro areas with many listings
+METROS = [(25.79, -80.13), (40.71, -74.00), (34.05, -118.24), (41.88, -87.63), (32.78, -96.80)]
+HOURS = [
+    "Sun-Thu: 11:00 AM - 10:00 PM\nFri: 11:00 AM - 2:00 PM",
+    "Mon-Fri: 7 AM - 3 PM",
+    "Daily: 5 PM - 1 AM",
+]
+
+
+def make_listing(rows: int, seed: int = 7):
+    rng = random.Random(seed)
+    listing = []
+    for i in range(rows):
+        lat, lng = rng.choice(METROS)
+        listing.append({
+            "id": i,
+            "latitude": lat + rng.uniform(-0.2, 0.2),
+            "longitude": lng + rng.uniform(-0.2, 0.2),
+            "hours": rng.choice(HOURS),
+        })
+    return listing
+
+
+def time_listing(listing, resolve):
+    calculator = RestaurantStatusCalculator()
+    start = time.perf_counter()
+    for row in listing:
+        calculator.get_restaurant_status(resolve(row))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--cold-sample", type=int, default=10,
+                        help="rows to time with a fresh TimezoneFinder each")
+    args = parser.parse_args()
+
+    if not hours.TIMEZONEFINDER_AVAILABLE:
+        sys.exit("timezonefinder is not installed")
+
+    listing = make_listing(args.rows)
+    results = {}
+
+    def cold(row):
+        tz = hours.TimezoneFinder().timezone_at(lat=row["latitude"], lng=row["longitude"])
+        return dict(row, timezone=tz)
+
+    sample = time_listing(listing[:args.cold_sample], cold)
+    results["cold (extrapolated)"] = sample / args.cold_sample * len(listing)
+
+    hours._timezone_at.cache_clear()
+
+    def memoized(row):
+        return dict(row, timezone=hours.lookup_timezone(row["latitude"], row["longitude"]))
+
+    results["memoized"] = time_listing(listing, memoized)
+
+    persisted_rows = []
+    for row in listing:
+        timezone = hours.lookup_timezone(row["latitude"], row["longitude"])
+        ranges, hours_tz = compile_restaurant_hours(None, row["hours"], timezone)
+        persisted_rows.append(dict(row, timezone=timezone, hours_week_ranges=ranges, hours_timezone=hours_tz))
+    lookups_before = hours._timezone_at.cache_info()
+    results["persisted"] = time_listing(persisted_rows, lambda row: row)
+    assert hours._timezone_at.cache_info() == lookups_before, "hot path performed a lookup"
+
+    print(f"{len(listing)}-row listing")
+    for name, elapsed in results.items():
+        print(f"  {name:<22} {elapsed * 1000:10.1f} ms  ({elapsed / len(listing) * 1e6:8.1f} us/row)")
+    print(f"  lookup cache: {hours._timezone_at.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Compile Restaurant Hours
+
+Backfills restaurants.hours_week_ranges / hours_timezone from hours_json,
+hours_of_operation and timezone (see utils.weekly_hours). Runs in id order in
+small batches, one transaction per batch; safe to re-run.
+
+Usage:
+    python scripts/compile_restaurant_hours.py
+    python scripts/compile_restaurant_hours.py --only-missing --batch-size 1000
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import create_engine, text
+
+from utils.weekly_hours import compile_restaurant_hours
+
+SELECT_BATCH = """
+    SELECT id, hours_json, hours_of_operation, timezone
+    FROM restaurants
+    WHERE id > :after {missing}
+    ORDER BY id
+    LIMIT :batch_size
+"""
+
+UPDATE_BATCH = text("""
+    UPDATE restaurants AS r
+    SET hours_week_ranges = CAST(v.ranges AS int4multirange),
+        hours_timezone = v.tz
+    FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS v(id integer, ranges text, tz text)
+    WHERE r.id = v.id
+""")
+
+
+def compile_all(engine, batch_size: int = 500, only_missing: bool = False) -> dict:
+    """Compile hours for every restaurant; returns counts."""
+    select = text(SELECT_BATCH.format(
+        missing="AND hours_week_ranges IS NULL" if only_missing else ""
+    ))
+    stats = {"rows": 0, "compiled": 0, "unknown": 0}
+    after = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(select, {"after": after, "batch_size": batch_size}).fetchall()
+            if not rows:
+                break
+            updates = []
+            for row in rows:
+                ranges, tz = compile_restaurant_hours(row.hours_json, row.hours_of_operation, row.timezone)
+                updates.append({"id": row.id, "ranges": ranges, "tz": tz})
+                stats["compiled" if ranges is not None else "unknown"] += 1
+            conn.execute(UPDATE_BATCH, {"rows": json.dumps(updates)})
+        stats["rows"] += len(rows)
+        after = rows[-1].id
+        print(f"compiled through id {after} ({stats['rows']} rows)")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--only-missing", action="store_true",
+                        help="skip rows that already have compiled hours")
+    args = parser.parse_args()
+
+    database_url = os.environ.get("DATABASE_URL")
+    if not database_url:
+        sys.exit("DATABASE_URL is not set")
+
+    stats = compile_all(create_engine(database_url), args.batch_size, args.only_missing)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
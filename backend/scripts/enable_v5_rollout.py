@@ -85,7 +85,7 @@ class V5RolloutManager:
                 
                 if not dry_run:
                     self.feature_flags.set_stage(flag_name, stage_config['stage'])
-                    self.feature_flags.flags[flag_name]['rollout_percentage'] = stage_config['rollout_percentage']
+                    self.feature_flags.set_rollout_percentage(flag_name, stage_config['rollout_percentage'])
                 
                 results['changes'].append({
                     'flag': flag_name,
@@ -136,7 +136,7 @@ class V5RolloutManager:
                         new_stage = FeatureFlagStageV5.DISABLED
                     
                     self.feature_flags.set_stage(flag_name, new_stage)
-                    self.feature_flags.flags[flag_name]['rollout_percentage'] = max(0, old_rollout - 20)
+                    self.feature_flags.set_rollout_percentage(flag_name, max(0, old_rollout - 20))
                 
                 results['changes'].append({
                     'flag': flag_name,
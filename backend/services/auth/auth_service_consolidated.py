@@ -18,6 +18,7 @@ from cache.redis_manager_v5 import get_redis_manager_v5
 # Import consolidated services
 from services.auth.unified_session_manager import UnifiedSessionManager
 from services.auth.secure_password_handler import SecurePasswordHandler
+from services.auth.password_pool import PasswordPoolSaturated
 from services.auth.webauthn_manager import WebAuthnManager
 from services.auth.token_manager_v5 import TokenManagerV5
 from utils.secure_error_handler import SecureErrorHandler
@@ -86,8 +87,9 @@ class ConsolidatedAuthService:
             # Clear failed attempts on successful login
             self._clear_failed_attempts(email)
             
-            # Update last login
-            self._update_last_login(user_data['id'], ip_address)
+            # Update last login, upgrading the stored hash if its cost is outdated
+            new_password_hash = self.password_handler.rehash_if_needed(password, user_data['password_hash'])
+            self._update_last_login(user_data['id'], ip_address, new_password_hash)
             
             # Return user data
             return True, {
@@ -100,6 +102,8 @@ class ConsolidatedAuthService:
                 'last_login': datetime.utcnow().isoformat()
             }
             
+        except PasswordPoolSaturated:
+            raise
         except Exception as e:
             logger.error(f"Authentication error for user {email}: {e}")
             return False, None
@@ -657,17 +661,18 @@ class ConsolidatedAuthService:
         except Exception as e:
             logger.error(f"Error clearing failed attempts for {email}: {e}")
     
-    def _update_last_login(self, user_id: str, ip_address: str = None):
-        """Update last login timestamp."""
+    def _update_last_login(self, user_id: str, ip_address: str = None, new_password_hash: Optional[str] = None):
+        """Update last login timestamp (and the password hash when it was upgraded)."""
         try:
             with self.db_manager.session_scope() as session:
                 session.execute(
                     text("""
                         UPDATE users 
-                        SET last_login = NOW(), updated_at = NOW()
+                        SET last_login = NOW(), updated_at = NOW(),
+                            password_hash = COALESCE(:new_password_hash, password_hash)
                         WHERE id = :user_id
                     """),
-                    {'user_id': user_id}
+                    {'user_id': user_id, 'new_password_hash': new_password_hash}
                 )
                 
         except Exception as e:
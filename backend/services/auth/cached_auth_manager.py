@@ -10,6 +10,7 @@ import time
 from typing import Optional, Dict, Any
 from utils.logging_config import get_logger
 from utils.postgres_auth import PostgresAuthManager
+from services.auth.password_pool import PasswordPoolSaturated
 
 logger = get_logger(__name__)
 
@@ -90,6 +91,8 @@ class CachedAuthManager:
             
             return user_info
             
+        except PasswordPoolSaturated:
+            raise
         except Exception as e:
             logger.error(f"Authentication error for {email}: {e}")
             return None
@@ -102,6 +105,8 @@ class CachedAuthManager:
         try:
             from utils.postgres_auth import PasswordSecurity
             return PasswordSecurity.verify_password(password, password_hash)
+        except PasswordPoolSaturated:
+            raise
         except Exception as e:
             logger.error(f"Password verification error: {e}")
             return False
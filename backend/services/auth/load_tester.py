@@ -99,6 +99,17 @@ class AuthLoadTester:
                     {'type': 'register', 'weight': 0.1},
                     {'type': 'token_validation', 'weight': 0.5}
                 ]
+            ),
+            # Login-only burst: measures bcrypt pool throughput and backpressure
+            # (saturation shows up as "HTTP 503" errors, not slow unrelated requests)
+            'login_burst': CapacityTestScenario(
+                name="Login Burst",
+                concurrent_users=100,
+                duration_seconds=60,
+                ramp_up_seconds=0,
+                operations=[
+                    {'type': 'login', 'weight': 1.0}
+                ]
             )
         }
         
@@ -0,0 +1,152 @@
+"""
+Password Hashing Pool
+=====================
+
+bcrypt is deliberately slow (~250 ms of CPU at 12 rounds). The bcrypt package
+releases the GIL, but under the gevent worker all requests of a worker share
+one OS thread: CPU-bound hashing in a request blocks the gevent hub, and with
+it every other request on that worker, for the whole computation. This module
+runs hashing and verification on a small process pool instead.
+
+The pool is bounded: at most PASSWORD_POOL_MAX_PENDING operations may be
+queued or running per worker process. Beyond that, and when an operation
+waits longer than PASSWORD_POOL_TIMEOUT_SECONDS, PasswordPoolSaturated (a
+503 with Retry-After) is raised immediately instead of queueing more work.
+
+The executor is created lazily and re-created after a fork, so it is safe
+with gunicorn's preload_app. Child processes are spawned rather than forked
+from a threaded worker.
+
+Configuration (environment):
+    PASSWORD_POOL_WORKERS            default: min(4, CPU count); 0 hashes inline
+    PASSWORD_POOL_MAX_PENDING        default: 4 x workers
+    PASSWORD_POOL_TIMEOUT_SECONDS    default: 5
+    PASSWORD_POOL_RETRY_AFTER        default: 1 (seconds)
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+import bcrypt
+from werkzeug.exceptions import ServiceUnavailable
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class PasswordPoolSaturated(ServiceUnavailable):
+    """Raised when the password pool cannot take more work."""
+
+    description = "Authentication is temporarily busy. Please retry shortly."
+
+
+def _hashpw(password: bytes, rounds: int) -> str:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds)).decode("utf-8")
+
+
+def _checkpw(password: bytes, password_hash: bytes) -> bool:
+    return bcrypt.checkpw(password, password_hash)
+
+
+def bcrypt_cost(password_hash: str) -> Optional[int]:
+    """Cost factor encoded in a bcrypt hash ("$2b$12$..." -> 12), or None."""
+    parts = (password_hash or "").split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(password_hash: str, rounds: int) -> bool:
+    """True when a stored hash was made with a cost below the configured `rounds`.
+
+    Upgrade only: raising BCRYPT_ROUNDS re-hashes passwords on their next login,
+    lowering it (or FLASK_ENV=development) leaves stronger hashes alone.
+    """
+    cost = bcrypt_cost(password_hash)
+    return cost is not None and cost < rounds
+
+
+class PasswordHashPool:
+    """Bounded process pool for bcrypt hashing and verification."""
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 timeout: Optional[float] = None, retry_after: Optional[int] = None):
+        if workers is None:
+            workers = int(os.getenv("PASSWORD_POOL_WORKERS", min(4, os.cpu_count() or 1)))
+        self.workers = workers
+        self.max_pending = max_pending or int(os.getenv("PASSWORD_POOL_MAX_PENDING", max(1, workers) * 4))
+        self.timeout = timeout or float(os.getenv("PASSWORD_POOL_TIMEOUT_SECONDS", "5"))
+        self.retry_after = retry_after or int(os.getenv("PASSWORD_POOL_RETRY_AFTER", "1"))
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[threading.BoundedSemaphore] = None
+        self._pid: Optional[int] = None
+
+    def hash_password(self, password: str, rounds: int) -> str:
+        return self._run(_hashpw, password.encode("utf-8"), rounds)
+
+    def verify_password(self, password: str, password_hash: str) -> bool:
+        return self._run(_checkpw, password.encode("utf-8"), password_hash.encode("utf-8"))
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+
+        executor, slots = self._get_executor()
+        if not slots.acquire(blocking=False):
+            logger.warning("Password pool saturated", max_pending=self.max_pending)
+            raise PasswordPoolSaturated(retry_after=self.retry_after)
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # The job keeps its slot until it finishes, so the backlog stays bounded
+            logger.warning("Password pool operation timed out", timeout=self.timeout)
+            raise PasswordPoolSaturated(retry_after=self.retry_after)
+        except BrokenProcessPool:
+            logger.error("Password pool worker died; running inline and restarting pool")
+            self.shutdown()
+            return fn(*args)
+
+    def _get_executor(self):
+        with self._lock:
+            pid = os.getpid()
+            if self._executor is None or self._pid != pid:
+                # A forked worker inherits the parent's handle but not its processes
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+                self._slots = threading.BoundedSemaphore(self.max_pending)
+                self._pid = pid
+            return self._executor, self._slots
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._pid == os.getpid():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[PasswordHashPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_password_pool() -> PasswordHashPool:
+    """Get the process-wide password pool."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordHashPool()
+    return _pool
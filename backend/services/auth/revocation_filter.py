@@ -0,0 +1,237 @@
+"""
+In-process revocation filter for session families and JTIs.
+
+Almost every revocation check answers "not revoked", yet each one used to
+cost a Redis round trip and often a database query. RevocationFilter keeps a
+Bloom filter of every revoked, unexpired family id and JTI in memory, so a negative
+answer needs no I/O and only possible positives (including Bloom false
+positives) go on to the authoritative Redis/database check.
+
+The filter is rebuilt from auth_sessions when it starts and then every
+REVOCATION_FILTER_REBUILD_SECONDS. Between rebuilds it is fed by the Redis
+pub/sub channel that every code path revoking auth_sessions rows publishes
+to (SessionFamilyManager directly, everything else via publish_revocations).
+The background thread subscribes before each rebuild, so revocations that
+land during a rebuild are buffered and applied afterwards.
+
+While the filter cannot vouch for its contents, every check falls back to
+the full lookup. This covers the time before the first rebuild, while
+disconnected from the channel, and when a rebuild is overdue by more than
+one interval. Revocations are therefore seen within pub/sub latency; one
+whose publish fails is seen by other processes at their next rebuild.
+
+The background thread starts lazily on first use in each process, so the
+filter is safe to install before gunicorn forks its workers.
+
+Configuration (environment):
+    ENABLE_REVOCATION_FILTER             default: true
+    REVOCATION_FILTER_REBUILD_SECONDS    default: 300
+    REVOCATION_FILTER_CAPACITY           default: 100000 (grows to 2x revoked rows)
+    REVOCATION_FILTER_ERROR_RATE         default: 0.001
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+CHANNEL = 'auth_v5:revocations'
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationFilter:
+    """Bloom filter of revoked family ids and JTIs, kept current via Redis pub/sub."""
+
+    def __init__(self, redis_manager, connection_manager, rebuild_interval: Optional[int] = None,
+                 capacity: Optional[int] = None, error_rate: Optional[float] = None):
+        self.redis_manager = redis_manager
+        self.connection_manager = connection_manager
+        self.rebuild_interval = rebuild_interval or int(os.getenv('REVOCATION_FILTER_REBUILD_SECONDS', '300'))
+        self.capacity = capacity or int(os.getenv('REVOCATION_FILTER_CAPACITY', '100000'))
+        self.error_rate = error_rate or float(os.getenv('REVOCATION_FILTER_ERROR_RATE', '0.001'))
+        self._bloom: Optional[BloomFilter] = None
+        self._built_at = 0.0
+        self._subscribed = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether negative answers can be trusted right now."""
+        return (
+            self._bloom is not None
+            and self._subscribed
+            and time.monotonic() - self._built_at < 2 * self.rebuild_interval
+        )
+
+    def might_be_revoked(self, family_id: Optional[str] = None, jti: Optional[str] = None) -> bool:
+        """False only when the filter is current and holds neither id."""
+        self.start()
+        if not self.ready:
+            return True
+        bloom = self._bloom
+        return (family_id is not None and f"f:{family_id}" in bloom) or (jti is not None and f"j:{jti}" in bloom)
+
+    def publish(self, family_ids: Iterable[str] = (), jtis: Iterable[str] = ()) -> None:
+        """Record revocations locally and broadcast them to every other process."""
+        payload = {'families': [f for f in family_ids if f], 'jtis': [j for j in jtis if j]}
+        self._add(payload)
+        try:
+            self.redis_manager.get_client().publish(CHANNEL, json.dumps(payload))
+        except Exception as e:
+            # Other processes pick it up at their next rebuild
+            logger.warning("Failed to publish revocation", error=str(e))
+
+    def rebuild(self) -> int:
+        """Replace the filter with one built from auth_sessions; returns revoked rows read.
+
+        Every unexpired revoked row contributes its JTIs, but a family is only
+        added once it has no live row left: refresh rotation revokes the old
+        row while the family carries on, so a single revoked row must not mark
+        its family as possibly revoked.
+        """
+        with self.connection_manager.session_scope() as session:
+            rows = session.execute(text("""
+                SELECT family_id, current_jti, reused_jti_of, family_revoked
+                FROM (
+                    SELECT family_id, current_jti, reused_jti_of, revoked_at,
+                           bool_and(revoked_at IS NOT NULL) OVER (PARTITION BY family_id) AS family_revoked
+                    FROM auth_sessions
+                    WHERE expires_at > NOW()
+                ) unexpired
+                WHERE revoked_at IS NOT NULL
+            """)).fetchall()
+        bloom = BloomFilter(max(self.capacity, 2 * len(rows)), self.error_rate)
+        for row in rows:
+            if row.family_revoked and row.family_id:
+                bloom.add(f"f:{row.family_id}")
+            for jti in (row.current_jti, row.reused_jti_of):
+                if jti:
+                    bloom.add(f"j:{jti}")
+        with self._lock:
+            self._bloom = bloom
+            self._built_at = time.monotonic()
+        logger.info("Revocation filter rebuilt", revoked_rows=len(rows), bits=bloom.size)
+        return len(rows)
+
+    def start(self) -> None:
+        """Start the background thread in this process (idempotent)."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            # A forked child inherits state but not the thread; start from scratch
+            self._bloom = None
+            self._subscribed = False
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='revocation-filter', daemon=True)
+            self._pid = pid
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _add(self, payload: dict) -> None:
+        bloom = self._bloom
+        if bloom is None:
+            return
+        for family_id in payload.get('families', ()):
+            bloom.add(f"f:{family_id}")
+        for jti in payload.get('jtis', ()):
+            bloom.add(f"j:{jti}")
+
+    def _run(self) -> None:
+        backoff = 1
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                pubsub = self.redis_manager.get_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                self._subscribed = True
+                self.rebuild()
+                backoff = 1
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get('type') == 'message':
+                        self._add(json.loads(message['data']))
+                    if time.monotonic() - self._built_at >= self.rebuild_interval:
+                        self.rebuild()
+            except Exception as e:
+                logger.warning("Revocation filter unavailable; checks fall back to Redis", error=str(e))
+            finally:
+                self._subscribed = False
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, 30)
+
+
+_revocation_filter: Optional[RevocationFilter] = None
+
+
+def install_revocation_filter(redis_manager, connection_manager) -> Optional[RevocationFilter]:
+    """Create the process-wide filter unless ENABLE_REVOCATION_FILTER is off."""
+    global _revocation_filter
+    if os.getenv('ENABLE_REVOCATION_FILTER', 'true').lower() != 'true':
+        return None
+    if _revocation_filter is None:
+        _revocation_filter = RevocationFilter(redis_manager, connection_manager)
+    return _revocation_filter
+
+
+def get_revocation_filter() -> Optional[RevocationFilter]:
+    """The installed filter, or None when revocation checks should always do the full lookup."""
+    return _revocation_filter
+
+
+def publish_revocations(family_ids: Iterable = (), jtis: Iterable = ()) -> None:
+    """Publish auth_sessions revocations to the installed filter (no-op without one).
+
+    Call this wherever revoked_at is written, with the family ids and JTIs of
+    the revoked rows, so no process's filter keeps answering "not revoked".
+    """
+    revocation_filter = get_revocation_filter()
+    if revocation_filter is None:
+        return
+    revocation_filter.publish(
+        family_ids=[str(family_id) for family_id in family_ids if family_id],
+        jtis=[str(jti) for jti in jtis if jti],
+    )
@@ -10,11 +10,11 @@ import os
 import secrets
 import time
 import hashlib
-import bcrypt
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from utils.logging_config import get_logger
 from utils.error_handler import ValidationError
+from services.auth.password_pool import PasswordPoolSaturated, get_password_pool, needs_rehash
 
 logger = get_logger(__name__)
 
@@ -73,15 +73,16 @@ class SecurePasswordHandler:
             raise ValidationError(f"Password validation failed: {'; '.join(validation_result.issues)}")
         
         try:
-            # Generate salt and hash password
-            salt = bcrypt.gensalt(rounds=self.bcrypt_rounds)
-            password_hash = bcrypt.hashpw(password.encode('utf-8'), salt)
+            # Hash on the password pool, off the request thread
+            password_hash = get_password_pool().hash_password(password, self.bcrypt_rounds)
             
             # Clear password from memory immediately
             password = None
             
-            return password_hash.decode('utf-8')
+            return password_hash
             
+        except PasswordPoolSaturated:
+            raise
         except Exception as e:
             logger.error(f"Error hashing password: {e}")
             raise ValidationError("Password hashing failed")
@@ -98,18 +99,41 @@ class SecurePasswordHandler:
             True if password matches, False otherwise
         """
         try:
-            # Use bcrypt's constant-time comparison
-            is_valid = bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+            # bcrypt's constant-time comparison, run on the password pool
+            is_valid = get_password_pool().verify_password(password, password_hash)
             
             # Clear password from memory
             password = None
             
             return is_valid
             
+        except PasswordPoolSaturated:
+            raise
         except Exception as e:
             logger.error(f"Error verifying password: {e}")
             return False
     
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Whether a stored hash uses a bcrypt cost below the configured rounds."""
+        return needs_rehash(password_hash, self.bcrypt_rounds)
+    
+    def rehash_if_needed(self, password: str, password_hash: str) -> Optional[str]:
+        """
+        New hash for a just-verified password whose stored hash uses an outdated cost.
+        
+        Strength validation is skipped (the password was already accepted), and a
+        saturated pool defers the upgrade to a later login.
+        
+        Returns:
+            The new hash, or None when no upgrade is needed or possible now
+        """
+        if not self.needs_rehash(password_hash):
+            return None
+        try:
+            return get_password_pool().hash_password(password, self.bcrypt_rounds)
+        except PasswordPoolSaturated:
+            return None
+    
     def validate_password_strength(self, password: str) -> PasswordStrengthResult:
         """
         Validate password strength and provide feedback.
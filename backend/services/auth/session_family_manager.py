@@ -13,6 +13,7 @@ from sqlalchemy import text
 from utils.logging_config import get_logger
 from cache.redis_manager_v5 import get_redis_manager_v5
 from database.connection_manager import get_connection_manager
+from services.auth.revocation_filter import get_revocation_filter
 
 logger = get_logger(__name__)
 
@@ -20,16 +21,18 @@ logger = get_logger(__name__)
 class SessionFamilyManager:
     """Manages session families with replay hardening and rotation."""
     
-    def __init__(self, redis_manager=None, connection_manager=None):
+    def __init__(self, redis_manager=None, connection_manager=None, revocation_filter=None):
         """
         Initialize SessionFamilyManager.
         
         Args:
             redis_manager: Redis manager instance (optional)
             connection_manager: Database connection manager (optional)
+            revocation_filter: In-process RevocationFilter (optional, defaults to the installed one)
         """
         self.redis_manager = redis_manager or get_redis_manager_v5()
         self.connection_manager = connection_manager or get_connection_manager()
+        self.revocation_filter = revocation_filter or get_revocation_filter()
         self.refresh_mutex_ttl = int(os.getenv('REFRESH_MUTEX_TTL_SECONDS', '10'))
         
         logger.info("SessionFamilyManager initialized")
@@ -263,6 +266,10 @@ class SessionFamilyManager:
                 prefix='auth'
             )
             
+            # Tell every process's revocation filter
+            if self.revocation_filter is not None:
+                self.revocation_filter.publish(family_ids=[family_id], jtis=[reused_jti])
+            
             logger.info(f"Family {family_id} revoked: {reason}")
             return True
             
@@ -280,6 +287,10 @@ class SessionFamilyManager:
         Returns:
             True if revoked, False otherwise
         """
+        # In-process filter: a definite "not revoked" needs no I/O
+        if self.revocation_filter is not None and not self.revocation_filter.might_be_revoked(family_id=family_id):
+            return False
+        
         try:
             # Check cache first
             cached_revocation = self.redis_manager.get(
@@ -317,16 +328,22 @@ class SessionFamilyManager:
             logger.error(f"Error checking family revocation {family_id}: {e}")
             return True  # Fail safe - assume revoked on error
     
-    def is_jti_revoked(self, jti: str) -> bool:
+    def is_jti_revoked(self, jti: str, family_id: Optional[str] = None) -> bool:
         """
         Check if specific JTI is revoked.
         
         Args:
             jti: JWT ID to check
+            family_id: Family the token claims (enables the in-process fast path;
+                without it an older JTI cannot be tied to a revoked family without I/O)
             
         Returns:
             True if revoked, False otherwise
         """
+        if (family_id and self.revocation_filter is not None
+                and not self.revocation_filter.might_be_revoked(family_id=family_id, jti=jti)):
+            return False
+        
         try:
             # Check cache first
             cached_family = self.redis_manager.get(f"jti:{jti}", prefix='auth')
@@ -5,6 +5,7 @@ from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Tuple
 
+from .revocation_filter import publish_revocations
 from .token_manager_v5 import TokenManagerV5
 
 
@@ -104,11 +105,13 @@ def rotate_or_reject(db_manager, *, user_id: str, provided_refresh: str, sid: st
         if not row:
             # Unknown session id: revoke entire family defensively
             session.execute(text("UPDATE auth_sessions SET revoked_at = NOW() WHERE family_id = :fid AND revoked_at IS NULL"), {"fid": fid})
+            publish_revocations(family_ids=[fid])
             return None
 
         if row.revoked_at is not None or row.expires_at <= now:
             # Reuse or expired; revoke family
             session.execute(text("UPDATE auth_sessions SET revoked_at = NOW() WHERE family_id = :fid AND revoked_at IS NULL"), {"fid": fid})
+            publish_revocations(family_ids=[fid])
             return None
 
         # Check hash match to detect misuse
@@ -119,13 +122,16 @@ def rotate_or_reject(db_manager, *, user_id: str, provided_refresh: str, sid: st
         if not real:
             # Provided token does not match stored hash: revoke family
             session.execute(text("UPDATE auth_sessions SET revoked_at = NOW() WHERE family_id = :fid AND revoked_at IS NULL"), {"fid": fid})
+            publish_revocations(family_ids=[fid])
             return None
 
         # Rotate: revoke current and create new session in same family
-        session.execute(
-            text("UPDATE auth_sessions SET revoked_at = NOW(), last_used = NOW() WHERE id = :sid AND revoked_at IS NULL"),
+        rotated = session.execute(
+            text("UPDATE auth_sessions SET revoked_at = NOW(), last_used = NOW() WHERE id = :sid AND revoked_at IS NULL RETURNING current_jti"),
             {"sid": sid},
-        )
+        ).fetchall()
+        # Only the rotated-out token is revoked; the family stays live
+        publish_revocations(jtis=[r.current_jti for r in rotated])
 
         # Create new session id and token
         new_sid = new_session_id()
@@ -167,3 +173,4 @@ def revoke_family(db_manager, *, fid: str) -> None:
     from sqlalchemy import text
     with _session_scope(db_manager) as session:
         session.execute(text("UPDATE auth_sessions SET revoked_at = NOW() WHERE family_id = :fid AND revoked_at IS NULL"), {"fid": fid})
+    publish_revocations(family_ids=[fid])
@@ -21,6 +21,8 @@ from services.auth.token_manager_v5 import TokenManagerV5
 from services.auth.sessions import persist_initial, new_session_id, new_family_id, rotate_or_reject
 from services.auth.tokens import verify
 from services.auth.performance_monitor import timed_auth_operation
+from services.auth.password_pool import PasswordPoolSaturated
+from services.auth.revocation_filter import publish_revocations
 from flask import request
 
 logger = get_logger(__name__)
@@ -167,6 +169,10 @@ class AuthServiceV5:
                 logger.warning(f"Authentication failed for user {email} - invalid credentials or account locked", extra=failure_context)
                 return False, None
                 
+        except PasswordPoolSaturated:
+            # Backpressure: surface as 503 + Retry-After rather than a failed login
+            raise
+            
         except ValidationError as e:
             # Log validation errors (e.g., invalid email format)
             validation_context = auth_context.copy()
@@ -1071,11 +1077,13 @@ class AuthServiceV5:
         try:
             from sqlalchemy import text
             with self.db_manager.session_scope() as session:
-                res = session.execute(
-                    text("UPDATE auth_sessions SET revoked_at = NOW() WHERE id = :sid AND user_id = :uid AND revoked_at IS NULL"),
+                revoked = session.execute(
+                    text("UPDATE auth_sessions SET revoked_at = NOW() WHERE id = :sid AND user_id = :uid AND revoked_at IS NULL "
+                         "RETURNING family_id, current_jti"),
                     {"sid": session_id, "uid": user_id},
-                )
-                return res.rowcount > 0
+                ).fetchall()
+            publish_revocations(family_ids=[r.family_id for r in revoked], jtis=[r.current_jti for r in revoked])
+            return len(revoked) > 0
         except Exception as e:
             logger.error(f"Error revoking session {session_id} for {user_id}: {e}")
             return False
@@ -1086,16 +1094,19 @@ class AuthServiceV5:
             from sqlalchemy import text
             with self.db_manager.session_scope() as session:
                 if except_sid:
-                    res = session.execute(
-                        text("UPDATE auth_sessions SET revoked_at = NOW() WHERE user_id = :uid AND id <> :sid AND revoked_at IS NULL"),
+                    revoked = session.execute(
+                        text("UPDATE auth_sessions SET revoked_at = NOW() WHERE user_id = :uid AND id <> :sid AND revoked_at IS NULL "
+                             "RETURNING family_id, current_jti"),
                         {"uid": user_id, "sid": except_sid},
-                    )
+                    ).fetchall()
                 else:
-                    res = session.execute(
-                        text("UPDATE auth_sessions SET revoked_at = NOW() WHERE user_id = :uid AND revoked_at IS NULL"),
+                    revoked = session.execute(
+                        text("UPDATE auth_sessions SET revoked_at = NOW() WHERE user_id = :uid AND revoked_at IS NULL "
+                             "RETURNING family_id, current_jti"),
                         {"uid": user_id},
-                    )
-                return res.rowcount or 0
+                    ).fetchall()
+            publish_revocations(family_ids=[r.family_id for r in revoked], jtis=[r.current_jti for r in revoked])
+            return len(revoked)
         except Exception as e:
             logger.error(f"Error revoking all sessions for {user_id}: {e}")
             return 0
@@ -364,12 +364,17 @@ def sync_external_apis(api_name: str, sync_type: str = "full"):
     
     try:
         if api_name == "google_places":
-            # Sync with Google Places API
-            # This would integrate with the existing Google Places service
-            logger.info("Syncing with Google Places API")
+            # Refresh stale Google reviews/ratings (incremental; "full" takes a larger batch)
+            from services.google_places_sync import GooglePlacesSyncPipeline
             
-            # Placeholder for actual Google Places sync
-            time.sleep(2)  # Simulate API calls
+            logger.info("Syncing with Google Places API")
+            report = GooglePlacesSyncPipeline().run(limit=1000 if sync_type == "full" else 200)
+            return {
+                "api_name": api_name,
+                "sync_type": sync_type,
+                "status": "success" if report.get("success") else "error",
+                "report": report
+            }
             
         elif api_name == "kosher_certifications":
             # Sync kosher certification data
@@ -390,6 +395,23 @@ def sync_external_apis(api_name: str, sync_type: str = "full"):
         raise
 
 
+@job("specials_claim_reconcile", priority=JobPriority.LOW)
+def reconcile_special_claims(batch_size: int = 500):
+    """Reconcile Redis special claim counters with Postgres claim rows."""
+    from services.specials_service import reconcile_claim_counters
+    
+    try:
+        corrected = reconcile_claim_counters(batch_size=batch_size)
+        return {
+            "counters_corrected": corrected,
+            "status": "success"
+        }
+        
+    except Exception as e:
+        logger.error(f"Special claim reconciliation failed: {e}")
+        raise
+
+
 def schedule_common_jobs():
     """Schedule common recurring jobs."""
     job_manager = get_job_queue_manager()
@@ -422,6 +444,13 @@ def schedule_common_jobs():
         priority=JobPriority.NORMAL
     )
     
+    # Reconcile special claim counters every 5 minutes
+    job_manager.schedule_recurring_job(
+        "specials_claim_reconcile",
+        "*/5 * * * *",  # Every 5 minutes
+        priority=JobPriority.LOW
+    )
+    
     logger.info("Scheduled common recurring jobs")
 
 
@@ -4,6 +4,12 @@ Data Retention and PII Hygiene Service
 
 Provides automated data retention policies, PII masking, and data purging
 for compliance with privacy regulations and security best practices.
+
+Purges run in primary-key order in small batches, each its own short
+transaction (DELETE ... WHERE pk IN (SELECT pk ... LIMIT n FOR UPDATE SKIP
+LOCKED)), throttled between batches and checkpointed in Redis so an
+interrupted run resumes where it stopped. Time-partitioned tables can drop
+whole expired partitions instead of deleting their rows.
 """
 
 import os
@@ -11,11 +17,13 @@ import re
 import hashlib
 import threading
 import time
-from typing import Dict, Any, List, Tuple
-from datetime import datetime, timedelta
-from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass, field
 from enum import Enum
 
+from sqlalchemy import bindparam, text
+
 from utils.logging_config import get_logger
 from database.connection_manager import get_connection_manager
 from cache.redis_manager_v5 import get_redis_manager_v5
@@ -60,6 +68,21 @@ class RetentionPolicy:
     batch_size: int = 1000
     mask_pii: bool = False
     pii_columns: List[str] = None
+    primary_key: str = "id"
+    sleep_between_batches: float = 0.1  # seconds; throttles WAL/replication load
+    max_batches_per_run: Optional[int] = None  # None = run until no rows match
+    drop_expired_partitions: bool = False  # For range-partitioned tables on date_column
+
+
+@dataclass
+class PurgeResult:
+    """Outcome of one retention policy run."""
+    policy: str
+    deleted: int = 0
+    batches: int = 0
+    partitions_dropped: List[str] = field(default_factory=list)
+    completed: bool = True  # False when stopped early; the checkpoint is kept
+    dry_run: bool = False
 
 
 @dataclass
@@ -244,6 +267,9 @@ class PIIMasker:
 class DataRetentionService:
     """Data retention and PII hygiene service."""
     
+    CHECKPOINT_PREFIX = "data_retention:checkpoint:"
+    CHECKPOINT_TTL = 7 * 86400
+    
     def __init__(self):
         """Initialize data retention service."""
         self.connection_manager = get_connection_manager()
@@ -256,9 +282,18 @@ class DataRetentionService:
         # PII field configurations
         self.pii_fields: Dict[str, List[PIIField]] = {}
         
+        # Redis key patterns opted in to TTL enforcement (pattern -> period), via
+        # add_redis_retention_rule. Empty by default: keys without a TTL are left
+        # alone unless a pattern is registered here. Session (session:*,
+        # session_data:*, session_step_up:*) and rate-limit keys are owned by their
+        # services and are never registered by default.
+        self.redis_retention_rules: Dict[str, RetentionPeriod] = {}
+        self.redis_scan_count = 1000
+        
         # Service state
         self._running = False
         self._thread = None
+        self._stop_event = threading.Event()
         self._check_interval = 3600  # 1 hour
         
         # Load default policies
@@ -370,6 +405,7 @@ class DataRetentionService:
             return
         
         self._check_interval = check_interval
+        self._stop_event.clear()
         self._running = True
         self._thread = threading.Thread(target=self._retention_loop, daemon=True)
         self._thread.start()
@@ -382,6 +418,7 @@ class DataRetentionService:
             return
         
         self._running = False
+        self._stop_event.set()
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=10)
         
@@ -409,79 +446,193 @@ class DataRetentionService:
             except Exception as e:
                 logger.error(f"Error processing policy {policy.name}: {e}")
     
-    def _process_policy(self, policy: RetentionPolicy) -> None:
-        """Process a single retention policy."""
+    def _checkpoint_key(self, policy: RetentionPolicy) -> str:
+        return f"{self.CHECKPOINT_PREFIX}{policy.name}"
+    
+    def _get_checkpoint(self, policy: RetentionPolicy) -> Optional[str]:
+        """Last primary key purged by an unfinished run of the policy."""
+        try:
+            value = self.redis_manager.get_client().get(self._checkpoint_key(policy))
+            return value.decode() if isinstance(value, bytes) else value
+        except Exception as e:
+            logger.warning(f"Could not read retention checkpoint for {policy.name}: {e}")
+            return None
+    
+    def _set_checkpoint(self, policy: RetentionPolicy, last_id: Optional[Any]) -> None:
+        try:
+            client = self.redis_manager.get_client()
+            if last_id is None:
+                client.delete(self._checkpoint_key(policy))
+            else:
+                client.set(self._checkpoint_key(policy), str(last_id), ex=self.CHECKPOINT_TTL)
+        except Exception as e:
+            logger.warning(f"Could not write retention checkpoint for {policy.name}: {e}")
+    
+    @staticmethod
+    def _build_predicate(policy: RetentionPolicy, cutoff_date: datetime) -> Tuple[str, Dict[str, Any]]:
+        """Build the WHERE clause (without WHERE) selecting expired rows."""
+        clauses = [f"{policy.date_column} < :cutoff"]
+        params: Dict[str, Any] = {'cutoff': cutoff_date}
+        
+        for i, (column, value) in enumerate((policy.conditions or {}).items()):
+            if value == "IS NOT NULL":
+                clauses.append(f"{column} IS NOT NULL")
+            elif value == "IS NULL":
+                clauses.append(f"{column} IS NULL")
+            else:
+                clauses.append(f"{column} = :cond_{i}")
+                params[f'cond_{i}'] = value
+        
+        return " AND ".join(clauses), params
+    
+    def _process_policy(self, policy: RetentionPolicy) -> PurgeResult:
+        """Process a single retention policy in throttled primary-key batches."""
+        result = PurgeResult(policy=policy.name, dry_run=policy.dry_run)
         if policy.retention_period == RetentionPeriod.PERMANENT:
-            return
+            return result
         
         # Calculate cutoff date
         cutoff_date = datetime.utcnow() - timedelta(seconds=policy.retention_period.value)
+        predicate, params = self._build_predicate(policy, cutoff_date)
+        pk = policy.primary_key
+        
+        if policy.dry_run:
+            with self.connection_manager.session_scope() as session:
+                count = session.execute(
+                    text(f"SELECT COUNT(*) FROM {policy.table_name} WHERE {predicate}"), params
+                ).scalar()
+            logger.info(f"DRY RUN: Would delete {count} records from {policy.table_name}")
+            return result
+        
+        if policy.drop_expired_partitions:
+            result.partitions_dropped = self._drop_expired_partitions(policy, cutoff_date)
+        
+        def batch_select(after) -> str:
+            after_clause = f" AND {pk} > :after" if after is not None else ""
+            return f"""
+                    SELECT {pk} FROM {policy.table_name}
+                    WHERE {predicate}{after_clause}
+                    ORDER BY {pk}
+                    LIMIT :batch_size
+                    FOR UPDATE SKIP LOCKED"""
+        
+        def delete_query(after) -> Any:
+            return text(f"""
+                DELETE FROM {policy.table_name}
+                WHERE {pk} IN ({batch_select(after)}
+                )
+                RETURNING {pk}
+            """)
         
-        # Build query
-        query = f"SELECT * FROM {policy.table_name} WHERE {policy.date_column} < %s"
-        params = [cutoff_date]
+        delete_selected = text(
+            f"DELETE FROM {policy.table_name} WHERE {pk} IN :ids RETURNING {pk}"
+        ).bindparams(bindparam('ids', expanding=True))
         
-        # Add conditions
-        if policy.conditions:
-            for column, value in policy.conditions.items():
-                if value == "IS NOT NULL":
-                    query += f" AND {column} IS NOT NULL"
-                elif value == "IS NULL":
-                    query += f" AND {column} IS NULL"
-                else:
-                    query += f" AND {column} = %s"
-                    params.append(value)
-        
-        # Add limit for batch processing
-        query += f" LIMIT {policy.batch_size}"
+        last_id = self._get_checkpoint(policy)
+        if last_id is not None:
+            logger.info(f"Resuming policy {policy.name} after {pk} {last_id}")
         
         try:
-            with self.connection_manager.get_connection() as conn:
-                cursor = conn.cursor()
+            while True:
+                if policy.max_batches_per_run is not None and result.batches >= policy.max_batches_per_run:
+                    result.completed = False
+                    break
+                if self._stop_event.is_set():
+                    result.completed = False
+                    break
                 
-                # Get records to process
-                cursor.execute(query, params)
-                records = cursor.fetchall()
-                
-                if not records:
-                    logger.debug(f"No records to process for policy {policy.name}")
-                    return
-                
-                logger.info(f"Processing {len(records)} records for policy {policy.name}")
-                
-                if policy.dry_run:
-                    logger.info(f"DRY RUN: Would delete {len(records)} records from {policy.table_name}")
-                    return
+                # One short transaction per batch keeps locks and WAL bursts small
+                batch_params = dict(params, after=last_id, batch_size=policy.batch_size)
+                with self.connection_manager.session_scope() as session:
+                    if policy.mask_pii:
+                        # Lock the batch, mask it, then delete exactly the rows that were masked
+                        deleted_ids = [row[0] for row in session.execute(
+                            text(batch_select(last_id)), batch_params
+                        ).fetchall()]
+                        if deleted_ids:
+                            self._mask_records_before_deletion(deleted_ids, policy)
+                            deleted_ids = [row[0] for row in session.execute(
+                                delete_selected, {'ids': deleted_ids}
+                            ).fetchall()]
+                    else:
+                        deleted_ids = [row[0] for row in session.execute(
+                            delete_query(last_id), batch_params
+                        ).fetchall()]
                 
-                # Process records
-                if policy.mask_pii:
-                    self._mask_records_before_deletion(records, policy)
+                if not deleted_ids:
+                    break
                 
-                # Delete records
-                delete_query = f"DELETE FROM {policy.table_name} WHERE {policy.date_column} < %s"
-                delete_params = [cutoff_date]
-                
-                if policy.conditions:
-                    for column, value in policy.conditions.items():
-                        if value == "IS NOT NULL":
-                            delete_query += f" AND {column} IS NOT NULL"
-                        elif value == "IS NULL":
-                            delete_query += f" AND {column} IS NULL"
-                        else:
-                            delete_query += f" AND {column} = %s"
-                            delete_params.append(value)
-                
-                cursor.execute(delete_query, delete_params)
-                deleted_count = cursor.rowcount
-                conn.commit()
-                
-                logger.info(f"Deleted {deleted_count} records from {policy.table_name} (policy: {policy.name})")
+                result.batches += 1
+                result.deleted += len(deleted_ids)
+                last_id = max(deleted_ids)
+                self._set_checkpoint(policy, last_id)
                 
+                if len(deleted_ids) < policy.batch_size:
+                    break
+                if policy.sleep_between_batches:
+                    self._stop_event.wait(policy.sleep_between_batches)
+        
         except Exception as e:
             logger.error(f"Error processing policy {policy.name}: {e}")
             raise
+        
+        # A finished pass clears the checkpoint so rows skipped while locked are retried next run
+        if result.completed:
+            self._set_checkpoint(policy, None)
+        
+        if result.deleted or result.partitions_dropped:
+            logger.info(
+                f"Deleted {result.deleted} records in {result.batches} batches from {policy.table_name} "
+                f"(policy: {policy.name}, partitions dropped: {len(result.partitions_dropped)}, "
+                f"completed: {result.completed})"
+            )
+        else:
+            logger.debug(f"No records to process for policy {policy.name}")
+        return result
+    
+    @staticmethod
+    def _parse_partition_upper_bound(bound_expr: str) -> Optional[datetime]:
+        """Parse the TO bound of a range partition expression (naive UTC)."""
+        match = re.search(r"TO \('([^']+)'\)", bound_expr or "")
+        if not match:
+            return None  # DEFAULT / MAXVALUE partitions are never dropped
+        try:
+            upper = datetime.fromisoformat(match.group(1))
+        except ValueError:
+            return None
+        if upper.tzinfo is not None:
+            upper = upper.astimezone(timezone.utc).replace(tzinfo=None)
+        return upper
     
-    def _mask_records_before_deletion(self, records: List[Tuple], policy: RetentionPolicy) -> None:
+    def _drop_expired_partitions(self, policy: RetentionPolicy, cutoff_date: datetime) -> List[str]:
+        """Detach and drop partitions whose whole range is older than the cutoff."""
+        if policy.conditions:
+            # Dropping a partition would also remove rows the conditions keep
+            logger.warning(f"Policy {policy.name} has conditions; skipping partition drop")
+            return []
+        
+        with self.connection_manager.session_scope() as session:
+            partitions = session.execute(text("""
+                SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = :table_name
+            """), {'table_name': policy.table_name}).fetchall()
+        
+        dropped = []
+        for name, bound_expr in sorted(partitions):
+            upper = self._parse_partition_upper_bound(bound_expr)
+            if upper is None or upper > cutoff_date:
+                continue
+            with self.connection_manager.session_scope() as session:
+                session.execute(text(f'ALTER TABLE {policy.table_name} DETACH PARTITION "{name}"'))
+                session.execute(text(f'DROP TABLE "{name}"'))
+            dropped.append(name)
+            logger.info(f"Dropped expired partition {name} of {policy.table_name} (policy: {policy.name})")
+        return dropped
+    
+    def _mask_records_before_deletion(self, record_ids: List[Any], policy: RetentionPolicy) -> None:
         """Mask PII in records before deletion."""
         if policy.table_name not in self.pii_fields:
             return
@@ -490,37 +641,62 @@ class DataRetentionService:
         
         # This would typically involve updating records with masked values
         # before deletion, but for simplicity, we'll just log the action
-        logger.info(f"Would mask PII in {len(records)} records from {policy.table_name}")
+        logger.info(f"Would mask PII in {len(record_ids)} records from {policy.table_name}")
     
-    def _cleanup_redis_data(self) -> None:
-        """Clean up expired Redis data."""
+    def _cleanup_redis_data(self) -> Dict[str, int]:
+        """Give a TTL to opted-in Redis keys that were left without one.
+
+        Only patterns registered with add_redis_retention_rule are touched.
+        Keys are walked with SCAN and their TTLs checked in one pipeline per
+        SCAN page, so no single command blocks Redis.
+        """
+        stats = {'scanned': 0, 'expiry_set': 0}
+        if not self.redis_retention_rules:
+            return stats
         try:
-            # Get all keys with TTL
-            keys = self.redis_manager.get_all_keys()
+            client = self.redis_manager.get_client()
+            if client is None:
+                return stats
             
-            expired_keys = []
-            for key in keys:
-                ttl = self.redis_manager.get_ttl(key)
-                if ttl == -1:  # No expiration set
-                    continue
-                elif ttl == -2:  # Key doesn't exist
-                    expired_keys.append(key)
-                elif ttl == 0:  # Key expired
-                    expired_keys.append(key)
+            for pattern, period in self.redis_retention_rules.items():
+                cursor = 0
+                while True:
+                    cursor, keys = client.scan(cursor=cursor, match=pattern, count=self.redis_scan_count)
+                    if keys:
+                        stats['scanned'] += len(keys)
+                        pipe = client.pipeline(transaction=False)
+                        for key in keys:
+                            pipe.ttl(key)
+                        ttls = pipe.execute()
+                        
+                        persistent = [key for key, ttl in zip(keys, ttls) if ttl == -1]
+                        if persistent:
+                            pipe = client.pipeline(transaction=False)
+                            for key in persistent:
+                                pipe.expire(key, period.value)
+                            pipe.execute()
+                            stats['expiry_set'] += len(persistent)
+                    if cursor == 0:
+                        break
             
-            # Clean up expired keys
-            if expired_keys:
-                self.redis_manager.delete_multiple(expired_keys)
-                logger.info(f"Cleaned up {len(expired_keys)} expired Redis keys")
+            if stats['expiry_set']:
+                logger.info(f"Set retention TTL on {stats['expiry_set']} Redis keys "
+                            f"({stats['scanned']} scanned)")
         
         except Exception as e:
             logger.error(f"Error cleaning up Redis data: {e}")
+        return stats
     
     def add_retention_policy(self, policy: RetentionPolicy) -> None:
         """Add a new retention policy."""
         self.retention_policies.append(policy)
         logger.info(f"Added retention policy: {policy.name}")
     
+    def add_redis_retention_rule(self, pattern: str, period: RetentionPeriod) -> None:
+        """Opt a Redis key pattern in to TTL enforcement by the retention loop."""
+        self.redis_retention_rules[pattern] = period
+        logger.info(f"Added Redis retention rule: {pattern} ({period.name})")
+    
     def remove_retention_policy(self, policy_name: str) -> bool:
         """Remove a retention policy."""
         for i, policy in enumerate(self.retention_policies):
@@ -555,14 +731,18 @@ class DataRetentionService:
             policy.enabled = True
             
             # Process the policy
-            self._process_policy(policy)
+            result = self._process_policy(policy)
             
             # Restore original state
             policy.enabled = was_enabled
             
             return {
                 'success': True,
-                'message': f'Policy {policy_name} executed successfully'
+                'message': f'Policy {policy_name} executed successfully',
+                'deleted': result.deleted,
+                'batches': result.batches,
+                'partitions_dropped': result.partitions_dropped,
+                'completed': result.completed
             }
         
         except Exception as e:
@@ -0,0 +1,299 @@
+"""
+Transactional email outbox.
+
+Requests enqueue messages here instead of talking to the mail provider; the
+outbox worker (workers.email_outbox_worker) claims them in batches and sends
+them over pooled, persistent SMTP connections with retry and backoff.
+
+Messages live in Redis: payloads in a hash, due times in a sorted set. A claim
+leases a batch by pushing its due time forward, so a sender that dies mid-batch
+only delays those messages until the lease expires (delivery is at-least-once).
+
+Running senders refresh a heartbeat key. EmailService only enqueues while the
+heartbeat is live and sends synchronously otherwise, so mail is never queued
+with nobody left to deliver it.
+"""
+
+import json
+import os
+import queue
+import smtplib
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Lease due messages: push their score to the lease expiry and return payloads.
+# KEYS[1] = due zset, KEYS[2] = payload hash
+# ARGV[1] = now, ARGV[2] = batch size, ARGV[3] = lease expiry
+_CLAIM_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+if #ids == 0 then
+    return {}
+end
+for _, id in ipairs(ids) do
+    redis.call('ZADD', KEYS[1], ARGV[3], id)
+end
+return redis.call('HMGET', KEYS[2], unpack(ids))
+"""
+
+
+class EmailOutbox:
+    """Redis-backed queue of outgoing emails."""
+
+    QUEUE_KEY = "email_outbox:queue"
+    MESSAGES_KEY = "email_outbox:messages"
+    DEAD_LETTER_KEY = "email_outbox:dead"
+    DEAD_LETTER_LIMIT = 1000
+    SENDER_HEARTBEAT_KEY = "email_outbox:sender_heartbeat"
+
+    def __init__(
+        self,
+        redis_client,
+        max_attempts: int = 5,
+        base_backoff: float = 30.0,
+        max_backoff: float = 3600.0,
+    ):
+        self.redis_client = redis_client
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._claim = redis_client.register_script(_CLAIM_SCRIPT) if redis_client is not None else None
+
+    @property
+    def available(self) -> bool:
+        return self.redis_client is not None
+
+    def beat(self, ttl: float) -> None:
+        """Mark a sender as alive for the next `ttl` seconds."""
+        self.redis_client.set(self.SENDER_HEARTBEAT_KEY, os.getpid(), px=int(ttl * 1000))
+
+    def sender_alive(self) -> bool:
+        """Whether any process has a running sender."""
+        return bool(self.redis_client.exists(self.SENDER_HEARTBEAT_KEY))
+
+    def enqueue(self, to_email: str, subject: str, html_body: str, text_body: Optional[str] = None) -> str:
+        """Add a message to the outbox; returns its id."""
+        message_id = str(uuid.uuid4())
+        message = {
+            "id": message_id,
+            "to_email": to_email,
+            "subject": subject,
+            "html_body": html_body,
+            "text_body": text_body,
+            "attempts": 0,
+            "created_at": time.time(),
+        }
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.hset(self.MESSAGES_KEY, message_id, json.dumps(message))
+        pipe.zadd(self.QUEUE_KEY, {message_id: time.time()})
+        pipe.execute()
+        return message_id
+
+    def claim(self, batch_size: int = 50, lease_seconds: float = 120.0) -> List[Dict[str, Any]]:
+        """Lease up to `batch_size` due messages."""
+        now = time.time()
+        payloads = self._claim(
+            keys=[self.QUEUE_KEY, self.MESSAGES_KEY],
+            args=[now, batch_size, now + lease_seconds],
+        )
+        messages = []
+        for payload in payloads or []:
+            if payload is None:
+                continue
+            messages.append(json.loads(payload))
+        return messages
+
+    def ack(self, message_ids: List[str]) -> None:
+        """Remove sent messages."""
+        if not message_ids:
+            return
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.zrem(self.QUEUE_KEY, *message_ids)
+        pipe.hdel(self.MESSAGES_KEY, *message_ids)
+        pipe.execute()
+
+    def backoff_for(self, attempts: int) -> float:
+        """Exponential backoff after `attempts` failed sends."""
+        return min(self.base_backoff * (2 ** max(attempts - 1, 0)), self.max_backoff)
+
+    def retry(self, message: Dict[str, Any], error: str) -> bool:
+        """Reschedule a failed message, or dead-letter it after max_attempts.
+
+        Returns:
+            True if the message will be retried
+        """
+        message = dict(message, attempts=message.get("attempts", 0) + 1, last_error=error)
+        pipe = self.redis_client.pipeline(transaction=False)
+
+        if message["attempts"] >= self.max_attempts:
+            pipe.zrem(self.QUEUE_KEY, message["id"])
+            pipe.hdel(self.MESSAGES_KEY, message["id"])
+            pipe.lpush(self.DEAD_LETTER_KEY, json.dumps(message))
+            pipe.ltrim(self.DEAD_LETTER_KEY, 0, self.DEAD_LETTER_LIMIT - 1)
+            pipe.execute()
+            logger.error(f"Email {message['id']} to {message['to_email']} dead-lettered after "
+                         f"{message['attempts']} attempts: {error}")
+            return False
+
+        pipe.hset(self.MESSAGES_KEY, message["id"], json.dumps(message))
+        pipe.zadd(self.QUEUE_KEY, {message["id"]: time.time() + self.backoff_for(message["attempts"])})
+        pipe.execute()
+        return True
+
+    def get_stats(self) -> Dict[str, int]:
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.zcard(self.QUEUE_KEY)
+        pipe.zcount(self.QUEUE_KEY, "-inf", time.time())
+        pipe.llen(self.DEAD_LETTER_KEY)
+        queued, due, dead = pipe.execute()
+        return {"queued": queued, "due": due, "dead_lettered": dead}
+
+
+class SMTPConnectionPool:
+    """Pool of persistent, authenticated SMTP connections.
+
+    Connections are opened lazily (connect, STARTTLS, login once), checked with
+    NOOP after sitting idle, and discarded when a send fails on them.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 587,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        size: int = 2,
+        timeout: float = 30.0,
+        max_idle: float = 60.0,
+        smtp_factory=smtplib.SMTP,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.smtp_factory = smtp_factory
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._open = 0
+        self._lock = threading.Lock()
+        self.stats = {"connections_opened": 0, "connections_discarded": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["SMTPConnectionPool"]:
+        """Build a pool from SMTP_* settings (None if SMTP_HOST is not set)."""
+        host = os.getenv("SMTP_HOST")
+        if not host:
+            return None
+        return cls(
+            host=host,
+            port=int(os.getenv("SMTP_PORT", "587")),
+            user=os.getenv("SMTP_USER"),
+            password=os.getenv("SMTP_PASSWORD"),
+            use_tls=os.getenv("SMTP_USE_TLS", "true").lower() == "true",
+            size=int(os.getenv("SMTP_POOL_SIZE", "2")),
+        )
+
+    def _connect(self):
+        server = self.smtp_factory(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.user and self.password:
+                server.login(self.user, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        self.stats["connections_opened"] += 1
+        return server
+
+    @staticmethod
+    def _close(server) -> None:
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _checkout(self):
+        while True:
+            try:
+                server, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if time.monotonic() - idle_since < self.max_idle:
+                return server
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except Exception:
+                pass
+            self._discard(server)
+
+        with self._lock:
+            can_open = self._open < self.size
+            if can_open:
+                self._open += 1
+        if not can_open:
+            # Pool exhausted: wait for another sender to return a connection
+            server, _ = self._idle.get(timeout=self.timeout)
+            return server
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._open -= 1
+            raise
+
+    def _discard(self, server) -> None:
+        self._close(server)
+        with self._lock:
+            self._open -= 1
+        self.stats["connections_discarded"] += 1
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it is discarded instead of returned if the block raises."""
+        server = self._checkout()
+        try:
+            yield server
+        except Exception:
+            self._discard(server)
+            raise
+        self._idle.put((server, time.monotonic()))
+
+    def close_all(self) -> None:
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(server)
+
+
+_email_outbox: Optional[EmailOutbox] = None
+
+
+def get_email_outbox() -> EmailOutbox:
+    """Get the shared outbox (unavailable when Redis is not configured)."""
+    global _email_outbox
+    if _email_outbox is None:
+        try:
+            from cache.redis_manager_v5 import get_redis_manager_v5
+
+            _email_outbox = EmailOutbox(get_redis_manager_v5().get_client())
+        except Exception as e:
+            logger.warning(f"Email outbox unavailable, sending synchronously: {e}")
+            _email_outbox = EmailOutbox(None)
+    return _email_outbox
@@ -4,13 +4,22 @@ Email service for authentication system.
 This module provides email sending functionality for password resets,
 email verification, and other authentication-related notifications.
 Supports multiple email providers (SMTP, SendGrid, Mailgun, etc.).
+
+When the email outbox is enabled (EMAIL_OUTBOX_ENABLED, default on) and Redis
+is available, send_email only enqueues the message; the outbox worker delivers
+it in the background over pooled SMTP connections with retry and backoff.
+The first queued message starts that worker in the sending process, and
+messages are only queued while some process's worker heartbeat is live;
+otherwise they are sent synchronously.
 """
 
 import os
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional, Dict
+from functools import lru_cache
+from string import Template
+from typing import Any, Optional, Dict
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -21,22 +30,66 @@ class EmailServiceError(Exception):
     pass
 
 
+def build_mime_message(from_header: str, to_email: str, subject: str, html_body: str,
+                       text_body: Optional[str] = None) -> MIMEMultipart:
+    """Build a multipart/alternative message with optional text and HTML parts."""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = from_header
+    msg['To'] = to_email
+    
+    # Add text part if provided
+    if text_body:
+        msg.attach(MIMEText(text_body, 'plain'))
+    
+    # Add HTML part
+    msg.attach(MIMEText(html_body, 'html'))
+    return msg
+
+
 class EmailService:
     """Email service with multiple provider support."""
     
-    def __init__(self):
+    def __init__(self, outbox=None):
         self.provider = os.getenv('EMAIL_PROVIDER', 'smtp').lower()
         self.enabled = os.getenv('EMAIL_ENABLED', 'false').lower() == 'true'
+        self.outbox_enabled = os.getenv('EMAIL_OUTBOX_ENABLED', 'true').lower() == 'true'
+        self._outbox = outbox
         
         if not self.enabled:
             logger.info("Email service is disabled - emails will be logged instead")
     
+    @property
+    def outbox(self):
+        """The email outbox, or None when disabled/unavailable (send synchronously)."""
+        if not self.outbox_enabled:
+            return None
+        if self._outbox is None:
+            from services.email_outbox import get_email_outbox
+            self._outbox = get_email_outbox()
+        return self._outbox if self._outbox.available else None
+    
     def send_email(self, to_email: str, subject: str, html_body: str, text_body: Optional[str] = None) -> bool:
-        """Send email using configured provider."""
+        """Send email using configured provider.
+
+        With the outbox enabled the message is only queued; delivery happens in
+        the outbox worker, so the caller never waits on the provider.
+        """
         if not self.enabled:
             logger.info(f"Email service disabled - would send email to {to_email}: {subject}")
             return True
-            
+        
+        outbox = self.outbox
+        if outbox is not None:
+            try:
+                if self._ensure_sender(outbox):
+                    message_id = outbox.enqueue(to_email, subject, html_body, text_body)
+                    logger.info(f"Queued email {message_id} to {to_email}")
+                    return True
+                logger.warning(f"No email outbox sender is running, sending to {to_email} synchronously")
+            except Exception as e:
+                logger.warning(f"Failed to queue email to {to_email}, sending synchronously: {e}")
+        
         try:
             if self.provider == 'smtp':
                 return self._send_smtp(to_email, subject, html_body, text_body)
@@ -52,33 +105,53 @@ class EmailService:
             logger.error(f"Failed to send email to {to_email}: {e}")
             return False
     
+    def _ensure_sender(self, outbox) -> bool:
+        """Start this process's outbox sender if needed; True if any sender is alive."""
+        from workers.email_outbox_worker import ensure_email_outbox_worker
+        ensure_email_outbox_worker(outbox=outbox, email_service=self)
+        return outbox.sender_alive()
+    
+    def deliver(self, message: Dict[str, Any], smtp_pool=None) -> bool:
+        """Deliver an outbox message with the configured provider.
+
+        SMTP sends reuse a connection from `smtp_pool`. Provider errors are
+        raised so the outbox worker can retry; False means misconfiguration.
+        """
+        to_email, subject = message['to_email'], message['subject']
+        html_body, text_body = message['html_body'], message.get('text_body')
+        
+        if self.provider == 'smtp' and smtp_pool is not None:
+            msg = build_mime_message(self._smtp_from_header(), to_email, subject, html_body, text_body)
+            with smtp_pool.connection() as server:
+                server.send_message(msg)
+            return True
+        if self.provider == 'smtp':
+            return self._send_smtp(to_email, subject, html_body, text_body)
+        if self.provider == 'sendgrid':
+            return self._send_sendgrid(to_email, subject, html_body, text_body)
+        if self.provider == 'mailgun':
+            return self._send_mailgun(to_email, subject, html_body, text_body)
+        logger.error(f"Unsupported email provider: {self.provider}")
+        return False
+    
+    @staticmethod
+    def _smtp_from_header() -> str:
+        smtp_from = os.getenv('SMTP_FROM_EMAIL', os.getenv('SMTP_USER'))
+        smtp_from_name = os.getenv('SMTP_FROM_NAME', 'JewGo Authentication')
+        return f"{smtp_from_name} <{smtp_from}>"
+    
     def _send_smtp(self, to_email: str, subject: str, html_body: str, text_body: Optional[str] = None) -> bool:
-        """Send email via SMTP."""
+        """Send email via SMTP on a one-off connection (used when the outbox is off)."""
         smtp_host = os.getenv('SMTP_HOST')
         smtp_port = int(os.getenv('SMTP_PORT', '587'))
         smtp_user = os.getenv('SMTP_USER')
         smtp_password = os.getenv('SMTP_PASSWORD')
-        smtp_from = os.getenv('SMTP_FROM_EMAIL', smtp_user)
-        smtp_from_name = os.getenv('SMTP_FROM_NAME', 'JewGo Authentication')
         
         if not all([smtp_host, smtp_user, smtp_password]):
             logger.error("SMTP configuration incomplete")
             return False
         
-        # Create message
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = f"{smtp_from_name} <{smtp_from}>"
-        msg['To'] = to_email
-        
-        # Add text part if provided
-        if text_body:
-            text_part = MIMEText(text_body, 'plain')
-            msg.attach(text_part)
-        
-        # Add HTML part
-        html_part = MIMEText(html_body, 'html')
-        msg.attach(html_part)
+        msg = build_mime_message(self._smtp_from_header(), to_email, subject, html_body, text_body)
         
         # Send email
         with smtplib.SMTP(smtp_host, smtp_port) as server:
@@ -173,7 +246,19 @@ class EmailService:
 
 
 class AuthEmailTemplates:
-    """Email templates for authentication flows."""
+    """Email templates for authentication flows.
+
+    The welcome templates are compiled once per frontend URL and provider, and
+    only the recipient's name is rendered per call, into a fresh dict. Ones
+    that embed reset/verification tokens are rendered per call so tokens are
+    never retained.
+    """
+    
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _compile(body: str, **fixed: str) -> Template:
+        """`body` with the per-deployment values filled in, leaving ${user_name} to render per call."""
+        return Template(Template(body).safe_substitute({k: v.replace('$', '$$') for k, v in fixed.items()}))
     
     @staticmethod
     def password_reset_email(reset_url: str, user_name: str = "User") -> Dict[str, str]:
@@ -309,14 +394,7 @@ class AuthEmailTemplates:
             "text_body": text_body
         }
     
-    @staticmethod
-    def oauth_welcome_email(user_name: str = "User", provider: str = "Google") -> Dict[str, str]:
-        """Generate welcome email for OAuth users with password setup instructions."""
-        subject = f"Welcome to JewGo - Account Created via {provider}!"
-        
-        frontend_url = os.getenv('FRONTEND_URL', 'https://jewgo.app')
-        
-        html_body = f"""
+    _OAUTH_WELCOME_HTML = """
         <!DOCTYPE html>
         <html>
         <head>
@@ -327,15 +405,15 @@ class AuthEmailTemplates:
             <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px;">
                 <h2 style="color: #333; margin-top: 0;">🎉 Welcome to JewGo!</h2>
                 
-                <p>Hello {user_name},</p>
+                <p>Hello ${user_name},</p>
                 
-                <p>Your JewGo account has been successfully created using your {provider} account! You can now access all of JewGo's features.</p>
+                <p>Your JewGo account has been successfully created using your ${provider} account! You can now access all of JewGo's features.</p>
                 
                 <div style="background-color: #e3f2fd; padding: 15px; border-radius: 6px; margin: 20px 0;">
                     <h3 style="color: #1976d2; margin-top: 0;">🔐 Set Up Direct Login (Optional)</h3>
-                    <p>While you can always sign in with {provider}, you can also set up a password for direct login:</p>
+                    <p>While you can always sign in with ${provider}, you can also set up a password for direct login:</p>
                     <div style="text-align: center; margin: 15px 0;">
-                        <a href="{frontend_url}/auth/forgot-password" style="background-color: #1976d2; color: white; padding: 10px 20px; text-decoration: none; border-radius: 4px; display: inline-block;">Set Up Password</a>
+                        <a href="${frontend_url}/auth/forgot-password" style="background-color: #1976d2; color: white; padding: 10px 20px; text-decoration: none; border-radius: 4px; display: inline-block;">Set Up Password</a>
                     </div>
                     <p style="font-size: 14px; color: #666;">This will allow you to sign in directly with your email and password in the future.</p>
                 </div>
@@ -350,7 +428,7 @@ class AuthEmailTemplates:
                 </ul>
                 
                 <div style="text-align: center; margin: 30px 0;">
-                    <a href="{frontend_url}" style="background-color: #007bff; color: white; padding: 12px 24px; text-decoration: none; border-radius: 4px; display: inline-block;">Start Exploring JewGo</a>
+                    <a href="${frontend_url}" style="background-color: #007bff; color: white; padding: 12px 24px; text-decoration: none; border-radius: 4px; display: inline-block;">Start Exploring JewGo</a>
                 </div>
                 
                 <p style="color: #666; margin-top: 30px;">
@@ -360,23 +438,23 @@ class AuthEmailTemplates:
                 <hr style="margin: 30px 0; border: none; border-top: 1px solid #ddd;">
                 
                 <p style="color: #999; font-size: 12px;">
-                    This email was sent from JewGo Authentication System. You signed up using {provider}.
+                    This email was sent from JewGo Authentication System. You signed up using ${provider}.
                 </p>
             </div>
         </body>
         </html>
         """
-        
-        text_body = f"""
+
+    _OAUTH_WELCOME_TEXT = """
         Welcome to JewGo!
         
-        Hello {user_name},
+        Hello ${user_name},
         
-        Your JewGo account has been successfully created using your {provider} account! You can now access all of JewGo's features.
+        Your JewGo account has been successfully created using your ${provider} account! You can now access all of JewGo's features.
         
         SET UP DIRECT LOGIN (OPTIONAL):
-        While you can always sign in with {provider}, you can also set up a password for direct login.
-        Visit: {frontend_url}/auth/forgot-password
+        While you can always sign in with ${provider}, you can also set up a password for direct login.
+        Visit: ${frontend_url}/auth/forgot-password
         This will allow you to sign in directly with your email and password in the future.
         
         You can now enjoy all the features of JewGo:
@@ -386,27 +464,26 @@ class AuthEmailTemplates:
         - Connect with the Jewish community
         - Browse the Jewish marketplace
         
-        Start exploring: {frontend_url}
+        Start exploring: ${frontend_url}
         
         If you have any questions, please contact our support team.
         
         ---
         JewGo Authentication System
-        You signed up using {provider}.
+        You signed up using ${provider}.
         """
-        
+
+    @staticmethod
+    def oauth_welcome_email(user_name: str = "User", provider: str = "Google") -> Dict[str, str]:
+        """Generate welcome email for OAuth users with password setup instructions."""
+        fixed = {'frontend_url': os.getenv('FRONTEND_URL', 'https://jewgo.app'), 'provider': provider}
         return {
-            "subject": subject,
-            "html_body": html_body,
-            "text_body": text_body
+            "subject": f"Welcome to JewGo - Account Created via {provider}!",
+            "html_body": AuthEmailTemplates._compile(AuthEmailTemplates._OAUTH_WELCOME_HTML, **fixed).substitute(user_name=user_name),
+            "text_body": AuthEmailTemplates._compile(AuthEmailTemplates._OAUTH_WELCOME_TEXT, **fixed).substitute(user_name=user_name),
         }
 
-    @staticmethod
-    def welcome_email(user_name: str = "User") -> Dict[str, str]:
-        """Generate welcome email after successful verification."""
-        subject = "Welcome to JewGo - Your Account is Ready!"
-        
-        html_body = f"""
+    _WELCOME_HTML = """
         <!DOCTYPE html>
         <html>
         <head>
@@ -417,7 +494,7 @@ class AuthEmailTemplates:
             <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px;">
                 <h2 style="color: #333; margin-top: 0;">🎉 Welcome to JewGo!</h2>
                 
-                <p>Hello {user_name},</p>
+                <p>Hello ${user_name},</p>
                 
                 <p>Your email has been successfully verified and your JewGo account is now active!</p>
                 
@@ -430,7 +507,7 @@ class AuthEmailTemplates:
                 </ul>
                 
                 <div style="text-align: center; margin: 30px 0;">
-                    <a href="{os.getenv('FRONTEND_URL', 'https://jewgo.app')}" style="background-color: #007bff; color: white; padding: 12px 24px; text-decoration: none; border-radius: 4px; display: inline-block;">Start Exploring</a>
+                    <a href="${frontend_url}" style="background-color: #007bff; color: white; padding: 12px 24px; text-decoration: none; border-radius: 4px; display: inline-block;">Start Exploring</a>
                 </div>
                 
                 <p style="color: #666; margin-top: 30px;">
@@ -446,11 +523,11 @@ class AuthEmailTemplates:
         </body>
         </html>
         """
-        
-        text_body = f"""
+
+    _WELCOME_TEXT = """
         Welcome to JewGo!
         
-        Hello {user_name},
+        Hello ${user_name},
         
         Your email has been successfully verified and your JewGo account is now active!
         
@@ -460,18 +537,22 @@ class AuthEmailTemplates:
         - Find community events and services
         - Connect with the Jewish community
         
-        Start exploring: {os.getenv('FRONTEND_URL', 'https://jewgo.app')}
+        Start exploring: ${frontend_url}
         
         If you have any questions, please contact our support team.
         
         ---
         JewGo Authentication System
         """
-        
+
+    @staticmethod
+    def welcome_email(user_name: str = "User") -> Dict[str, str]:
+        """Generate welcome email after successful verification."""
+        frontend_url = os.getenv('FRONTEND_URL', 'https://jewgo.app')
         return {
-            "subject": subject,
-            "html_body": html_body,
-            "text_body": text_body
+            "subject": "Welcome to JewGo - Your Account is Ready!",
+            "html_body": AuthEmailTemplates._compile(AuthEmailTemplates._WELCOME_HTML, frontend_url=frontend_url).substitute(user_name=user_name),
+            "text_body": AuthEmailTemplates._compile(AuthEmailTemplates._WELCOME_TEXT, frontend_url=frontend_url).substitute(user_name=user_name),
         }
 
 
@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""Google Places sync pipeline.
+
+Refreshes Google reviews/ratings for restaurants whose data is stale:
+
+- Stale rows are selected incrementally by `restaurants.last_google_sync_at`
+  (partial index `idx_restaurants_google_sync_stale`), oldest first.
+- Places API calls run concurrently on one async HTTP client, under a global
+  token-bucket request budget plus a concurrency limit per endpoint.
+- Results are written back in chunks, one UPDATE statement per chunk, through
+  a shared pooled engine instead of a per-call engine.
+
+Rows that fail transiently keep their old `last_google_sync_at` and are
+picked up again on the next run; rows with no Google listing are stamped so
+they rotate to the back of the queue.
+
+`GoogleReviewTableSync` runs the same fetch for a given list of restaurants
+and writes the individual reviews to the `google_reviews` table instead.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import httpx
+from sqlalchemy import text
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_BASE_URL = "https://maps.googleapis.com/maps/api/place"
+
+# Concurrent in-flight requests allowed per Places endpoint
+DEFAULT_ENDPOINT_CONCURRENCY = {
+    "details": 8,
+    "textsearch": 4,
+}
+
+# Places statuses that mean "try again later" rather than "no data"
+TRANSIENT_STATUSES = {"OVER_QUERY_LIMIT", "UNKNOWN_ERROR"}
+
+STATUS_UPDATED = "updated"
+STATUS_NOT_FOUND = "not_found"
+STATUS_FAILED = "failed"
+
+
+class PlacesApiError(Exception):
+    """Transient Places API failure; the row is retried on the next run."""
+
+
+class TokenBucket:
+    """Async token bucket shared by all requests of a sync run."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._updated_at = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _convert_timestamp_to_date(timestamp: Optional[int]) -> str:
+    try:
+        if timestamp:
+            return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        return ""
+    except Exception:
+        return ""
+
+
+def format_reviews_payload(result: Dict[str, Any], max_reviews: int = 20) -> Dict[str, Any]:
+    """Convert a Place Details result into the stored `google_reviews` payload."""
+    reviews = []
+    for review in result.get("reviews", [])[:max_reviews]:
+        reviews.append({
+            "google_review_id": review.get("time"),
+            "author_name": review.get("author_name", "Anonymous"),
+            "author_url": review.get("author_url", ""),
+            "rating": review.get("rating", 0),
+            "relative_time_description": review.get("relative_time_description", ""),
+            "text": review.get("text", ""),
+            "time": review.get("time"),
+            "translated": review.get("translated", False),
+            "language": review.get("language", "en"),
+            "profile_photo_url": review.get("profile_photo_url", ""),
+            "rating_date": _convert_timestamp_to_date(review.get("time")),
+        })
+    return {
+        "reviews": reviews,
+        "overall_rating": result.get("rating"),
+        "total_reviews": result.get("user_ratings_total"),
+        "fetched_at": time.time(),
+    }
+
+
+class PlacesApiClient:
+    """Rate-budgeted async client for the Places web service."""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = DEFAULT_BASE_URL,
+        requests_per_second: float = 10.0,
+        burst: Optional[float] = None,
+        endpoint_concurrency: Optional[Dict[str, int]] = None,
+        timeout: float = 15.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.endpoint_concurrency = {**DEFAULT_ENDPOINT_CONCURRENCY, **(endpoint_concurrency or {})}
+        self.timeout = timeout
+        self.transport = transport
+        self.requests_sent = 0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._bucket: Optional[TokenBucket] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> "PlacesApiClient":
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            transport=self.transport,
+            limits=httpx.Limits(max_connections=sum(self.endpoint_concurrency.values())),
+        )
+        self._bucket = TokenBucket(self.requests_per_second, self.burst)
+        self._semaphores = {
+            endpoint: asyncio.Semaphore(limit) for endpoint, limit in self.endpoint_concurrency.items()
+        }
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._client.aclose()
+        self._client = None
+
+    async def get(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET `{endpoint}/json` within the endpoint's concurrency limit and the global budget."""
+        semaphore = self._semaphores.setdefault(endpoint, asyncio.Semaphore(1))
+        async with semaphore:
+            await self._bucket.acquire()
+            self.requests_sent += 1
+            try:
+                response = await self._client.get(f"/{endpoint}/json", params={**params, "key": self.api_key})
+                response.raise_for_status()
+                data = response.json()
+            except (httpx.HTTPError, ValueError) as e:
+                raise PlacesApiError(f"{endpoint} request failed: {e}") from e
+
+        if data.get("status") in TRANSIENT_STATUSES:
+            raise PlacesApiError(f"{endpoint} returned {data['status']}")
+        return data
+
+    async def find_place_id(self, name: str, address: Optional[str] = None) -> Optional[str]:
+        """Resolve a place ID with a text search."""
+        query = f"{name} {address}" if address else name
+        data = await self.get("textsearch", {"query": query, "type": "restaurant"})
+        if data.get("status") == "OK" and data.get("results"):
+            return data["results"][0].get("place_id")
+        return None
+
+    async def fetch_details(self, place_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch the review fields of a place."""
+        data = await self.get(
+            "details",
+            {"place_id": place_id, "fields": "reviews,rating,user_ratings_total"},
+        )
+        if data.get("status") == "OK" and "result" in data:
+            return data["result"]
+        return None
+
+
+@dataclass
+class SyncOutcome:
+    """Result of syncing one restaurant."""
+    restaurant_id: int
+    name: str
+    status: str
+    place_id: Optional[str] = None
+    payload: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    def detail(self) -> Dict[str, Any]:
+        detail = {"restaurant_id": self.restaurant_id, "name": self.name, "status": self.status}
+        if self.error:
+            detail["error"] = self.error
+        return detail
+
+
+@dataclass
+class SyncReport:
+    """Summary of a sync run."""
+    processed: int = 0
+    updated: int = 0
+    not_found: int = 0
+    failed: int = 0
+    requests_sent: int = 0
+    duration_seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+    details: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "processed": self.processed,
+            "updated": self.updated,
+            "not_found": self.not_found,
+            "failed": self.failed,
+            "requests_sent": self.requests_sent,
+            "duration_seconds": round(self.duration_seconds, 3),
+            "errors": self.errors,
+            "details": self.details,
+        }
+
+
+_SELECT_STALE_SQL = text(
+    """
+    SELECT id, name, address, COALESCE(place_id, google_place_id) AS place_id
+    FROM restaurants
+    WHERE status = 'active'
+      AND (last_google_sync_at IS NULL OR last_google_sync_at < :cutoff)
+    ORDER BY last_google_sync_at ASC NULLS FIRST, id
+    LIMIT :limit
+    """
+)
+
+_UPDATE_SYNCED_SQL = text(
+    """
+    UPDATE restaurants AS r
+    SET google_reviews = s.google_reviews,
+        google_rating = s.google_rating,
+        google_review_count = s.google_review_count,
+        place_id = COALESCE(r.place_id, s.place_id),
+        last_google_sync_at = NOW(),
+        updated_at = NOW()
+    FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS s(
+        id integer,
+        google_reviews text,
+        google_rating double precision,
+        google_review_count integer,
+        place_id text
+    )
+    WHERE r.id = s.id
+    """
+)
+
+_MARK_NOT_FOUND_SQL = text(
+    """
+    UPDATE restaurants
+    SET last_google_sync_at = NOW()
+    WHERE id = ANY(:ids)
+    """
+)
+
+
+class GooglePlacesSyncPipeline:
+    """Select stale restaurants, fetch Places data concurrently, write back in batches."""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        engine=None,
+        base_url: Optional[str] = None,
+        requests_per_second: Optional[float] = None,
+        endpoint_concurrency: Optional[Dict[str, int]] = None,
+        stale_after: timedelta = timedelta(days=7),
+        write_batch_size: int = 50,
+        max_reviews: int = 20,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.api_key = api_key or os.environ.get("GOOGLE_PLACES_API_KEY")
+        self._engine = engine
+        self.base_url = base_url or os.environ.get("GOOGLE_PLACES_BASE_URL", DEFAULT_BASE_URL)
+        self.requests_per_second = requests_per_second or float(os.environ.get("GOOGLE_PLACES_RPS", "10"))
+        self.endpoint_concurrency = endpoint_concurrency
+        self.stale_after = stale_after
+        self.write_batch_size = write_batch_size
+        self.max_reviews = max_reviews
+        self.transport = transport
+
+    @property
+    def engine(self):
+        """The injected engine, or the application's shared engine."""
+        if self._engine is None:
+            from database.unified_connection_manager import get_unified_connection_manager
+
+            self._engine = get_unified_connection_manager().engine
+            if self._engine is None:
+                raise RuntimeError("Database not connected")
+        return self._engine
+
+    def select_stale(self, limit: int) -> List[Dict[str, Any]]:
+        """Get up to `limit` active restaurants not synced within `stale_after`."""
+        cutoff = datetime.utcnow() - self.stale_after
+        with self.engine.connect() as conn:
+            rows = conn.execute(_SELECT_STALE_SQL, {"cutoff": cutoff, "limit": limit}).fetchall()
+        return [dict(row._mapping) for row in rows]
+
+    async def _sync_one(self, client: PlacesApiClient, restaurant: Dict[str, Any]) -> SyncOutcome:
+        restaurant_id, name = restaurant["id"], restaurant["name"]
+        try:
+            place_id = restaurant.get("place_id") or await client.find_place_id(name, restaurant.get("address"))
+            if not place_id:
+                return SyncOutcome(restaurant_id, name, STATUS_NOT_FOUND)
+
+            result = await client.fetch_details(place_id)
+            if result is None:
+                return SyncOutcome(restaurant_id, name, STATUS_NOT_FOUND, place_id=place_id)
+
+            return SyncOutcome(
+                restaurant_id,
+                name,
+                STATUS_UPDATED,
+                place_id=place_id,
+                payload=format_reviews_payload(result, self.max_reviews),
+            )
+        except PlacesApiError as e:
+            return SyncOutcome(restaurant_id, name, STATUS_FAILED, error=str(e))
+        except Exception as e:
+            logger.exception("Unexpected error syncing restaurant", restaurant_id=restaurant_id, error=str(e))
+            return SyncOutcome(restaurant_id, name, STATUS_FAILED, error=str(e))
+
+    async def fetch_all(self, restaurants: List[Dict[str, Any]]) -> tuple[List[SyncOutcome], int]:
+        """Fetch Places data for all restaurants concurrently.
+
+        Returns:
+            (outcomes in input order, number of API requests sent)
+        """
+        async with PlacesApiClient(
+            self.api_key,
+            base_url=self.base_url,
+            requests_per_second=self.requests_per_second,
+            endpoint_concurrency=self.endpoint_concurrency,
+            transport=self.transport,
+        ) as client:
+            outcomes = await asyncio.gather(*(self._sync_one(client, r) for r in restaurants))
+            return list(outcomes), client.requests_sent
+
+    def write_outcomes(self, outcomes: List[SyncOutcome]) -> int:
+        """Write synced and not-found outcomes, one transaction and two statements per chunk.
+
+        Returns:
+            Number of restaurants written
+        """
+        writable = [o for o in outcomes if o.status in (STATUS_UPDATED, STATUS_NOT_FOUND)]
+        written = 0
+        for start in range(0, len(writable), self.write_batch_size):
+            chunk = writable[start:start + self.write_batch_size]
+            rows = [
+                {
+                    "id": o.restaurant_id,
+                    "google_reviews": json.dumps(o.payload),
+                    "google_rating": o.payload.get("overall_rating"),
+                    "google_review_count": o.payload.get("total_reviews"),
+                    "place_id": o.place_id,
+                }
+                for o in chunk if o.status == STATUS_UPDATED
+            ]
+            not_found_ids = [o.restaurant_id for o in chunk if o.status == STATUS_NOT_FOUND]
+
+            with self.engine.begin() as conn:
+                if rows:
+                    conn.execute(_UPDATE_SYNCED_SQL, {"rows": json.dumps(rows)})
+                if not_found_ids:
+                    conn.execute(_MARK_NOT_FOUND_SQL, {"ids": not_found_ids})
+            written += len(chunk)
+        return written
+
+    async def run_async(self, limit: int = 100) -> SyncReport:
+        return await self.sync_async(self.select_stale(limit))
+
+    async def sync_async(self, restaurants: List[Dict[str, Any]]) -> SyncReport:
+        """Fetch and write back the given restaurants (dicts with id, name, address, place_id)."""
+        started = time.perf_counter()
+        report = SyncReport()
+
+        report.processed = len(restaurants)
+        if restaurants:
+            outcomes, report.requests_sent = await self.fetch_all(restaurants)
+            self.write_outcomes(outcomes)
+
+            for outcome in outcomes:
+                report.details.append(outcome.detail())
+                if outcome.status == STATUS_UPDATED:
+                    report.updated += 1
+                elif outcome.status == STATUS_NOT_FOUND:
+                    report.not_found += 1
+                else:
+                    report.failed += 1
+                    report.errors.append(f"Error processing restaurant {outcome.restaurant_id}: {outcome.error}")
+
+        report.duration_seconds = time.perf_counter() - started
+        logger.info(
+            "Completed Google Places sync",
+            processed=report.processed,
+            updated=report.updated,
+            not_found=report.not_found,
+            failed=report.failed,
+            requests_sent=report.requests_sent,
+            duration_seconds=round(report.duration_seconds, 3),
+        )
+        return report
+
+    def run(self, limit: int = 100) -> Dict[str, Any]:
+        """Sync up to `limit` stale restaurants (blocking entry point for jobs and scripts)."""
+        if not self.api_key:
+            return {"success": False, "error": "Google Places API key not configured"}
+        return asyncio.run(self.run_async(limit)).to_dict()
+
+
+_UPSERT_GOOGLE_REVIEWS_SQL = text(
+    """
+    INSERT INTO google_reviews (
+        id, restaurant_id, place_id, google_review_id, author_name, author_url,
+        profile_photo_url, rating, text, time, relative_time_description, language,
+        created_at, updated_at
+    )
+    SELECT s.id, s.restaurant_id, s.place_id, s.google_review_id, s.author_name, s.author_url,
+           s.profile_photo_url, s.rating, s.text, s.time, s.relative_time_description, s.language,
+           NOW(), NOW()
+    FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS s(
+        id text,
+        restaurant_id integer,
+        place_id text,
+        google_review_id text,
+        author_name text,
+        author_url text,
+        profile_photo_url text,
+        rating integer,
+        text text,
+        time timestamp,
+        relative_time_description text,
+        language text
+    )
+    ON CONFLICT (id) DO UPDATE
+    SET author_name = EXCLUDED.author_name,
+        author_url = EXCLUDED.author_url,
+        profile_photo_url = EXCLUDED.profile_photo_url,
+        rating = EXCLUDED.rating,
+        text = EXCLUDED.text,
+        time = EXCLUDED.time,
+        relative_time_description = EXCLUDED.relative_time_description,
+        language = EXCLUDED.language,
+        updated_at = NOW()
+    """
+)
+
+_DELETE_OLD_GOOGLE_REVIEWS_SQL = text(
+    """
+    DELETE FROM google_reviews AS g
+    USING jsonb_to_recordset(CAST(:synced AS jsonb)) AS s(restaurant_id integer, place_id text)
+    WHERE g.restaurant_id = s.restaurant_id
+      AND g.place_id = s.place_id
+      AND NOT (g.id = ANY(:keep_ids))
+    """
+)
+
+
+def google_review_rows(restaurant_id: int, place_id: str, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Convert a reviews payload into `google_reviews` rows.
+
+    Review IDs keep the author/date scheme of GoogleReviewSyncService, so
+    existing rows are updated in place.
+    """
+    rows = {}
+    for review in payload.get("reviews", []):
+        review_date = datetime.fromtimestamp(review.get("time") or 0).strftime("%Y-%m-%d")
+        google_review_id = f"{review.get('author_name') or 'unknown'}_{review_date}"
+        # Same author and day collapse into one row, last review wins
+        row_id = f"google_rev_{restaurant_id}_{google_review_id}"
+        rows[row_id] = {
+            "id": row_id,
+            "restaurant_id": restaurant_id,
+            "place_id": place_id,
+            "google_review_id": google_review_id,
+            "author_name": review.get("author_name") or "",
+            "author_url": review.get("author_url") or None,
+            "profile_photo_url": review.get("profile_photo_url") or None,
+            "rating": review.get("rating") or 0,
+            "text": review.get("text", ""),
+            "time": review_date,
+            "relative_time_description": review.get("relative_time_description"),
+            "language": review.get("language"),
+        }
+    return list(rows.values())
+
+
+class GoogleReviewTableSync(GooglePlacesSyncPipeline):
+    """The sync pipeline, writing reviews to the `google_reviews` table instead of `restaurants`."""
+
+    async def _sync_one(self, client: PlacesApiClient, restaurant: Dict[str, Any]) -> SyncOutcome:
+        outcome = await super()._sync_one(client, restaurant)
+        if outcome.status == STATUS_UPDATED and not outcome.payload["reviews"]:
+            # Keep the stored reviews rather than deleting them all
+            return SyncOutcome(outcome.restaurant_id, outcome.name, STATUS_NOT_FOUND, place_id=outcome.place_id)
+        return outcome
+
+    def write_outcomes(self, outcomes: List[SyncOutcome]) -> int:
+        """Upsert reviews and delete dropped ones, one transaction and two statements per chunk.
+
+        Returns:
+            Number of restaurants written
+        """
+        synced = [o for o in outcomes if o.status == STATUS_UPDATED]
+        for start in range(0, len(synced), self.write_batch_size):
+            chunk = synced[start:start + self.write_batch_size]
+            rows = [
+                row for o in chunk for row in google_review_rows(o.restaurant_id, o.place_id, o.payload)
+            ]
+            with self.engine.begin() as conn:
+                conn.execute(_UPSERT_GOOGLE_REVIEWS_SQL, {"rows": json.dumps(rows)})
+                conn.execute(
+                    _DELETE_OLD_GOOGLE_REVIEWS_SQL,
+                    {
+                        "synced": json.dumps([{"restaurant_id": o.restaurant_id, "place_id": o.place_id} for o in chunk]),
+                        "keep_ids": [row["id"] for row in rows],
+                    },
+                )
+        return len(synced)
@@ -1,7 +1,13 @@
+import asyncio
 from datetime import datetime
 from typing import Any, Dict
 from services.base_service import BaseService
 from services.google_places_service import GooglePlacesService
+from services.google_places_sync import (
+    STATUS_NOT_FOUND,
+    STATUS_UPDATED,
+    GoogleReviewTableSync,
+)
 
 
 class GoogleReviewSyncService(BaseService):
@@ -116,6 +122,10 @@ class GoogleReviewSyncService(BaseService):
     ) -> Dict[str, Any]:
         """Sync Google reviews for all restaurants that have place_id.
 
+        Places requests run concurrently under the Google Places sync request
+        budget, and reviews are written back in batches (see
+        services.google_places_sync.GoogleReviewTableSync).
+
         Args:
             max_reviews: Maximum number of reviews to fetch per restaurant
 
@@ -135,35 +145,43 @@ class GoogleReviewSyncService(BaseService):
 
         try:
             # Get all restaurants with place_id
-            restaurants = self.db_manager.get_restaurants(
-                limit=1000
-            )  # Adjust limit as needed
-
-            for restaurant in restaurants:
-                if not restaurant.get("place_id"):
-                    continue
-
-                results["total_restaurants"] += 1
-
-                try:
-                    success = self.sync_restaurant_google_reviews(
-                        restaurant_id=restaurant["id"],
-                        place_id=restaurant["place_id"],
-                        max_reviews=max_reviews,
+            restaurants = [
+                {
+                    "id": restaurant["id"],
+                    "name": restaurant.get("name", ""),
+                    "address": restaurant.get("address"),
+                    "place_id": restaurant["place_id"],
+                }
+                for restaurant in self.db_manager.get_restaurants(
+                    limit=1000
+                )  # Adjust limit as needed
+                if restaurant.get("place_id")
+            ]
+            results["total_restaurants"] = len(restaurants)
+            if not restaurants:
+                return results
+
+            api_key = self.google_places_service.api_key
+            if not api_key:
+                results["failed_syncs"] = len(restaurants)
+                results["errors"].append("Google Places API key not configured")
+                return results
+
+            pipeline = GoogleReviewTableSync(api_key=api_key, max_reviews=max_reviews)
+            report = asyncio.run(pipeline.sync_async(restaurants))
+
+            for detail in report.details:
+                if detail["status"] == STATUS_UPDATED:
+                    results["successful_syncs"] += 1
+                elif detail["status"] == STATUS_NOT_FOUND:
+                    results["failed_syncs"] += 1
+                    results["errors"].append(
+                        f"Failed to sync restaurant {detail['restaurant_id']}"
                     )
-
-                    if success:
-                        results["successful_syncs"] += 1
-                    else:
-                        results["failed_syncs"] += 1
-                        results["errors"].append(
-                            f"Failed to sync restaurant {restaurant['id']}"
-                        )
-
-                except Exception as e:
+                else:
                     results["failed_syncs"] += 1
                     results["errors"].append(
-                        f"Error syncing restaurant {restaurant['id']}: {str(e)}"
+                        f"Error syncing restaurant {detail['restaurant_id']}: {detail.get('error')}"
                     )
 
             self.logger.info(
@@ -172,6 +190,7 @@ class GoogleReviewSyncService(BaseService):
                     "total_restaurants": results["total_restaurants"],
                     "successful_syncs": results["successful_syncs"],
                     "failed_syncs": results["failed_syncs"],
+                    "requests_sent": report.requests_sent,
                 },
             )
 
@@ -3,6 +3,7 @@ from datetime import datetime, time
 from typing import Any, Dict, List, Optional
 import pytz
 from utils.hours_formatter import HoursFormatter
+from utils.weekly_hours import is_open_at
 
 """Hours computation utilities.
 This module provides functions for computing restaurant hours status,
@@ -31,28 +32,8 @@ def is_open_now(hours_doc: Dict[str, Any]) -> bool:
     try:
         if not hours_doc:
             return False
-        hours_data = hours_doc.get("hours", {})
-        timezone = hours_doc.get("timezone", "America/New_York")
-        # Get current time in restaurant's timezone
-        tz = pytz.timezone(timezone)
-        now = datetime.now(tz)
-        current_day = now.strftime("%A").lower()
-        current_time = now.time()
-        # Get today's hours
-        day_abbr = _get_day_abbreviation(current_day)
-        today_hours = hours_data.get(day_abbr, {})
-        if not today_hours.get("is_open", False):
-            return False
-        # Parse open and close times
-        open_time = _parse_time_string(today_hours.get("open", ""))
-        close_time = _parse_time_string(today_hours.get("close", ""))
-        if not open_time or not close_time:
-            return False
-        # Handle overnight hours (e.g., 11PM - 2AM)
-        if close_time < open_time:
-            return current_time >= open_time or current_time <= close_time
-        else:
-            return open_time <= current_time <= close_time
+        # One shared parser (utils.weekly_hours), memoized per hours document
+        return bool(is_open_at(hours_doc))
     except Exception as e:
         logger.exception("Error checking if restaurant is open: %s", str(e))
         return False
@@ -10,19 +10,30 @@ This module provides advanced background job processing capabilities:
 - Job monitoring and statistics
 - Dead letter queue for failed jobs
 - Job result caching and persistence
+- Atomic, batched promotion of due jobs (Lua)
+- Process-pool execution for CPU-bound jobs
+- Atomic pop-and-mark-running of the next job (Lua)
+- Visibility timeouts, heartbeats and reclaiming of orphaned jobs, with a
+  dead letter queue for jobs reclaimed too often
+
+Job state lives in a Redis hash per job: the immutable job spec is stored once
+as JSON under 'data', and transitions only write the fields that change
+(status, timestamps, progress, ...), pipelined with the queue moves.
 
 Author: JewGo Development Team
-Version: 1.0
+Version: 1.1
 Last Updated: 2025-01-15
 """
 
 import json
+import os
 import time
 import uuid
 import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Callable
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields
 from enum import Enum
 from croniter import croniter
 
@@ -51,6 +62,12 @@ class JobPriority(Enum):
     CRITICAL = 20
 
 
+class ExecutionMode(Enum):
+    """Where a job function runs."""
+    THREAD = "thread"    # In the worker thread (I/O-bound jobs)
+    PROCESS = "process"  # In the shared process pool (CPU-bound jobs: exports, image work)
+
+
 @dataclass
 class Job:
     """Job data structure."""
@@ -72,6 +89,8 @@ class Job:
     result: Optional[Any] = None
     error: Optional[str] = None
     tags: List[str] = None
+    progress: float = 0.0
+    progress_message: Optional[str] = None
     
     def __post_init__(self):
         if self.tags is None:
@@ -91,10 +110,107 @@ class JobStats:
     queue_size: int
 
 
+# Move due jobs from the scheduled set to the pending set in one atomic step.
+# KEYS[1] = scheduled queue, KEYS[2] = pending queue
+# ARGV[1] = now (epoch seconds), ARGV[2] = batch size, ARGV[3] = job key prefix,
+# ARGV[4] = default priority
+_PROMOTE_DUE_JOBS_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, job_id in ipairs(due) do
+    local job_key = ARGV[3] .. job_id
+    local priority = tonumber(redis.call('HGET', job_key, 'priority') or ARGV[4])
+    redis.call('ZADD', KEYS[2], priority, job_id)
+    redis.call('ZREM', KEYS[1], job_id)
+    redis.call('HSET', job_key, 'status', 'pending')
+end
+return due
+"""
+
+# Take the highest-priority pending job and mark it running in one atomic step,
+# so a worker dying in between can't lose the job.
+# KEYS[1] = pending queue, KEYS[2] = running queue
+# ARGV[1] = now (epoch seconds), ARGV[2] = now (ISO timestamp), ARGV[3] = job key prefix
+_CLAIM_NEXT_JOB_SCRIPT = """
+local popped = redis.call('ZPOPMAX', KEYS[1])
+if #popped == 0 then
+    return false
+end
+local job_id = popped[1]
+redis.call('ZADD', KEYS[2], ARGV[1], job_id)
+redis.call('HSET', ARGV[3] .. job_id, 'status', 'running', 'started_at', ARGV[2])
+return job_id
+"""
+
+# Requeue running jobs whose heartbeat is older than the visibility timeout, or
+# move them to the dead letter queue once they have been reclaimed too often.
+# KEYS[1] = running queue, KEYS[2] = pending queue, KEYS[3] = dead letter queue
+# ARGV[1] = heartbeat cutoff (epoch seconds), ARGV[2] = batch size,
+# ARGV[3] = job key prefix, ARGV[4] = default priority, ARGV[5] = max reclaims,
+# ARGV[6] = now (epoch seconds), ARGV[7] = now (ISO timestamp)
+# Returns {reclaimed job ids, dead-lettered job ids}
+_RECLAIM_ORPHANED_JOBS_SCRIPT = """
+local orphaned = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+local reclaimed, dead = {}, {}
+for _, job_id in ipairs(orphaned) do
+    local job_key = ARGV[3] .. job_id
+    redis.call('ZREM', KEYS[1], job_id)
+    local reclaims = redis.call('HINCRBY', job_key, 'reclaim_count', 1)
+    if reclaims > tonumber(ARGV[5]) then
+        redis.call('ZADD', KEYS[3], ARGV[6], job_id)
+        redis.call('HSET', job_key, 'status', 'failed', 'completed_at', ARGV[7],
+            'error', 'Worker lost ' .. reclaims .. ' times; moved to dead letter queue')
+        table.insert(dead, job_id)
+    else
+        local priority = tonumber(redis.call('HGET', job_key, 'priority') or ARGV[4])
+        redis.call('ZADD', KEYS[2], priority, job_id)
+        redis.call('HSET', job_key, 'status', 'pending')
+        table.insert(reclaimed, job_id)
+    end
+end
+return {reclaimed, dead}
+"""
+
+# Hash fields that hold mutable job state (everything else comes from 'data')
+_STATE_FIELDS = (
+    'status', 'scheduled_at', 'started_at', 'completed_at', 'retry_count',
+    'result', 'error', 'progress', 'progress_message',
+)
+_DATETIME_FIELDS = ('created_at', 'scheduled_at', 'started_at', 'completed_at')
+_JOB_FIELDS = {f.name for f in fields(Job)}
+
+
+def _decode(value: Any) -> Any:
+    """Decode bytes returned by a non-decoding Redis client."""
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+def _encode_field(value: Any) -> Any:
+    """Encode a job field for storage in a Redis hash."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None:
+        return ''
+    return value
+
+
 class JobQueueManager:
     """Advanced job queue manager with Redis backend."""
     
-    def __init__(self, redis_manager=None):
+    JOB_KEY_PREFIX = "job:"
+    
+    def __init__(
+        self,
+        redis_manager=None,
+        process_pool_size: Optional[int] = None,
+        visibility_timeout: Optional[int] = None,
+        heartbeat_interval: Optional[int] = None,
+        max_reclaims: Optional[int] = None,
+        promote_batch_size: int = 500,
+        scheduler_max_wait: float = 5.0,
+        worker_poll_interval: float = 0.5
+    ):
         self.redis_manager = redis_manager or get_redis_manager_v5()
         self.redis_client = self.redis_manager.get_client()
         
@@ -106,26 +222,88 @@ class JobQueueManager:
         self.scheduled_queue = "job_queue:scheduled"
         self.dead_letter_queue = "job_queue:dead_letter"
         
+        # Execution settings
+        self.process_pool_size = process_pool_size or int(
+            os.getenv('JOB_QUEUE_PROCESS_POOL_SIZE', max((os.cpu_count() or 2) - 1, 1))
+        )
+        self.visibility_timeout = visibility_timeout or int(os.getenv('JOB_QUEUE_VISIBILITY_TIMEOUT', 120))
+        self.heartbeat_interval = heartbeat_interval or int(os.getenv('JOB_QUEUE_HEARTBEAT_INTERVAL', 15))
+        # Reclaims (worker lost mid-job) allowed before a job is dead-lettered
+        self.max_reclaims = max_reclaims if max_reclaims is not None else int(os.getenv('JOB_QUEUE_MAX_RECLAIMS', 3))
+        self.promote_batch_size = promote_batch_size
+        self.scheduler_max_wait = scheduler_max_wait
+        self.worker_poll_interval = worker_poll_interval
+        
+        # Lua scripts (registration is local; scripts are loaded on first use)
+        self._promote_due_jobs = None
+        self._claim_next_job = None
+        self._reclaim_orphaned_jobs = None
+        if self.redis_client is not None:
+            self._promote_due_jobs = self.redis_client.register_script(_PROMOTE_DUE_JOBS_SCRIPT)
+            self._claim_next_job = self.redis_client.register_script(_CLAIM_NEXT_JOB_SCRIPT)
+            self._reclaim_orphaned_jobs = self.redis_client.register_script(_RECLAIM_ORPHANED_JOBS_SCRIPT)
+        
         # Job registry
         self.job_registry: Dict[str, Callable] = {}
+        self.execution_modes: Dict[str, ExecutionMode] = {}
         self.worker_threads: List[threading.Thread] = []
         self.is_running = False
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._process_pool_lock = threading.Lock()
+        self._scheduler_wakeup = threading.Event()
+        self._work_available = threading.Event()
+        
+        # Jobs being executed by this process, for heartbeats
+        self._active_jobs: Dict[str, float] = {}
+        self._active_jobs_lock = threading.Lock()
         
         # Statistics
         self.stats = {
             'total_processed': 0,
             'total_failed': 0,
             'total_retries': 0,
+            'total_promoted': 0,
+            'total_reclaimed': 0,
+            'total_dead_lettered': 0,
             'start_time': datetime.now()
         }
         
         logger.info("Job queue manager initialized")
+    
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.JOB_KEY_PREFIX}{job_id}"
+    
+    def register_job(self, name: str, func: Callable, execution_mode: ExecutionMode = ExecutionMode.THREAD):
+        """Register a job function.
 
-    def register_job(self, name: str, func: Callable):
-        """Register a job function."""
+        PROCESS-mode functions run in the process pool, so they must be
+        importable module-level functions with picklable arguments and results.
+        """
         self.job_registry[name] = func
-        logger.info(f"Registered job: {name}")
-
+        self.execution_modes[name] = execution_mode
+        logger.info(f"Registered job: {name} ({execution_mode.value})")
+    
+    def _store_new_job(self, job: Job, queue: str, score: float, **extra_fields):
+        """Store a new job's spec and state and add it to a queue in one round trip."""
+        job_data = self._serialize_job(job)
+        mapping = {
+            'data': json.dumps(job_data, default=str),
+            'priority': job.priority.value,
+            **{field: _encode_field(getattr(job, field)) for field in _STATE_FIELDS if field != 'result'},
+            **extra_fields
+        }
+        
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.hset(self._job_key(job.id), mapping=mapping)
+        pipe.zadd(queue, {job.id: score})
+        pipe.execute()
+    
+    @staticmethod
+    def _serialize_job(job: Job) -> Dict[str, Any]:
+        """Convert a job to JSON-safe primitives."""
+        return {key: _encode_field(value) if isinstance(value, (Enum, datetime)) else value
+                for key, value in asdict(job).items()}
+    
     def enqueue_job(
         self,
         name: str,
@@ -160,30 +338,19 @@ class JobQueueManager:
             tags=tags or []
         )
         
-        # Store job data
-        job_key = f"job:{job_id}"
-        self.redis_client.hset(job_key, mapping={
-            'data': json.dumps(asdict(job), default=str)
-        })
-        
-        # Add to appropriate queue
         if scheduled_at:
             # Add to scheduled queue with timestamp score
-            self.redis_client.zadd(
-                self.scheduled_queue,
-                {job_id: scheduled_at.timestamp()}
-            )
+            self._store_new_job(job, self.scheduled_queue, scheduled_at.timestamp())
+            self._scheduler_wakeup.set()
             logger.info(f"Scheduled job {job_id} for {scheduled_at}")
         else:
             # Add to pending queue with priority score
-            self.redis_client.zadd(
-                self.pending_queue,
-                {job_id: priority.value}
-            )
+            self._store_new_job(job, self.pending_queue, priority.value)
+            self._work_available.set()
             logger.info(f"Enqueued job {job_id} with priority {priority.name}")
         
         return job_id
-
+    
     def schedule_recurring_job(
         self,
         name: str,
@@ -217,92 +384,108 @@ class JobQueueManager:
             tags=(tags or []) + ['recurring', f'cron:{cron_expression}']
         )
         
-        # Store job data with cron expression
-        job_key = f"job:{job_id}"
-        job_data = asdict(job)
-        job_data['cron_expression'] = cron_expression
-        job_data['is_recurring'] = True
-        
-        self.redis_client.hset(job_key, mapping={
-            'data': json.dumps(job_data, default=str)
-        })
-        
-        # Add to scheduled queue
-        self.redis_client.zadd(
-            self.scheduled_queue,
-            {job_id: next_run.timestamp()}
-        )
+        # Store job data with cron expression and add to scheduled queue
+        self._store_new_job(job, self.scheduled_queue, next_run.timestamp(), cron=cron_expression)
+        self._scheduler_wakeup.set()
         
         logger.info(f"Scheduled recurring job {job_id} with cron '{cron_expression}'")
         return job_id
-
+    
     def get_job(self, job_id: str) -> Optional[Job]:
         """Get job by ID."""
-        job_key = f"job:{job_id}"
-        job_data = self.redis_client.hget(job_key, 'data')
+        job_id = _decode(job_id)
+        raw = self.redis_client.hgetall(self._job_key(job_id))
         
-        if not job_data:
+        if not raw:
             return None
         
         try:
-            data = json.loads(job_data)
+            fields_map = {_decode(key): _decode(value) for key, value in raw.items()}
+            data = json.loads(fields_map['data'])
+            
+            # Overlay mutable state fields written by transitions
+            for field in _STATE_FIELDS:
+                if field in fields_map:
+                    data[field] = fields_map[field] if fields_map[field] != '' else None
+            if data.get('result') is not None and 'result' in fields_map:
+                data['result'] = json.loads(data['result'])
+            data['retry_count'] = int(data.get('retry_count') or 0)
+            data['progress'] = float(data.get('progress') or 0.0)
+            
             # Convert datetime strings back to datetime objects
-            for field in ['created_at', 'scheduled_at', 'started_at', 'completed_at']:
+            for field in _DATETIME_FIELDS:
                 if data.get(field):
                     data[field] = datetime.fromisoformat(data[field])
             
             # Convert enums
-            data['priority'] = JobPriority(data['priority'])
+            data['priority'] = JobPriority(int(data['priority']))
             data['status'] = JobStatus(data['status'])
             
-            return Job(**data)
+            return Job(**{key: value for key, value in data.items() if key in _JOB_FIELDS})
         except Exception as e:
             logger.error(f"Error parsing job data for {job_id}: {e}")
             return None
-
-    def update_job_status(self, job_id: str, status: JobStatus, **updates):
-        """Update job status and other fields."""
-        job = self.get_job(job_id)
-        if not job:
-            return
-        
-        # Update fields
-        for key, value in updates.items():
-            if hasattr(job, key):
-                setattr(job, key, value)
-        
-        job.status = status
+    
+    def _status_fields(self, status: JobStatus, **updates) -> Dict[str, Any]:
+        """Build the hash fields written for a status transition."""
+        mapping = {'status': status.value}
         
         # Update timestamps
         if status == JobStatus.RUNNING:
-            job.started_at = datetime.now()
+            mapping['started_at'] = datetime.now().isoformat()
         elif status in [JobStatus.COMPLETED, JobStatus.FAILED]:
-            job.completed_at = datetime.now()
+            mapping['completed_at'] = datetime.now().isoformat()
         
-        # Store updated job
-        job_key = f"job:{job_id}"
-        self.redis_client.hset(job_key, mapping={
-            'data': json.dumps(asdict(job), default=str)
-        })
-
+        for key, value in updates.items():
+            if key not in _JOB_FIELDS:
+                continue
+            if key == 'result':
+                mapping[key] = json.dumps(value, default=str)
+            else:
+                mapping[key] = _encode_field(value)
+        
+        return mapping
+    
+    def update_job_status(self, job_id: str, status: JobStatus, pipe=None, **updates):
+        """Update job status and other fields.
+
+        Only the changed fields are written. Pass `pipe` to batch the write with
+        other commands; otherwise it is sent immediately.
+        """
+        job_id = _decode(job_id)
+        target = pipe if pipe is not None else self.redis_client
+        target.hset(self._job_key(job_id), mapping=self._status_fields(status, **updates))
+    
+    def update_job_progress(self, job_id: str, progress: float, message: Optional[str] = None):
+        """Record job progress (0-100) and refresh the job's heartbeat in one round trip."""
+        job_id = _decode(job_id)
+        mapping = {'progress': float(progress)}
+        if message is not None:
+            mapping['progress_message'] = message
+        
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.hset(self._job_key(job_id), mapping=mapping)
+        pipe.zadd(self.running_queue, {job_id: time.time()}, xx=True)
+        pipe.execute()
+    
     def cancel_job(self, job_id: str) -> bool:
         """Cancel a job."""
-        job = self.get_job(job_id)
-        if not job:
+        job_id = _decode(job_id)
+        if not self.redis_client.exists(self._job_key(job_id)):
             return False
         
-        # Remove from queues
-        self.redis_client.zrem(self.pending_queue, job_id)
-        self.redis_client.zrem(self.scheduled_queue, job_id)
-        self.redis_client.zrem(self.running_queue, job_id)
-        
-        # Update status
-        self.update_job_status(job_id, JobStatus.CANCELLED)
+        # Remove from queues and update status
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.zrem(self.pending_queue, job_id)
+        pipe.zrem(self.scheduled_queue, job_id)
+        pipe.zrem(self.running_queue, job_id)
+        self.update_job_status(job_id, JobStatus.CANCELLED, pipe=pipe)
+        pipe.execute()
         
         logger.info(f"Cancelled job {job_id}")
         return True
-
-    def retry_job(self, job_id: str) -> bool:
+    
+    def retry_job(self, job_id: str, pipe=None) -> bool:
         """Retry a failed job."""
         job = self.get_job(job_id)
         if not job or job.retry_count >= job.max_retries:
@@ -312,34 +495,35 @@ class JobQueueManager:
         delay = job.retry_delay * (2 ** job.retry_count)
         retry_time = datetime.now() + timedelta(seconds=delay)
         
-        # Update retry count
-        job.retry_count += 1
-        job.status = JobStatus.RETRYING
-        job.scheduled_at = retry_time
-        
-        # Store updated job
-        job_key = f"job:{job_id}"
-        self.redis_client.hset(job_key, mapping={
-            'data': json.dumps(asdict(job), default=str)
-        })
-        
-        # Add to scheduled queue
-        self.redis_client.zadd(
-            self.scheduled_queue,
-            {job_id: retry_time.timestamp()}
+        own_pipe = pipe is None
+        if own_pipe:
+            pipe = self.redis_client.pipeline(transaction=False)
+        
+        # Update retry count and add to scheduled queue
+        self.update_job_status(
+            job.id,
+            JobStatus.RETRYING,
+            pipe=pipe,
+            retry_count=job.retry_count + 1,
+            scheduled_at=retry_time
         )
+        pipe.zadd(self.scheduled_queue, {job.id: retry_time.timestamp()})
         
-        logger.info(f"Scheduled retry {job.retry_count}/{job.max_retries} for job {job_id} in {delay}s")
+        if own_pipe:
+            pipe.execute()
+        self._scheduler_wakeup.set()
+        
+        logger.info(f"Scheduled retry {job.retry_count + 1}/{job.max_retries} for job {job.id} in {delay}s")
         return True
-
+    
     def get_job_stats(self) -> JobStats:
         """Get job queue statistics."""
         # Count jobs in each queue
-        pending_count = self.redis_client.zcard(self.pending_queue)
-        running_count = self.redis_client.zcard(self.running_queue)
-        completed_count = self.redis_client.zcard(self.completed_queue)
-        failed_count = self.redis_client.zcard(self.failed_queue)
-        scheduled_count = self.redis_client.zcard(self.scheduled_queue)
+        pipe = self.redis_client.pipeline(transaction=False)
+        for queue in (self.pending_queue, self.running_queue, self.completed_queue,
+                      self.failed_queue, self.scheduled_queue):
+            pipe.zcard(queue)
+        pending_count, running_count, completed_count, failed_count, scheduled_count = pipe.execute()
         
         total_jobs = pending_count + running_count + completed_count + failed_count + scheduled_count
         
@@ -357,7 +541,7 @@ class JobQueueManager:
             success_rate=success_rate,
             queue_size=pending_count + scheduled_count
         )
-
+    
     def start_workers(self, num_workers: int = 3):
         """Start background worker threads."""
         if self.is_running:
@@ -366,6 +550,9 @@ class JobQueueManager:
         
         self.is_running = True
         
+        if any(mode == ExecutionMode.PROCESS for mode in self.execution_modes.values()):
+            self._get_process_pool()
+        
         for i in range(num_workers):
             worker = threading.Thread(
                 target=self._worker_loop,
@@ -375,110 +562,204 @@ class JobQueueManager:
             worker.start()
             self.worker_threads.append(worker)
         
-        # Start scheduler thread
-        scheduler = threading.Thread(
-            target=self._scheduler_loop,
-            name="JobScheduler",
-            daemon=True
-        )
-        scheduler.start()
-        self.worker_threads.append(scheduler)
+        # Start scheduler and heartbeat threads
+        for target, name in ((self._scheduler_loop, "JobScheduler"), (self._heartbeat_loop, "JobHeartbeat")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self.worker_threads.append(thread)
         
-        logger.info(f"Started {num_workers} job workers and scheduler")
-
+        logger.info(f"Started {num_workers} job workers, scheduler and heartbeat")
+    
     def stop_workers(self):
         """Stop background worker threads."""
         self.is_running = False
+        self._scheduler_wakeup.set()
+        self._work_available.set()
         
         for worker in self.worker_threads:
             worker.join(timeout=5)
         
         self.worker_threads.clear()
+        
+        with self._process_pool_lock:
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=False, cancel_futures=True)
+                self._process_pool = None
+        
         logger.info("Stopped all job workers")
-
+    
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """Get (lazily creating) the process pool for PROCESS-mode jobs."""
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                import multiprocessing
+                
+                # spawn: the parent runs threads and holds Redis sockets, which fork would copy
+                context = multiprocessing.get_context(os.getenv('JOB_QUEUE_PROCESS_START_METHOD', 'spawn'))
+                self._process_pool = ProcessPoolExecutor(max_workers=self.process_pool_size, mp_context=context)
+                logger.info(f"Started job process pool with {self.process_pool_size} processes")
+            return self._process_pool
+    
+    def _terminate_process_pool(self, pool: ProcessPoolExecutor):
+        """Kill a pool whose task timed out, so the job can't keep running after its retry starts.
+
+        A single pool task can't be interrupted, so the pool's processes are
+        terminated and the next PROCESS-mode job starts a fresh pool. Other jobs
+        running in the same pool fail with BrokenProcessPool and are retried.
+        """
+        with self._process_pool_lock:
+            if self._process_pool is pool:
+                self._process_pool = None
+        for process in list((getattr(pool, '_processes', None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        logger.warning("Terminated job process pool after a job timeout")
+    
+    def claim_next_job(self) -> Optional[str]:
+        """Atomically pop the highest-priority pending job and mark it running."""
+        now = time.time()
+        job_id = self._claim_next_job(
+            keys=[self.pending_queue, self.running_queue],
+            args=[now, datetime.fromtimestamp(now).isoformat(), self.JOB_KEY_PREFIX]
+        )
+        return _decode(job_id) if job_id else None
+    
     def _worker_loop(self):
         """Main worker loop."""
         while self.is_running:
             try:
-                # Get next job from pending queue (highest priority first)
-                job_data = self.redis_client.bzpopmax(self.pending_queue, timeout=1)
+                job_id = self.claim_next_job()
                 
-                if not job_data:
+                if not job_id:
+                    # Enqueues in this process wake us early; other processes' are polled
+                    self._work_available.wait(self.worker_poll_interval)
+                    self._work_available.clear()
                     continue
                 
-                queue_name, job_id, score = job_data
                 self._execute_job(job_id)
-                
+            
             except Exception as e:
                 logger.error(f"Error in worker loop: {e}")
                 time.sleep(1)
-
+    
+    def promote_due_jobs(self, now: Optional[float] = None) -> List[str]:
+        """Atomically move all due scheduled jobs to the pending queue.
+
+        Recurring jobs are re-added to the scheduled queue at their next cron time.
+        """
+        now = time.time() if now is None else now
+        promoted: List[str] = []
+        
+        while True:
+            batch = [
+                _decode(job_id) for job_id in self._promote_due_jobs(
+                    keys=[self.scheduled_queue, self.pending_queue],
+                    args=[now, self.promote_batch_size, self.JOB_KEY_PREFIX, JobPriority.NORMAL.value]
+                )
+            ]
+            promoted.extend(batch)
+            if len(batch) < self.promote_batch_size:
+                break
+        
+        if promoted:
+            self._reschedule_recurring(promoted)
+            self.stats['total_promoted'] += len(promoted)
+            self._work_available.set()
+        
+        return promoted
+    
+    def _reschedule_recurring(self, job_ids: List[str]):
+        """Schedule the next occurrence of promoted recurring jobs."""
+        pipe = self.redis_client.pipeline(transaction=False)
+        for job_id in job_ids:
+            pipe.hget(self._job_key(job_id), 'cron')
+        cron_expressions = pipe.execute()
+        
+        pipe = self.redis_client.pipeline(transaction=False)
+        rescheduled = 0
+        for job_id, cron_expr in zip(job_ids, cron_expressions):
+            if not cron_expr:
+                continue
+            next_run = croniter(_decode(cron_expr), datetime.now()).get_next(datetime)
+            pipe.hset(self._job_key(job_id), 'scheduled_at', next_run.isoformat())
+            pipe.zadd(self.scheduled_queue, {job_id: next_run.timestamp()})
+            rescheduled += 1
+        if rescheduled:
+            pipe.execute()
+    
+    def reclaim_orphaned_jobs(self, now: Optional[float] = None) -> List[str]:
+        """Requeue running jobs whose worker stopped heartbeating.
+
+        Jobs already reclaimed `max_reclaims` times (e.g. ones that crash their
+        worker) go to the dead letter queue instead. Returns the requeued jobs.
+        """
+        now = time.time() if now is None else now
+        reclaimed, dead = self._reclaim_orphaned_jobs(
+            keys=[self.running_queue, self.pending_queue, self.dead_letter_queue],
+            args=[now - self.visibility_timeout, self.promote_batch_size,
+                  self.JOB_KEY_PREFIX, JobPriority.NORMAL.value, self.max_reclaims,
+                  now, datetime.fromtimestamp(now).isoformat()]
+        )
+        reclaimed = [_decode(job_id) for job_id in reclaimed]
+        dead = [_decode(job_id) for job_id in dead]
+        if reclaimed:
+            self.stats['total_reclaimed'] += len(reclaimed)
+            self._work_available.set()
+            logger.warning(f"Reclaimed {len(reclaimed)} orphaned jobs: {reclaimed}")
+        if dead:
+            self.stats['total_dead_lettered'] += len(dead)
+            logger.error(f"Moved {len(dead)} jobs reclaimed more than {self.max_reclaims} times "
+                         f"to the dead letter queue: {dead}")
+        return reclaimed
+    
+    def _next_scheduler_wait(self) -> float:
+        """Seconds until the next scheduled job is due, capped at scheduler_max_wait."""
+        upcoming = self.redis_client.zrange(self.scheduled_queue, 0, 0, withscores=True)
+        if not upcoming:
+            return self.scheduler_max_wait
+        _, due_at = upcoming[0]
+        return min(max(due_at - time.time(), 0.0), self.scheduler_max_wait)
+    
     def _scheduler_loop(self):
-        """Scheduler loop for recurring and delayed jobs."""
+        """Scheduler loop for recurring and delayed jobs and orphan reclaiming."""
+        last_reclaim = 0.0
         while self.is_running:
             try:
-                current_time = datetime.now().timestamp()
-                
-                # Get jobs ready for execution
-                ready_jobs = self.redis_client.zrangebyscore(
-                    self.scheduled_queue,
-                    0,
-                    current_time,
-                    withscores=True
-                )
-                
-                for job_id, scheduled_time in ready_jobs:
-                    # Move to pending queue
-                    self.redis_client.zrem(self.scheduled_queue, job_id)
-                    
-                    # Check if it's a recurring job
-                    job = self.get_job(job_id)
-                    if job and 'recurring' in job.tags:
-                        # Schedule next occurrence
-                        cron_expr = None
-                        for tag in job.tags:
-                            if tag.startswith('cron:'):
-                                cron_expr = tag[5:]
-                                break
-                        
-                        if cron_expr:
-                            cron = croniter(cron_expr, datetime.now())
-                            next_run = cron.get_next(datetime)
-                            
-                            # Update job with next run time
-                            job.scheduled_at = next_run
-                            job.status = JobStatus.SCHEDULED
-                            
-                            job_key = f"job:{job_id}"
-                            self.redis_client.hset(job_key, mapping={
-                                'data': json.dumps(asdict(job), default=str)
-                            })
-                            
-                            # Re-add to scheduled queue
-                            self.redis_client.zadd(
-                                self.scheduled_queue,
-                                {job_id: next_run.timestamp()}
-                            )
-                    
-                    # Add to pending queue
-                    priority = job.priority if job else JobPriority.NORMAL
-                    self.redis_client.zadd(
-                        self.pending_queue,
-                        {job_id: priority.value}
-                    )
-                    
-                    # Update status
-                    if job:
-                        self.update_job_status(job_id, JobStatus.PENDING)
+                self.promote_due_jobs()
                 
-                time.sleep(1)  # Check every second
+                now = time.time()
+                if now - last_reclaim >= self.heartbeat_interval:
+                    self.reclaim_orphaned_jobs(now)
+                    last_reclaim = now
                 
+                # Sleep until the next job is due; enqueues in this process wake us early
+                self._scheduler_wakeup.wait(self._next_scheduler_wait())
+                self._scheduler_wakeup.clear()
+            
             except Exception as e:
                 logger.error(f"Error in scheduler loop: {e}")
                 time.sleep(5)
-
+    
+    def _heartbeat_loop(self):
+        """Refresh the running-queue score of jobs executing in this process."""
+        while self.is_running:
+            try:
+                with self._active_jobs_lock:
+                    active = list(self._active_jobs)
+                
+                if active:
+                    now = time.time()
+                    pipe = self.redis_client.pipeline(transaction=False)
+                    pipe.zadd(self.running_queue, {job_id: now for job_id in active}, xx=True)
+                    pipe.execute()
+            
+            except Exception as e:
+                logger.error(f"Error in heartbeat loop: {e}")
+            
+            time.sleep(self.heartbeat_interval)
+    
     def _execute_job(self, job_id: str):
-        """Execute a job."""
+        """Execute a job claimed by claim_next_job."""
         job = self.get_job(job_id)
         if not job:
             logger.error(f"Job {job_id} not found")
@@ -487,57 +768,74 @@ class JobQueueManager:
         # Check if job function is registered
         if job.func_name not in self.job_registry:
             logger.error(f"Job function {job.func_name} not registered")
-            self._handle_job_failure(job_id, f"Function {job.func_name} not registered")
+            self._handle_job_failure(job_id, f"Function {job.func_name} not registered", job=job)
             return
         
-        # Move to running queue
-        self.redis_client.zrem(self.pending_queue, job_id)
-        self.redis_client.zadd(self.running_queue, {job_id: time.time()})
-        self.update_job_status(job_id, JobStatus.RUNNING)
+        with self._active_jobs_lock:
+            self._active_jobs[job_id] = time.time()
         
         try:
             # Execute job
             func = self.job_registry[job.func_name]
-            result = func(*job.args, **job.kwargs)
+            if self.execution_modes.get(job.func_name) == ExecutionMode.PROCESS:
+                pool = self._get_process_pool()
+                future = pool.submit(func, *job.args, **job.kwargs)
+                try:
+                    result = future.result(timeout=job.timeout)
+                except FutureTimeoutError:
+                    # Stop the task before the retry is scheduled
+                    if not future.cancel():
+                        self._terminate_process_pool(pool)
+                    raise TimeoutError(f"Job exceeded timeout of {job.timeout}s")
+            else:
+                result = func(*job.args, **job.kwargs)
             
             # Job completed successfully
             self._handle_job_success(job_id, result)
-            
+        
         except Exception as e:
             # Job failed
-            self._handle_job_failure(job_id, str(e))
-
+            self._handle_job_failure(job_id, str(e), job=job)
+        
+        finally:
+            with self._active_jobs_lock:
+                self._active_jobs.pop(job_id, None)
+    
     def _handle_job_success(self, job_id: str, result: Any):
         """Handle successful job completion."""
-        # Move to completed queue
-        self.redis_client.zrem(self.running_queue, job_id)
-        self.redis_client.zadd(self.completed_queue, {job_id: time.time()})
-        
-        # Update job status
-        self.update_job_status(job_id, JobStatus.COMPLETED, result=result)
+        # Move to completed queue and update job status in one round trip
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.zrem(self.running_queue, job_id)
+        pipe.zadd(self.completed_queue, {job_id: time.time()})
+        self.update_job_status(job_id, JobStatus.COMPLETED, pipe=pipe, result=result, progress=100.0)
+        pipe.execute()
         
         # Update statistics
         self.stats['total_processed'] += 1
         
         logger.info(f"Job {job_id} completed successfully")
-
-    def _handle_job_failure(self, job_id: str, error: str):
+    
+    def _handle_job_failure(self, job_id: str, error: str, job: Optional[Job] = None):
         """Handle job failure."""
-        job = self.get_job(job_id)
+        job = job or self.get_job(job_id)
         if not job:
             return
         
-        # Move to running queue
-        self.redis_client.zrem(self.running_queue, job_id)
+        pipe = self.redis_client.pipeline(transaction=False)
+        
+        # Remove from running queue
+        pipe.zrem(self.running_queue, job_id)
         
         # Check if we should retry
         if job.retry_count < job.max_retries:
-            self.retry_job(job_id)
+            self.retry_job(job_id, pipe=pipe)
+            pipe.execute()
             self.stats['total_retries'] += 1
         else:
             # Move to failed queue
-            self.redis_client.zadd(self.failed_queue, {job_id: time.time()})
-            self.update_job_status(job_id, JobStatus.FAILED, error=error)
+            pipe.zadd(self.failed_queue, {job_id: time.time()})
+            self.update_job_status(job_id, JobStatus.FAILED, pipe=pipe, error=error)
+            pipe.execute()
             self.stats['total_failed'] += 1
             
             logger.error(f"Job {job_id} failed permanently: {error}")
@@ -557,10 +855,15 @@ def get_job_queue_manager() -> JobQueueManager:
     return _job_queue_manager
 
 
-def job(name: str, priority: JobPriority = JobPriority.NORMAL, **kwargs):
+def job(
+    name: str,
+    priority: JobPriority = JobPriority.NORMAL,
+    execution_mode: ExecutionMode = ExecutionMode.THREAD,
+    **kwargs
+):
     """Decorator to register a job function."""
     def decorator(func):
         manager = get_job_queue_manager()
-        manager.register_job(name, func)
+        manager.register_job(name, func, execution_mode=execution_mode)
         return func
     return decorator
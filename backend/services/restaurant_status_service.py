@@ -1,7 +1,7 @@
 import logging
-import re
-from datetime import datetime, time, timedelta
+from datetime import datetime
 import pytz
+from utils.weekly_hours import weekly_hours_for
 from .base_service import BaseService
 
 """Restaurant Status Service.
@@ -38,20 +38,22 @@ class RestaurantStatusService(BaseService):
         """
         try:
             # Extract restaurant information
-            hours_data = restaurant_data.get("hours_open") or restaurant_data.get(
-                "hours"
-            )
             latitude = restaurant_data.get("latitude")
             longitude = restaurant_data.get("longitude")
             city = restaurant_data.get("city")
             state = restaurant_data.get("state")
-            # Determine timezone
-            timezone_str = self._get_timezone(latitude, longitude, city, state)
+            # Determine timezone: compiled hours are local to hours_timezone, and the
+            # persisted timezone column avoids any per-request lookup
+            timezone_str = (
+                restaurant_data.get("hours_timezone")
+                or restaurant_data.get("timezone")
+                or self._get_timezone(latitude, longitude, city, state)
+            )
             # Get current time in restaurant's timezone
             current_time_local = self._get_current_time_in_timezone(timezone_str)
-            # Parse business hours
-            hours_parsed, parsed_hours = self._parse_business_hours(hours_data)
-            if not hours_parsed:
+            # Hours compile once (utils.weekly_hours); the open check is a bitmap lookup
+            weekly, _ = weekly_hours_for(restaurant_data)
+            if weekly is None:
                 return {
                     "is_open": False,
                     "status": "unknown",
@@ -61,11 +63,11 @@ class RestaurantStatusService(BaseService):
                     "hours_parsed": False,
                     "status_reason": "Unable to parse business hours",
                 }
-            # Check if restaurant is currently open
-            is_open, next_open_time, status_reason = self._check_if_open(
-                parsed_hours,
-                current_time_local,
+            is_open = weekly.is_open_at(current_time_local)
+            next_open_time = (
+                None if is_open else weekly.next_open_after(current_time_local)
             )
+            status_reason = "Currently open" if is_open else "Currently closed"
             status = "open" if is_open else "closed"
             return {
                 "is_open": is_open,
@@ -187,202 +189,3 @@ class RestaurantStatusService(BaseService):
         except Exception:
             # Fallback to UTC
             return datetime.now(pytz.UTC)
-
-    def _parse_business_hours(
-        self,
-        hours_data: str | None,
-    ) -> tuple[bool, list[dict]]:
-        """Parse business hours from various formats."""
-        if not hours_data:
-            return False, []
-        # Common patterns for business hours
-        patterns = [
-            # Mon-Fri 9:00 AM-5:00 PM
-            r"(\w{3})-(\w{3})\s+(\d{1,2}):(\d{2})\s*(AM|PM)-(\d{1,2}):(\d{2})\s*(AM|PM)",
-            # Monday-Friday 9:00 AM-5:00 PM
-            r"(\w+)-(\w+)\s+(\d{1,2}):(\d{2})\s*(AM|PM)-(\d{1,2}):(\d{2})\s*(AM|PM)",
-            # Mon 9:00 AM-5:00 PM, Tue 9:00 AM-5:00 PM
-            r"(\w{3})\s+(\d{1,2}):(\d{2})\s*(AM|PM)-(\d{1,2}):(\d{2})\s*(AM|PM)",
-        ]
-        for pattern in patterns:
-            matches = re.findall(pattern, hours_data, re.IGNORECASE)
-            if matches:
-                return True, self._parse_day_hours(matches, pattern)
-        # Fallback parsing
-        return self._fallback_hours_parsing(hours_data)
-
-    def _parse_day_hours(self, matches: tuple, pattern: str) -> list[dict]:
-        """Parse individual day hours from matches."""
-        parsed_hours = []
-        day_mapping = {
-            "mon": "monday",
-            "tue": "tuesday",
-            "wed": "wednesday",
-            "thu": "thursday",
-            "fri": "friday",
-            "sat": "saturday",
-            "sun": "sunday",
-        }
-        for match in matches:
-            if len(match) == 8:  # Range format (Mon-Fri)
-                (
-                    start_day,
-                    end_day,
-                    start_hour,
-                    start_min,
-                    start_ampm,
-                    end_hour,
-                    end_min,
-                    end_ampm,
-                ) = match
-                days = self._get_days_between(start_day.lower(), end_day.lower())
-            else:  # Single day format
-                (
-                    day,
-                    start_hour,
-                    start_min,
-                    start_ampm,
-                    end_hour,
-                    end_min,
-                    end_ampm,
-                ) = match
-                days = [day_mapping.get(day.lower(), day.lower())]
-            start_time = self._time_from_components(start_hour, start_min, start_ampm)
-            end_time = self._time_from_components(end_hour, end_min, end_ampm)
-            for day in days:
-                parsed_hours.append(
-                    {
-                        "day": day,
-                        "open": start_time,
-                        "close": end_time,
-                    }
-                )
-        return parsed_hours
-
-    def _time_from_components(self, hour: str, minute: str, ampm: str) -> time:
-        """Convert time components to time object."""
-        hour = int(hour)
-        minute = int(minute)
-        if ampm.upper() == "PM" and hour != 12:
-            hour += 12
-        elif ampm.upper() == "AM" and hour == 12:
-            hour = 0
-        return time(hour, minute)
-
-    def _get_days_between(self, start_day: str, end_day: str) -> list[str]:
-        """Get list of days between start and end day."""
-        days = [
-            "monday",
-            "tuesday",
-            "wednesday",
-            "thursday",
-            "friday",
-            "saturday",
-            "sunday",
-        ]
-        day_mapping = {
-            "mon": "monday",
-            "tue": "tuesday",
-            "wed": "wednesday",
-            "thu": "thursday",
-            "fri": "friday",
-            "sat": "saturday",
-            "sun": "sunday",
-        }
-        start_day = day_mapping.get(start_day, start_day)
-        end_day = day_mapping.get(end_day, end_day)
-        try:
-            start_idx = days.index(start_day)
-            end_idx = days.index(end_day)
-            if start_idx <= end_idx:
-                return days[start_idx : end_idx + 1]
-            return days[start_idx:] + days[: end_idx + 1]
-        except ValueError:
-            return [start_day]
-
-    def _fallback_hours_parsing(self, hours_data: str) -> tuple[bool, list[dict]]:
-        """Fallback parsing for non-standard hour formats."""
-        # This is a simplified fallback - in production, you might want more sophisticated parsing
-        logger.warning("Using fallback parsing for hours", hours_data=hours_data)
-        return False, []
-
-    def _check_if_open(
-        self,
-        parsed_hours: list[dict],
-        current_time: datetime,
-    ) -> tuple[bool, datetime | None, str]:
-        """Check if restaurant is currently open."""
-        if not parsed_hours:
-            return False, None, "No hours data available"
-        current_day = current_time.strftime("%A").lower()
-        current_time_obj = current_time.time()
-        # Find today's hours
-        today_hours = None
-        for hours in parsed_hours:
-            if hours["day"].lower() == current_day:
-                today_hours = hours
-                break
-        if not today_hours:
-            return False, None, f"Closed on {current_day}"
-        # Check if current time is within open hours
-        open_time = today_hours["open"]
-        close_time = today_hours["close"]
-        # Handle overnight hours (e.g., 11 PM - 2 AM)
-        if close_time < open_time:
-            if current_time_obj >= open_time or current_time_obj <= close_time:
-                return True, None, "Open (overnight hours)"
-            next_open = self._calculate_next_open_time(parsed_hours, current_time)
-            return False, next_open, "Closed (overnight hours)"
-        if open_time <= current_time_obj <= close_time:
-            return True, None, "Open"
-        next_open = self._calculate_next_open_time(parsed_hours, current_time)
-        return False, next_open, "Closed"
-
-    def _calculate_next_open_time(
-        self,
-        parsed_hours: list[dict],
-        current_time: datetime,
-    ) -> datetime | None:
-        """Calculate the next time the restaurant will be open."""
-        if not parsed_hours:
-            return None
-        current_day = current_time.strftime("%A").lower()
-        days = [
-            "monday",
-            "tuesday",
-            "wednesday",
-            "thursday",
-            "friday",
-            "saturday",
-            "sunday",
-        ]
-        # Find current day index
-        try:
-            current_day_idx = days.index(current_day)
-        except ValueError:
-            return None
-        # Check next 7 days
-        for i in range(7):
-            check_day_idx = (current_day_idx + i) % 7
-            check_day = days[check_day_idx]
-            # Find hours for this day
-            day_hours = None
-            for hours in parsed_hours:
-                if hours["day"].lower() == check_day:
-                    day_hours = hours
-                    break
-            if day_hours:
-                open_time = day_hours["open"]
-                if i == 0:  # Today
-                    if current_time.time() < open_time:
-                        # Restaurant opens later today
-                        return datetime.combine(
-                            current_time.date(), open_time, tzinfo=current_time.tzinfo
-                        )
-                else:
-                    # Future day
-                    future_date = current_time.date() + timedelta(days=i)
-                    return datetime.combine(
-                        future_date, open_time, tzinfo=current_time.tzinfo
-                    )
-        return None
@@ -188,42 +188,20 @@ class ScraperService(BaseService):
             return False
 
     def _batch_update_reviews(self, batch_size: int) -> dict[str, Any]:
-        """Batch update Google reviews for multiple restaurants."""
+        """Batch update Google reviews for the stalest restaurants via the sync pipeline."""
+        from .google_places_sync import GooglePlacesSyncPipeline
+
         try:
-            # Get restaurants without recent reviews
-            restaurants = self.db_manager.get_restaurants_without_recent_reviews(
-                batch_size
-            )
-            results = {
-                "total_processed": len(restaurants),
-                "total_updated": 0,
-                "errors": [],
-                "details": [],
+            report = GooglePlacesSyncPipeline().run(limit=batch_size)
+            if "error" in report:
+                return report
+            return {
+                "total_processed": report["processed"],
+                "total_updated": report["updated"],
+                "errors": report["errors"],
+                "details": report["details"],
+                "success": report["failed"] == 0,
             }
-            for restaurant in restaurants:
-                try:
-                    success = self._update_restaurant_reviews(restaurant["id"])
-                    if success:
-                        results["total_updated"] += 1
-                        results["details"].append(
-                            {
-                                "restaurant_id": restaurant["id"],
-                                "name": restaurant["name"],
-                                "status": "updated",
-                            }
-                        )
-                    else:
-                        results["errors"].append(
-                            f"Failed to update restaurant {restaurant['id']}"
-                        )
-                    # Rate limiting
-                    self._rate_limit()
-                except Exception as e:
-                    results["errors"].append(
-                        f"Error updating restaurant {restaurant['id']}: {e!s}"
-                    )
-            results["success"] = len(results["errors"]) == 0
-            return results
         except Exception as e:
             return {"success": False, "error": str(e)}
 
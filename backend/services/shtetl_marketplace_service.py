@@ -6,14 +6,39 @@ Author: JewGo Development Team
 Version: 1.0
 Last Updated: 2025-08-28
 """
+import hashlib
 import json
+import math
+import os
+import time
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
+from utils.cursor_v5 import CursorV5Error, CursorV5ValidationError, cursor_manager_v5
 from utils.logging_config import get_logger
 from .base_service import BaseService
 
 logger = get_logger(__name__)
 
+METERS_PER_MILE = 1609.344
+EARTH_RADIUS_MILES = 3959
+MILES_PER_DEGREE = 69.0
+SCHEMA_CHECK_TTL_SECONDS = int(os.getenv("SHTETL_SCHEMA_CHECK_TTL", "300"))
+COUNT_CACHE_TTL_SECONDS = int(os.getenv("SHTETL_COUNT_CACHE_TTL", "60"))
+# Listing order, all DESC; id breaks ties so keyset cursors are exact.
+LISTING_SORT_COLUMNS = (
+    "is_gemach",
+    "community_verified",
+    "rabbi_endorsed",
+    "kosher_verified",
+    "is_featured",
+    "created_at",
+    "id",
+)
+LISTING_CURSOR_SORT_KEY = "shtetl_community"
+
+# Process-wide, so services built per request still skip information_schema.
+_schema_cache: Dict[str, Any] = {"columns": None, "expires_at": 0.0}
+
 
 class ShtetlMarketplaceService(BaseService):
     """Shtetl marketplace service for Jewish community items and Gemach loans."""
@@ -44,14 +69,25 @@ class ShtetlMarketplaceService(BaseService):
         lat: Optional[float] = None,
         lng: Optional[float] = None,
         radius: float = 10.0,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
     ) -> Dict[str, Any]:
-        """Get shtetl marketplace listings with community-specific filtering."""
+        """Get shtetl marketplace listings with community-specific filtering.
+
+        Pages with ``cursor`` (the ``next_cursor`` of the previous page) walk
+        the listing order index; ``offset`` is still honoured when no cursor
+        is given. ``radius`` is in miles around ``lat``/``lng``. The total is
+        cached briefly and skipped entirely when ``include_total`` is False.
+        """
         try:
             if not self._is_db_available():
                 return self._get_empty_listings_response(limit, offset)
-            if not self._shtetl_table_exists():
+            columns = self._shtetl_columns()
+            if not columns:
                 return self._get_empty_listings_response(limit, offset)
-            query, params = self._build_shtetl_query(
+            position = self._decode_listing_cursor(cursor, status) if cursor else None
+            where, distance_select, params = self._build_shtetl_where(
+                columns,
                 status,
                 search,
                 category,
@@ -64,10 +100,24 @@ class ShtetlMarketplaceService(BaseService):
                 max_price,
                 city,
                 state,
-                limit,
-                offset,
+                lat,
+                lng,
+                radius,
             )
-            listings, total = self._execute_shtetl_query(query, params)
+            query, query_params = self._build_shtetl_query(
+                where, distance_select, params, limit, offset, position
+            )
+            with self.db_manager.connection_manager.get_session_context() as session:
+                listings = self._execute_shtetl_query(session, query, query_params)
+                total = (
+                    self._count_shtetl_listings(session, where, params)
+                    if include_total
+                    else None
+                )
+            next_cursor = None
+            if len(listings) > limit:
+                listings = listings[:limit]
+                next_cursor = self._encode_listing_cursor(listings[-1], status)
             return {
                 "success": True,
                 "data": {
@@ -75,9 +125,17 @@ class ShtetlMarketplaceService(BaseService):
                     "total": total,
                     "limit": limit,
                     "offset": offset,
+                    "next_cursor": next_cursor,
                     "community_focus": True,
                 },
             }
+        except CursorV5Error as e:
+            logger.warning("Invalid shtetl listings cursor", error=str(e))
+            return {
+                "success": False,
+                "error": "Invalid or expired cursor",
+                "data": {"listings": [], "total": 0, "limit": limit, "offset": offset},
+            }
         except Exception as e:
             logger.exception("Error fetching shtetl marketplace listings")
             return {
@@ -115,24 +173,39 @@ class ShtetlMarketplaceService(BaseService):
         return bool(self.db_manager and hasattr(self.db_manager, "connection_manager"))
 
     def _shtetl_table_exists(self) -> bool:
+        return bool(self._shtetl_columns())
+
+    def _shtetl_columns(self) -> frozenset:
+        """Columns of shtetl_marketplace (empty when the table is missing).
+
+        Looked up in information_schema once per SCHEMA_CHECK_TTL_SECONDS per
+        process rather than on every listings request.
+        """
+        now = time.monotonic()
+        if _schema_cache["columns"] is not None and now < _schema_cache["expires_at"]:
+            return _schema_cache["columns"]
         try:
             with self.db_manager.connection_manager.get_session_context() as session:
                 from sqlalchemy import text
 
                 result = session.execute(
                     text(
-                        "SELECT 1 FROM information_schema.tables WHERE table_name = 'shtetl_marketplace'"
+                        "SELECT column_name FROM information_schema.columns "
+                        "WHERE table_name = 'shtetl_marketplace'"
                     )
                 )
-                return bool(result.fetchone())
+                columns = frozenset(row[0] for row in result.fetchall())
         except Exception as e:
             logger.warning(
                 "Could not check shtetl_marketplace table", extra={"error": str(e)}
             )
-            return False
+            return frozenset()
+        _schema_cache.update(columns=columns, expires_at=now + SCHEMA_CHECK_TTL_SECONDS)
+        return columns
 
-    def _build_shtetl_query(
+    def _build_shtetl_where(
         self,
+        columns,
         status,
         search,
         category,
@@ -145,23 +218,17 @@ class ShtetlMarketplaceService(BaseService):
         max_price,
         city,
         state,
-        limit,
-        offset,
-    ) -> tuple[str, Dict[str, Any]]:
-        query = """
-            SELECT s.id, s.title, s.description, s.price_cents, s.currency, s.city, s.state, s.zip_code,
-                   s.latitude as lat, s.longitude as lng, s.seller_name, s.seller_phone, s.seller_email,
-                   s.category_name, s.subcategory, s.status, s.created_at, s.updated_at,
-                   s.thumbnail, s.images, s.kosher_agency, s.kosher_level, s.kosher_verified,
-                   s.rabbi_endorsed, s.community_verified, s.is_gemach, s.gemach_type,
-                   s.holiday_category, s.condition, s.stock_quantity, s.is_available, s.is_featured,
-                   s.rating, s.review_count, s.transaction_type, s.contact_preference, s.notes
-            FROM shtetl_marketplace s
-            WHERE s.status = :status
-        """
+        lat,
+        lng,
+        radius,
+    ) -> tuple[str, str, Dict[str, Any]]:
+        """WHERE clause, extra distance column and params shared by the page and count queries."""
+        conditions = ["s.status = :status"]
         params: Dict[str, Any] = {"status": status}
         if search:
-            query += " AND (s.title ILIKE :search1 OR s.description ILIKE :search2 OR s.keywords ILIKE :search3)"
+            conditions.append(
+                "(s.title ILIKE :search1 OR s.description ILIKE :search2 OR s.keywords ILIKE :search3)"
+            )
             params.update(
                 {
                     "search1": f"%{search}%",
@@ -170,74 +237,168 @@ class ShtetlMarketplaceService(BaseService):
                 }
             )
         if category:
-            query += " AND s.category_name ILIKE :category"
+            conditions.append("s.category_name ILIKE :category")
             params["category"] = f"%{category}%"
         if subcategory:
-            query += " AND s.subcategory ILIKE :subcategory"
+            conditions.append("s.subcategory ILIKE :subcategory")
             params["subcategory"] = f"%{subcategory}%"
         if transaction_type:
-            query += " AND s.transaction_type = :transaction_type"
+            conditions.append("s.transaction_type = :transaction_type")
             params["transaction_type"] = transaction_type
         if is_gemach is not None:
-            query += " AND s.is_gemach = :is_gemach"
+            conditions.append("s.is_gemach = :is_gemach")
             params["is_gemach"] = is_gemach
         if kosher_agency:
-            query += " AND s.kosher_agency ILIKE :kosher_agency"
+            conditions.append("s.kosher_agency ILIKE :kosher_agency")
             params["kosher_agency"] = f"%{kosher_agency}%"
         if holiday_category:
-            query += " AND s.holiday_category = :holiday_category"
+            conditions.append("s.holiday_category = :holiday_category")
             params["holiday_category"] = holiday_category
         if min_price is not None:
-            query += " AND s.price_cents >= :min_price"
+            conditions.append("s.price_cents >= :min_price")
             params["min_price"] = min_price
         if max_price is not None:
-            query += " AND s.price_cents <= :max_price"
+            conditions.append("s.price_cents <= :max_price")
             params["max_price"] = max_price
         if city:
-            query += " AND s.city ILIKE :city"
+            conditions.append("s.city ILIKE :city")
             params["city"] = f"%{city}%"
         if state:
-            query += " AND s.state ILIKE :state"
+            conditions.append("s.state ILIKE :state")
             params["state"] = f"%{state}%"
-        query += """
-            ORDER BY
-                s.is_gemach DESC,
-                s.community_verified DESC,
-                s.rabbi_endorsed DESC,
-                s.kosher_verified DESC,
-                s.is_featured DESC,
-                s.created_at DESC
+        distance_select = ""
+        if lat is not None and lng is not None:
+            params.update({"lat": float(lat), "lng": float(lng), "radius": float(radius)})
+            if "geog" in columns:
+                point = "ST_SetSRID(ST_MakePoint(:lng, :lat), 4326)::geography"
+                conditions.append(f"ST_DWithin(s.geog, {point}, :radius * {METERS_PER_MILE})")
+                distance_select = f", ST_Distance(s.geog, {point}) / {METERS_PER_MILE} AS distance_miles"
+            else:
+                # add_shtetl_marketplace_listing_indexes.sql not applied yet:
+                # bounding box on the raw columns, then the exact distance.
+                distance = (
+                    f"({EARTH_RADIUS_MILES} * acos(LEAST(1.0, "
+                    "cos(radians(:lat)) * cos(radians(s.latitude)) * cos(radians(s.longitude) - radians(:lng)) "
+                    "+ sin(radians(:lat)) * sin(radians(s.latitude)))))"
+                )
+                lat_delta = float(radius) / MILES_PER_DEGREE
+                lng_delta = lat_delta / max(math.cos(math.radians(float(lat))), 0.01)
+                conditions.append(
+                    "s.latitude BETWEEN :min_lat AND :max_lat "
+                    "AND s.longitude BETWEEN :min_lng AND :max_lng "
+                    f"AND {distance} <= :radius"
+                )
+                params.update(
+                    {
+                        "min_lat": float(lat) - lat_delta,
+                        "max_lat": float(lat) + lat_delta,
+                        "min_lng": float(lng) - lng_delta,
+                        "max_lng": float(lng) + lng_delta,
+                    }
+                )
+                distance_select = f", {distance} AS distance_miles"
+        return " AND ".join(conditions), distance_select, params
+
+    def _build_shtetl_query(
+        self,
+        where: str,
+        distance_select: str,
+        params: Dict[str, Any],
+        limit: int,
+        offset: int,
+        position: Optional[list] = None,
+    ) -> tuple[str, Dict[str, Any]]:
+        """Page query in the listing order; fetches one extra row to detect a next page."""
+        sort_columns = ", ".join(f"s.{column}" for column in LISTING_SORT_COLUMNS)
+        query = f"""
+            SELECT s.id, s.title, s.description, s.price_cents, s.currency, s.city, s.state, s.zip_code,
+                   s.latitude as lat, s.longitude as lng, s.seller_name, s.seller_phone, s.seller_email,
+                   s.category_name, s.subcategory, s.status, s.created_at, s.updated_at,
+                   s.thumbnail, s.images, s.kosher_agency, s.kosher_level, s.kosher_verified,
+                   s.rabbi_endorsed, s.community_verified, s.is_gemach, s.gemach_type,
+                   s.holiday_category, s.condition, s.stock_quantity, s.is_available, s.is_featured,
+                   s.rating, s.review_count, s.transaction_type, s.contact_preference, s.notes
+                   {distance_select}
+            FROM shtetl_marketplace s
+            WHERE {where}
+        """
+        query_params = dict(params)
+        if position is not None:
+            # Every sort column is NOT NULL and DESC, so one row comparison is
+            # the keyset predicate and matches idx_shtetl_listing_order.
+            after = ", ".join(f":after_{column}" for column in LISTING_SORT_COLUMNS)
+            query += f" AND ({sort_columns}) < ({after})"
+            query_params.update(
+                {f"after_{column}": value for column, value in zip(LISTING_SORT_COLUMNS, position)}
+            )
+            offset = 0
+        order_by = ", ".join(f"s.{column} DESC" for column in LISTING_SORT_COLUMNS)
+        query += f"""
+            ORDER BY {order_by}
             LIMIT :limit OFFSET :offset
         """
-        params.update({"limit": limit, "offset": offset})
-        return query, params
+        query_params.update({"limit": limit + 1, "offset": offset})
+        return query, query_params
 
-    def _execute_shtetl_query(self, query: str, params: Dict[str, Any]):
+    def _execute_shtetl_query(self, session, query: str, params: Dict[str, Any]):
         from sqlalchemy import text
 
-        with self.db_manager.connection_manager.get_session_context() as session:
-            rows = session.execute(text(query), params).fetchall()
-            listings = []
-            for row in rows:
-                listing = dict(row._mapping)
-                if listing.get("images"):
-                    try:
-                        if isinstance(listing["images"], str):
-                            listing["images"] = json.loads(listing["images"])
-                    except (json.JSONDecodeError, TypeError):
-                        listing["images"] = []
-                listings.append(listing)
-            # Count
-            base_from = "FROM shtetl_marketplace s"
-            after_from = query.split(base_from, 1)[1]
-            count_query = ("SELECT COUNT(*) as total " + base_from + after_from).split(
-                "ORDER BY"
-            )[0]
-            total = session.execute(
-                text(count_query),
-                {k: v for k, v in params.items() if k not in ["limit", "offset"]},
-            ).scalar()
-            return listings, total
+        rows = session.execute(text(query), params).fetchall()
+        listings = []
+        for row in rows:
+            listing = dict(row._mapping)
+            if listing.get("images"):
+                try:
+                    if isinstance(listing["images"], str):
+                        listing["images"] = json.loads(listing["images"])
+                except (json.JSONDecodeError, TypeError):
+                    listing["images"] = []
+            listings.append(listing)
+        return listings
+
+    def _count_shtetl_listings(self, session, where: str, params: Dict[str, Any]) -> int:
+        """Total matching listings, cached for COUNT_CACHE_TTL_SECONDS when a cache is configured."""
+        from sqlalchemy import text
+
+        cache_key = None
+        if self.cache_manager:
+            digest = hashlib.md5(
+                json.dumps([where, params], sort_keys=True, default=str).encode()
+            ).hexdigest()
+            cache_key = f"shtetl:listings:count:{digest}"
+            cached = self.cache_manager.get(cache_key)
+            if cached is not None:
+                return cached
+        total = session.execute(
+            text(f"SELECT COUNT(*) FROM shtetl_marketplace s WHERE {where}"), params
+        ).scalar()
+        if cache_key:
+            self.cache_manager.set(cache_key, total, ttl=COUNT_CACHE_TTL_SECONDS)
+        return total
+
+    def _encode_listing_cursor(self, listing: Dict[str, Any], status: str) -> str:
+        key = [listing[column] for column in LISTING_SORT_COLUMNS]
+        key[LISTING_SORT_COLUMNS.index("created_at")] = listing["created_at"].isoformat()
+        return cursor_manager_v5._sign_and_encode(
+            {"sortKey": LISTING_CURSOR_SORT_KEY, "status": status, "key": key}
+        )
+
+    def _decode_listing_cursor(self, cursor: str, status: str) -> list:
+        payload = cursor_manager_v5._decode_and_verify(cursor)
+        key = payload.get("key")
+        if (
+            payload.get("sortKey") != LISTING_CURSOR_SORT_KEY
+            or payload.get("status") != status
+            or not isinstance(key, list)
+            or len(key) != len(LISTING_SORT_COLUMNS)
+        ):
+            raise CursorV5ValidationError("Cursor does not belong to these listings")
+        try:
+            created_at = LISTING_SORT_COLUMNS.index("created_at")
+            key[created_at] = datetime.fromisoformat(key[created_at])
+        except (TypeError, ValueError) as e:
+            raise CursorV5ValidationError(f"Invalid cursor position: {e}") from e
+        return key
 
     def _fetch_shtetl_listing_row(self, listing_id: str):
         from sqlalchemy import text
@@ -436,6 +597,7 @@ class ShtetlMarketplaceService(BaseService):
                 "total": 0,
                 "limit": limit,
                 "offset": offset,
+                "next_cursor": None,
                 "community_focus": True,
             },
         }
@@ -6,6 +6,7 @@ Author: JewGo Development Team
 Version: 1.0
 Last Updated: 2025-08-28
 """
+import html
 import uuid
 import json
 from datetime import datetime
@@ -14,9 +15,29 @@ from dataclasses import dataclass
 from utils.logging_config import get_logger
 from utils.cache_manager_v4 import CacheManagerV4
 from utils.config_manager import ConfigManager
+from utils.cursor_v5 import MAX_PAGE_SIZE, cursor_manager_v5
 
 logger = get_logger(__name__)
 
+MESSAGE_LIST_TTL = 300  # 5 minutes
+# Outlives every list entry, so a list is never served under a reused generation.
+CACHE_GENERATION_TTL = 86400
+MESSAGE_CURSOR_ENTITY = "shtetl_messages"
+MESSAGE_CURSOR_DATA_VERSION = "1"
+MESSAGE_SEARCH_CURSOR_ENTITY = "shtetl_message_search"
+# Must match the configuration search_vector is built with
+SEARCH_CONFIG = "english"
+# 1 divides by 1 + log(document length), so long messages don't outrank focused ones
+SEARCH_RANK_NORMALIZATION = 1
+# ts_headline marks matches with control characters (stripped from the text
+# first); the text is HTML-escaped before they become <mark> tags
+HEADLINE_START_SEL = "\x02"
+HEADLINE_STOP_SEL = "\x03"
+SUBJECT_HEADLINE_OPTIONS = f"HighlightAll=true, StartSel={HEADLINE_START_SEL}, StopSel={HEADLINE_STOP_SEL}"
+MESSAGE_HEADLINE_OPTIONS = (
+    f"StartSel={HEADLINE_START_SEL}, StopSel={HEADLINE_STOP_SEL}, MaxWords=35, MinWords=15, MaxFragments=2"
+)
+
 
 @dataclass
 class MessageData:
@@ -202,10 +223,11 @@ class ShtetlMessageService:
             # Update reply count for parent message
             if message_data.parent_message_id:
                 self._update_reply_count(message_data.parent_message_id)
-            # Clear cache
-            self.cache_manager.delete(f"store_messages:{message_data.store_id}")
-            self.cache_manager.delete(f"user_messages:{message_data.sender_user_id}")
-            self.cache_manager.delete(f"user_messages:{message_data.recipient_user_id}")
+            # Invalidate cached lists that can contain the new message
+            self._bump_cache_generation("store", message_data.store_id)
+            self._bump_cache_generation("user", message_data.sender_user_id)
+            self._bump_cache_generation("user", message_data.recipient_user_id)
+            self._bump_cache_generation("thread", message_data.thread_id)
             logger.info(
                 f"Created message {message_id} from {message_data.sender_user_id} to {message_data.recipient_user_id}"
             )
@@ -233,12 +255,18 @@ class ShtetlMessageService:
         offset: int = 0,
         status: Optional[str] = None,
         user_id: Optional[str] = None,
+        cursor: Optional[str] = None,
     ) -> List[Dict]:
-        """Get messages for a store."""
+        """Get messages for a store, newest first.
+
+        Pass ``next_cursor(messages, limit)`` of the previous page as
+        ``cursor`` to continue after it; ``offset`` is used only without one.
+        """
         try:
-            cache_key = f"store_messages:{store_id}:{limit}:{offset}:{status}:{user_id}"
+            generation = self._cache_generation("store", store_id)
+            cache_key = f"store_messages:{store_id}:{generation}:{limit}:{offset}:{cursor}:{status}:{user_id}"
             cached_result = self.cache_manager.get(cache_key)
-            if cached_result:
+            if cached_result is not None:
                 return cached_result
             query = """
                 SELECT * FROM shtetl_messages
@@ -251,26 +279,30 @@ class ShtetlMessageService:
             if user_id:
                 query += " AND (sender_user_id = %s OR recipient_user_id = %s)"
                 params.extend([user_id, user_id])
-            query += " ORDER BY created_at DESC LIMIT %s OFFSET %s"
-            params.extend([limit, offset])
+            query, params = self._paginate_newest_first(query, params, limit, offset, cursor)
             results = self.db_manager.execute_query(
                 query, tuple(params), fetch_all=True
-            )
-            # Cache the result
-            self.cache_manager.set(cache_key, results, ttl=300)  # 5 minutes
-            return results if results else []
+            ) or []
+            self.cache_manager.set(cache_key, results, ttl=MESSAGE_LIST_TTL)
+            return results
         except Exception as e:
             self.logger.error(f"Error getting messages for store {store_id}: {e}")
             return []
 
     def get_user_messages(
-        self, user_id: str, limit: int = 50, offset: int = 0, unread_only: bool = False
+        self,
+        user_id: str,
+        limit: int = 50,
+        offset: int = 0,
+        unread_only: bool = False,
+        cursor: Optional[str] = None,
     ) -> List[Dict]:
-        """Get messages for a user."""
+        """Get messages for a user, newest first (see get_store_messages for ``cursor``)."""
         try:
-            cache_key = f"user_messages:{user_id}:{limit}:{offset}:{unread_only}"
+            generation = self._cache_generation("user", user_id)
+            cache_key = f"user_messages:{user_id}:{generation}:{limit}:{offset}:{cursor}:{unread_only}"
             cached_result = self.cache_manager.get(cache_key)
-            if cached_result:
+            if cached_result is not None:
                 return cached_result
             query = """
                 SELECT * FROM shtetl_messages
@@ -279,14 +311,12 @@ class ShtetlMessageService:
             params = [user_id]
             if unread_only:
                 query += " AND message_status = 'sent'"
-            query += " ORDER BY created_at DESC LIMIT %s OFFSET %s"
-            params.extend([limit, offset])
+            query, params = self._paginate_newest_first(query, params, limit, offset, cursor)
             results = self.db_manager.execute_query(
                 query, tuple(params), fetch_all=True
-            )
-            # Cache the result
-            self.cache_manager.set(cache_key, results, ttl=300)  # 5 minutes
-            return results if results else []
+            ) or []
+            self.cache_manager.set(cache_key, results, ttl=MESSAGE_LIST_TTL)
+            return results
         except Exception as e:
             self.logger.error(f"Error getting messages for user {user_id}: {e}")
             return []
@@ -296,9 +326,10 @@ class ShtetlMessageService:
     ) -> List[Dict]:
         """Get all messages in a thread."""
         try:
-            cache_key = f"message_thread:{thread_id}:{limit}:{offset}"
+            generation = self._cache_generation("thread", thread_id)
+            cache_key = f"message_thread:{thread_id}:{generation}:{limit}:{offset}"
             cached_result = self.cache_manager.get(cache_key)
-            if cached_result:
+            if cached_result is not None:
                 return cached_result
             query = """
                 SELECT * FROM shtetl_messages
@@ -308,14 +339,27 @@ class ShtetlMessageService:
             """
             results = self.db_manager.execute_query(
                 query, (thread_id, limit, offset), fetch_all=True
-            )
-            # Cache the result
-            self.cache_manager.set(cache_key, results, ttl=300)  # 5 minutes
-            return results if results else []
+            ) or []
+            self.cache_manager.set(cache_key, results, ttl=MESSAGE_LIST_TTL)
+            return results
         except Exception as e:
             self.logger.error(f"Error getting message thread {thread_id}: {e}")
             return []
 
+    def next_cursor(self, messages: List[Dict], limit: int) -> Optional[str]:
+        """Cursor for the page after ``messages``, or None when it was the last page."""
+        if not messages or len(messages) < limit:
+            return None
+        last = messages[-1]
+        return cursor_manager_v5.create_cursor(
+            primary_value=last["created_at"],
+            record_id=int(last["id"]),
+            sort_key="created_at_desc",
+            entity_type=MESSAGE_CURSOR_ENTITY,
+            data_version=MESSAGE_CURSOR_DATA_VERSION,
+            page_size=min(max(limit, 1), MAX_PAGE_SIZE),
+        )
+
     def mark_message_read(self, message_id: str, user_id: str) -> bool:
         """Mark a message as read."""
         try:
@@ -323,11 +367,12 @@ class ShtetlMessageService:
                 UPDATE shtetl_messages
                 SET message_status = 'read', read_at = NOW(), updated_at = NOW()
                 WHERE message_id = %s AND recipient_user_id = %s
+                RETURNING store_id, sender_user_id, recipient_user_id, thread_id
             """
-            self.db_manager.execute_query(query, (message_id, user_id))
-            # Clear cache
-            self.cache_manager.delete_pattern("user_messages:*")
-            self.cache_manager.delete_pattern("store_messages:*")
+            updated = self.db_manager.execute_query(
+                query, (message_id, user_id), fetch_one=True
+            )
+            self._invalidate_message_caches(updated)
             logger.info(f"Marked message {message_id} as read by user {user_id}")
             return True
         except Exception as e:
@@ -341,11 +386,12 @@ class ShtetlMessageService:
                 UPDATE shtetl_messages
                 SET message_status = 'replied', replied_at = NOW(), updated_at = NOW()
                 WHERE message_id = %s
+                RETURNING store_id, sender_user_id, recipient_user_id, thread_id
             """
-            self.db_manager.execute_query(query, (message_id,))
-            # Clear cache
-            self.cache_manager.delete_pattern("user_messages:*")
-            self.cache_manager.delete_pattern("store_messages:*")
+            updated = self.db_manager.execute_query(
+                query, (message_id,), fetch_one=True
+            )
+            self._invalidate_message_caches(updated)
             logger.info(f"Marked message {message_id} as replied")
             return True
         except Exception as e:
@@ -359,11 +405,12 @@ class ShtetlMessageService:
                 UPDATE shtetl_messages
                 SET message_status = 'archived', archived_at = NOW(), updated_at = NOW()
                 WHERE message_id = %s AND (sender_user_id = %s OR recipient_user_id = %s)
+                RETURNING store_id, sender_user_id, recipient_user_id, thread_id
             """
-            self.db_manager.execute_query(query, (message_id, user_id, user_id))
-            # Clear cache
-            self.cache_manager.delete_pattern("user_messages:*")
-            self.cache_manager.delete_pattern("store_messages:*")
+            updated = self.db_manager.execute_query(
+                query, (message_id, user_id, user_id), fetch_one=True
+            )
+            self._invalidate_message_caches(updated)
             logger.info(f"Archived message {message_id} by user {user_id}")
             return True
         except Exception as e:
@@ -378,113 +425,63 @@ class ShtetlMessageService:
         limit: int = 50,
         offset: int = 0,
     ) -> MessageAnalytics:
-        """Get message analytics for a store."""
+        """Get message analytics for a store in a single pass over its messages.
+
+        ``limit`` and ``offset`` are accepted for compatibility; analytics
+        always cover every message in the date range.
+        """
         try:
-            analytics = MessageAnalytics()
-            # Base query with pagination
-            base_query = """
-            SELECT id, store_id, sender_name, sender_email, message_text, 
-                   message_status, created_at, updated_at
-            FROM shtetl_messages 
-            WHERE store_id = %s
-            """
-            params = [store_id]
-            if start_date and end_date:
-                base_query += " AND created_at >= %s AND created_at <= %s"
-                params.extend([start_date, end_date])
-            
-            # Add pagination
-            base_query += " ORDER BY created_at DESC LIMIT %s OFFSET %s"
-            params.extend([limit, offset])
-            # Total messages
-            total_query = """
-                SELECT COUNT(*) as total_messages
-                FROM shtetl_messages
-                WHERE store_id = %s
-            """
-            if start_date and end_date:
-                total_query += " AND created_at >= %s AND created_at <= %s"
-                total_params = [store_id, start_date, end_date]
-            else:
-                total_params = [store_id]
-            total_result = self.db_manager.execute_query(
-                total_query, tuple(total_params), fetch_one=True
-            )
-            if total_result:
-                analytics.total_messages = int(total_result.get("total_messages", 0))
-            # Unread messages
-            unread_query = """
-                SELECT COUNT(*) as unread_count
-                FROM shtetl_messages
-                WHERE store_id = %s AND message_status = 'sent'
-            """
-            if start_date and end_date:
-                unread_query += " AND created_at >= %s AND created_at <= %s"
-                unread_params = [store_id, start_date, end_date]
-            else:
-                unread_params = [store_id]
-            unread_result = self.db_manager.execute_query(
-                unread_query, tuple(unread_params), fetch_one=True
-            )
-            if unread_result:
-                analytics.unread_messages = int(unread_result.get("unread_count", 0))
-            # Kosher messages
-            kosher_query = """
-                SELECT COUNT(*) as kosher_count
-                FROM shtetl_messages
-                WHERE store_id = %s AND kosher_related = true
-            """
-            if start_date and end_date:
-                kosher_query += " AND created_at >= %s AND created_at <= %s"
-                kosher_params = [store_id, start_date, end_date]
-            else:
-                kosher_params = [store_id]
-            kosher_result = self.db_manager.execute_query(
-                kosher_query, tuple(kosher_params), fetch_one=True
-            )
-            if kosher_result:
-                analytics.kosher_messages = int(kosher_result.get("kosher_count", 0))
-            # Urgent messages
-            urgent_query = """
-                SELECT COUNT(*) as urgent_count
-                FROM shtetl_messages
-                WHERE store_id = %s AND priority = 'urgent'
-            """
-            if start_date and end_date:
-                urgent_query += " AND created_at >= %s AND created_at <= %s"
-                urgent_params = [store_id, start_date, end_date]
-            else:
-                urgent_params = [store_id]
-            urgent_result = self.db_manager.execute_query(
-                urgent_query, tuple(urgent_params), fetch_one=True
-            )
-            if urgent_result:
-                analytics.urgent_messages = int(urgent_result.get("urgent_count", 0))
-            # Message types breakdown
-            type_query = """
-                SELECT sender_type, COUNT(*) as count
+            query = """
+                SELECT
+                    COUNT(*) AS total_messages,
+                    COUNT(*) FILTER (WHERE created_at >= date_trunc('day', NOW())) AS messages_today,
+                    COUNT(*) FILTER (WHERE created_at >= NOW() - INTERVAL '7 days') AS messages_this_week,
+                    COUNT(*) FILTER (WHERE created_at >= NOW() - INTERVAL '30 days') AS messages_this_month,
+                    COUNT(*) FILTER (WHERE message_status = 'sent') AS unread_messages,
+                    COUNT(*) FILTER (WHERE kosher_related) AS kosher_messages,
+                    COUNT(*) FILTER (WHERE priority = 'urgent') AS urgent_messages,
+                    COUNT(*) FILTER (WHERE sender_type = 'customer') AS customer_messages,
+                    COUNT(*) FILTER (WHERE sender_type = 'store_owner') AS store_owner_messages,
+                    COUNT(*) FILTER (WHERE sender_type = 'admin') AS admin_messages,
+                    COUNT(*) FILTER (WHERE sender_type = 'customer' AND replied_at IS NOT NULL) AS replied_customer_messages,
+                    AVG(EXTRACT(EPOCH FROM (replied_at - created_at)) / 3600.0)
+                        FILTER (WHERE replied_at IS NOT NULL) AS average_response_time_hours
                 FROM shtetl_messages
                 WHERE store_id = %s
-                GROUP BY sender_type
             """
+            params = [store_id]
             if start_date and end_date:
-                type_query += " AND created_at >= %s AND created_at <= %s"
-                type_params = [store_id, start_date, end_date]
-            else:
-                type_params = [store_id]
-            type_results = self.db_manager.execute_query(
-                type_query, tuple(type_params), fetch_all=True
+                query += " AND created_at >= %s AND created_at <= %s"
+                params.extend([start_date, end_date])
+            result = self.db_manager.execute_query(query, tuple(params), fetch_one=True)
+            if not result:
+                return MessageAnalytics()
+            counts = {
+                name: int(result.get(name) or 0)
+                for name in (
+                    "total_messages",
+                    "messages_today",
+                    "messages_this_week",
+                    "messages_this_month",
+                    "unread_messages",
+                    "kosher_messages",
+                    "urgent_messages",
+                    "customer_messages",
+                    "store_owner_messages",
+                    "admin_messages",
+                )
+            }
+            customer_messages = counts["customer_messages"]
+            replied = int(result.get("replied_customer_messages") or 0)
+            return MessageAnalytics(
+                **counts,
+                average_response_time_hours=round(
+                    float(result.get("average_response_time_hours") or 0.0), 2
+                ),
+                response_rate_percentage=round(
+                    replied * 100.0 / customer_messages, 2
+                ) if customer_messages else 0.0,
             )
-            for result in type_results:
-                sender_type = result.get("sender_type")
-                count = int(result.get("count", 0))
-                if sender_type == "customer":
-                    analytics.customer_messages = count
-                elif sender_type == "store_owner":
-                    analytics.store_owner_messages = count
-                elif sender_type == "admin":
-                    analytics.admin_messages = count
-            return analytics
         except Exception as e:
             self.logger.error(
                 f"Error getting message analytics for store {store_id}: {e}"
@@ -492,40 +489,99 @@ class ShtetlMessageService:
             return MessageAnalytics()
 
     def search_messages(
-        self, store_id: str, search_term: str, limit: int = 50, offset: int = 0
+        self,
+        store_id: str,
+        search_term: str,
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[str] = None,
     ) -> List[Dict]:
-        """Search messages by text."""
+        """Full-text search of a store's messages, best match first.
+
+        ``search_term`` uses web search syntax ("quoted phrase", or, -word).
+        Matching, ranking and LIMIT run in SQL on the store-scoped search
+        index; ``subject_headline`` and ``message_headline`` (HTML-escaped,
+        matches wrapped in <mark>) are built only for the returned page.
+        Pass ``next_search_cursor(results, limit)`` as ``cursor`` to
+        continue; ``offset`` is used only without one.
+        """
         try:
-            query = """
-                SELECT * FROM shtetl_messages
-                WHERE store_id = %s
-                AND (
-                    subject ILIKE %s OR
-                    message_text ILIKE %s OR
-                    sender_name ILIKE %s OR
-                    recipient_name ILIKE %s OR
-                    keywords ILIKE %s
+            if not search_term or not search_term.strip():
+                return []
+            tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+            rank = f"ts_rank_cd(m.search_vector, {tsquery}, {SEARCH_RANK_NORMALIZATION})"
+            query = f"""
+                WITH page AS (
+                    SELECT m.id, {rank} AS rank
+                    FROM shtetl_messages m
+                    WHERE m.store_id = %s AND m.search_vector @@ {tsquery}
+            """
+            params = [search_term, store_id, search_term]
+            if cursor:
+                payload = cursor_manager_v5.decode_cursor(
+                    cursor, expected_entity_type=MESSAGE_SEARCH_CURSOR_ENTITY
                 )
-                ORDER BY created_at DESC
-                LIMIT %s OFFSET %s
+                after_rank, after_id = cursor_manager_v5.extract_cursor_position(payload)
+                query += f" AND ({rank}, m.id) < (%s::real, %s)"
+                params.extend([search_term, after_rank, after_id])
+                offset = 0
+            query += f"""
+                    ORDER BY rank DESC, m.id DESC
+                    LIMIT %s OFFSET %s
+                )
+                SELECT m.*, page.rank,
+                       ts_headline('{SEARCH_CONFIG}', translate(COALESCE(m.subject, ''), chr(2) || chr(3), ''),
+                                   {tsquery}, %s) AS subject_headline,
+                       ts_headline('{SEARCH_CONFIG}', translate(m.message_text, chr(2) || chr(3), ''),
+                                   {tsquery}, %s) AS message_headline
+                FROM page
+                JOIN shtetl_messages m ON m.id = page.id
+                ORDER BY page.rank DESC, m.id DESC
             """
-            search_pattern = f"%{search_term}%"
-            params = (
-                store_id,
-                search_pattern,
-                search_pattern,
-                search_pattern,
-                search_pattern,
-                search_pattern,
+            params.extend([
                 limit,
                 offset,
-            )
-            results = self.db_manager.execute_query(query, params, fetch_all=True)
-            return results if results else []
+                search_term,
+                SUBJECT_HEADLINE_OPTIONS,
+                search_term,
+                MESSAGE_HEADLINE_OPTIONS,
+            ])
+            results = self.db_manager.execute_query(
+                query, tuple(params), fetch_all=True
+            ) or []
+            for result in results:
+                result.pop("search_vector", None)
+                for key in ("subject_headline", "message_headline"):
+                    if result.get(key) is not None:
+                        result[key] = self._render_headline(result[key])
+            return results
         except Exception as e:
             self.logger.error(f"Error searching messages for store {store_id}: {e}")
             return []
 
+    @staticmethod
+    def _render_headline(headline: str) -> str:
+        """HTML-escape a ts_headline result and turn its match markers into <mark> tags."""
+        return (
+            html.escape(headline)
+            .replace(HEADLINE_START_SEL, "<mark>")
+            .replace(HEADLINE_STOP_SEL, "</mark>")
+        )
+
+    def next_search_cursor(self, results: List[Dict], limit: int) -> Optional[str]:
+        """Cursor for the search page after ``results``, or None when it was the last page."""
+        if not results or len(results) < limit:
+            return None
+        last = results[-1]
+        return cursor_manager_v5.create_cursor(
+            primary_value=float(last["rank"]),
+            record_id=int(last["id"]),
+            sort_key="relevance_desc",
+            entity_type=MESSAGE_SEARCH_CURSOR_ENTITY,
+            data_version=MESSAGE_CURSOR_DATA_VERSION,
+            page_size=min(max(limit, 1), MAX_PAGE_SIZE),
+        )
+
     def _update_reply_count(self, parent_message_id: str) -> None:
         """Update reply count for a parent message."""
         try:
@@ -542,14 +598,90 @@ class ShtetlMessageService:
 
     def get_unread_count(self, user_id: str) -> int:
         """Get unread message count for a user."""
-        try:
-            query = """
+        return self._get_unread_counter(
+            "recipient",
+            user_id,
+            """
                 SELECT COUNT(*) as unread_count
                 FROM shtetl_messages
                 WHERE recipient_user_id = %s AND message_status = 'sent'
+            """,
+        )
+
+    def get_store_unread_count(self, store_id: str) -> int:
+        """Get unread message count for a store."""
+        return self._get_unread_counter(
+            "store",
+            store_id,
+            """
+                SELECT COUNT(*) as unread_count
+                FROM shtetl_messages
+                WHERE store_id = %s AND message_status = 'sent'
+            """,
+        )
+
+    def _get_unread_counter(self, scope: str, owner_id: str, count_query: str) -> int:
+        """Read the trigger-maintained unread counter, counting messages if it is unavailable."""
+        try:
+            query = """
+                SELECT unread_count FROM shtetl_message_counters
+                WHERE scope = %s AND owner_id = %s
             """
-            result = self.db_manager.execute_query(query, (user_id,), fetch_one=True)
+            result = self.db_manager.execute_query(
+                query, (scope, owner_id), fetch_one=True
+            )
+            return int(result.get("unread_count", 0)) if result else 0
+        except Exception as e:
+            self.logger.warning(
+                f"Unread counter unavailable for {scope} {owner_id}, counting messages: {e}"
+            )
+        try:
+            result = self.db_manager.execute_query(
+                count_query, (owner_id,), fetch_one=True
+            )
             return int(result.get("unread_count", 0)) if result else 0
         except Exception as e:
-            self.logger.error(f"Error getting unread count for user {user_id}: {e}")
+            self.logger.error(f"Error getting unread count for {scope} {owner_id}: {e}")
             return 0
+
+    def _paginate_newest_first(
+        self, query: str, params: List, limit: int, offset: int, cursor: Optional[str]
+    ) -> Tuple[str, List]:
+        """Order by (created_at, id) descending, continuing after ``cursor`` when given."""
+        if cursor:
+            payload = cursor_manager_v5.decode_cursor(
+                cursor, expected_entity_type=MESSAGE_CURSOR_ENTITY
+            )
+            created_at, message_id = cursor_manager_v5.extract_cursor_position(payload)
+            query += " AND (created_at, id) < (%s, %s)"
+            params = params + [created_at, message_id]
+            offset = 0
+        query += " ORDER BY created_at DESC, id DESC LIMIT %s OFFSET %s"
+        return query, params + [limit, offset]
+
+    def _cache_generation(self, scope: str, owner_id: str) -> str:
+        """Current cache generation for one store, user or thread's message lists."""
+        key = f"message_cache_gen:{scope}:{owner_id}"
+        generation = self.cache_manager.get(key)
+        if generation is None:
+            generation = self._bump_cache_generation(scope, owner_id)
+        return generation
+
+    def _bump_cache_generation(self, scope: str, owner_id: Optional[str]) -> Optional[str]:
+        """Start a new generation so cached lists of the old one are never read again."""
+        if not owner_id:
+            return None
+        generation = uuid.uuid4().hex[:12]
+        self.cache_manager.set(
+            f"message_cache_gen:{scope}:{owner_id}", generation, ttl=CACHE_GENERATION_TTL
+        )
+        return generation
+
+    def _invalidate_message_caches(self, message: Optional[Dict]) -> None:
+        """Invalidate the lists a message with changed status appears in."""
+        if not message:
+            return
+        self._bump_cache_generation("store", message.get("store_id"))
+        self._bump_cache_generation("user", message.get("sender_user_id"))
+        self._bump_cache_generation("user", message.get("recipient_user_id"))
+        self._bump_cache_generation("thread", message.get("thread_id"))
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Atomic Redis claim counters for the Specials System.
+
+Claim limits (global per special, per user, per user per day for per-visit
+specials, one per guest session) are enforced with a single Lua
+check-and-increment, so concurrent claims never oversell a special and never
+serialize on Postgres row locks or COUNT queries.
+
+Counters are seeded lazily from Postgres the first time a key is used. Every
+reservation marks its special dirty with the reservation time;
+`reconcile_claim_counters` in services.specials_service (run as a background
+job) recomputes the counts from `special_claims` and repairs any drift caused
+by reservations whose claim row was never written. A special is only
+reconciled once its last reservation is older than RESERVATION_SETTLE_SECONDS,
+so a reservation whose claim row is still being committed is never counted
+away.
+"""
+from __future__ import annotations
+
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Result codes returned by the reserve script
+RESERVED = 1
+TOTAL_LIMIT_REACHED = -1
+SUBJECT_LIMIT_REACHED = -2
+
+# KEYS[1] = total counter, KEYS[2] = subject counter (user/guest), KEYS[3] = dirty sorted set
+# ARGV[1] = total limit (0 = unlimited), ARGV[2] = subject limit (0 = unlimited)
+# ARGV[3] = counter TTL seconds, ARGV[4] = special id, ARGV[5] = reservation time
+_RESERVE_SCRIPT = """
+local total_limit = tonumber(ARGV[1])
+local subject_limit = tonumber(ARGV[2])
+local total = tonumber(redis.call('GET', KEYS[1]) or '0')
+local subject = tonumber(redis.call('GET', KEYS[2]) or '0')
+if total_limit > 0 and total >= total_limit then
+    return -1
+end
+if subject_limit > 0 and subject >= subject_limit then
+    return -2
+end
+redis.call('INCR', KEYS[1])
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+redis.call('ZADD', KEYS[3], ARGV[5], ARGV[4])
+return 1
+"""
+
+# KEYS[1] = dirty sorted set, ARGV[1] = latest reservation time to take, ARGV[2] = limit
+_POP_SETTLED_SCRIPT = """
+local members = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #members > 0 then
+    redis.call('ZREM', KEYS[1], unpack(members))
+end
+return members
+"""
+
+# KEYS[1] = total counter, KEYS[2] = subject counter
+_RELEASE_SCRIPT = """
+for i = 1, #KEYS do
+    if tonumber(redis.call('GET', KEYS[i]) or '0') > 0 then
+        redis.call('DECR', KEYS[i])
+    end
+end
+return 1
+"""
+
+# KEYS[1] = counter, ARGV[1] = expected value, ARGV[2] = new value, ARGV[3] = TTL seconds
+_COMPARE_AND_SET_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+class SpecialClaimCounter:
+    """Redis-backed claim counters with atomic limit enforcement."""
+
+    KEY_PREFIX = 'specials:claims:'
+    DIRTY_SET_KEY = 'specials:claims:dirty_at'
+
+    # Longer than any claim transaction takes from reservation to commit
+    RESERVATION_SETTLE_SECONDS = 60
+
+    # Counters outlive any special's claim window; daily counters only need two days
+    COUNTER_TTL = 60 * 60 * 24 * 30
+    DAILY_COUNTER_TTL = 60 * 60 * 48
+
+    def __init__(self, redis_client=None):
+        self.redis_client = redis_client
+        self._reserve = None
+        self._release = None
+        self._compare_and_set = None
+        self._pop_settled = None
+        if self.redis_client is not None:
+            self._reserve = self.redis_client.register_script(_RESERVE_SCRIPT)
+            self._release = self.redis_client.register_script(_RELEASE_SCRIPT)
+            self._compare_and_set = self.redis_client.register_script(_COMPARE_AND_SET_SCRIPT)
+            self._pop_settled = self.redis_client.register_script(_POP_SETTLED_SCRIPT)
+
+    @property
+    def available(self) -> bool:
+        return self.redis_client is not None
+
+    def total_key(self, special_id) -> str:
+        return f"{self.KEY_PREFIX}{special_id}:total"
+
+    def user_key(self, special_id, user_id, per_visit: bool = False, day: Optional[str] = None) -> str:
+        if per_visit:
+            day = day or datetime.now(timezone.utc).date().isoformat()
+            return f"{self.KEY_PREFIX}{special_id}:user:{user_id}:{day}"
+        return f"{self.KEY_PREFIX}{special_id}:user:{user_id}"
+
+    def guest_key(self, special_id, guest_id) -> str:
+        return f"{self.KEY_PREFIX}{special_id}:guest:{guest_id}"
+
+    def subject_key(self, special, user_id: Optional[str], guest_id: Optional[str]) -> Tuple[str, int]:
+        """Get the (counter key, limit) for the claimant; limit 0 means unlimited."""
+        if user_id:
+            return (
+                self.user_key(special.id, user_id, bool(special.per_visit)),
+                special.max_claims_per_user or 0,
+            )
+        return self.guest_key(special.id, guest_id), 1
+
+    def ttl_for(self, special) -> int:
+        """Counter TTL for a special (daily counters for per-visit specials)."""
+        return self.DAILY_COUNTER_TTL if special.per_visit else self.COUNTER_TTL
+
+    def seed(self, keys_and_loaders: Iterable[Tuple[str, Callable[[], int]]], ttl: int) -> None:
+        """Seed missing counters from Postgres; existing counters are left untouched."""
+        keys_and_loaders = list(keys_and_loaders)
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key, _ in keys_and_loaders:
+            pipe.exists(key)
+        present = pipe.execute()
+
+        missing = [(key, loader) for (key, loader), exists in zip(keys_and_loaders, present) if not exists]
+        if not missing:
+            return
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key, loader in missing:
+            # NX keeps a concurrent seed or reservation from being overwritten
+            pipe.set(key, int(loader()), ex=ttl, nx=True)
+        pipe.execute()
+
+    def get_counts(self, special, user_id: Optional[str], guest_id: Optional[str] = None) -> Tuple[int, int]:
+        """Get (total claims, claimant claims) from the counters in one round trip."""
+        subject_key, _ = self.subject_key(special, user_id, guest_id)
+        total, subject = self.redis_client.mget([self.total_key(special.id), subject_key])
+        return int(total or 0), int(subject or 0)
+
+    def try_reserve(self, special, user_id: Optional[str], guest_id: Optional[str]) -> int:
+        """Atomically check limits and reserve one claim.
+
+        Returns:
+            RESERVED, TOTAL_LIMIT_REACHED or SUBJECT_LIMIT_REACHED
+        """
+        subject_key, subject_limit = self.subject_key(special, user_id, guest_id)
+        return int(self._reserve(
+            keys=[self.total_key(special.id), subject_key, self.DIRTY_SET_KEY],
+            args=[special.max_claims_total or 0, subject_limit, self.ttl_for(special), str(special.id), time.time()],
+        ))
+
+    def release(self, special, user_id: Optional[str], guest_id: Optional[str]) -> None:
+        """Give back a reservation whose claim row could not be written."""
+        subject_key, _ = self.subject_key(special, user_id, guest_id)
+        try:
+            self._release(keys=[self.total_key(special.id), subject_key])
+        except Exception as exc:
+            # Reconciliation repairs the counter if this fails
+            logger.warning(f"Failed to release claim reservation for special {special.id}: {exc}")
+
+    def pop_dirty(self, limit: int = 500) -> List[str]:
+        """Take up to `limit` dirty specials without a reservation in the settle window.
+
+        Specials reserved more recently stay dirty until a later run.
+        """
+        settled_before = time.time() - self.RESERVATION_SETTLE_SECONDS
+        return [
+            member.decode() if isinstance(member, bytes) else member
+            for member in (self._pop_settled(keys=[self.DIRTY_SET_KEY], args=[settled_before, limit]) or [])
+        ]
+
+    def is_dirty(self, special_id) -> bool:
+        """Check whether the special was reserved again since it was popped."""
+        return self.redis_client.zscore(self.DIRTY_SET_KEY, str(special_id)) is not None
+
+    def read(self, keys: List[str]) -> Dict[str, Optional[int]]:
+        """Read raw counter values (None for missing counters)."""
+        if not keys:
+            return {}
+        values = self.redis_client.mget(keys)
+        return {key: (int(value) if value is not None else None) for key, value in zip(keys, values)}
+
+    def compare_and_set(self, expected: Dict[str, Optional[int]], actual: Dict[str, int], ttl: int) -> int:
+        """Replace counters with authoritative values unless a claim moved them meanwhile.
+
+        Returns:
+            Number of counters corrected
+        """
+        corrected = 0
+        for key, value in actual.items():
+            old_value = expected.get(key)
+            if old_value is None or old_value == value:
+                continue
+            corrected += int(self._compare_and_set(keys=[key], args=[old_value, value, ttl]))
+        return corrected
+
+
+_claim_counter: Optional[SpecialClaimCounter] = None
+
+
+def get_special_claim_counter() -> SpecialClaimCounter:
+    """Get the shared claim counter (no-op when Redis is unavailable)."""
+    global _claim_counter
+    if _claim_counter is None:
+        from services.redis_cache_service import cache_service
+
+        try:
+            _claim_counter = SpecialClaimCounter(getattr(cache_service, 'redis', None))
+        except Exception as exc:
+            logger.warning(f"Claim counters unavailable, falling back to database counts: {exc}")
+            _claim_counter = SpecialClaimCounter(None)
+    return _claim_counter
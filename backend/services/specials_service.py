@@ -7,9 +7,15 @@ Contains core business logic extracted from routes:
 - claim eligibility and creation
 - redemption validation
 - formatting responses
+
+Point-in-time ("now") listings are cached per time bucket; each entry expires no
+later than the next special start/end boundary, so a cached page never spans a
+change in the active set. Claim limits are enforced by atomic Redis counters
+(see services.specials_claim_counter) with a database fallback.
 """
 from __future__ import annotations
 
+from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Optional, Tuple, List, Dict, Any
@@ -21,8 +27,24 @@ from sqlalchemy.exc import IntegrityError
 from database.database_manager_v5 import get_database_manager_v5
 from database.specials_models import Special, SpecialClaim, SpecialEvent, SpecialMedia
 from services.redis_cache_service import cache_service
+from services.specials_claim_counter import (
+    RESERVED,
+    TOTAL_LIMIT_REACHED,
+    get_special_claim_counter,
+)
+from utils.logging_config import get_logger
 from utils.specials_helpers import parse_time_window as _parse_time_window, generate_redeem_code, is_special_active, safe_float
 
+logger = get_logger(__name__)
+
+
+# Cache settings for formatted specials listings
+SPECIALS_CACHE_TTL = 300
+SPECIALS_CACHE_BUCKET_SECONDS = 300
+
+# How many dirty specials one reconciliation run handles
+CLAIM_RECONCILE_BATCH = 500
+
 
 def _db_session():
     return get_database_manager_v5().get_session()
@@ -55,11 +77,84 @@ def get_active_specials_for_restaurant(
         return specials, total
 
 
-def _cache_key_for_formatted(restaurant_id: int, time_from: datetime, time_until: datetime, limit: int, offset: int) -> str:
+def _window_key_and_bucket_end(time_from: datetime, time_until: datetime) -> Tuple[str, Optional[datetime]]:
+    """Build the window part of a cache key.
+
+    Point-in-time windows ('now') are quantized into SPECIALS_CACHE_BUCKET_SECONDS
+    buckets so that all requests in a bucket share an entry; the bucket end is
+    returned so the entry can expire with it. Fixed windows keep exact bounds.
+    """
+    if time_from == time_until:
+        epoch = int(time_from.timestamp())
+        bucket_start = epoch - epoch % SPECIALS_CACHE_BUCKET_SECONDS
+        bucket_end = datetime.fromtimestamp(bucket_start + SPECIALS_CACHE_BUCKET_SECONDS, tz=timezone.utc)
+        return f"at:{bucket_start}", bucket_end
     return (
-        f"restaurant:{restaurant_id}:from:{time_from.isoformat(timespec='seconds')}:"
-        f"until:{time_until.isoformat(timespec='seconds')}:limit:{limit}:offset:{offset}"
-    )
+        f"from:{time_from.isoformat(timespec='seconds')}:"
+        f"until:{time_until.isoformat(timespec='seconds')}"
+    ), None
+
+
+def _cache_key_for_formatted(restaurant_id: int, time_from: datetime, time_until: datetime, limit: int, offset: int) -> str:
+    window_key, _ = _window_key_and_bucket_end(time_from, time_until)
+    return f"restaurant:{restaurant_id}:{window_key}:limit:{limit}:offset:{offset}"
+
+
+def _next_special_boundary(session, after: datetime, restaurant_id: Optional[int] = None) -> Optional[datetime]:
+    """Return the next valid_from/valid_until after `after`, when the active set can change."""
+    filters = [Special.is_active.is_(True), Special.deleted_at.is_(None)]
+    if restaurant_id is not None:
+        filters.append(Special.restaurant_id == restaurant_id)
+    next_start = session.query(func.min(Special.valid_from)).filter(*filters, Special.valid_from > after)
+    next_end = session.query(func.min(Special.valid_until)).filter(*filters, Special.valid_until >= after)
+    starts_at, ends_at = session.query(next_start.scalar_subquery(), next_end.scalar_subquery()).one()
+    boundaries = [boundary for boundary in (starts_at, ends_at) if boundary is not None]
+    return min(boundaries) if boundaries else None
+
+
+def _entry_ttl(
+    session,
+    time_from: datetime,
+    time_until: datetime,
+    restaurant_id: Optional[int] = None,
+) -> int:
+    """TTL for a listing entry: bucket end or next special boundary, whichever is first."""
+    _, bucket_end = _window_key_and_bucket_end(time_from, time_until)
+    if bucket_end is None:
+        return SPECIALS_CACHE_TTL
+    now = datetime.now(timezone.utc)
+    expires_at = bucket_end
+    boundary = _next_special_boundary(session, time_from, restaurant_id)
+    if boundary is not None:
+        expires_at = min(expires_at, boundary)
+    seconds = int((expires_at - now).total_seconds())
+    return max(1, min(SPECIALS_CACHE_TTL, seconds))
+
+
+def _query_formatted_page(
+    time_from: datetime,
+    time_until: datetime,
+    limit: int,
+    offset: int,
+    restaurant_id: Optional[int] = None,
+) -> Tuple[Dict[str, Any], int]:
+    """Load one page of active specials, formatted without user context, plus its cache TTL."""
+    with _db_session() as session:
+        base_query = session.query(Special).filter(
+            Special.is_active.is_(True),
+            Special.deleted_at.is_(None),
+            Special.valid_from <= time_until,
+            Special.valid_until >= time_from,
+        )
+        if restaurant_id is not None:
+            base_query = base_query.filter(Special.restaurant_id == restaurant_id)
+        total_local = base_query.count()
+        specials_local = (
+            base_query.order_by(Special.valid_from.asc()).offset(offset).limit(limit).all()
+        )
+        formatted = format_specials(session, specials_local, None)
+        ttl = _entry_ttl(session, time_from, time_until, restaurant_id)
+        return {"formatted": formatted, "total": total_local}, ttl
 
 
 def get_formatted_specials_for_restaurant(
@@ -69,31 +164,14 @@ def get_formatted_specials_for_restaurant(
     limit: int = 50,
     offset: int = 0,
 ) -> Tuple[List[Dict[str, Any]], int]:
-    """Return formatted specials with simple caching (5 min TTL)."""
+    """Return formatted specials with bucketed caching (up to 5 min TTL)."""
     cache_namespace = "specials"
     key = _cache_key_for_formatted(restaurant_id, time_from, time_until, limit, offset)
 
-    def _compute():
-        with _db_session() as session:
-            base_query = session.query(Special).filter(
-                Special.restaurant_id == restaurant_id,
-                Special.is_active.is_(True),
-                Special.deleted_at.is_(None),
-                Special.valid_from <= time_until,
-                Special.valid_until >= time_from,
-            )
-            total_local = base_query.count()
-            specials_local = (
-                base_query.order_by(Special.valid_from.asc()).offset(offset).limit(limit).all()
-            )
-            current_user_id = None  # formatting without user context for cache
-            formatted = [format_special(session, s, current_user_id) for s in specials_local]
-            return {"formatted": formatted, "total": total_local}
-
     cached = cache_service.get(key, cache_namespace)
     if cached is None:
-        computed = _compute()
-        cache_service.set(key, computed, ttl=300, namespace=cache_namespace)
+        computed, ttl = _query_formatted_page(time_from, time_until, limit, offset, restaurant_id)
+        cache_service.set(key, computed, ttl=ttl, namespace=cache_namespace)
         cached = computed
     return cached["formatted"], cached["total"]
 
@@ -106,31 +184,13 @@ def get_formatted_specials_all(
 ) -> Tuple[List[Dict[str, Any]], int]:
     """Return formatted specials across all restaurants with caching."""
     cache_namespace = "specials_all"
-    key = (
-        f"from:{time_from.isoformat(timespec='seconds')}:"
-        f"until:{time_until.isoformat(timespec='seconds')}:"
-        f"limit:{limit}:offset:{offset}"
-    )
-
-    def _compute():
-        with _db_session() as session:
-            base_query = session.query(Special).filter(
-                Special.is_active.is_(True),
-                Special.deleted_at.is_(None),
-                Special.valid_from <= time_until,
-                Special.valid_until >= time_from,
-            )
-            total_local = base_query.count()
-            specials_local = (
-                base_query.order_by(Special.valid_from.asc()).offset(offset).limit(limit).all()
-            )
-            formatted = [format_special(session, special, None) for special in specials_local]
-            return {"formatted": formatted, "total": total_local}
+    window_key, _ = _window_key_and_bucket_end(time_from, time_until)
+    key = f"{window_key}:limit:{limit}:offset:{offset}"
 
     cached = cache_service.get(key, cache_namespace)
     if cached is None:
-        computed = _compute()
-        cache_service.set(key, computed, ttl=300, namespace=cache_namespace)
+        computed, ttl = _query_formatted_page(time_from, time_until, limit, offset)
+        cache_service.set(key, computed, ttl=ttl, namespace=cache_namespace)
         cached = computed
     return cached["formatted"], cached["total"]
 
@@ -138,6 +198,7 @@ def get_formatted_specials_all(
 def invalidate_specials_cache_for_restaurant(restaurant_id: int) -> None:
     try:
         cache_service.delete_pattern(f"restaurant:{restaurant_id}:*", namespace="specials")
+        cache_service.delete_pattern("*", namespace="specials_all")
     except Exception:
         # best-effort invalidation
         pass
@@ -157,48 +218,96 @@ def refresh_active_specials_mv() -> bool:
         return False
 
 
+def _count_claims(session, special: Special, user_id: Optional[str] = None, guest_id: Optional[str] = None) -> int:
+    """COUNT claims for a special, optionally for one claimant (today only for per-visit user limits)."""
+    query = session.query(func.count(SpecialClaim.id)).filter(SpecialClaim.special_id == special.id)
+    if user_id:
+        query = query.filter(SpecialClaim.user_id == user_id)
+        if special.per_visit:
+            query = query.filter(func.date(SpecialClaim.claimed_at) == datetime.now(timezone.utc).date())
+    elif guest_id:
+        query = query.filter(SpecialClaim.guest_session_id == guest_id)
+    return int(query.scalar() or 0)
+
+
+def _claim_counts(session, special: Special, user_id: Optional[str], guest_id: Optional[str] = None) -> Tuple[int, int]:
+    """Return (total claims, claimant claims), from Redis counters when available."""
+    counter = get_special_claim_counter()
+    if counter.available:
+        try:
+            subject_key, _ = counter.subject_key(special, user_id, guest_id)
+            counter.seed(
+                [
+                    (counter.total_key(special.id), lambda: _count_claims(session, special)),
+                    (subject_key, lambda: _count_claims(session, special, user_id, guest_id)),
+                ],
+                ttl=counter.ttl_for(special),
+            )
+            return counter.get_counts(special, user_id, guest_id)
+        except Exception:
+            # Fall through to database counts
+            pass
+    total = _count_claims(session, special) if special.max_claims_total else 0
+    return total, _count_claims(session, special, user_id, guest_id)
+
+
 def calculate_claims_remaining(session, special: Special, user_id: Optional[str]) -> int:
     if user_id is None:
         return 0
     if special.max_claims_per_user is None:
         return 0
-    if special.per_visit:
-        today = datetime.now(timezone.utc).date()
-        today_claims = session.query(SpecialClaim).filter(
-            SpecialClaim.special_id == special.id,
-            SpecialClaim.user_id == user_id,
-            func.date(SpecialClaim.claimed_at) == today,
-        ).count()
-        return max(0, special.max_claims_per_user - today_claims)
-    else:
-        existing_claims = session.query(SpecialClaim).filter(
-            SpecialClaim.special_id == special.id,
-            SpecialClaim.user_id == user_id,
-        ).count()
-        return max(0, special.max_claims_per_user - existing_claims)
+    _, user_claims = _claim_counts(session, special, user_id)
+    return max(0, special.max_claims_per_user - user_claims)
 
 
 def can_user_claim(session, special: Special, user_id: Optional[str], guest_id: Optional[str]) -> Tuple[bool, Optional[str]]:
     now = datetime.now(timezone.utc)
     if not is_special_active(now, special.valid_from, special.valid_until, special.is_active):
         return False, "Special is not currently active"
-    if special.max_claims_total:
-        total_claims = session.query(SpecialClaim).filter(
-            SpecialClaim.special_id == special.id
-        ).count()
-        if total_claims >= special.max_claims_total:
-            return False, "Special has reached maximum claims limit"
+    if not user_id and not guest_id:
+        return False, "Either user or guest required"
+    total_claims, subject_claims = _claim_counts(session, special, user_id, guest_id)
+    if special.max_claims_total and total_claims >= special.max_claims_total:
+        return False, "Special has reached maximum claims limit"
     if user_id:
-        remaining = calculate_claims_remaining(session, special, user_id)
+        if special.max_claims_per_user is None:
+            return False, "No remaining claims"
+        remaining = max(0, special.max_claims_per_user - subject_claims)
         return (remaining > 0), (None if remaining > 0 else "No remaining claims")
-    if guest_id:
-        # Check guest duplication when configured by unique index
-        existing = session.query(SpecialClaim).filter(
-            SpecialClaim.special_id == special.id,
-            SpecialClaim.guest_session_id == guest_id,
-        ).count()
-        return (existing == 0), (None if existing == 0 else "Guest already claimed")
-    return False, "Either user or guest required"
+    # Check guest duplication when configured by unique index
+    return (subject_claims == 0), (None if subject_claims == 0 else "Guest already claimed")
+
+
+def _reserve_claim(session, special: Special, user_id: Optional[str], guest_session_id: Optional[str]) -> bool:
+    """Reserve a claim slot atomically. Returns True if a Redis reservation was taken.
+
+    Without Redis, falls back to a database COUNT check of the total limit; the
+    per-user/guest uniqueness is then left to database constraints.
+    """
+    from werkzeug.exceptions import Conflict
+
+    counter = get_special_claim_counter()
+    if counter.available:
+        subject_key, _ = counter.subject_key(special, user_id, guest_session_id)
+        counter.seed(
+            [
+                (counter.total_key(special.id), lambda: _count_claims(session, special)),
+                (subject_key, lambda: _count_claims(session, special, user_id, guest_session_id)),
+            ],
+            ttl=counter.ttl_for(special),
+        )
+        result = counter.try_reserve(special, user_id, guest_session_id)
+        if result == RESERVED:
+            return True
+        if result == TOTAL_LIMIT_REACHED:
+            raise Conflict("Special has reached maximum claims limit")
+        if user_id:
+            raise Conflict("You have already claimed this special")
+        raise Conflict("This guest session has already claimed this special")
+
+    if special.max_claims_total and _count_claims(session, special) >= special.max_claims_total:
+        raise Conflict("Special has reached maximum claims limit")
+    return False
 
 
 def create_claim(
@@ -208,37 +317,119 @@ def create_claim(
     ip_address: Optional[str],
     user_agent: Optional[str],
 ) -> Tuple[SpecialClaim, Optional[str]]:
-    """Create a claim and an associated claim event. Returns (claim, redeem_code)."""
+    """Create a claim and an associated claim event. Returns (claim, redeem_code).
+
+    Raises Conflict when a claim limit is reached.
+    """
     with _db_session() as session:
-        claim = SpecialClaim(
-            special_id=special.id,
-            user_id=user_id,
-            guest_session_id=guest_session_id,
-            ip_address=ip_address,
-            user_agent=user_agent,
-        )
+        reserved = _reserve_claim(session, special, user_id, guest_session_id)
         try:
-            session.add(claim)
-            session.flush()
-        except IntegrityError as exc:
-            session.rollback()
+            claim = SpecialClaim(
+                special_id=special.id,
+                user_id=user_id,
+                guest_session_id=guest_session_id,
+                ip_address=ip_address,
+                user_agent=user_agent,
+            )
+            try:
+                session.add(claim)
+                session.flush()
+            except IntegrityError as exc:
+                session.rollback()
+                raise
+            # Log event
+            event = SpecialEvent(
+                special_id=special.id,
+                user_id=user_id,
+                guest_session_id=guest_session_id,
+                event_type='claim',
+                ip_address=ip_address,
+                user_agent=user_agent,
+            )
+            session.add(event)
+            # Generate redeem code if required
+            redeem_code = generate_redeem_code() if special.requires_code else None
+            session.commit()
+        except Exception:
+            if reserved:
+                get_special_claim_counter().release(special, user_id, guest_session_id)
             raise
-        # Log event
-        event = SpecialEvent(
-            special_id=special.id,
-            user_id=user_id,
-            guest_session_id=guest_session_id,
-            event_type='claim',
-            ip_address=ip_address,
-            user_agent=user_agent,
-        )
-        session.add(event)
-        # Generate redeem code if required
-        redeem_code = generate_redeem_code() if special.requires_code else None
-        session.commit()
         return claim, redeem_code
 
 
+def reconcile_claim_counters(batch_size: int = CLAIM_RECONCILE_BATCH) -> int:
+    """Repair Redis claim counters of recently claimed specials from Postgres.
+
+    Only specials whose last reservation has settled are taken, so every
+    reservation counted in Redis has its claim row committed (or released) by
+    the time the claims are counted. A special reserved again before its
+    counters are replaced is skipped, and counters are compare-and-set, so a
+    claim racing with reconciliation wins and its special is reconciled on a
+    later run. Returns counters corrected.
+    """
+    counter = get_special_claim_counter()
+    if not counter.available:
+        return 0
+    special_ids = counter.pop_dirty(batch_size)
+    if not special_ids:
+        return 0
+
+    today = datetime.now(timezone.utc).date()
+    corrected = 0
+    with _db_session() as session:
+        specials = session.query(Special).filter(Special.id.in_(special_ids)).all()
+        totals = dict(
+            session.query(SpecialClaim.special_id, func.count(SpecialClaim.id))
+            .filter(SpecialClaim.special_id.in_(special_ids))
+            .group_by(SpecialClaim.special_id)
+            .all()
+        )
+        subject_rows = (
+            session.query(
+                SpecialClaim.special_id,
+                SpecialClaim.user_id,
+                SpecialClaim.guest_session_id,
+                func.date(SpecialClaim.claimed_at),
+                func.count(SpecialClaim.id),
+            )
+            .filter(SpecialClaim.special_id.in_(special_ids))
+            .group_by(
+                SpecialClaim.special_id,
+                SpecialClaim.user_id,
+                SpecialClaim.guest_session_id,
+                func.date(SpecialClaim.claimed_at),
+            )
+            .all()
+        )
+
+    subject_counts: Dict[Any, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    specials_by_id = {special.id: special for special in specials}
+    for special_id, user_id, guest_id, claim_date, count in subject_rows:
+        special = specials_by_id.get(special_id)
+        if special is None:
+            continue
+        if user_id:
+            if special.per_visit and claim_date != today:
+                continue
+            key = counter.user_key(special_id, user_id, bool(special.per_visit), today.isoformat())
+        else:
+            key = counter.guest_key(special_id, guest_id)
+        subject_counts[special_id][key] += count
+
+    for special in specials:
+        actual = {counter.total_key(special.id): totals.get(special.id, 0)}
+        actual.update(subject_counts.get(special.id, {}))
+        expected = counter.read(list(actual))
+        if counter.is_dirty(special.id):
+            # Reserved after the pop; its claim row may not be committed yet
+            continue
+        corrected += counter.compare_and_set(expected, actual, ttl=counter.ttl_for(special))
+
+    if corrected:
+        logger.info(f"Reconciled {corrected} special claim counters")
+    return corrected
+
+
 def redeem_claim(claim: SpecialClaim, current_user_id: str, redeem_code: Optional[str]) -> SpecialClaim:
     """Redeem a claim; assumes upstream staff authorization checks."""
     with _db_session() as session:
@@ -258,13 +449,39 @@ def redeem_claim(claim: SpecialClaim, current_user_id: str, redeem_code: Optiona
         return db_claim
 
 
-def format_special(session, special: Special, current_user_id: Optional[str]) -> Dict[str, Any]:
+def _load_media_by_special(session, special_ids: List[Any]) -> Dict[Any, List[SpecialMedia]]:
+    """Load media for a page of specials in one IN query, grouped by special id."""
+    media_by_special: Dict[Any, List[SpecialMedia]] = defaultdict(list)
+    if not special_ids:
+        return media_by_special
     media_items = (
         session.query(SpecialMedia)
-        .filter(SpecialMedia.special_id == special.id)
-        .order_by(SpecialMedia.position.asc())
+        .filter(SpecialMedia.special_id.in_(special_ids))
+        .order_by(SpecialMedia.special_id, SpecialMedia.position.asc())
         .all()
     )
+    for item in media_items:
+        media_by_special[item.special_id].append(item)
+    return media_by_special
+
+
+def format_specials(session, specials: List[Special], current_user_id: Optional[str]) -> List[Dict[str, Any]]:
+    """Format a page of specials, loading their media in a single query."""
+    media_by_special = _load_media_by_special(session, [special.id for special in specials])
+    return [
+        format_special(session, special, current_user_id, media_items=media_by_special.get(special.id, []))
+        for special in specials
+    ]
+
+
+def format_special(
+    session,
+    special: Special,
+    current_user_id: Optional[str],
+    media_items: Optional[List[SpecialMedia]] = None,
+) -> Dict[str, Any]:
+    if media_items is None:
+        media_items = _load_media_by_special(session, [special.id]).get(special.id, [])
     can_claim_flag = True
     remaining = 0
     if current_user_id:
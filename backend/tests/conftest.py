@@ -2,10 +2,12 @@
 Pytest configuration and fixtures for backend tests.
 """
 
+import fnmatch
 import os
 import pytest
 from app_factory_full import create_app
-from unittest.mock import Mock
+from unittest.mock import MagicMock, Mock
+from middleware.sql_profiler import assert_query_budget
 
 # Test configuration
 def pytest_configure(config):
@@ -36,6 +38,9 @@ def setup_test_env(test_config):
     os.environ['ENABLE_SUPABASE_ADMIN_ROLES'] = 'false'
     # Disable JWKS pre-warming for testing
     os.environ['ENABLE_JWKS_PREWARM'] = 'false'
+    # Keep revocation checks on the full Redis/database path
+    os.environ['ENABLE_REVOCATION_FILTER'] = 'false'
+    os.environ['FEATURE_FLAGS_REDIS_SYNC'] = 'false'
     
     # Set test mode
     os.environ['TEST_MODE'] = test_config['test_mode']
@@ -47,6 +52,10 @@ def setup_test_env(test_config):
         del os.environ['ENABLE_SUPABASE_ADMIN_ROLES']
     if 'ENABLE_JWKS_PREWARM' in os.environ:
         del os.environ['ENABLE_JWKS_PREWARM']
+    if 'ENABLE_REVOCATION_FILTER' in os.environ:
+        del os.environ['ENABLE_REVOCATION_FILTER']
+    if 'FEATURE_FLAGS_REDIS_SYNC' in os.environ:
+        del os.environ['FEATURE_FLAGS_REDIS_SYNC']
     if 'TEST_MODE' in os.environ:
         del os.environ['TEST_MODE']
 
@@ -107,3 +116,166 @@ def auth_headers():
     In TEST_MODE, many auth integrations are bypassed; this provides a placeholder header.
     """
     return {"Authorization": "Bearer test-token"}
+
+
+@pytest.fixture
+def query_budget():
+    """Assert an endpoint's SQL query budget.
+
+    Usage:
+        with query_budget(max_queries=3, max_repeats=1):
+            client.get('/api/v5/restaurants/1')
+    """
+    return assert_query_budget
+
+
+class InMemoryRedis:
+    """Minimal in-memory Redis client for unit tests.
+
+    Values come back as bytes like redis-py's. Lua scripts are not run:
+    register_script returns a MagicMock (recorded in ``scripts``) whose
+    side_effect a test sets to emulate the script against this client.
+    """
+
+    def __init__(self):
+        self.strings = {}
+        self.hashes = {}
+        self.sets = {}
+        self.zsets = {}
+        self.lists = {}
+        self.scripts = []
+        self.scan_calls = []
+
+    @staticmethod
+    def _b(value):
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def _stores(self):
+        return (self.strings, self.hashes, self.sets, self.zsets, self.lists)
+
+    def register_script(self, source):
+        script = MagicMock(name='script')
+        self.scripts.append(script)
+        return script
+
+    def pipeline(self, transaction=True):
+        return InMemoryPipeline(self)
+
+    # Keys
+    def exists(self, *keys):
+        return sum(1 for key in keys if any(key in store for store in self._stores()))
+
+    def delete(self, *keys):
+        deleted = 0
+        for key in keys:
+            for store in self._stores():
+                if store.pop(key, None) is not None:
+                    deleted += 1
+        return deleted
+
+    def expire(self, key, seconds):
+        return bool(self.exists(key))
+
+    def scan(self, cursor=0, match=None, count=None):
+        self.scan_calls.append(match)
+        keys = [key for store in self._stores() for key in store]
+        return 0, [key for key in keys if match is None or fnmatch.fnmatch(key, match)]
+
+    # Strings
+    def get(self, key):
+        return self.strings.get(key)
+
+    def set(self, key, value, ex=None, px=None):
+        self.strings[key] = self._b(value)
+        return True
+
+    # Hashes
+    def hset(self, key, field=None, value=None, mapping=None):
+        target = self.hashes.setdefault(key, {})
+        if mapping:
+            target.update({f: self._b(v) for f, v in mapping.items()})
+        if field is not None:
+            target[field] = self._b(value)
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hgetall(self, key):
+        return {f.encode(): v for f, v in self.hashes.get(key, {}).items()}
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.hashes.get(key, {}).pop(field, None)
+
+    # Sets
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    def sunion(self, keys):
+        result = set()
+        for key in keys:
+            result |= self.sets.get(key, set())
+        return result
+
+    # Sorted sets
+    def zadd(self, key, mapping, xx=False):
+        zset = self.zsets.setdefault(key, {})
+        for member, score in mapping.items():
+            if not xx or member in zset:
+                zset[member] = score
+
+    def zrem(self, key, *members):
+        for member in members:
+            self.zsets.get(key, {}).pop(member, None)
+
+    def zpopmax(self, key):
+        zset = self.zsets.get(key, {})
+        if not zset:
+            return []
+        member = max(zset, key=zset.get)
+        return [(member.encode(), zset.pop(member))]
+
+    def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    def zcount(self, key, low, high):
+        return sum(1 for score in self.zsets.get(key, {}).values() if float(low) <= score <= float(high))
+
+    def zrange(self, key, start, end, withscores=False):
+        items = sorted(self.zsets.get(key, {}).items(), key=lambda item: item[1])[start:end + 1]
+        return [(m.encode(), s) for m, s in items] if withscores else [m.encode() for m, _ in items]
+
+    # Lists
+    def lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value)
+
+    def ltrim(self, key, start, end):
+        self.lists[key] = self.lists.get(key, [])[start:end + 1]
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+
+class InMemoryPipeline:
+    """Queues commands and runs them against the InMemoryRedis on execute()."""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        results = [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+
+@pytest.fixture
+def redis_client():
+    """A fresh InMemoryRedis."""
+    return InMemoryRedis()
@@ -198,7 +198,7 @@ class MockSession:
                 session['revoked_at'] = datetime.utcnow()
                 session['last_used'] = datetime.utcnow()
                 updated = 1
-            return [None] * updated
+            return [MockRow({'current_jti': session.get('current_jti')})] * updated
 
         if 'update auth_sessions set revoked_at = now() where family_id' in query_lower:
             updated = 0
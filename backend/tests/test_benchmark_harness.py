@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Tests for the seeded benchmark harness: dataset determinism, migration splitting and regression rules."""
+import json
+import random
+
+import pytest
+
+from benchmarks.data import METROS, DatasetSize, generate_dataset, random_location
+from benchmarks.run import compare, load_baselines, percentile, run_scenario, summarize, write_baselines
+from benchmarks.scenarios import SCENARIOS_BY_NAME, Scenario
+from benchmarks.seed import check_target, split_sql_statements
+
+SMALL = DatasetSize(restaurants=200, synagogues=20, mikvahs=5, stores=20, reviews_per_restaurant=3, users=5)
+
+
+class TestDataset:
+    """Test that the same seed always produces the same rows."""
+
+    def test_same_seed_same_rows(self):
+        assert generate_dataset(SMALL, 7) == generate_dataset(SMALL, 7)
+        assert generate_dataset(SMALL, 7)["restaurants"] != generate_dataset(SMALL, 8)["restaurants"]
+
+    def test_tables_have_requested_sizes(self):
+        dataset = generate_dataset(SMALL, 7)
+        assert [len(dataset[name]) for name in ("restaurants", "shuls", "mikvah", "stores")] == [200, 20, 5, 20]
+        assert {review["restaurant_id"] for review in dataset["reviews"]} <= set(range(1, 201))
+
+    def test_locations_cluster_around_metros(self):
+        rng = random.Random(1)
+        near = 0
+        for _ in range(1000):
+            _, _, lat, lng = random_location(rng)
+            if any(abs(lat - m[2]) < 4 * m[5] and abs(lng - m[3]) < 4 * m[5] for m in METROS):
+                near += 1
+        assert near > 950
+
+
+def test_migrations_split_outside_function_bodies():
+    sql = """
+-- comment;
+CREATE TABLE a (id int);
+DO $$
+BEGIN
+    ALTER TABLE a ADD COLUMN b int;
+END $$;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx ON a (b)
+    WHERE b IS NOT NULL;
+-- DROP INDEX CONCURRENTLY idx;
+"""
+    statements = split_sql_statements(sql)
+
+    assert len(statements) == 3
+    assert statements[1].startswith("DO $$") and statements[1].endswith("END $$;")
+    assert statements[2].startswith("CREATE INDEX CONCURRENTLY")
+
+
+@pytest.mark.parametrize("url", [
+    "postgresql://u:p@db.example.com:5432/jewgo_bench",
+    "postgresql://u:p@localhost:5432/jewgo",
+])
+def test_seeder_refuses_non_benchmark_databases(url):
+    with pytest.raises(SystemExit):
+        check_target(url, "redis://localhost:6389/0")
+
+
+class TestRegressionRules:
+    """Test baseline comparison."""
+
+    BASELINE = {"search": {"p95_ms": 40.0, "p99_ms": 60.0, "queries_per_request": 3}}
+
+    def result(self, p95=40.0, p99=60.0, queries=3, unexpected=None):
+        return {"search": {"p95_ms": p95, "p99_ms": p99, "queries_per_request": queries,
+                           "unexpected_status": unexpected or {}}}
+
+    def test_within_threshold_passes(self):
+        assert compare(self.result(p95=47.0, p99=71.0), self.BASELINE) == []
+
+    def test_latency_growth_fails(self):
+        regressions = compare(self.result(p99=80.0), self.BASELINE)
+        assert len(regressions) == 1 and "p99_ms" in regressions[0]
+
+    def test_noise_floor_ignores_tiny_absolute_changes(self):
+        baseline = {"search": {"p95_ms": 1.0, "p99_ms": 1.5, "queries_per_request": 3}}
+        assert compare(self.result(p95=2.0, p99=3.0), baseline) == []
+
+    def test_extra_queries_and_bad_statuses_fail(self):
+        regressions = compare(self.result(queries=4, unexpected={"500": 2}), self.BASELINE)
+        assert len(regressions) == 2
+
+    def test_query_baseline_is_required_in_ci_mode(self):
+        latency_only = {"search": {"p95_ms": 40.0, "p99_ms": 60.0}}
+        assert compare(self.result(queries=9), latency_only) == []
+        assert compare(self.result(queries=9), latency_only, require_query_baseline=True) == [
+            "search: no query-count baseline"]
+        assert compare(self.result(p95=400.0), {"search": {"queries_per_request": 3}}) == []
+
+
+class TestBaselineFiles:
+    """Test the committed query baseline and the local latency baseline."""
+
+    MANIFEST = {"restaurants": 100, "seed": 1}
+
+    def report(self, queries=3):
+        return {"dataset": self.MANIFEST, "request_seed": 1, "scenarios": {
+            "search": {"p95_ms": 40.0, "p99_ms": 60.0, "queries_per_request": queries, "max_queries_per_request": 5}}}
+
+    def test_update_writes_only_query_counts_to_the_committed_baseline(self, tmp_path):
+        latency, queries = tmp_path / "latency.json", tmp_path / "queries.json"
+
+        write_baselines(latency, queries, self.report(), {})
+
+        assert json.loads(queries.read_text())["scenarios"] == {
+            "search": {"max_queries_per_request": 5, "queries_per_request": 3}}
+        assert json.loads(latency.read_text())["scenarios"]["search"]["p95_ms"] == 40.0
+
+    def test_committed_query_counts_override_local_ones(self, tmp_path):
+        latency, queries = tmp_path / "latency.json", tmp_path / "queries.json"
+        write_baselines(latency, queries, self.report(queries=7), {})
+        queries.write_text(json.dumps(dict(self.report(queries=3), scenarios={"search": {"queries_per_request": 3}})))
+
+        baseline = load_baselines(latency, queries, self.MANIFEST, require_query_baseline=True)
+
+        assert baseline == {"search": {"p95_ms": 40.0, "p99_ms": 60.0, "queries_per_request": 3}}
+
+    def test_missing_query_baseline_fails_only_when_required(self, tmp_path):
+        latency, queries = tmp_path / "latency.json", tmp_path / "queries.json"
+
+        assert load_baselines(latency, queries, self.MANIFEST) == {}
+        assert load_baselines(latency, queries, self.MANIFEST, update=True, require_query_baseline=True) == {}
+        with pytest.raises(SystemExit, match="no query baseline"):
+            load_baselines(latency, queries, self.MANIFEST, require_query_baseline=True)
+
+    def test_baseline_for_another_dataset_is_refused(self, tmp_path):
+        latency, queries = tmp_path / "latency.json", tmp_path / "queries.json"
+        write_baselines(latency, queries, self.report(), {})
+
+        with pytest.raises(SystemExit, match="reseed"):
+            load_baselines(latency, queries, {"restaurants": 5, "seed": 1})
+
+
+def test_run_scenario_replays_requests_and_counts_queries():
+    class FakeCounter:
+        count = 0
+
+        def reset(self):
+            FakeCounter.count = 2
+
+    class FakeClient:
+        def __init__(self):
+            self.paths = []
+
+        def open(self, path, method, **kwargs):
+            self.paths.append(path)
+            return type("Response", (), {"status_code": 200 if len(self.paths) % 5 else 503})()
+
+    scenario = Scenario("detail", SCENARIOS_BY_NAME["restaurant_detail"].build, warmup=2, iterations=8)
+    manifest = {"restaurants": 100, "users": 5}
+
+    first = FakeClient()
+    result = run_scenario(first, scenario, manifest, FakeCounter(), seed=3)
+    replay = FakeClient()
+    run_scenario(replay, scenario, manifest, FakeCounter(), seed=3)
+
+    assert result["requests"] == 8 and result["queries_per_request"] == 2
+    assert result["unexpected_status"] == {"503": 2}
+    assert replay.paths == first.paths
+
+
+def test_percentiles_use_nearest_rank():
+    values = sorted(float(v) for v in range(1, 101))
+    assert (percentile(values, 50), percentile(values, 99), percentile([], 50)) == (50.0, 99.0, 0.0)
+    assert summarize([3.0, 1.0, 2.0], [1, 1, 4], {})["p50_ms"] == 2.0
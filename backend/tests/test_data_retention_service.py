@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""Tests for batched, checkpointed retention purges and SCAN-based Redis cleanup."""
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import services.data_retention_service as data_retention
+from services.data_retention_service import (
+    DataRetentionService,
+    DataType,
+    RetentionPeriod,
+    RetentionPolicy,
+)
+
+
+class FakeResult:
+    def __init__(self, rows=(), scalar=None):
+        self._rows = list(rows)
+        self._scalar = scalar
+
+    def fetchall(self):
+        return self._rows
+
+    def scalar(self):
+        return self._scalar
+
+
+class FakeConnectionManager:
+    """Records statements; each session_scope() is one transaction."""
+
+    def __init__(self, responder):
+        self.responder = responder
+        self.transactions = []
+
+    def session_scope(self):
+        manager = self
+        statements = []
+        self.transactions.append(statements)
+
+        class Scope:
+            def __enter__(self):
+                session = MagicMock()
+
+                def execute(statement, params=None):
+                    statements.append((str(statement), params or {}))
+                    return manager.responder(str(statement), params or {})
+                session.execute.side_effect = execute
+                return session
+
+            def __exit__(self, *exc_info):
+                return False
+
+        return Scope()
+
+
+class FakeRedis:
+    def __init__(self, keys=None):
+        self.values = {}
+        self.ttls = dict(keys or {})
+        self.expired = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value.encode()
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+    def scan(self, cursor=0, match=None, count=None):
+        prefix = match.rstrip('*')
+        keys = sorted(k for k in self.ttls if k.startswith(prefix))
+        page = keys[cursor:cursor + 2]
+        next_cursor = cursor + 2 if cursor + 2 < len(keys) else 0
+        return next_cursor, page
+
+    def ttl(self, key):
+        return self.ttls[key]
+
+    def expire(self, key, seconds):
+        self.expired[key] = seconds
+
+    def pipeline(self, transaction=True):
+        client = self
+        calls = []
+
+        class Pipe:
+            def __getattr__(self, name):
+                def queue(*args):
+                    calls.append((name, args))
+                return queue
+
+            def execute(self):
+                return [getattr(client, name)(*args) for name, args in calls]
+
+        return Pipe()
+
+
+def make_service(responder, redis_client=None):
+    redis_manager = MagicMock()
+    redis_manager.get_client.return_value = redis_client or FakeRedis()
+    with patch.object(data_retention, 'get_connection_manager', return_value=FakeConnectionManager(responder)), \
+            patch.object(data_retention, 'get_redis_manager_v5', return_value=redis_manager):
+        return DataRetentionService()
+
+
+def make_policy(**overrides):
+    options = dict(
+        name='audit_logs',
+        description='Audit logs retention',
+        data_type=DataType.AUDIT,
+        retention_period=RetentionPeriod.DAYS_365,
+        table_name='audit_logs',
+        date_column='created_at',
+        batch_size=3,
+        sleep_between_batches=0,
+    )
+    options.update(overrides)
+    return RetentionPolicy(**options)
+
+
+def batched_responder(batches):
+    """Return successive id batches for DELETE statements."""
+    remaining = list(batches)
+
+    def respond(statement, params):
+        if statement.strip().startswith('DELETE'):
+            return FakeResult([(i,) for i in (remaining.pop(0) if remaining else [])])
+        return FakeResult()
+    return respond
+
+
+class TestBatchedPurge:
+    """Test primary-key-ordered batch deletion."""
+
+    def test_purges_in_small_transactions_until_short_batch(self):
+        service = make_service(batched_responder([[1, 2, 3], [4, 5, 6], [7]]))
+
+        result = service._process_policy(make_policy())
+
+        transactions = service.connection_manager.transactions
+        assert (result.deleted, result.batches, result.completed) == (7, 3, True)
+        assert len(transactions) == 3 and all(len(t) == 1 for t in transactions)
+        statement, params = transactions[0][0]
+        assert 'FOR UPDATE SKIP LOCKED' in statement and 'ORDER BY id' in statement
+        assert params['batch_size'] == 3
+        # Later batches continue after the last deleted key
+        assert transactions[1][0][1]['after'] == 3
+        # A completed run clears the checkpoint
+        assert service.redis_manager.get_client().values == {}
+
+    def test_stopped_run_keeps_checkpoint_and_resumes(self):
+        service = make_service(batched_responder([[1, 2, 3], [4, 5, 6]]))
+        policy = make_policy(max_batches_per_run=1)
+
+        first = service._process_policy(policy)
+        second = service._process_policy(policy)
+
+        assert first.completed is False
+        assert service.connection_manager.transactions[1][0][1]['after'] == '3'
+        assert second.completed is False
+        assert service.redis_manager.get_client().values[service._checkpoint_key(policy)] == b'6'
+
+    def test_conditions_become_bound_parameters(self):
+        service = make_service(batched_responder([]))
+        policy = make_policy(conditions={'success': False, 'revoked_at': 'IS NOT NULL'})
+
+        service._process_policy(policy)
+
+        statement, params = service.connection_manager.transactions[0][0]
+        assert 'success = :cond_0' in statement and 'revoked_at IS NOT NULL' in statement
+        assert params['cond_0'] is False
+
+    def test_pii_is_masked_before_the_batch_is_deleted(self):
+        selected = [[1, 2, 3], [4]]
+
+        def respond(statement, params):
+            if statement.strip().startswith('SELECT'):
+                return FakeResult([(i,) for i in selected.pop(0)])
+            if statement.strip().startswith('DELETE'):
+                return FakeResult([(i,) for i in params['ids']])
+            return FakeResult()
+        service = make_service(respond)
+        masked = []
+        service._mask_records_before_deletion = lambda ids, policy: masked.append(
+            (list(ids), len(service.connection_manager.transactions[-1])))
+
+        result = service._process_policy(make_policy(mask_pii=True))
+
+        # Each batch is masked after its rows are locked and before they are deleted
+        assert masked == [([1, 2, 3], 1), ([4], 1)]
+        assert (result.deleted, result.batches) == (4, 2)
+        select, delete = service.connection_manager.transactions[0]
+        assert 'FOR UPDATE SKIP LOCKED' in select[0]
+        assert delete[0].startswith('DELETE FROM audit_logs WHERE id IN') and delete[1] == {'ids': [1, 2, 3]}
+
+    def test_dry_run_only_counts(self):
+        service = make_service(lambda statement, params: FakeResult(scalar=42))
+
+        result = service._process_policy(make_policy(dry_run=True))
+
+        [[(statement, _)]] = service.connection_manager.transactions
+        assert statement.strip().startswith('SELECT COUNT(*)')
+        assert result.deleted == 0
+
+
+class TestPartitionDrop:
+    """Test dropping fully expired partitions."""
+
+    def test_drops_only_partitions_entirely_before_cutoff(self):
+        def respond(statement, params):
+            if 'pg_inherits' in statement:
+                return FakeResult([
+                    ('audit_logs_2020_01', "FOR VALUES FROM ('2020-01-01 00:00:00+00') TO ('2020-02-01 00:00:00+00')"),
+                    ('audit_logs_future', f"FOR VALUES FROM ('{datetime.utcnow().year + 1}-01-01') TO ('{datetime.utcnow().year + 1}-02-01')"),
+                    ('audit_logs_default', 'DEFAULT'),
+                ])
+            return FakeResult()
+        service = make_service(respond)
+
+        result = service._process_policy(make_policy(drop_expired_partitions=True))
+
+        assert result.partitions_dropped == ['audit_logs_2020_01']
+        statements = [s for t in service.connection_manager.transactions for s, _ in t]
+        assert 'ALTER TABLE audit_logs DETACH PARTITION "audit_logs_2020_01"' in statements
+        assert 'DROP TABLE "audit_logs_2020_01"' in statements
+
+    def test_policies_with_conditions_never_drop_partitions(self):
+        service = make_service(batched_responder([]))
+        policy = make_policy(drop_expired_partitions=True, conditions={'success': False})
+
+        assert service._drop_expired_partitions(policy, datetime.utcnow()) == []
+
+
+def test_redis_cleanup_leaves_session_and_rate_limit_keys_alone_by_default():
+    redis_client = FakeRedis({
+        'session:a': -1,
+        'session_data:a': -1,
+        'session_step_up:a': -1,
+        'rate_limit:x': -1,
+    })
+    service = make_service(batched_responder([]), redis_client)
+
+    assert service._cleanup_redis_data() == {'scanned': 0, 'expiry_set': 0}
+    assert redis_client.expired == {}
+
+
+def test_redis_cleanup_scans_and_sets_missing_ttls_on_opted_in_patterns():
+    redis_client = FakeRedis({
+        'export:a': -1,
+        'export:b': 500,
+        'export:c': -1,
+        'report:x': -1,
+        'session:a': -1,
+    })
+    service = make_service(batched_responder([]), redis_client)
+    service.add_redis_retention_rule('export:*', RetentionPeriod.DAYS_30)
+    service.add_redis_retention_rule('report:*', RetentionPeriod.HOURS_24)
+
+    stats = service._cleanup_redis_data()
+
+    assert redis_client.expired == {
+        'export:a': RetentionPeriod.DAYS_30.value,
+        'export:c': RetentionPeriod.DAYS_30.value,
+        'report:x': RetentionPeriod.HOURS_24.value,
+    }
+    assert stats == {'scanned': 4, 'expiry_set': 3}
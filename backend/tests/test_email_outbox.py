@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""Tests for the email outbox and its pooled SMTP sender against a local aiosmtpd server."""
+import json
+import socket
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+from services.email_outbox import EmailOutbox, SMTPConnectionPool
+from services.email_service import AuthEmailTemplates, EmailService
+import workers.email_outbox_worker as email_outbox_worker
+from workers.email_outbox_worker import EmailOutboxWorker
+
+
+class CollectingHandler:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return '250 OK'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = CollectingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+@pytest.fixture
+def outbox(redis_client):
+    outbox = EmailOutbox(redis_client, max_attempts=2, base_backoff=30)
+
+    def claim(keys, args):
+        # What the claim script does, against the in-memory client
+        queue_key, messages_key = keys
+        now, batch_size, lease_until = float(args[0]), int(args[1]), float(args[2])
+        due = sorted((score, member) for member, score in redis_client.zsets.get(queue_key, {}).items()
+                     if score <= now)[:batch_size]
+        for _, member in due:
+            redis_client.zsets[queue_key][member] = lease_until
+        return [redis_client.hashes.get(messages_key, {}).get(member) for _, member in due]
+
+    outbox._claim.side_effect = claim
+    return outbox
+
+
+@pytest.fixture
+def email_env(monkeypatch):
+    monkeypatch.setenv('EMAIL_ENABLED', 'true')
+    monkeypatch.setenv('EMAIL_PROVIDER', 'smtp')
+    monkeypatch.setenv('SMTP_FROM_EMAIL', 'noreply@jewgo.test')
+
+
+@pytest.fixture
+def email_service(outbox, email_env, monkeypatch):
+    # Stand-in for the lazily started sender: a live heartbeat, no thread
+    monkeypatch.setattr(email_outbox_worker, 'ensure_email_outbox_worker',
+                        lambda outbox, email_service: outbox.beat(30))
+    return EmailService(outbox=outbox)
+
+
+def make_pool(controller, size=1):
+    return SMTPConnectionPool(controller.hostname, controller.port, use_tls=False, size=size, timeout=5)
+
+
+class TestEmailOutbox:
+    """Test that requests only enqueue and the worker delivers in batches."""
+
+    def test_send_email_only_enqueues(self, email_service, outbox, monkeypatch):
+        smtp = MagicMock()
+        monkeypatch.setattr('smtplib.SMTP', smtp)
+
+        assert email_service.send_email('a@example.com', 'Hi', '<p>Hi</p>', 'Hi') is True
+
+        smtp.assert_not_called()
+        assert outbox.get_stats()['queued'] == 1
+
+    def test_worker_sends_batch_over_one_persistent_connection(self, smtp_server, email_service, outbox):
+        controller, handler = smtp_server
+        for i in range(5):
+            email_service.send_email(f'user{i}@example.com', f'Subject {i}', '<p>Body</p>', 'Body')
+        pool = make_pool(controller)
+        worker = EmailOutboxWorker(outbox, email_service, smtp_pool=pool, batch_size=10)
+
+        assert worker.run_once() == (5, 0)
+        worker.stop()
+
+        assert sorted(env.rcpt_tos[0] for env in handler.messages) == [f'user{i}@example.com' for i in range(5)]
+        assert pool.stats['connections_opened'] == 1
+        assert outbox.get_stats()['queued'] == 0
+
+    def test_claimed_messages_are_leased(self, email_service, outbox):
+        email_service.send_email('a@example.com', 'Hi', '<p>Hi</p>')
+
+        assert len(outbox.claim(10, lease_seconds=60)) == 1
+        assert outbox.claim(10, lease_seconds=60) == []
+
+    def test_failed_send_backs_off_then_dead_letters(self, email_service, outbox):
+        email_service.send_email('a@example.com', 'Hi', '<p>Hi</p>')
+        pool = MagicMock(size=1)
+        pool.connection.return_value.__enter__.side_effect = ConnectionRefusedError('refused')
+        worker = EmailOutboxWorker(outbox, email_service, smtp_pool=pool)
+
+        assert worker.run_once() == (0, 1)
+        [(message_id, due_at)] = outbox.redis_client.zsets[outbox.QUEUE_KEY].items()
+        assert due_at >= time.time() + 25
+        stored = json.loads(outbox.redis_client.hashes[outbox.MESSAGES_KEY][message_id])
+        assert stored['attempts'] == 1
+
+        # Make it due again; the second failure reaches max_attempts
+        outbox.redis_client.zsets[outbox.QUEUE_KEY][message_id] = 0
+        assert worker.run_once() == (0, 1)
+        worker.stop()
+
+        assert outbox.get_stats() == {'queued': 0, 'due': 0, 'dead_lettered': 1}
+        assert worker.stats['dead_lettered'] == 1
+
+    def test_broken_connection_is_discarded(self, smtp_server):
+        controller, _ = smtp_server
+        pool = make_pool(controller)
+
+        with pytest.raises(RuntimeError):
+            with pool.connection():
+                raise RuntimeError('send failed')
+        with pool.connection() as server:
+            assert server.noop()[0] == 250
+
+        assert pool.stats == {'connections_opened': 2, 'connections_discarded': 1}
+        pool.close_all()
+
+
+def test_without_a_live_sender_mail_is_sent_synchronously(outbox, email_env, monkeypatch):
+    monkeypatch.setattr(email_outbox_worker, 'ensure_email_outbox_worker', lambda **kwargs: None)
+    service = EmailService(outbox=outbox)
+    service._send_smtp = MagicMock(return_value=True)
+
+    assert service.send_email('a@example.com', 'Hi', '<p>Hi</p>') is True
+    service._send_smtp.assert_called_once()
+    assert outbox.get_stats()['queued'] == 0
+
+
+def test_first_send_starts_the_sender_in_this_process(smtp_server, outbox, email_env, monkeypatch):
+    controller, handler = smtp_server
+    monkeypatch.setenv('SMTP_HOST', controller.hostname)
+    monkeypatch.setenv('SMTP_PORT', str(controller.port))
+    monkeypatch.setenv('SMTP_USE_TLS', 'false')
+    service = EmailService(outbox=outbox)
+    try:
+        assert service.send_email('a@example.com', 'Hi', '<p>Hi</p>') is True
+        worker = email_outbox_worker.email_outbox_worker
+        assert worker.running_here and outbox.sender_alive()
+
+        service.send_email('b@example.com', 'Hi', '<p>Hi</p>')
+        assert email_outbox_worker.email_outbox_worker is worker
+
+        deadline = time.time() + 10
+        while len(handler.messages) < 2 and time.time() < deadline:
+            time.sleep(0.05)
+        assert sorted(env.rcpt_tos[0] for env in handler.messages) == ['a@example.com', 'b@example.com']
+
+        # A worker inherited across fork has no thread behind it and is replaced
+        worker._pid = -1
+        service.send_email('c@example.com', 'Hi', '<p>Hi</p>')
+        assert email_outbox_worker.email_outbox_worker is not worker
+        worker.stop()
+    finally:
+        email_outbox_worker.stop_email_outbox_worker()
+
+
+def test_stop_flushes_due_messages(smtp_server, email_service, outbox):
+    controller, handler = smtp_server
+    for i in range(3):
+        email_service.send_email(f'user{i}@example.com', 'Hi', '<p>Hi</p>')
+    worker = EmailOutboxWorker(outbox, email_service, smtp_pool=make_pool(controller))
+
+    worker.stop(flush_seconds=5)
+
+    assert len(handler.messages) == 3
+    assert outbox.get_stats()['queued'] == 0
+
+
+def test_outbox_disabled_sends_synchronously(monkeypatch):
+    monkeypatch.setenv('EMAIL_ENABLED', 'true')
+    monkeypatch.setenv('EMAIL_OUTBOX_ENABLED', 'false')
+    service = EmailService(outbox=MagicMock())
+    service._send_smtp = MagicMock(return_value=True)
+
+    assert service.send_email('a@example.com', 'Hi', '<p>Hi</p>') is True
+    service._send_smtp.assert_called_once()
+    service._outbox.enqueue.assert_not_called()
+
+
+def test_welcome_template_is_compiled_once_and_rendered_per_call():
+    first = AuthEmailTemplates.welcome_email('Dana')
+    hits = AuthEmailTemplates._compile.cache_info().hits
+
+    other = AuthEmailTemplates.welcome_email('Eli')
+    again = AuthEmailTemplates.welcome_email('Dana')
+
+    assert again == first and again is not first
+    assert 'Hello Eli,' in other['html_body'] and 'Hello Eli,' in other['text_body']
+    assert AuthEmailTemplates._compile.cache_info().hits == hits + 4
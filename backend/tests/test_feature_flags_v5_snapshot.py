@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Tests for compiled feature flag snapshots and Redis-published flag changes."""
+import queue
+import time
+
+import pytest
+
+from utils.feature_flags_v5 import FeatureFlagStageV5, FeatureFlagsV5
+
+
+class FakeRedis:
+    """Hash, counter and pub/sub shared by every FeatureFlagsV5 in a test."""
+
+    def __init__(self):
+        self.hashes, self.counters, self.subscribers = {}, {}, []
+
+    def get_client(self):
+        return self
+
+    def build_key(self, key, prefix='cache'):
+        return f"{prefix}:{key}"
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def incr(self, key):
+        self.counters[key] = self.counters.get(key, 0) + 1
+        return self.counters[key]
+
+    def publish(self, channel, data):
+        for inbox in self.subscribers:
+            inbox.put({"type": "message", "channel": channel, "data": data})
+
+    def pubsub(self, ignore_subscribe_messages=True):
+        redis, inbox = self, queue.Queue()
+
+        class PubSub:
+            def subscribe(self, channel):
+                redis.subscribers.append(inbox)
+
+            def listen(self):
+                while True:
+                    yield inbox.get()
+
+        return PubSub()
+
+
+@pytest.fixture
+def flags():
+    return FeatureFlagsV5()
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_fully_rolled_out_flags_compile_to_constants(flags):
+    compiled = flags._snapshot.flags["auth_api_v5"]
+    assert compiled.constant is True
+    assert flags.is_enabled("auth_api_v5", user_id="anyone")
+
+
+def test_disabled_dependency_disables_dependents(flags):
+    flags.set_stage("v5_api_enabled", FeatureFlagStageV5.DISABLED)
+
+    assert flags._snapshot.generation != flags._generation
+    assert not flags.is_enabled("auth_api_v5")
+    assert flags._snapshot.flags["auth_api_v5"].constant is False
+
+
+def test_environment_overrides_are_read_at_compile_time(flags, monkeypatch):
+    assert flags.is_enabled("v5_api_enabled")
+    monkeypatch.setenv("EMERGENCY_DISABLE_V5_API_ENABLED", "true")
+    monkeypatch.setenv("FEATURE_FLAG_V5_RATE_LIMIT_V5_USER_vip", "true")
+    assert flags.is_enabled("v5_api_enabled")
+
+    flags.refresh()
+
+    assert not flags.is_enabled("v5_api_enabled")
+    assert not flags.is_enabled("auth_api_v5")
+    monkeypatch.delenv("EMERGENCY_DISABLE_V5_API_ENABLED")
+    flags.refresh()
+    assert flags.is_enabled("rate_limit_v5", user_id="vip")
+
+
+def test_other_environments_compile_once_per_generation(flags, monkeypatch):
+    compiled = []
+    compile_snapshot = flags._compile
+
+    def counting_compile(generation, environment=None):
+        compiled.append(environment)
+        return compile_snapshot(generation, environment)
+
+    monkeypatch.setattr(flags, "_compile", counting_compile)
+    flags.set_stage("rate_limit_v5", FeatureFlagStageV5.DEVELOPMENT)
+    flags.is_enabled("rate_limit_v5")
+
+    assert not any(flags.is_enabled("rate_limit_v5", environment="production") for _ in range(5))
+    assert compiled == [None, "production"]
+
+    flags.set_stage("rate_limit_v5", FeatureFlagStageV5.FULL)
+
+    assert all(flags.is_enabled("rate_limit_v5", environment="production") for _ in range(5))
+    assert compiled == [None, "production", None, "production"]
+
+
+def test_rollout_buckets_are_stable_and_proportional(flags):
+    flags.set_rollout_percentage("rate_limit_v5", 20.0)
+    users = [f"user-{i}" for i in range(5000)]
+    enabled = [u for u in users if flags.is_enabled("rate_limit_v5", user_id=u)]
+
+    assert 850 < len(enabled) < 1150
+    assert enabled == [u for u in users if flags.is_enabled("rate_limit_v5", user_id=u)]
+
+
+def test_unknown_flag_returns_default(flags):
+    assert flags.is_enabled("no_such_flag", default=True) is True
+
+
+def test_changes_reach_other_processes_through_redis():
+    redis = FakeRedis()
+    admin, worker = FeatureFlagsV5(), FeatureFlagsV5()
+    admin.attach_redis(redis)
+    worker.attach_redis(redis)
+    assert wait_until(lambda: len(redis.subscribers) == 2)
+    assert worker.is_enabled("entity_api_v5")
+
+    admin.set_stage("entity_api_v5", FeatureFlagStageV5.DISABLED)
+
+    assert wait_until(lambda: not worker.is_enabled("entity_api_v5"))
+    assert worker.get_flag_info("entity_api_v5")["stage"] == FeatureFlagStageV5.DISABLED
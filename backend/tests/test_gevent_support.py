@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Tests for the gevent wait callback that makes psycopg2 cooperative."""
+import subprocess
+import sys
+from pathlib import Path
+
+import gevent.socket
+import psycopg2
+import pytest
+from psycopg2 import extensions
+
+from database.gevent_support import gevent_wait_callback, make_psycopg_green
+
+
+class FakeAsyncConnection:
+    def __init__(self, states):
+        self.states = list(states)
+
+    def poll(self):
+        return self.states.pop(0)
+
+    def fileno(self):
+        return 42
+
+
+def test_wait_callback_waits_on_the_socket_until_ok(monkeypatch):
+    waits = []
+    monkeypatch.setattr(gevent.socket, "wait_read", lambda fd, timeout=None: waits.append(("read", fd)))
+    monkeypatch.setattr(gevent.socket, "wait_write", lambda fd, timeout=None: waits.append(("write", fd)))
+    conn = FakeAsyncConnection([extensions.POLL_WRITE, extensions.POLL_READ, extensions.POLL_OK])
+
+    gevent_wait_callback(conn)
+
+    assert waits == [("write", 42), ("read", 42)]
+    assert conn.states == []
+
+
+def test_wait_callback_rejects_unknown_poll_state():
+    with pytest.raises(psycopg2.OperationalError):
+        gevent_wait_callback(FakeAsyncConnection([99]))
+
+
+def test_callback_is_not_installed_without_gevent_patching():
+    assert make_psycopg_green() is False
+    assert extensions.get_wait_callback() is None
+
+
+def test_callback_is_installed_in_a_patched_process():
+    script = (
+        "from gevent import monkey; monkey.patch_all()\n"
+        "from psycopg2 import extensions\n"
+        "from database.gevent_support import gevent_wait_callback, make_psycopg_green\n"
+        "assert make_psycopg_green() and make_psycopg_green()\n"
+        "assert extensions.get_wait_callback() is gevent_wait_callback\n"
+    )
+    backend_dir = Path(__file__).parent.parent
+    result = subprocess.run([sys.executable, "-c", script], cwd=backend_dir, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""End-to-end tests for the Google Places sync pipeline against a stub Places server."""
+import asyncio
+import functools
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import services.google_review_sync_service as google_review_sync_service
+from services.google_places_sync import (
+    STATUS_FAILED,
+    STATUS_NOT_FOUND,
+    STATUS_UPDATED,
+    GooglePlacesSyncPipeline,
+    GoogleReviewTableSync,
+    TokenBucket,
+)
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "google_places"
+
+
+class StubPlacesHandler(BaseHTTPRequestHandler):
+    """Serve recorded Places responses keyed by query / place_id."""
+
+    fixtures = {
+        "textsearch": json.loads((FIXTURES_DIR / "textsearch.json").read_text()),
+        "details": json.loads((FIXTURES_DIR / "details.json").read_text()),
+    }
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        endpoint = url.path.strip("/").split("/")[0]
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.server.requests.append((endpoint, params))
+
+        lookup = params.get("query") if endpoint == "textsearch" else params.get("place_id")
+        body = self.fixtures.get(endpoint, {}).get(lookup, {"status": "NOT_FOUND"})
+
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def places_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubPlacesHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_engine(rows):
+    """Fake engine: connect() returns the stale rows, begin() records the writes."""
+    engine = MagicMock()
+    read_conn = engine.connect.return_value.__enter__.return_value
+    read_conn.execute.return_value.fetchall.return_value = [SimpleNamespace(_mapping=row) for row in rows]
+    engine.writes = engine.begin.return_value.__enter__.return_value.execute
+    return engine
+
+
+STALE_ROWS = [
+    {"id": 1, "name": "Bagel Bros", "address": "9 Main St", "place_id": "ChIJbagel"},
+    {"id": 2, "name": "Sushi Spot", "address": "123 Collins Ave", "place_id": None},
+    {"id": 3, "name": "Ghost Diner", "address": "1 Nowhere St", "place_id": None},
+    {"id": 4, "name": "Busy Grill", "address": "5 Ocean Dr", "place_id": "ChIJthrottled"},
+]
+
+
+def make_pipeline(places_server, engine, pipeline_class=GooglePlacesSyncPipeline, **overrides):
+    host, port = places_server.server_address
+    options = dict(
+        api_key="test-key",
+        engine=engine,
+        base_url=f"http://{host}:{port}",
+        requests_per_second=1000,
+        write_batch_size=50,
+    )
+    options.update(overrides)
+    return pipeline_class(**options)
+
+
+class TestGooglePlacesSyncPipeline:
+    """Test stale selection, concurrent fetching and batched writes."""
+
+    def test_run_syncs_stale_rows_end_to_end(self, places_server):
+        engine = make_engine(STALE_ROWS)
+
+        report = make_pipeline(places_server, engine).run(limit=10)
+
+        statuses = {detail["restaurant_id"]: detail["status"] for detail in report["details"]}
+        assert statuses == {1: STATUS_UPDATED, 2: STATUS_UPDATED, 3: STATUS_NOT_FOUND, 4: STATUS_FAILED}
+        assert (report["processed"], report["updated"], report["not_found"], report["failed"]) == (4, 2, 1, 1)
+        assert report["requests_sent"] == len(places_server.requests) == 5
+        assert all(params["key"] == "test-key" for _, params in places_server.requests)
+
+        # One transaction with one UPDATE for synced rows and one for not-found rows
+        assert engine.begin.call_count == 1
+        (_, synced_params), (_, not_found_params) = [c.args for c in engine.writes.call_args_list]
+        synced = {row["id"]: row for row in json.loads(synced_params["rows"])}
+        assert set(synced) == {1, 2}
+        assert synced[2]["place_id"] == "ChIJsushi"
+        assert synced[1]["google_rating"] == 4.6
+        assert len(json.loads(synced[1]["google_reviews"])["reviews"]) == 2
+        assert not_found_params == {"ids": [3]}
+
+    def test_writes_are_chunked(self, places_server):
+        rows = [dict(STALE_ROWS[0], id=i) for i in range(1, 6)]
+        engine = make_engine(rows)
+
+        make_pipeline(places_server, engine, write_batch_size=2).run(limit=10)
+
+        assert engine.begin.call_count == 3
+        assert engine.writes.call_count == 3
+
+    def test_no_stale_rows_makes_no_requests(self, places_server):
+        engine = make_engine([])
+
+        report = make_pipeline(places_server, engine).run(limit=10)
+
+        assert report["processed"] == 0
+        assert places_server.requests == []
+        engine.begin.assert_not_called()
+
+    def test_missing_api_key_is_reported(self, places_server, monkeypatch):
+        monkeypatch.delenv("GOOGLE_PLACES_API_KEY", raising=False)
+        report = make_pipeline(places_server, make_engine(STALE_ROWS), api_key=None).run()
+        assert report == {"success": False, "error": "Google Places API key not configured"}
+
+
+REVIEW_ROWS = [
+    {"id": 1, "name": "Bagel Bros", "address": "9 Main St", "place_id": "ChIJbagel"},
+    {"id": 2, "name": "Sushi Spot", "address": "123 Collins Ave", "place_id": "ChIJsushi"},
+    {"id": 3, "name": "Ghost Diner", "address": "1 Nowhere St", "place_id": "ChIJghost"},
+    {"id": 4, "name": "Busy Grill", "address": "5 Ocean Dr", "place_id": "ChIJthrottled"},
+]
+
+
+class TestGoogleReviewTableSync:
+    """Test the google_reviews table sync built on the same pipeline."""
+
+    def test_reviews_are_upserted_and_pruned_in_one_batch(self, places_server):
+        engine = make_engine([])
+
+        report = asyncio.run(
+            make_pipeline(places_server, engine, GoogleReviewTableSync).sync_async(REVIEW_ROWS)
+        )
+
+        assert (report.updated, report.not_found, report.failed) == (2, 1, 1)
+        assert engine.begin.call_count == 1
+        (_, upsert_params), (_, delete_params) = [c.args for c in engine.writes.call_args_list]
+        rows = json.loads(upsert_params["rows"])
+        assert [(row["restaurant_id"], row["author_name"]) for row in rows] == [
+            (1, "Dana"), (1, "Avi"), (2, "Rivka")]
+        assert rows[0]["id"] == f"google_rev_1_{rows[0]['google_review_id']}"
+        assert rows[0]["google_review_id"].startswith("Dana_")
+        assert json.loads(delete_params["synced"]) == [
+            {"restaurant_id": 1, "place_id": "ChIJbagel"},
+            {"restaurant_id": 2, "place_id": "ChIJsushi"},
+        ]
+        assert delete_params["keep_ids"] == [row["id"] for row in rows]
+
+    def test_sync_all_restaurants_uses_the_pipeline(self, places_server, monkeypatch):
+        engine = make_engine([])
+        monkeypatch.setattr(
+            google_review_sync_service, "GooglePlacesService",
+            lambda db_manager, config: SimpleNamespace(api_key="test-key"),
+        )
+        host, port = places_server.server_address
+        monkeypatch.setattr(
+            google_review_sync_service, "GoogleReviewTableSync",
+            functools.partial(GoogleReviewTableSync, engine=engine, base_url=f"http://{host}:{port}"),
+        )
+        db_manager = MagicMock()
+        db_manager.get_restaurants.return_value = REVIEW_ROWS + [{"id": 5, "name": "No Listing", "place_id": None}]
+
+        results = google_review_sync_service.GoogleReviewSyncService(db_manager).sync_all_restaurants_google_reviews()
+
+        assert (results["total_restaurants"], results["successful_syncs"], results["failed_syncs"]) == (4, 2, 2)
+        assert len(places_server.requests) == 4
+        assert engine.begin.call_count == 1
+        db_manager.upsert_google_reviews.assert_not_called()
+
+
+def test_token_bucket_limits_rate():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+
+    async def scenario():
+        await bucket.acquire()
+        await bucket.acquire()
+        waiter = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0.01)
+        blocked = not waiter.done()
+        now[0] += 0.5
+        await asyncio.wait_for(waiter, timeout=2)
+        return blocked
+
+    assert asyncio.run(scenario()) is True
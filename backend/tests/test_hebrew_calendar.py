@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Tests for the in-process Hebrew calendar, zmanim and their use by the v5 services."""
+import json
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from database.services.mikvah_service_v5 import MikvahServiceV5
+from database.services.synagogue_service_v5 import SynagogueServiceV5
+from utils.hebrew_calendar import HebrewCalendar, HebrewDate, build_days, gematria
+from utils.zmanim import zmanim_for_day
+
+REFERENCE = json.loads((Path(__file__).parent / "fixtures" / "jewish_calendar" / "reference_days.json").read_text())
+NON_FESTIVAL_CATEGORIES = {"roshchodesh", "modern"}
+
+
+def minutes(clock):
+    hours, mins = clock.split(":")
+    return int(hours) * 60 + int(mins)
+
+
+@pytest.fixture(scope="module")
+def reference_days():
+    wanted = [date.fromisoformat(entry["date"]) for entry in REFERENCE["days"]]
+    tables = {israel: build_days(min(wanted), max(wanted), israel) for israel in (False, True)}
+    return [(entry, tables[entry["israel"]][date.fromisoformat(entry["date"])]) for entry in REFERENCE["days"]]
+
+
+def test_hebrew_dates_match_reference(reference_days):
+    for entry, day in reference_days:
+        assert [day.hebrew.year, day.hebrew.month, day.hebrew.day] == entry["hebrew"], entry["date"]
+
+
+def test_parsha_matches_reference(reference_days):
+    for entry, day in reference_days:
+        if "parsha" in entry:
+            assert (day.parsha[0] if day.parsha else None) == entry["parsha"], (entry["date"], entry["israel"])
+
+
+def test_holidays_match_reference(reference_days):
+    for entry, day in reference_days:
+        names = [holiday.name for holiday in day.holidays]
+        for expected in entry["holidays"]:
+            assert any(name == expected or name.startswith((expected + " ", expected + ":")) for name in names), \
+                (entry["date"], entry["israel"], names)
+        if not entry["holidays"]:
+            assert all(h.category in NON_FESTIVAL_CATEGORIES or h.name.startswith("Erev") for h in day.holidays), \
+                (entry["date"], entry["israel"], names)
+
+
+@pytest.mark.parametrize("entry", REFERENCE["zmanim"], ids=lambda e: f"{e['location']}-{e['date']}")
+def test_zmanim_within_two_minutes_of_reference(entry):
+    times = zmanim_for_day(date.fromisoformat(entry["date"]), entry["latitude"], entry["longitude"], entry["timezone"])
+
+    for name in ("sunrise", "sunset", "tzeit_hakochavim"):
+        assert abs(minutes(times[name].strftime("%H:%M")) - minutes(entry[name])) <= 2, name
+
+
+def test_date_conversion_round_trips_and_formats():
+    day = date(2000, 1, 1)
+    while day < date(2040, 1, 1):
+        assert HebrewDate.from_gregorian(day).to_gregorian() == day
+        day += timedelta(days=13)
+
+    assert HebrewDate.from_gregorian(date(2024, 10, 3)) == HebrewDate(5785, 7, 1)
+    assert HebrewDate(5785, 7, 15).hebrew() == "ט״ו תשרי תשפ״ה"
+    assert gematria(1) == "א׳"
+
+
+def test_candle_lighting_and_havdalah_flags():
+    days = build_days(date(2025, 4, 10), date(2025, 9, 25))
+
+    assert days[date(2025, 4, 11)].candle_lighting == "before_sunset"  # Friday
+    assert days[date(2025, 4, 12)].candle_lighting == "after_nightfall"  # Shabbat into Pesach
+    assert not days[date(2025, 4, 12)].havdalah
+    assert days[date(2025, 4, 14)].havdalah  # diaspora second day of Pesach ends
+    assert days[date(2025, 9, 22)].candle_lighting == "before_sunset"  # Erev Rosh Hashana
+    assert days[date(2025, 9, 24)].havdalah and not days[date(2025, 9, 23)].havdalah
+
+
+def test_table_serves_the_window_and_computes_outside_it():
+    calendar = HebrewCalendar(days_behind=2, days_ahead=10)
+
+    today = calendar.day(date.today())
+    table = calendar._tables[False]
+    assert calendar.day(date.today() + timedelta(days=5)) is table[date.today() + timedelta(days=5)]
+    assert calendar._tables[False] is table
+    assert calendar.day(date(1990, 6, 1)).hebrew == HebrewDate(5750, 3, 8)
+    assert today.gregorian == date.today()
+
+
+def test_synagogue_calendar_info_uses_local_zmanim():
+    service = SynagogueServiceV5(repository=Mock(), cache_manager=Mock())
+    synagogue = {"id": 1, "latitude": 25.7617, "longitude": -80.1918}
+    friday = datetime(2025, 3, 21)
+
+    info = service._get_jewish_calendar_info(friday, synagogue)
+    sunset = zmanim_for_day(friday.date(), 25.7617, -80.1918, "America/New_York")["sunset"]
+
+    assert info["parsha"] == {"english": "Vayakhel", "hebrew": "ויקהל"}
+    assert info["candle_lighting"] == (sunset - timedelta(minutes=18)).strftime("%H:%M")
+    assert info["havdalah"] is None
+    service.cache_manager.get.assert_not_called()
+
+
+def test_mikvah_calendar_data_is_computed_locally():
+    feature_flags = Mock()
+    feature_flags.is_enabled.return_value = True
+    service = MikvahServiceV5(Mock(), Mock(), feature_flags)
+
+    info = service.get_jewish_calendar_info(datetime(2025, 3, 14))
+
+    assert info["hebrew_year"] == 5785 and info["hebrew_month"] == "Adar" and info["hebrew_day"] == 14
+    assert "Purim" in info["events"] and info["is_holiday"]
+    service.redis_manager.get.assert_not_called()
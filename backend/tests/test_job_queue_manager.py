@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""Tests for job storage, scheduled-job promotion and orphan reclaiming in the job queue."""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.job_queue_manager import (
+    ExecutionMode,
+    JobPriority,
+    JobQueueManager,
+    JobStatus,
+)
+
+
+@pytest.fixture
+def manager(redis_client):
+    redis_manager = MagicMock()
+    redis_manager.get_client.return_value = redis_client
+    manager = JobQueueManager(redis_manager, promote_batch_size=2, visibility_timeout=30, max_reclaims=2)
+
+    def claim_next_job(keys, args):
+        # What the claim script does, against the in-memory client
+        popped = redis_client.zpopmax(keys[0])
+        if not popped:
+            return None
+        job_id = popped[0][0]
+        redis_client.zadd(keys[1], {job_id.decode(): args[0]})
+        redis_client.hset(args[2] + job_id.decode(), mapping={'status': 'running', 'started_at': args[1]})
+        return job_id
+
+    manager._claim_next_job.side_effect = claim_next_job
+    return manager
+
+
+class TestJobStorage:
+    """Test that jobs round-trip through the per-job hash."""
+
+    def test_enqueued_job_round_trips(self, manager, redis_client):
+        job_id = manager.enqueue_job('export', 1, 'a', priority=JobPriority.HIGH, tags=['x'], fmt='csv')
+
+        job = manager.get_job(job_id.encode())
+
+        assert job.args == [1, 'a']
+        assert job.kwargs == {'fmt': 'csv'}
+        assert job.priority == JobPriority.HIGH
+        assert job.status == JobStatus.PENDING
+        assert redis_client.zsets[manager.pending_queue][job_id] == JobPriority.HIGH.value
+
+    def test_transitions_only_write_state_fields(self, manager, redis_client):
+        job_id = manager.enqueue_job('export')
+        spec = redis_client.hashes[manager._job_key(job_id)]['data']
+
+        manager.update_job_status(job_id, JobStatus.COMPLETED, result={'rows': 3}, progress=100.0)
+
+        job = manager.get_job(job_id)
+        assert redis_client.hashes[manager._job_key(job_id)]['data'] == spec
+        assert job.status == JobStatus.COMPLETED
+        assert job.result == {'rows': 3}
+        assert job.progress == 100.0
+        assert job.completed_at is not None
+
+    def test_progress_refreshes_heartbeat_of_running_job(self, manager, redis_client):
+        job_id = manager.enqueue_job('export')
+        redis_client.zadd(manager.running_queue, {job_id: 0})
+
+        manager.update_job_progress(job_id, 40, 'halfway')
+
+        job = manager.get_job(job_id)
+        assert (job.progress, job.progress_message) == (40.0, 'halfway')
+        assert redis_client.zsets[manager.running_queue][job_id] > 0
+
+
+class TestScheduling:
+    """Test batched promotion and reclaiming via the Lua scripts."""
+
+    def test_promotion_repeats_until_batch_is_short(self, manager):
+        manager._promote_due_jobs.side_effect = [[b'a', b'b'], [b'c']]
+
+        promoted = manager.promote_due_jobs(now=100)
+
+        assert promoted == ['a', 'b', 'c']
+        assert manager._promote_due_jobs.call_count == 2
+        assert manager.stats['total_promoted'] == 3
+
+    def test_promoted_recurring_job_is_rescheduled(self, manager, redis_client):
+        job_id = manager.schedule_recurring_job('digest', '*/5 * * * *')
+        redis_client.zrem(manager.scheduled_queue, job_id)
+        manager._promote_due_jobs.side_effect = [[job_id.encode()]]
+
+        manager.promote_due_jobs()
+
+        assert redis_client.zsets[manager.scheduled_queue][job_id] > time.time()
+
+    def test_reclaim_uses_visibility_timeout_cutoff(self, manager):
+        manager._reclaim_orphaned_jobs.return_value = [[b'stale'], []]
+
+        assert manager.reclaim_orphaned_jobs(now=1000) == ['stale']
+        args = manager._reclaim_orphaned_jobs.call_args.kwargs['args']
+        assert (args[0], args[4]) == (1000 - 30, 2)
+
+    def test_jobs_reclaimed_too_often_are_dead_lettered(self, manager):
+        manager._reclaim_orphaned_jobs.return_value = [[b'stale'], [b'poison']]
+
+        assert manager.reclaim_orphaned_jobs(now=1000) == ['stale']
+        assert manager._reclaim_orphaned_jobs.call_args.kwargs['keys'][2] == manager.dead_letter_queue
+        assert (manager.stats['total_reclaimed'], manager.stats['total_dead_lettered']) == (1, 1)
+
+    def test_scheduler_wait_is_capped(self, manager, redis_client):
+        assert manager._next_scheduler_wait() == manager.scheduler_max_wait
+        redis_client.zadd(manager.scheduled_queue, {'soon': time.time() + 1})
+        assert manager._next_scheduler_wait() <= 1
+
+
+class TestExecution:
+    """Test job execution paths."""
+
+    def test_claim_marks_highest_priority_job_running(self, manager, redis_client):
+        low = manager.enqueue_job('export', priority=JobPriority.LOW)
+        high = manager.enqueue_job('export', priority=JobPriority.HIGH)
+
+        assert manager.claim_next_job() == high
+
+        assert list(redis_client.zsets[manager.pending_queue]) == [low]
+        assert list(redis_client.zsets[manager.running_queue]) == [high]
+        job = manager.get_job(high)
+        assert job.status == JobStatus.RUNNING and job.started_at is not None
+
+    def test_claim_returns_none_when_queue_is_empty(self, manager):
+        assert manager.claim_next_job() is None
+
+    def test_failed_job_is_scheduled_for_retry(self, manager, redis_client):
+        manager.register_job('flaky', MagicMock(side_effect=RuntimeError('boom')))
+        job_id = manager.enqueue_job('flaky')
+
+        manager._execute_job(manager.claim_next_job())
+
+        job = manager.get_job(job_id)
+        assert job.status == JobStatus.RETRYING
+        assert job.retry_count == 1
+        assert job_id in redis_client.zsets[manager.scheduled_queue]
+        assert job_id not in redis_client.zsets[manager.running_queue]
+
+    def test_process_mode_job_runs_in_pool(self, manager, redis_client):
+        pool = MagicMock()
+        pool.submit.return_value.result.return_value = 42
+        manager._process_pool = pool
+        manager.register_job('render', MagicMock(), execution_mode=ExecutionMode.PROCESS)
+        job_id = manager.enqueue_job('render', 7)
+
+        manager._execute_job(manager.claim_next_job())
+
+        pool.submit.assert_called_once()
+        assert manager.get_job(job_id).result == 42
+        assert job_id in redis_client.zsets[manager.completed_queue]
+
+    def test_timed_out_process_job_is_terminated_before_retry(self, manager):
+        manager.process_pool_size = 1
+        manager.register_job('sleep', time.sleep, execution_mode=ExecutionMode.PROCESS)
+        job_id = manager.enqueue_job('sleep', 60, timeout=1)
+        pool = manager._get_process_pool()
+        processes = []
+        terminate_process_pool = manager._terminate_process_pool
+
+        def terminate(timed_out_pool):
+            processes.extend(timed_out_pool._processes.values())
+            terminate_process_pool(timed_out_pool)
+
+        manager._terminate_process_pool = terminate
+        try:
+            manager._execute_job(manager.claim_next_job())
+
+            assert processes
+            for process in processes:
+                process.join(timeout=10)
+            assert not any(process.is_alive() for process in processes)
+            assert manager.get_job(job_id).status == JobStatus.RETRYING
+            assert manager._process_pool is None
+            assert isinstance(manager._get_process_pool(), ProcessPoolExecutor)
+        finally:
+            manager.stop_workers()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+@pytest.fixture
+def live_manager():
+    """A manager running the real Lua scripts against JOB_QUEUE_TEST_REDIS_URL, in its own key namespace."""
+    url = os.getenv("JOB_QUEUE_TEST_REDIS_URL")
+    if not url:
+        pytest.skip("set JOB_QUEUE_TEST_REDIS_URL to a Redis server to run the Lua script tests")
+    redis = pytest.importorskip("redis")
+    client = redis.Redis.from_url(url)
+    try:
+        client.ping()
+    except redis.RedisError as e:
+        pytest.skip(f"Redis at {url} is unavailable: {e}")
+    redis_manager = MagicMock()
+    redis_manager.get_client.return_value = client
+    manager = JobQueueManager(redis_manager, promote_batch_size=2, visibility_timeout=30, max_reclaims=2)
+    namespace = f"test_job_queue:{uuid.uuid4().hex[:8]}"
+    for queue in ('pending', 'running', 'completed', 'failed', 'scheduled', 'dead_letter'):
+        setattr(manager, f"{queue}_queue", f"{namespace}:{queue}")
+    manager.JOB_KEY_PREFIX = f"{namespace}:job:"
+    yield manager
+    client.delete(*client.keys(f"{namespace}:*") or [namespace])
+    client.close()
+
+
+def score(manager, queue, job_id):
+    return manager.redis_client.zscore(queue, job_id)
+
+
+@pytest.mark.integration
+class TestLuaScripts:
+    """Run the claim, promote and reclaim scripts against a real Redis."""
+
+    def test_concurrent_claims_take_each_job_once_in_priority_order(self, live_manager):
+        jobs = {live_manager.enqueue_job('export', priority=priority): priority
+                for priority in (JobPriority.LOW, JobPriority.NORMAL, JobPriority.HIGH, JobPriority.CRITICAL) * 5}
+        claimed = []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            while (job_id := live_manager.claim_next_job()) is not None:
+                claimed.append(job_id)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(claimed) == sorted(jobs)
+        assert live_manager.redis_client.zcard(live_manager.pending_queue) == 0
+        assert live_manager.redis_client.zcard(live_manager.running_queue) == len(jobs)
+        assert all(live_manager.get_job(job_id).status == JobStatus.RUNNING for job_id in jobs)
+
+        high = live_manager.enqueue_job('export', priority=JobPriority.HIGH)
+        live_manager.enqueue_job('export', priority=JobPriority.LOW)
+        assert live_manager.claim_next_job() == high
+
+    def test_promotion_moves_only_due_jobs_with_their_priority(self, live_manager):
+        due = [live_manager.enqueue_job('export', delay=60, priority=JobPriority.HIGH) for _ in range(3)]
+        later = live_manager.enqueue_job('export', delay=3600)
+
+        promoted = live_manager.promote_due_jobs(now=time.time() + 120)
+
+        assert sorted(promoted) == sorted(due)
+        assert live_manager.redis_client.zrange(live_manager.scheduled_queue, 0, -1) == [later.encode()]
+        for job_id in due:
+            assert score(live_manager, live_manager.pending_queue, job_id) == JobPriority.HIGH.value
+            assert live_manager.get_job(job_id).status == JobStatus.PENDING
+
+    def test_orphans_are_requeued_then_dead_lettered(self, live_manager):
+        job_id = live_manager.enqueue_job('export', priority=JobPriority.HIGH)
+        fresh = live_manager.enqueue_job('export')
+        now = time.time()
+
+        for attempt in range(live_manager.max_reclaims):
+            assert live_manager.claim_next_job() == job_id
+            live_manager.redis_client.zadd(live_manager.running_queue, {job_id: now - 60})
+            assert live_manager.reclaim_orphaned_jobs(now=now) == [job_id]
+            assert score(live_manager, live_manager.pending_queue, job_id) == JobPriority.HIGH.value
+            assert live_manager.get_job(job_id).status == JobStatus.PENDING
+
+        assert live_manager.claim_next_job() == job_id
+        assert live_manager.claim_next_job() == fresh  # heartbeat still current
+        live_manager.redis_client.zadd(live_manager.running_queue, {job_id: now - 60})
+
+        assert live_manager.reclaim_orphaned_jobs(now=now) == []
+        assert score(live_manager, live_manager.dead_letter_queue, job_id) is not None
+        assert score(live_manager, live_manager.running_queue, fresh) is not None
+        job = live_manager.get_job(job_id)
+        assert job.status == JobStatus.FAILED and 'dead letter' in job.error
+        assert live_manager.stats['total_dead_lettered'] == 1
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Tests for the bounded bcrypt process pool and rehash-on-login."""
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+
+import bcrypt
+import pytest
+
+from services.auth.password_pool import (
+    PasswordHashPool, PasswordPoolSaturated, bcrypt_cost, needs_rehash,
+)
+from utils.postgres_auth import PasswordSecurity, PostgresAuthManager
+
+
+class PendingExecutor:
+    """Executor whose jobs never finish."""
+
+    def submit(self, fn, *args):
+        return Future()
+
+
+def test_hash_and_verify_run_on_worker_process():
+    pool = PasswordHashPool(workers=1)
+    try:
+        password_hash = pool.hash_password("Correct-Horse-9", rounds=4)
+        assert bcrypt_cost(password_hash) == 4
+        assert pool.verify_password("Correct-Horse-9", password_hash)
+        assert not pool.verify_password("wrong", password_hash)
+    finally:
+        pool.shutdown()
+
+
+def test_zero_workers_hash_inline():
+    pool = PasswordHashPool(workers=0)
+    assert pool.verify_password("pw", pool.hash_password("pw", rounds=4))
+    assert pool._executor is None
+
+
+def test_full_queue_fails_fast_with_retry_after(monkeypatch):
+    pool = PasswordHashPool(workers=1, max_pending=2, retry_after=3)
+    slots = threading.BoundedSemaphore(2)
+    monkeypatch.setattr(pool, "_get_executor", lambda: (PendingExecutor(), slots))
+    slots.acquire()
+    slots.acquire()
+
+    with pytest.raises(PasswordPoolSaturated) as excinfo:
+        pool.verify_password("pw", "$2b$04$" + "a" * 53)
+
+    response = excinfo.value.get_response()
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+
+
+def test_slow_job_times_out_and_keeps_its_slot(monkeypatch):
+    pool = PasswordHashPool(workers=1, max_pending=1, timeout=0.01)
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(pool, "_get_executor", lambda: (PendingExecutor(), slots))
+
+    with pytest.raises(PasswordPoolSaturated):
+        pool.hash_password("pw", rounds=4)
+    assert not slots.acquire(blocking=False)
+
+
+@pytest.mark.parametrize("password_hash,expected", [
+    ("$2b$08$" + "a" * 53, True),
+    ("$2b$10$" + "a" * 53, True),
+    ("$2b$12$" + "a" * 53, False),
+    ("$2b$13$" + "a" * 53, False),
+    ("not-a-bcrypt-hash", False),
+])
+def test_needs_rehash_only_below_the_configured_cost(password_hash, expected):
+    assert needs_rehash(password_hash, 12) is expected
+
+
+def test_raising_the_cost_rehashes_and_lowering_it_does_not(monkeypatch):
+    monkeypatch.setenv("FLASK_ENV", "production")
+    monkeypatch.setenv("BCRYPT_ROUNDS", "12")
+    assert PasswordSecurity.needs_rehash("$2b$10$" + "a" * 53)
+
+    monkeypatch.setenv("BCRYPT_ROUNDS", "8")
+    assert not PasswordSecurity.needs_rehash("$2b$10$" + "a" * 53)
+
+
+@pytest.mark.parametrize("flask_env", ["production", "development"])
+def test_hash_at_the_configured_cost_is_never_rehashed(monkeypatch, flask_env):
+    monkeypatch.setenv("BCRYPT_ROUNDS", "12")
+    monkeypatch.setenv("FLASK_ENV", flask_env)
+
+    assert not PasswordSecurity.needs_rehash("$2b$12$" + "a" * 53)
+    assert not PasswordSecurity.needs_rehash(f"$2b${PasswordSecurity.bcrypt_rounds():02d}$" + "a" * 53)
+
+
+@pytest.fixture
+def login(monkeypatch):
+    """Authenticate against one stored user; returns (authenticate, session)."""
+    monkeypatch.setenv("JWT_SECRET_KEY", "test-secret")
+    monkeypatch.setenv("PASSWORD_POOL_WORKERS", "0")
+    monkeypatch.setenv("BCRYPT_ROUNDS", "6")
+    monkeypatch.setenv("FLASK_ENV", "production")
+    monkeypatch.setattr("services.auth.password_pool._pool", None)
+    session = MagicMock()
+
+    @contextmanager
+    def session_scope():
+        yield session
+
+    manager = PostgresAuthManager(MagicMock(session_scope=session_scope))
+    monkeypatch.setattr(manager, "_log_auth_event", lambda *args, **kwargs: None)
+
+    def authenticate(password, stored_hash):
+        session.execute.return_value.fetchone.return_value = MagicMock(_mapping={
+            "id": "u1", "name": "U", "email": "u@example.com", "password_hash": stored_hash,
+            "email_verified": True, "failed_login_attempts": 0, "locked_until": None,
+            "last_login": None, "roles": [],
+        })
+        return manager.authenticate_user("u@example.com", password)
+
+    return authenticate, session
+
+
+@pytest.mark.parametrize("password", ["Correct-Horse-9", "short"])
+def test_login_upgrades_outdated_hash_after_the_login_update(login, password):
+    authenticate, session = login
+    old_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=4)).decode()
+
+    assert authenticate(password, old_hash)["user_id"] == "u1"
+
+    login_update, upgrade = [call.args for call in session.execute.call_args_list[-2:]]
+    assert "last_login = NOW()" in str(login_update[0]) and "password_hash" not in str(login_update[0])
+    assert "password_hash = :old_hash" in str(upgrade[0]) and upgrade[1]["old_hash"] == old_hash
+    assert bcrypt_cost(upgrade[1]["new_hash"]) == 6
+    assert PasswordSecurity.verify_password(password, upgrade[1]["new_hash"])
+
+
+def test_login_keeps_a_current_hash(login):
+    authenticate, session = login
+    current_hash = bcrypt.hashpw(b"Correct-Horse-9", bcrypt.gensalt(rounds=6)).decode()
+
+    assert authenticate("Correct-Horse-9", current_hash)["user_id"] == "u1"
+    assert not any("new_hash" in str(call.args) for call in session.execute.call_args_list)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Tests for server-side prepared statements of repository query shapes."""
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine, func
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query, Session, declarative_base
+
+from database.prepared_statements import PreparedStatementCache, to_numbered_placeholders
+
+Base = declarative_base()
+PG = postgresql.psycopg2.dialect()
+
+
+class Item(Base):
+    __tablename__ = "items"
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    status = Column(String)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.connection = SimpleNamespace(info={})
+        self.driver_sql = []
+
+    def begin_nested(self):
+        return nullcontext()
+
+    def exec_driver_sql(self, sql):
+        self.driver_sql.append(sql)
+
+
+class FakeSession:
+    def __init__(self, connection):
+        self._connection = connection
+        self.executed = []
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=PG)
+
+    def connection(self):
+        return self._connection
+
+    def execute(self, statement):
+        self.executed.append(statement.compile(dialect=PG))
+        return SimpleNamespace(scalar=lambda: 7)
+
+
+def count_active(status, name):
+    return Query(func.count(Item.id)).filter(Item.status == status, Item.name.ilike(name))
+
+
+def test_placeholders_are_numbered_once_per_name_and_percent_is_unescaped():
+    sql, names = to_numbered_placeholders(
+        "SELECT * FROM t WHERE a = %(a_1)s AND b LIKE 'x%%' AND c = %(a_1)s LIMIT %(param_1)s"
+    )
+
+    assert sql == "SELECT * FROM t WHERE a = $1 AND b LIKE 'x%' AND c = $1 LIMIT $2"
+    assert names == ("a_1", "param_1")
+
+
+def test_statements_differing_only_in_values_share_one_shape():
+    cache = PreparedStatementCache(enabled=True)
+
+    first, _ = cache.shape_for(count_active("active", "%a%").statement, PG)
+    second, key = cache.shape_for(count_active("closed", "%b%").statement, PG)
+
+    assert first is second
+    assert "$1" in first.sql and "$2" in first.sql
+    assert cache.stats["compiles"] == 1 and cache.stats["hits"] == 1
+    assert first.compiled.construct_params(extracted_parameters=key.bindparams) == {
+        "status_1": "closed", "name_1": "%b%",
+    }
+
+
+def test_expanding_in_lists_are_not_prepared():
+    cache = PreparedStatementCache(enabled=True)
+
+    shape, _ = cache.shape_for(Query(Item).filter(Item.id.in_([1, 2])).statement, PG)
+
+    assert shape is None
+
+
+def test_shapes_are_prepared_once_per_connection_then_executed():
+    cache = PreparedStatementCache(enabled=True)
+    connection = FakeConnection()
+    session = FakeSession(connection)
+
+    assert cache.scalar(session, count_active("active", "%a%")) == 7
+    assert cache.scalar(session, count_active("closed", "%b%")) == 7
+
+    assert len(connection.driver_sql) == 1
+    assert connection.driver_sql[0].startswith("PREPARE jg_")
+    executed = session.executed[-1]
+    assert executed.string.startswith("EXECUTE jg_")
+    assert executed.params == {"p0": "closed", "p1": "%b%"}
+
+    reconnected = FakeConnection()
+    cache.scalar(FakeSession(reconnected), count_active("active", "%a%"))
+    assert len(reconnected.driver_sql) == 1
+
+
+def test_full_connections_fall_back_to_the_orm_path():
+    cache = PreparedStatementCache(enabled=True, max_per_connection=1)
+    connection = FakeConnection()
+    connection.connection.info["prepared_statements"] = {"jg_other"}
+    query = count_active("active", "%a%")
+    query.scalar = lambda: 3
+
+    assert cache.scalar(FakeSession(connection), query) == 3
+    assert connection.driver_sql == []
+    assert cache.stats["fallbacks"] == 1
+
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([Item(name="a", status="active"), Item(name="b", status="closed")])
+        session.commit()
+        yield session
+
+
+def test_other_databases_run_the_query_unchanged(sqlite_session):
+    cache = PreparedStatementCache(enabled=True)
+    query = sqlite_session.query(Item).filter(Item.status == "active")
+
+    assert [item.name for item in cache.all(sqlite_session, query)] == ["a"]
+    assert cache.first(sqlite_session, query).name == "a"
+    assert cache.stats == {"hits": 0, "compiles": 0, "prepares": 0, "fallbacks": 0}
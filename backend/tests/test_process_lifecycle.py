@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Tests for post-fork pool resets, prewarming and idle liveness checks."""
+from unittest.mock import Mock
+
+import pytest
+from redis.connection import ConnectionPool
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import QueuePool
+
+from cache.redis_manager_v5 import RedisManagerV5
+from database.unified_connection_manager import UnifiedConnectionManager
+from utils.process_lifecycle import after_fork, install_idle_liveness_check, register_fork_resource
+
+
+class RecordingResource:
+    def __init__(self, calls, fail=False):
+        self.calls, self.fail = calls, fail
+
+    def reset_after_fork(self):
+        self.calls.append(("reset", self))
+        if self.fail:
+            raise RuntimeError("boom")
+
+    def prewarm(self, target):
+        self.calls.append(("prewarm", target))
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=2)
+    statements = []
+
+    @event.listens_for(engine, "connect")
+    def trace(dbapi_connection, connection_record):
+        dbapi_connection.set_trace_callback(statements.append)
+
+    engine.statements = statements
+    yield engine
+    engine.dispose()
+
+
+def test_after_fork_resets_every_resource_then_prewarms():
+    calls = []
+    broken, healthy = RecordingResource(calls, fail=True), RecordingResource(calls)
+    register_fork_resource(broken)
+    register_fork_resource(healthy)
+
+    after_fork(prewarm_target=3)
+
+    assert ("reset", broken) in calls and ("reset", healthy) in calls
+    assert calls.count(("prewarm", 3)) == 2
+    assert max(i for i, call in enumerate(calls) if call[0] == "reset") < calls.index(("prewarm", 3))
+
+
+def test_connection_manager_drops_inherited_connections_without_closing(tmp_path):
+    manager = UnifiedConnectionManager(f"sqlite:///{tmp_path / 'app.db'}")
+    assert manager.connect()
+    with manager.engine.connect() as conn:
+        inherited = conn.connection.dbapi_connection
+    old_pool = manager.engine.pool
+
+    manager.reset_after_fork()
+
+    assert manager.engine.pool is not old_pool
+    assert manager.engine.pool.checkedin() == 0
+    inherited.execute("SELECT 1")  # still open: the parent keeps using it
+    with manager.session_scope() as session:
+        assert session.execute(text("SELECT 2")).scalar() == 2
+
+    manager.prewarm(2)
+    assert manager.engine.pool.checkedin() == 2
+    manager.disconnect()
+
+
+def test_redis_manager_resets_pool_without_touching_parent_sockets():
+    manager = RedisManagerV5.__new__(RedisManagerV5)
+    pool = ConnectionPool()
+    inherited = Mock()
+    pool._available_connections.append(inherited)
+    manager.redis_client = Mock(connection_pool=pool)
+
+    manager.reset_after_fork()
+
+    assert pool._available_connections == []
+    inherited.disconnect.assert_not_called()
+
+
+def test_recently_used_connections_skip_the_ping(sqlite_engine):
+    install_idle_liveness_check(sqlite_engine, idle_seconds=3600)
+    for _ in range(3):
+        with sqlite_engine.connect() as conn:
+            conn.execute(text("SELECT 2"))
+
+    assert "SELECT 1" not in sqlite_engine.statements
+
+
+def test_idle_connections_are_pinged_and_replaced_when_dead(sqlite_engine):
+    install_idle_liveness_check(sqlite_engine, idle_seconds=0)
+    with sqlite_engine.connect() as conn:
+        conn.connection.dbapi_connection.close()  # dies while pooled
+
+    with sqlite_engine.connect() as conn:
+        assert conn.execute(text("SELECT 2")).scalar() == 2
+    with sqlite_engine.connect() as conn:
+        conn.execute(text("SELECT 3"))
+
+    assert "SELECT 1" in sqlite_engine.statements
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Tests for cross-worker Prometheus aggregation and the /metrics endpoint."""
+import os
+import subprocess
+import sys
+
+import pytest
+from flask import Flask
+from prometheus_client.parser import text_string_to_metric_families
+
+import monitoring.prometheus_exposition as exposition
+from routes.v5.metrics_v5 import prometheus_bp
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter with PROMETHEUS_MULTIPROC_DIR set, like a gunicorn worker
+WORKER_SCRIPT = """
+import sys
+from monitoring.prometheus_exposition import observe_request
+requests, status = int(sys.argv[1]), int(sys.argv[2])
+for _ in range(requests):
+    observe_request("GET", "api_v5.restaurants_list", status, 0.02)
+"""
+
+
+def _samples(text):
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(text)
+        for sample in family.samples
+    }
+
+
+def test_worker_processes_are_aggregated(tmp_path):
+    exposition.prepare_multiprocess_dir(str(tmp_path))
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    workers = [
+        subprocess.Popen([sys.executable, "-c", WORKER_SCRIPT, str(count), str(status)], cwd=BACKEND_DIR, env=env)
+        for count, status in ((40, 200), (25, 200), (10, 500))
+    ]
+    assert [worker.wait(timeout=60) for worker in workers] == [0, 0, 0]
+
+    samples = _samples(exposition.collect_metrics(str(tmp_path)).decode())
+
+    endpoint = ("endpoint", "api_v5.restaurants_list")
+    assert samples[("jewgo_http_requests_total", (endpoint, ("method", "GET"), ("status", "200")))] == 65
+    assert samples[("jewgo_http_requests_total", (endpoint, ("method", "GET"), ("status", "500")))] == 10
+    duration = (endpoint, ("method", "GET"))
+    assert samples[("jewgo_http_request_duration_seconds_count", duration)] == 75
+    assert samples[("jewgo_http_request_duration_seconds_bucket", tuple(sorted(duration + (("le", "0.025"),))))] == 75
+    assert samples[("jewgo_http_request_duration_seconds_sum", duration)] == pytest.approx(1.5)
+
+
+def test_prepare_removes_stale_samples(tmp_path):
+    (tmp_path / "counter_123.db").write_bytes(b"stale")
+
+    exposition.prepare_multiprocess_dir(str(tmp_path))
+
+    assert list(tmp_path.iterdir()) == []
+
+
+class TestMetricsEndpoint:
+    """Test the /metrics route and its render cache."""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setattr(exposition, "_rendered", (float("-inf"), b""))
+        app = Flask(__name__)
+        app.register_blueprint(prometheus_bp)
+        return app.test_client()
+
+    def test_serves_text_format_and_caches_render(self, client, monkeypatch):
+        calls = []
+        monkeypatch.setattr(exposition, "collect_metrics", lambda: calls.append(1) or b"up 1.0\n")
+        monkeypatch.delenv("METRICS_SCRAPE_TOKEN", raising=False)
+
+        first, second = client.get("/metrics"), client.get("/metrics")
+
+        assert first.status_code == 200
+        assert first.content_type.startswith("text/plain; version=0.0.4")
+        assert second.data == b"up 1.0\n"
+        assert len(calls) == 1
+
+    def test_scrape_token_is_enforced_when_configured(self, client, monkeypatch):
+        monkeypatch.setenv("METRICS_SCRAPE_TOKEN", "s3cret")
+
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
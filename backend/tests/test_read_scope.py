@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Tests for UnifiedConnectionManager.read_scope and its use by the entity repository."""
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+
+from database.repositories.entity_repository_v5 import EntityRepositoryV5
+from database.unified_connection_manager import UnifiedConnectionManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = UnifiedConnectionManager(f"sqlite:///{tmp_path / 'read.db'}")
+    assert manager.connect()
+    with manager.session_scope() as session:
+        session.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        session.execute(text("INSERT INTO items (name) VALUES ('kept')"))
+    yield manager
+    manager.disconnect()
+
+
+def count_items(manager):
+    with manager.session_scope() as session:
+        return session.execute(text("SELECT COUNT(*) FROM items")).scalar()
+
+
+def test_read_scope_never_commits(manager):
+    with manager.read_scope() as session:
+        assert session.execute(text("SELECT name FROM items")).scalar() == "kept"
+        session.execute(text("INSERT INTO items (name) VALUES ('discarded')"))
+
+    assert count_items(manager) == 1
+
+
+def test_read_scope_records_pool_wait_separately(manager):
+    with manager.read_scope() as session:
+        session.execute(text("SELECT 1"))
+
+    stats = manager.metrics.get_stats()
+    assert len(manager.metrics.pool_wait_times) == 1
+    assert stats["average_pool_wait"] >= 0
+    assert stats["total_queries"] >= 1
+
+
+def test_read_scope_inside_session_scope_reuses_the_transaction(manager):
+    with manager.session_scope() as outer:
+        outer.execute(text("INSERT INTO items (name) VALUES ('written')"))
+        with manager.read_scope() as inner:
+            assert inner is outer
+            assert inner.execute(text("SELECT COUNT(*) FROM items")).scalar() == 2
+        outer.execute(text("INSERT INTO items (name) VALUES ('after')"))
+
+    assert count_items(manager) == 3
+
+
+def test_execute_query_can_run_read_only(manager):
+    assert manager.execute_query("SELECT name FROM items", fetch_mode="one", read_only=True) == {"name": "kept"}
+
+
+def test_read_only_settings_apply_transaction_local_timeouts(manager, monkeypatch):
+    monkeypatch.setenv("PG_STATEMENT_TIMEOUT", "15000")
+    monkeypatch.setenv("PG_IDLE_TX_TIMEOUT", "30000")
+
+    assert manager._read_only_settings() == (
+        "SET LOCAL statement_timeout = 15000; SET LOCAL idle_in_transaction_session_timeout = 30000"
+    )
+    assert "statement_timeout = 500;" in manager._read_only_settings(statement_timeout_ms=500)
+
+
+def test_repository_reads_prefer_read_scope():
+    calls = []
+
+    @contextmanager
+    def scope(kind):
+        calls.append(kind)
+        yield None
+
+    repo = EntityRepositoryV5.__new__(EntityRepositoryV5)
+    repo.connection_manager = SimpleNamespace(read_scope=lambda: scope("read"), session_scope=lambda: scope("write"))
+    with repo._read_scope():
+        pass
+    repo.connection_manager = SimpleNamespace(session_scope=lambda: scope("write"))
+    with repo._read_scope():
+        pass
+
+    assert calls == ["read", "write"]
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Tests for primary/replica routing in EnhancedConnectionPool."""
+import os
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from database.enhanced_connection_pool import ConnectionHealth, EnhancedConnectionPool, _primary_pinned_until
+
+
+def mark(pool, engine_id, healthy=True, lag=0.0):
+    pool.health_checker.health_status[engine_id] = ConnectionHealth(
+        connection_id=engine_id, is_healthy=healthy, last_check=datetime.now(),
+        response_time_ms=1.0, replication_lag_seconds=lag,
+    )
+
+
+def database_name(session):
+    return session.execute(text("SELECT name FROM whoami")).scalar()
+
+
+@pytest.fixture
+def pool(tmp_path):
+    urls = []
+    for name in ("primary", "replica_a", "replica_b"):
+        url = f"sqlite:///{tmp_path / name}.db"
+        urls.append(url)
+    pool = EnhancedConnectionPool(urls, pool_size=3, max_overflow=0, health_check_interval=0,
+                                  max_replica_lag_seconds=2.0, read_your_writes_seconds=0.2)
+    for engine, name in zip(pool.engines, ("primary", "replica_a", "replica_b")):
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE whoami (name TEXT)"))
+            conn.execute(text("INSERT INTO whoami VALUES (:name)"), {"name": name})
+    mark(pool, "engine_1")
+    mark(pool, "engine_2")
+    token = _primary_pinned_until.set(0.0)
+    yield pool
+    _primary_pinned_until.reset(token)
+    pool.close()
+
+
+def test_writes_always_go_to_the_primary(pool):
+    for _ in range(3):
+        with pool.session_scope() as session:
+            assert database_name(session) == "primary"
+
+
+def test_reads_go_to_the_replica_with_fewest_checked_out_connections(pool):
+    busy = pool.engines[1].connect()
+    try:
+        for _ in range(5):
+            with pool.read_scope() as session:
+                assert database_name(session) == "replica_b"
+    finally:
+        busy.close()
+
+
+def test_lagging_or_unhealthy_replicas_are_skipped(pool):
+    mark(pool, "engine_1", lag=3.0)
+    with pool.read_scope() as session:
+        assert database_name(session) == "replica_b"
+
+    mark(pool, "engine_2", healthy=False)
+    with pool.read_scope() as session:
+        assert database_name(session) == "primary"
+
+
+def test_reads_after_a_write_stay_on_the_primary_for_a_while(pool):
+    with pool.session_scope() as session:
+        session.execute(text("INSERT INTO whoami VALUES ('extra')"))
+
+    with pool.read_scope() as session:
+        assert database_name(session) == "primary"
+    time.sleep(0.25)
+    with pool.read_scope() as session:
+        assert database_name(session) != "primary"
+
+
+def test_unchecked_replicas_are_not_trusted(pool):
+    pool.health_checker.health_status.clear()
+
+    with pool.read_scope() as session:
+        assert database_name(session) == "primary"
+
+
+def test_an_old_lag_sample_counts_its_age_as_lag(pool):
+    mark(pool, "engine_1", lag=0.5)
+    mark(pool, "engine_2", lag=0.5)
+    pool.health_checker.health_status["engine_1"].lag_sampled_at = time.monotonic() - 1.8
+    pool.health_checker.health_status["engine_2"].lag_sampled_at = time.monotonic()
+
+    with pool.read_scope() as session:
+        assert database_name(session) == "replica_b"
+
+
+def test_replica_lag_is_sampled_more_often_than_the_lag_limit(pool):
+    checker = pool.health_checker
+    assert checker.lag_check_interval <= checker.max_replica_lag_seconds / 2
+
+    checker.check_interval, checker.lag_check_interval = 30, 0.05
+    checked = []
+    checker._check_engine_health = lambda engine_id, engine: checked.append(engine_id)
+    checker.start(pool.engines)
+    time.sleep(0.3)
+    checker.stop()
+
+    assert checked.count("engine_0") == 1
+    assert checked.count("engine_1") >= 3
+    assert checked.count("engine_2") >= 3
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(not os.getenv("REPLICA_TEST_REPLICA_URL"),
+                    reason="needs database/replication/docker-compose.yml running")
+def test_routing_against_a_streaming_replica():
+    pool = EnhancedConnectionPool(
+        [os.environ["REPLICA_TEST_PRIMARY_URL"], os.environ["REPLICA_TEST_REPLICA_URL"]],
+        pool_size=2, max_overflow=0, health_check_interval=0,
+        max_replica_lag_seconds=1.0, read_your_writes_seconds=0.5,
+    )
+    primary, replica = pool.engines
+    is_replica = text("SELECT pg_is_in_recovery()")
+    try:
+        with pool.session_scope() as session:
+            session.execute(text("CREATE TABLE IF NOT EXISTS routing_probe (id serial PRIMARY KEY)"))
+            session.execute(text("INSERT INTO routing_probe DEFAULT VALUES"))
+        with pool.read_scope() as session:
+            assert session.execute(is_replica).scalar() is False  # read-your-writes
+
+        time.sleep(0.6)
+        pool.health_checker._check_engine_health("engine_1", replica)
+        with pool.read_scope() as session:
+            assert session.execute(is_replica).scalar() is True
+
+        with replica.connect() as conn:
+            conn.execute(text("SELECT pg_wal_replay_pause()"))
+        try:
+            with pool.session_scope() as session:
+                session.execute(text("INSERT INTO routing_probe DEFAULT VALUES"))
+            time.sleep(1.5)
+            pool.health_checker._check_engine_health("engine_1", replica)
+            assert pool.health_checker.get_health_status("engine_1").replication_lag_seconds > 1.0
+            with pool.read_scope() as session:
+                assert session.execute(is_replica).scalar() is False
+        finally:
+            with replica.connect() as conn:
+                conn.execute(text("SELECT pg_wal_replay_resume()"))
+    finally:
+        pool.close()
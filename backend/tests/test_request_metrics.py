@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Tests for fixed-memory request histograms and their use by the v5 observability middleware."""
+import random
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+import monitoring.request_metrics as request_metrics
+from middleware.observability_v5 import ObservabilityV5Middleware, get_observability_stats_v5
+from monitoring.request_metrics import OVERFLOW_ROUTE, LatencyHistogram, RequestMetrics
+
+
+class TestLatencyHistogram:
+    """Test bucket accuracy and merging."""
+
+    def test_percentiles_are_within_bucket_error(self):
+        rng = random.Random(3)
+        samples = [rng.lognormvariate(3, 1.2) for _ in range(20000)]
+        histogram = LatencyHistogram()
+        for value in samples:
+            histogram.record(value)
+
+        ordered = sorted(samples)
+        for percent in (50, 90, 99):
+            exact = ordered[int(len(ordered) * percent / 100) - 1]
+            assert histogram.percentile(percent) == pytest.approx(exact, rel=0.03)
+        assert histogram.count == len(samples)
+        assert histogram.max == max(samples)
+        assert histogram.mean == pytest.approx(sum(samples) / len(samples))
+
+    def test_out_of_range_values_are_clamped(self):
+        histogram = LatencyHistogram()
+        histogram.record(0.0)
+        histogram.record(10 ** 9)
+
+        assert histogram.counts[0] == 1
+        assert histogram.counts[LatencyHistogram.BUCKETS - 1] == 1
+        assert histogram.percentile(100) <= 10 ** 9
+
+    def test_merge_adds_counts(self):
+        first, second = LatencyHistogram(), LatencyHistogram()
+        first.record(5)
+        second.record(500)
+
+        first.merge(second)
+
+        assert (first.count, first.max, first.percentile(100)) == (2, 500, pytest.approx(500, rel=0.03))
+
+
+class TestRequestMetrics:
+    """Test per-thread shards, merge-on-read and bounded series."""
+
+    def test_threads_record_into_separate_shards_merged_on_read(self):
+        metrics = RequestMetrics()
+        barrier = threading.Barrier(4)
+
+        def worker():
+            barrier.wait()
+            for i in range(1000):
+                metrics.record("GET_restaurants", 500 if i % 10 == 0 else 200, 20.0)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        snapshot = metrics.snapshot()
+        route = snapshot["routes"]["GET_restaurants"]
+        assert snapshot["request_count"] == 4000
+        assert route["status_codes"] == {"200": 3600, "500": 400}
+        assert route["error_rate_percent"] == pytest.approx(10.0)
+        # The exited threads' shards were folded into one retired set
+        assert metrics._shards == {} and len(metrics._retired) == 2
+
+    def test_series_are_capped_per_shard(self):
+        metrics = RequestMetrics(max_series_per_shard=3)
+        for i in range(10):
+            metrics.record(f"GET_route_{i}", 200, 1.0)
+
+        merged = metrics.merged()
+
+        assert len(merged) == 4
+        assert merged[(OVERFLOW_ROUTE, 200)].count == 7
+
+    def test_greenlets_share_their_os_thread_shard(self):
+        script = (
+            "from gevent import monkey; monkey.patch_all()\n"
+            "import gevent\n"
+            "from monitoring.request_metrics import RequestMetrics\n"
+            "metrics = RequestMetrics()\n"
+            "gevent.joinall([gevent.spawn(metrics.record, 'GET_ping', 200, 1.0) for _ in range(1000)])\n"
+            "assert len(metrics._shards) == 1, len(metrics._shards)\n"
+            "assert metrics.snapshot()['request_count'] == 1000\n"
+        )
+        backend_dir = Path(__file__).parent.parent
+        result = subprocess.run([sys.executable, "-c", script], cwd=backend_dir, capture_output=True, text=True)
+
+        assert result.returncode == 0, result.stderr
+
+
+@pytest.fixture
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(request_metrics, "_request_metrics", RequestMetrics())
+    return request_metrics.get_request_metrics()
+
+
+def test_middleware_records_each_request_once(fresh_registry):
+    app = Flask(__name__)
+    ObservabilityV5Middleware(app)
+
+    @app.route("/api/v5/ping")
+    def ping():
+        # A blueprint-level hook records the same request again
+        ObservabilityV5Middleware().record_request_metrics(None, app.response_class(status=200))
+        return "pong"
+
+    @app.route("/api/v5/missing")
+    def missing():
+        return "nope", 404
+
+    client = app.test_client()
+    for _ in range(3):
+        client.get("/api/v5/ping")
+    client.get("/api/v5/missing")
+
+    stats = get_observability_stats_v5()
+    assert stats["total_requests"] == 4
+    assert stats["error_rate_percent"] == 25.0
+    assert stats["endpoint_stats"]["GET_ping"]["request_count"] == 3
+    assert stats["p95_response_time_ms"] >= 0
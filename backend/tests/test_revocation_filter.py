@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Tests for the in-process session revocation filter."""
+import queue
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from unittest.mock import Mock
+
+import pytest
+
+from services.auth import revocation_filter as revocation_filter_module
+from services.auth import sessions
+from services.auth.revocation_filter import BloomFilter, RevocationFilter
+from services.auth.session_family_manager import SessionFamilyManager
+from services.auth_service_v5 import AuthServiceV5
+
+Row = namedtuple("Row", "family_id current_jti reused_jti_of family_revoked", defaults=(True,))
+
+
+class FakeRedis:
+    """Just enough pub/sub for the filter: every pubsub sees every publish."""
+
+    def __init__(self):
+        self.subscribers = []
+        self.fail = False
+
+    def get_client(self):
+        return self
+
+    def publish(self, channel, data):
+        for subscriber in self.subscribers:
+            subscriber.put({"type": "message", "channel": channel, "data": data})
+
+    def pubsub(self, ignore_subscribe_messages=True):
+        redis = self
+        inbox = queue.Queue()
+
+        class PubSub:
+            def subscribe(self, channel):
+                redis.subscribers.append(inbox)
+
+            def get_message(self, timeout=0.0):
+                if redis.fail:
+                    raise ConnectionError("redis went away")
+                try:
+                    return inbox.get(timeout=min(timeout, 0.05))
+                except queue.Empty:
+                    return None
+
+            def close(self):
+                redis.subscribers.remove(inbox)
+
+        return PubSub()
+
+
+class FakeConnectionManager:
+    def __init__(self, rows):
+        self.rows = rows
+
+    @contextmanager
+    def session_scope(self):
+        session = Mock()
+        session.execute.return_value.fetchall.return_value = list(self.rows)
+        yield session
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def running_filter(redis):
+    revocation_filter = RevocationFilter(redis, FakeConnectionManager([Row("fam-old", "jti-old", None),
+                                                                       Row("fam-live", "jti-rotated", None, False)]),
+                                         rebuild_interval=60, capacity=1000)
+    revocation_filter.start()
+    assert wait_until(lambda: revocation_filter.ready)
+    yield revocation_filter
+    revocation_filter.stop()
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=5000, error_rate=0.001)
+    for i in range(5000):
+        bloom.add(f"f:revoked-{i}")
+
+    assert all(f"f:revoked-{i}" in bloom for i in range(5000))
+    assert sum(f"f:active-{i}" in bloom for i in range(20000)) < 100
+
+
+def test_unready_filter_sends_everything_to_full_check(redis):
+    revocation_filter = RevocationFilter(redis, FakeConnectionManager([]), rebuild_interval=60)
+    revocation_filter.start = lambda: None
+
+    assert revocation_filter.might_be_revoked(family_id="anything")
+
+
+def test_rebuilt_filter_answers_negatives_in_memory(running_filter):
+    assert running_filter.might_be_revoked(family_id="fam-old")
+    assert running_filter.might_be_revoked(jti="jti-old")
+    assert not running_filter.might_be_revoked(family_id="fam-new", jti="jti-new")
+
+
+def test_rotated_out_rows_do_not_mark_their_live_family(running_filter):
+    assert running_filter.might_be_revoked(jti="jti-rotated")
+    assert not running_filter.might_be_revoked(family_id="fam-live")
+
+
+def test_revocations_reach_other_processes_via_pubsub(redis, running_filter):
+    other_process = RevocationFilter(redis, FakeConnectionManager([]), rebuild_interval=60)
+    other_process.publish(family_ids=["fam-new"])
+
+    assert wait_until(lambda: running_filter.might_be_revoked(family_id="fam-new"))
+
+
+def test_lost_subscription_falls_back_to_full_check(redis, running_filter):
+    redis.fail = True
+
+    assert wait_until(lambda: not running_filter.ready)
+    assert running_filter.might_be_revoked(family_id="fam-new")
+
+
+def test_session_manager_skips_redis_for_definite_negatives(running_filter):
+    redis_manager = Mock()
+    redis_manager.get.return_value = "revoked"
+    manager = SessionFamilyManager(redis_manager=redis_manager, connection_manager=Mock(),
+                                   revocation_filter=running_filter)
+
+    assert manager.is_family_revoked("fam-new") is False
+    assert manager.is_jti_revoked("jti-new", family_id="fam-new") is False
+    redis_manager.get.assert_not_called()
+
+    assert manager.is_family_revoked("fam-old") is True
+    redis_manager.get.assert_called_once()
+
+
+def test_revoking_a_family_publishes_it(running_filter):
+    connection_manager = FakeConnectionManager([])
+    manager = SessionFamilyManager(redis_manager=Mock(), connection_manager=connection_manager,
+                                   revocation_filter=running_filter)
+
+    assert manager.revoke_family("fam-logout")
+    assert running_filter.might_be_revoked(family_id="fam-logout")
+
+
+@pytest.fixture
+def installed_filter(running_filter, monkeypatch):
+    monkeypatch.setattr(revocation_filter_module, "_revocation_filter", running_filter)
+    return running_filter
+
+
+def test_session_logout_publishes_the_family(installed_filter):
+    sessions.revoke_family(FakeConnectionManager([]), fid="fam-signed-out")
+
+    assert installed_filter.might_be_revoked(family_id="fam-signed-out")
+
+
+def test_revoking_sessions_publishes_every_revoked_token(installed_filter):
+    service = AuthServiceV5(redis_manager=Mock(), connection_manager=FakeConnectionManager(
+        [Row("fam-laptop", "jti-laptop", None), Row("fam-phone", "jti-phone", None)]), feature_flags=Mock())
+
+    assert service.revoke_all_sessions("user-1") == 2
+    assert installed_filter.might_be_revoked(family_id="fam-laptop")
+    assert installed_filter.might_be_revoked(jti="jti-phone")
+    assert not installed_filter.might_be_revoked(family_id="fam-other")
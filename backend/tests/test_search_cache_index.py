@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Tests for targeted search cache invalidation."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from cache.search_cache_index import SearchCacheIndex
+from workers.cache_invalidation_worker import CacheInvalidationWorker
+
+
+@pytest.fixture
+def index(redis_client):
+    return SearchCacheIndex(redis_client)
+
+
+def cache_entry(redis_client, index, key, entity_refs, location=None, entity_types=('restaurants',)):
+    redis_client.set(key, 'cached')
+    index.record(key, entity_types, entity_refs, location=location, ttl=300)
+
+
+class TestSearchCacheIndex:
+    """Test entity/geo indexing of search cache entries."""
+
+    def test_entity_change_only_removes_entries_containing_entity(self, redis_client, index):
+        miami = {'latitude': 25.76, 'longitude': -80.19, 'radius': 10}
+        cache_entry(redis_client, index, 'search_v5:search:a', [('restaurants', 1)], miami)
+        cache_entry(redis_client, index, 'search_v5:search:b', [('restaurants', 2)], miami)
+
+        deleted = index.invalidate([{'entity_type': 'restaurant', 'entity_id': 1}])
+
+        assert deleted == 1
+        assert 'search_v5:search:a' not in redis_client.strings
+        assert 'search_v5:search:b' in redis_client.strings
+
+    def test_entity_change_removes_entries_covering_its_location(self, redis_client, index):
+        miami = {'latitude': 25.76, 'longitude': -80.19, 'radius': 10}
+        new_york = {'latitude': 40.71, 'longitude': -74.0, 'radius': 10}
+        cache_entry(redis_client, index, 'search_v5:search:miami', [], miami)
+        cache_entry(redis_client, index, 'search_v5:search:nyc', [], new_york)
+
+        index.invalidate([{
+            'entity_type': 'restaurant',
+            'entity_id': 99,
+            'latitude': 25.77,
+            'longitude': -80.2
+        }])
+
+        assert 'search_v5:search:miami' not in redis_client.strings
+        assert 'search_v5:search:nyc' in redis_client.strings
+
+    def test_unbounded_search_invalidated_by_any_change_of_its_type(self, redis_client, index):
+        cache_entry(redis_client, index, 'search_v5:search:all', [], None)
+        cache_entry(redis_client, index, 'search_v5:search:shuls', [], None, entity_types=('synagogues',))
+
+        index.invalidate([{'entity_type': 'restaurant', 'entity_id': 5}])
+
+        assert 'search_v5:search:all' not in redis_client.strings
+        assert 'search_v5:search:shuls' in redis_client.strings
+
+    def test_large_radius_is_indexed_as_unbounded(self, index):
+        assert index.cells_for_radius(25.76, -80.19, 5000) is None
+        assert index.cells_for_radius(25.76, -80.19, 10) == [index.cell_for(25.76, -80.19)]
+
+    def test_no_redis_is_noop(self):
+        index = SearchCacheIndex(None)
+        assert index.record('k', ['restaurants'], [('restaurants', 1)]) is False
+        assert index.invalidate([{'entity_type': 'restaurant', 'entity_id': 1}]) == 0
+
+
+class TestCacheInvalidationWorkerBatching:
+    """Test notification coalescing in the cache invalidation worker."""
+
+    @pytest.fixture
+    def worker(self, redis_client, index):
+        return CacheInvalidationWorker(
+            'postgresql://localhost/test',
+            redis_client=redis_client,
+            debounce_seconds=60,
+            search_index=index
+        )
+
+    @staticmethod
+    def notify(worker, entity_id, latitude=None, longitude=None):
+        payload = '{"id": %d%s}' % (
+            entity_id,
+            f', "latitude": {latitude}, "longitude": {longitude}' if latitude is not None else ''
+        )
+        worker._process_notification(SimpleNamespace(channel='restaurant_change', payload=payload))
+
+    def test_burst_is_flushed_as_one_batch(self, worker, redis_client, index):
+        cache_entry(redis_client, index, 'search_v5:search:a', [('restaurants', 1)])
+        cache_entry(redis_client, index, 'search_v5:search:b', [('synagogues', 2)], entity_types=('synagogues',))
+
+        for entity_id in range(1, 21):
+            self.notify(worker, entity_id, 25.76, -80.19)
+
+        # Nothing is applied until the debounce window closes
+        assert 'search_v5:search:a' in redis_client.strings
+        assert worker.get_stats()['pending_notifications'] == 20
+
+        worker._flush_pending()
+
+        assert 'search_v5:search:a' not in redis_client.strings
+        assert 'search_v5:search:b' in redis_client.strings
+        assert worker.stats['batches_flushed'] == 1
+        # Each pattern is scanned once for the whole burst
+        assert len(redis_client.scan_calls) == len(set(redis_client.scan_calls))
+        assert not any(call.startswith('search') for call in redis_client.scan_calls)
+
+    def test_zero_debounce_flushes_immediately(self, redis_client, index):
+        worker = CacheInvalidationWorker(
+            'postgresql://localhost/test',
+            redis_client=redis_client,
+            debounce_seconds=0,
+            search_index=index
+        )
+        cache_entry(redis_client, index, 'search_v5:search:a', [('restaurants', 7)])
+
+        self.notify(worker, 7)
+
+        assert 'search_v5:search:a' not in redis_client.strings
+        assert worker.get_stats()['pending_notifications'] == 0
+
+    def test_patterns_are_not_mutated_across_notifications(self, worker):
+        before = list(worker.CACHE_KEY_PATTERNS['restaurant'])
+        worker._get_cache_patterns('restaurant', {'id': 1})
+        assert worker.CACHE_KEY_PATTERNS['restaurant'] == before
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Tests for shtetl marketplace listings: keyset cursors, radius filter, cached schema and count."""
+import base64
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+import services.shtetl_marketplace_service as shtetl
+from services.shtetl_marketplace_service import ShtetlMarketplaceService
+
+COLUMNS = ["id", "title", "latitude", "longitude", "geog"]
+
+
+def listing_row(listing_id, created_at):
+    return SimpleNamespace(_mapping={
+        "id": listing_id, "title": f"Item {listing_id}", "images": '["a.jpg"]',
+        "is_gemach": False, "community_verified": True, "rabbi_endorsed": False,
+        "kosher_verified": False, "is_featured": False, "created_at": created_at,
+    })
+
+
+class FakeSession:
+    def __init__(self, columns, rows, total=42):
+        self.columns = columns
+        self.rows = rows
+        self.total = total
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append((sql, params or {}))
+        if "information_schema" in sql:
+            return SimpleNamespace(fetchall=lambda: [(column,) for column in self.columns])
+        if "COUNT(*)" in sql:
+            return SimpleNamespace(scalar=lambda: self.total)
+        return SimpleNamespace(fetchall=lambda: self.rows[: params["limit"]])
+
+    def queries(self, marker):
+        return [(sql, params) for sql, params in self.statements if marker in sql]
+
+
+@pytest.fixture(autouse=True)
+def clear_schema_cache():
+    shtetl._schema_cache.update(columns=None, expires_at=0.0)
+    yield
+    shtetl._schema_cache.update(columns=None, expires_at=0.0)
+
+
+def make_service(columns=COLUMNS, rows=(), cache_manager=None):
+    session = FakeSession(columns, list(rows))
+
+    @contextmanager
+    def session_context():
+        yield session
+
+    db_manager = SimpleNamespace(connection_manager=SimpleNamespace(get_session_context=session_context))
+    return ShtetlMarketplaceService(db_manager=db_manager, cache_manager=cache_manager), session
+
+
+def test_pages_walk_the_listing_order_with_keyset_cursors():
+    now = datetime(2025, 5, 1, tzinfo=timezone.utc)
+    rows = [listing_row(10 - i, now - timedelta(hours=i)) for i in range(3)]
+    service, session = make_service(rows=rows)
+
+    first = service.get_listings(limit=2, include_total=False)
+
+    assert [item["id"] for item in first["data"]["listings"]] == [10, 9]
+    assert first["data"]["listings"][0]["images"] == ["a.jpg"]
+    assert first["data"]["total"] is None and first["data"]["next_cursor"]
+    sql, params = session.queries("ORDER BY")[-1]
+    assert "s.is_gemach DESC" in sql and sql.rstrip().endswith("LIMIT :limit OFFSET :offset")
+    assert params["limit"] == 3
+
+    service.get_listings(limit=2, offset=40, cursor=first["data"]["next_cursor"], include_total=False)
+
+    sql, params = session.queries("ORDER BY")[-1]
+    assert "(s.is_gemach, s.community_verified, s.rabbi_endorsed, s.kosher_verified, " \
+           "s.is_featured, s.created_at, s.id) < (" in sql
+    assert params["after_id"] == 9 and params["after_created_at"] == now - timedelta(hours=1)
+    assert params["after_community_verified"] is True and params["offset"] == 0
+
+
+def test_last_page_has_no_cursor_and_foreign_cursors_are_rejected():
+    service, _ = make_service(rows=[listing_row(1, datetime(2025, 1, 1))])
+
+    result = service.get_listings(limit=5, include_total=False)
+    assert result["data"]["next_cursor"] is None
+
+    tampered = service.get_listings(cursor="bm90LWEtY3Vyc29y", include_total=False)
+    other_status = service._encode_listing_cursor(result["data"]["listings"][0], "sold")
+    assert not tampered["success"]
+    assert not service.get_listings(cursor=other_status, include_total=False)["success"]
+
+
+def test_cursor_decodes_when_its_signature_contains_the_separator():
+    service, _ = make_service()
+    for listing_id in range(1000):
+        listing = dict(listing_row(listing_id, datetime(2025, 1, 1))._mapping)
+        cursor = service._encode_listing_cursor(listing, "active")
+        if b"|" in base64.urlsafe_b64decode(cursor)[-32:]:
+            break
+
+    assert service._decode_listing_cursor(cursor, "active")[-1] == listing_id
+
+
+def test_radius_filters_on_stored_geography_in_miles():
+    service, session = make_service()
+
+    service.get_listings(lat=25.76, lng=-80.19, radius=5, include_total=False)
+
+    sql, params = session.queries("ORDER BY")[-1]
+    assert "ST_DWithin(s.geog, ST_SetSRID(ST_MakePoint(:lng, :lat), 4326)::geography, :radius * 1609.344)" in sql
+    assert "AS distance_miles" in sql
+    assert (params["lat"], params["lng"], params["radius"]) == (25.76, -80.19, 5.0)
+
+
+def test_radius_falls_back_to_bounding_box_without_geog_column():
+    service, session = make_service(columns=["id", "latitude", "longitude"])
+
+    service.get_listings(lat=40.0, lng=-74.0, radius=69, include_total=False)
+
+    sql, params = session.queries("ORDER BY")[-1]
+    assert "ST_DWithin" not in sql and "acos" in sql
+    assert params["min_lat"] == pytest.approx(39.0) and params["max_lat"] == pytest.approx(41.0)
+    assert params["max_lng"] - params["min_lng"] > 2.0
+
+
+def test_schema_check_is_cached_across_service_instances():
+    service, session = make_service()
+    service.get_listings(include_total=False)
+    service.get_listings(include_total=False)
+    other, other_session = make_service()
+    other.get_listings(include_total=False)
+
+    assert len(session.queries("information_schema")) == 1
+    assert other_session.queries("information_schema") == []
+
+
+def test_missing_table_returns_empty_listings():
+    service, session = make_service(columns=[])
+
+    result = service.get_listings()
+
+    assert result["success"] and result["data"]["listings"] == [] and result["data"]["total"] == 0
+    assert session.queries("ORDER BY") == []
+
+
+def test_count_uses_the_shared_where_clause_and_is_cached():
+    cache = Mock()
+    cache.get.side_effect = [None, 42]
+    service, session = make_service(cache_manager=cache)
+
+    assert service.get_listings(search="menorah", city="Miami")["data"]["total"] == 42
+    assert service.get_listings(search="menorah", city="Miami")["data"]["total"] == 42
+
+    counts = session.queries("COUNT(*)")
+    assert len(counts) == 1
+    sql, params = counts[0]
+    assert "s.title ILIKE :search1" in sql and "s.city ILIKE :city" in sql
+    assert "ORDER BY" not in sql and "limit" not in params
+    key, value = cache.set.call_args.args
+    assert key.startswith("shtetl:listings:count:") and value == 42
+    assert cache.set.call_args.kwargs == {"ttl": shtetl.COUNT_CACHE_TTL_SECONDS}
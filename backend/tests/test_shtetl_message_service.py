@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Tests for ShtetlMessageService analytics, unread counters, keyset pages and cache generations."""
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import pytest
+
+from services.shtetl_message_service import MessageData, ShtetlMessageService
+from utils.cursor_v5 import create_cursor_v5
+
+
+class DictCache:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def set(self, key, value, ttl=None):
+        self.values[key] = value
+        return True
+
+    def delete_pattern(self, pattern):
+        raise AssertionError("message caches are invalidated by generation, not by pattern")
+
+
+class FakeDB:
+    def __init__(self, responses=None):
+        self.responses = responses or {}
+        self.queries = []
+
+    def execute_query(self, query, params=None, fetch_one=False, fetch_all=False):
+        self.queries.append((" ".join(query.split()), params))
+        for marker, response in self.responses.items():
+            if marker in query:
+                if isinstance(response, Exception):
+                    raise response
+                return response
+        return [] if fetch_all else None
+
+
+def make_service(responses=None):
+    db = FakeDB(responses)
+    return ShtetlMessageService(db, DictCache(), Mock()), db
+
+
+def message(message_id, created_at):
+    return {"id": message_id, "created_at": created_at, "message_text": "hi"}
+
+
+def test_store_analytics_run_as_one_filtered_aggregate():
+    row = {
+        "total_messages": 12, "messages_today": 2, "messages_this_week": 5, "messages_this_month": 9,
+        "unread_messages": 4, "kosher_messages": 3, "urgent_messages": 1, "customer_messages": 8,
+        "store_owner_messages": 3, "admin_messages": 1, "replied_customer_messages": 6,
+        "average_response_time_hours": 2.456,
+    }
+    service, db = make_service({"FROM shtetl_messages": row})
+
+    analytics = service.get_store_analytics("store-1", datetime(2025, 1, 1), datetime(2025, 2, 1))
+
+    assert len(db.queries) == 1
+    sql, params = db.queries[0]
+    assert "COUNT(*) FILTER (WHERE message_status = 'sent')" in sql and "GROUP BY" not in sql
+    assert params == ("store-1", datetime(2025, 1, 1), datetime(2025, 2, 1))
+    assert (analytics.total_messages, analytics.unread_messages, analytics.customer_messages) == (12, 4, 8)
+    assert analytics.messages_today == 2 and analytics.average_response_time_hours == 2.46
+    assert analytics.response_rate_percentage == 75.0
+
+
+def test_unread_counts_read_the_maintained_counters():
+    service, db = make_service({"shtetl_message_counters": {"unread_count": 7}})
+
+    assert service.get_unread_count("user-1") == 7
+    assert service.get_store_unread_count("store-1") == 7
+    assert [params for _, params in db.queries] == [("recipient", "user-1"), ("store", "store-1")]
+
+    empty, _ = make_service()
+    assert empty.get_unread_count("user-2") == 0
+
+
+def test_unread_count_falls_back_to_counting_without_counter_table():
+    service, db = make_service({
+        "shtetl_message_counters": RuntimeError("relation does not exist"),
+        "COUNT(*)": {"unread_count": 3},
+    })
+
+    assert service.get_unread_count("user-1") == 3
+    assert "recipient_user_id = %s AND message_status = 'sent'" in db.queries[-1][0]
+
+
+def test_user_messages_page_with_keyset_cursor():
+    now = datetime(2025, 6, 1, 12, 0)
+    page = [message(20, now), message(19, now - timedelta(minutes=1))]
+    service, db = make_service({"FROM shtetl_messages": page})
+
+    first = service.get_user_messages("user-1", limit=2)
+    cursor = service.next_cursor(first, 2)
+    service.get_user_messages("user-1", limit=2, offset=10, cursor=cursor)
+
+    first_sql, first_params = db.queries[0]
+    assert first_sql.endswith("ORDER BY created_at DESC, id DESC LIMIT %s OFFSET %s")
+    assert first_params == ("user-1", 2, 0)
+    sql, params = db.queries[1]
+    assert "AND (created_at, id) < (%s, %s)" in sql
+    assert params == ("user-1", now - timedelta(minutes=1), 19, 2, 0)
+    assert service.next_cursor(first[:1], 2) is None
+
+
+def test_cursor_from_another_entity_is_rejected():
+    service, db = make_service()
+    foreign = create_cursor_v5(
+        primary_value=datetime(2025, 1, 1), record_id=1, entity_type="restaurants", data_version="1"
+    )
+
+    assert service.get_store_messages("store-1", cursor=foreign) == []
+    assert db.queries == []
+
+
+def test_lists_are_cached_until_a_new_message_or_read_bumps_the_generation():
+    service, db = make_service({"FROM shtetl_messages": [message(1, datetime(2025, 1, 1))]})
+
+    service.get_user_messages("user-1")
+    service.get_user_messages("user-1")
+    assert len(db.queries) == 1
+
+    service.create_message(MessageData(
+        message_id="", store_id="store-1", store_name="Store", sender_user_id="user-2",
+        sender_name="B", sender_email="b@x", sender_type="customer", recipient_user_id="user-1",
+        recipient_name="A", recipient_email="a@x", recipient_type="store_owner", message_text="Hello",
+    ))
+    service.get_user_messages("user-1")
+    assert len([q for q in db.queries if q[0].startswith("SELECT * FROM shtetl_messages")]) == 2
+
+    db.responses = {"RETURNING": {"store_id": "store-1", "sender_user_id": "user-2",
+                                  "recipient_user_id": "user-1", "thread_id": "t-1"},
+                    **db.responses}
+    before = service._cache_generation("user", "user-1")
+    assert service.mark_message_read("m-1", "user-1")
+    assert service._cache_generation("user", "user-1") != before
+    assert service._cache_generation("user", "someone-else") == service._cache_generation("user", "someone-else")
+
+
+@pytest.mark.parametrize("method,args", [("mark_message_replied", ("m-1",)), ("archive_message", ("m-1", "user-1"))])
+def test_status_changes_only_invalidate_the_affected_store(method, args):
+    service, _ = make_service({"RETURNING": {"store_id": "store-1", "sender_user_id": "u2",
+                                             "recipient_user_id": "u1", "thread_id": "t"}})
+    store_1 = service._cache_generation("store", "store-1")
+    store_2 = service._cache_generation("store", "store-2")
+
+    assert getattr(service, method)(*args)
+
+    assert service._cache_generation("store", "store-1") != store_1
+    assert service._cache_generation("store", "store-2") == store_2
+
+
+def test_search_ranks_and_limits_in_sql_and_highlights_only_the_page():
+    hits = [{"id": 8, "rank": 0.5, "search_vector": "'chees':3", "message_text": "Is the cheese chalav yisrael?"},
+            {"id": 3, "rank": 0.25, "search_vector": "'chees':1", "message_text": "Cheese platter"}]
+    service, db = make_service({"websearch_to_tsquery": hits})
+
+    results = service.search_messages("store-1", "cheese", limit=2)
+
+    sql, params = db.queries[0]
+    assert "ILIKE" not in sql
+    page, outer = sql.split("SELECT m.*")
+    assert "m.store_id = %s AND m.search_vector @@ websearch_to_tsquery('english', %s)" in page
+    assert "ORDER BY rank DESC, m.id DESC LIMIT %s OFFSET %s" in page and "ts_headline" not in page
+    assert outer.count("ts_headline") == 2 and "JOIN shtetl_messages m ON m.id = page.id" in outer
+    assert params[:5] == ("cheese", "store-1", "cheese", 2, 0)
+    assert [r["id"] for r in results] == [8, 3] and "search_vector" not in results[0]
+
+
+def test_search_headlines_escape_message_text():
+    hits = [{"id": 8, "rank": 0.5, "subject_headline": "\x02Cheese\x03 <b>sale</b>",
+             "message_headline": "<img src=x onerror=alert(1)> \x02cheese\x03 & wine", "message_text": "..."}]
+    service, db = make_service({"websearch_to_tsquery": hits})
+
+    [result] = service.search_messages("store-1", "cheese")
+
+    sql, params = db.queries[0]
+    assert "StartSel=<mark>" not in params[-1] and "translate(m.message_text, chr(2) || chr(3), '')" in sql
+    assert result["subject_headline"] == "<mark>Cheese</mark> &lt;b&gt;sale&lt;/b&gt;"
+    assert result["message_headline"] == "&lt;img src=x onerror=alert(1)&gt; <mark>cheese</mark> &amp; wine"
+
+
+def test_search_pages_with_a_relevance_cursor():
+    service, db = make_service({"websearch_to_tsquery": [{"id": 8, "rank": 0.5}, {"id": 3, "rank": 0.25}]})
+
+    cursor = service.next_search_cursor(service.search_messages("store-1", "cheese", limit=2), 2)
+    service.search_messages("store-1", "cheese", limit=2, offset=40, cursor=cursor)
+
+    sql, params = db.queries[1]
+    assert "AND (ts_rank_cd(m.search_vector, websearch_to_tsquery('english', %s), 1), m.id) < (%s::real, %s)" in sql
+    assert params[:7] == ("cheese", "store-1", "cheese", "cheese", 0.25, 3, 2) and params[7] == 0
+    assert service.next_search_cursor([{"id": 1, "rank": 0.1}], 2) is None
+
+
+def test_blank_search_and_list_cursors_do_not_query():
+    service, db = make_service()
+    list_cursor = service.next_cursor([message(4, datetime(2025, 1, 1))], 1)
+
+    assert service.search_messages("store-1", "   ") == []
+    assert service.search_messages("store-1", "cheese", cursor=list_cursor) == []
+    assert db.queries == []
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Tests for specials listing cache buckets, batched media and claim reservations."""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from werkzeug.exceptions import Conflict
+
+import services.specials_service as specials_service
+from services.specials_claim_counter import (
+    RESERVED,
+    SUBJECT_LIMIT_REACHED,
+    TOTAL_LIMIT_REACHED,
+    SpecialClaimCounter,
+)
+
+
+def make_special(**overrides):
+    now = datetime.now(timezone.utc)
+    values = dict(
+        id=uuid4(),
+        restaurant_id=1,
+        title='Deal',
+        subtitle=None,
+        description=None,
+        discount_type='percentage',
+        discount_value=10,
+        discount_label='10% off',
+        valid_from=now - timedelta(hours=1),
+        valid_until=now + timedelta(hours=1),
+        max_claims_total=None,
+        max_claims_per_user=1,
+        per_visit=False,
+        is_active=True,
+        requires_code=False,
+        code_hint=None,
+        terms=None,
+        hero_image_url=None,
+        created_at=now,
+        updated_at=None,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_now_windows_in_same_bucket_share_cache_key():
+    base = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    first = base + timedelta(seconds=5)
+    second = base + timedelta(seconds=specials_service.SPECIALS_CACHE_BUCKET_SECONDS - 1)
+    next_bucket = base + timedelta(seconds=specials_service.SPECIALS_CACHE_BUCKET_SECONDS)
+
+    key_first = specials_service._cache_key_for_formatted(1, first, first, 50, 0)
+    key_second = specials_service._cache_key_for_formatted(1, second, second, 50, 0)
+    key_next = specials_service._cache_key_for_formatted(1, next_bucket, next_bucket, 50, 0)
+
+    assert key_first == key_second
+    assert key_first != key_next
+    assert key_first.startswith('restaurant:1:')
+
+
+def test_entry_ttl_stops_at_next_special_boundary():
+    now = datetime.now(timezone.utc)
+    with patch.object(specials_service, '_next_special_boundary', return_value=now + timedelta(seconds=3)):
+        ttl = specials_service._entry_ttl(MagicMock(), now, now)
+    assert 1 <= ttl <= 3
+
+
+def test_fixed_window_uses_default_ttl():
+    now = datetime.now(timezone.utc)
+    ttl = specials_service._entry_ttl(MagicMock(), now, now + timedelta(days=1))
+    assert ttl == specials_service.SPECIALS_CACHE_TTL
+
+
+def test_format_specials_loads_media_in_one_query():
+    specials = [make_special() for _ in range(5)]
+    media = SimpleNamespace(
+        id=uuid4(), special_id=specials[2].id, kind='image', url='u', alt_text=None, position=0
+    )
+    session = MagicMock()
+    session.query.return_value.filter.return_value.order_by.return_value.all.return_value = [media]
+
+    formatted = specials_service.format_specials(session, specials, None)
+
+    assert session.query.call_count == 1
+    assert [len(item['media_items']) for item in formatted] == [0, 0, 1, 0, 0]
+
+
+class TestClaimReservation:
+    """Test claim creation against the Redis claim counter."""
+
+    @pytest.fixture
+    def counter(self):
+        counter = MagicMock(spec=SpecialClaimCounter)
+        counter.available = True
+        counter.subject_key.return_value = ('subject', 1)
+        counter.ttl_for.return_value = 60
+        with patch.object(specials_service, 'get_special_claim_counter', return_value=counter):
+            yield counter
+
+    @pytest.fixture
+    def session(self):
+        session = MagicMock()
+        session.__enter__.return_value = session
+        with patch.object(specials_service, '_db_session', return_value=session):
+            yield session
+
+    @pytest.mark.parametrize('result', [TOTAL_LIMIT_REACHED, SUBJECT_LIMIT_REACHED])
+    def test_limit_reached_raises_conflict_without_writing(self, counter, session, result):
+        counter.try_reserve.return_value = result
+
+        with pytest.raises(Conflict):
+            specials_service.create_claim(make_special(max_claims_total=1), 'user', None, None, None)
+
+        session.add.assert_not_called()
+        counter.release.assert_not_called()
+
+    def test_failed_insert_releases_reservation(self, counter, session):
+        counter.try_reserve.return_value = RESERVED
+        session.flush.side_effect = RuntimeError('db down')
+        special = make_special()
+
+        with pytest.raises(RuntimeError):
+            specials_service.create_claim(special, 'user', None, None, None)
+
+        counter.release.assert_called_once_with(special, 'user', None)
+
+    def test_successful_claim_keeps_reservation(self, counter, session):
+        counter.try_reserve.return_value = RESERVED
+
+        claim, redeem_code = specials_service.create_claim(make_special(), 'user', None, None, None)
+
+        assert redeem_code is None
+        session.commit.assert_called_once()
+        counter.release.assert_not_called()
+
+
+class TestClaimReconciliation:
+    """Test reconciling Redis claim counters against committed claim rows."""
+
+    @pytest.fixture
+    def special(self):
+        return make_special()
+
+    @pytest.fixture
+    def counter(self, special):
+        counter = MagicMock(spec=SpecialClaimCounter)
+        counter.available = True
+        counter.pop_dirty.return_value = [str(special.id)]
+        counter.total_key.return_value = 'total'
+        counter.user_key.return_value = 'user'
+        counter.ttl_for.return_value = 60
+        counter.read.return_value = {'total': 3, 'user': 3}
+        counter.compare_and_set.return_value = 2
+        counter.is_dirty.return_value = False
+        with patch.object(specials_service, 'get_special_claim_counter', return_value=counter):
+            yield counter
+
+    @pytest.fixture
+    def session(self, special):
+        session = MagicMock()
+        session.__enter__.return_value = session
+        query = session.query.return_value.filter.return_value
+        query.all.return_value = [special]
+        today = datetime.now(timezone.utc).date()
+        query.group_by.return_value.all.side_effect = [
+            [(special.id, 2)],
+            [(special.id, 'user-1', None, today, 2)],
+        ]
+        with patch.object(specials_service, '_db_session', return_value=session):
+            yield session
+
+    def test_settled_special_is_corrected_from_claim_rows(self, counter, session):
+        assert specials_service.reconcile_claim_counters() == 2
+
+        counter.compare_and_set.assert_called_once_with({'total': 3, 'user': 3}, {'total': 2, 'user': 2}, ttl=60)
+
+    def test_special_reserved_again_is_left_for_a_later_run(self, counter, session):
+        # The new reservation's claim row may not be committed yet, so lowering
+        # the counter to the committed count would let the special oversell
+        counter.is_dirty.return_value = True
+
+        assert specials_service.reconcile_claim_counters() == 0
+
+        counter.compare_and_set.assert_not_called()
+
+
+def test_pop_dirty_only_takes_specials_past_the_settle_window():
+    redis_client = MagicMock()
+    pop_settled = MagicMock(return_value=[b'a', 'b'])
+    redis_client.register_script.side_effect = lambda script: (
+        pop_settled if 'ZRANGEBYSCORE' in script else MagicMock()
+    )
+    counter = SpecialClaimCounter(redis_client)
+
+    with patch('services.specials_claim_counter.time.time', return_value=1000.0):
+        assert counter.pop_dirty(10) == ['a', 'b']
+
+    pop_settled.assert_called_once_with(
+        keys=[SpecialClaimCounter.DIRTY_SET_KEY],
+        args=[1000.0 - SpecialClaimCounter.RESERVATION_SETTLE_SECONDS, 10],
+    )
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Tests for the per-request SQL profiler: fingerprints, N+1 detection and query budgets."""
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+from middleware.sql_profiler import SQLProfilerMiddleware, fingerprint, profile_queries
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO items (id, name) VALUES (1, 'a'), (2, 'b'), (3, 'c'), (4, 'd'), (5, 'e')"))
+    yield engine
+    engine.dispose()
+
+
+def select_each_row(engine):
+    with engine.connect() as conn:
+        ids = [row[0] for row in conn.execute(text("SELECT id FROM items"))]
+        for item_id in ids:
+            conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": item_id}).scalar()
+
+
+class TestFingerprint:
+    """Test statement normalization."""
+
+    def test_literals_and_parameters_collapse(self):
+        assert fingerprint("SELECT * FROM r WHERE id = 12 AND name = 'O''Hara'") == \
+            fingerprint("SELECT * FROM r WHERE id = %(id_1)s AND name = %(name_1)s") == \
+            "SELECT * FROM r WHERE id = ? AND name = ?"
+
+    def test_in_lists_and_values_rows_collapse(self):
+        assert fingerprint("SELECT 1 FROM r WHERE id IN (1, 2, 3)") == "SELECT ? FROM r WHERE id IN (?)"
+        assert fingerprint("INSERT INTO r (a, b) VALUES (%s, %s), (%s, %s)") == "INSERT INTO r (a, b) VALUES (?, ?)"
+
+    def test_casts_and_identifiers_are_kept(self):
+        assert fingerprint("SELECT data::jsonb, col2 FROM t1") == "SELECT data::jsonb, col2 FROM t1"
+
+
+def test_per_row_queries_are_flagged_as_n_plus_one(engine):
+    with profile_queries(n_plus_one_threshold=5) as profile:
+        select_each_row(engine)
+
+    assert profile.count == 6
+    assert profile.total_ms > 0
+    [(fp, count, _)] = profile.repeated()
+    assert (fp, count) == ("SELECT name FROM items WHERE id = ?", 5)
+    assert profile.summary()["distinct_statements"] == 2
+
+
+def test_nested_profiles_both_record_and_outside_is_ignored(engine):
+    with profile_queries() as outer:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        with profile_queries() as inner:
+            select_each_row(engine)
+    select_each_row(engine)
+
+    assert (outer.count, inner.count) == (7, 6)
+
+
+def test_query_budget_fixture(engine, query_budget):
+    with query_budget(max_queries=6):
+        select_each_row(engine)
+    with pytest.raises(AssertionError, match="6 queries"):
+        with query_budget(max_queries=5):
+            select_each_row(engine)
+    with pytest.raises(AssertionError, match="5x"):
+        with query_budget(max_queries=10, max_repeats=1):
+            select_each_row(engine)
+
+
+def test_middleware_adds_server_timing_and_logs_n_plus_one(engine, monkeypatch):
+    monkeypatch.setenv("SQL_PROFILER_ENABLED", "true")
+    monkeypatch.setenv("SQL_PROFILER_SERVER_TIMING", "true")
+    app = Flask(__name__)
+
+    @app.route("/items")
+    def items():
+        select_each_row(engine)
+        return "ok"
+
+    middleware = SQLProfilerMiddleware(app)
+    warnings = []
+    monkeypatch.setattr("middleware.sql_profiler.logger.warning", lambda msg, **kw: warnings.append(kw))
+
+    response = app.test_client().get("/items")
+
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert response.headers["Server-Timing"].endswith('desc="6 queries"')
+    assert middleware.enabled and warnings[0]["executions"] == 5
+
+
+def test_middleware_is_off_outside_debug(monkeypatch):
+    monkeypatch.delenv("SQL_PROFILER_ENABLED", raising=False)
+    app = Flask(__name__)
+    app.route("/")(lambda: "ok")
+
+    assert not SQLProfilerMiddleware(app).enabled
+    assert "Server-Timing" not in app.test_client().get("/").headers
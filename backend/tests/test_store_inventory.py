@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""Tests for StoreServiceV5 inventory: pricing, all-or-nothing reservation and per-product caching."""
+import os
+import random
+import threading
+import uuid
+from contextlib import contextmanager
+from decimal import Decimal
+from unittest.mock import Mock
+
+import pytest
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.orm import sessionmaker
+
+from database.models import Store, StoreProduct
+from database.services.store_service_v5 import StoreServiceV5
+
+
+class SessionConnections:
+    """The session_scope/read_scope pair StoreServiceV5 uses, over one engine."""
+
+    def __init__(self, engine):
+        self.Session = sessionmaker(bind=engine)
+
+    @contextmanager
+    def session_scope(self):
+        session = self.Session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    read_scope = session_scope
+
+
+class DictRedis:
+    def __init__(self):
+        self.values = {}
+        self.deleted = []
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None, prefix='cache'):
+        return self.values.get((prefix, key), default)
+
+    def set(self, key, value, ttl=None, prefix='cache'):
+        self.values[(prefix, key)] = value
+        return True
+
+    def mget(self, keys, prefix='cache'):
+        return {key: self.values[(prefix, key)] for key in keys if (prefix, key) in self.values}
+
+    def mset(self, mapping, ttl=None, prefix='cache'):
+        for key, value in mapping.items():
+            self.values[(prefix, key)] = value
+        return True
+
+    def delete(self, key, prefix='cache'):
+        with self.lock:
+            self.deleted.append(key)
+        return self.values.pop((prefix, key), None) is not None
+
+
+def make_service(engine):
+    repository = Mock()
+    repository.connection_manager = SessionConnections(engine)
+    feature_flags = Mock()
+    feature_flags.is_enabled.return_value = False
+    return StoreServiceV5(repository, DictRedis(), feature_flags)
+
+
+def add_store(engine, store_id, products):
+    """Insert a store and its products as (id, price, stock, category) tuples."""
+    with SessionConnections(engine).session_scope() as session:
+        session.add(Store(id=store_id, name=f"Store {store_id}", address="1 Main St", city="Miami",
+                          state="FL", zip_code="33101"))
+        session.flush()
+        for product_id, price, stock, category in products:
+            session.add(StoreProduct(id=product_id, store_id=store_id, sku=f"sku-{product_id}",
+                                     name=f"Product {product_id}", category=category,
+                                     price=Decimal(price), stock_quantity=stock))
+
+
+def stock(engine):
+    with engine.connect() as conn:
+        return dict(conn.execute(select(StoreProduct.id, StoreProduct.stock_quantity)).all())
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'inventory.db'}")
+
+    # pysqlite only opens transactions before statements starting with
+    # INSERT/UPDATE/DELETE, so a WITH ... UPDATE would autocommit; begin explicitly
+    @event.listens_for(engine, "connect")
+    def disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    Store.__table__.create(engine)
+    StoreProduct.__table__.create(engine)
+    add_store(engine, 1, [(10, "4.50", 5, "bakery"), (11, "12.00", 2, "meat"), (12, "3.25", 40, "bakery")])
+    add_store(engine, 2, [(20, "9.99", 7, "judaica")])
+    yield engine
+    engine.dispose()
+
+
+def test_order_total_prices_all_products_in_one_query(engine):
+    service = make_service(engine)
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    total = service.calculate_order_total(1, [
+        {'product_id': 10, 'quantity': 2}, {'product_id': 11, 'quantity': 1}, {'product_id': 10, 'quantity': 1},
+    ])
+
+    assert len([s for s in statements if "FROM store_products" in s]) == 1
+    assert [(item['product_id'], item['quantity'], item['total_price']) for item in total['items']] == [
+        (10, 3, '13.50'), (11, 1, '12.00')]
+    assert total['subtotal'] == '25.50' and total['tax_amount'] == '2.23'
+    assert total['shipping_cost'] == '5.99' and total['total'] == '33.72'
+
+
+def test_order_total_rejects_products_from_another_store(engine):
+    service = make_service(engine)
+
+    total = service.calculate_order_total(1, [{'product_id': 10, 'quantity': 1}, {'product_id': 20, 'quantity': 1}])
+
+    assert total['total'] == '0.00' and total['unavailable_product_ids'] == [20]
+    assert 'error' in service.calculate_order_total(1, [{'product_id': 10, 'quantity': 0}])
+
+
+def test_reservation_decrements_stock_and_prices_the_order(engine):
+    service = make_service(engine)
+
+    result = service.reserve_inventory(1, [{'product_id': 11, 'quantity': 2}, {'product_id': 10, 'quantity': 1}])
+
+    assert result['success'] is True
+    assert result['remaining_stock'] == {10: 4, 11: 0}
+    assert result['order_total']['subtotal'] == '28.50'
+    assert stock(engine)[10] == 4 and stock(engine)[11] == 0
+
+
+def test_reservation_is_all_or_nothing(engine):
+    service = make_service(engine)
+
+    result = service.reserve_inventory(1, [{'product_id': 10, 'quantity': 5}, {'product_id': 11, 'quantity': 3}])
+
+    assert result == {'success': False, 'error': 'insufficient_stock', 'unavailable_product_ids': [11]}
+    assert stock(engine) == {10: 5, 11: 2, 12: 40, 20: 7}
+    assert service.reserve_inventory(1, [{'product_id': 20, 'quantity': 1}])['unavailable_product_ids'] == [20]
+    assert service.reserve_inventory(1, [])['error'] == 'invalid_items'
+
+
+def test_release_returns_reserved_stock(engine):
+    service = make_service(engine)
+    items = [{'product_id': 10, 'quantity': 3}]
+    assert service.reserve_inventory(1, items)['success']
+
+    assert service.release_inventory(1, items) is True
+    assert stock(engine)[10] == 5
+    assert service.release_inventory(2, items) is False
+
+
+def test_stock_changes_only_evict_the_products_they_touch(engine):
+    service = make_service(engine)
+    first = service.get_store_inventory(1)
+    assert [item['quantity'] for item in first['items']] == [5, 2, 40]
+    assert first['low_stock_count'] == 2 and first['categories'] == ['bakery', 'meat']
+
+    service.redis_manager.deleted.clear()
+    assert service.reserve_inventory(1, [{'product_id': 11, 'quantity': 2}])['success']
+    assert service.redis_manager.deleted == ['product:11']
+
+    inventory = service.get_store_inventory(1, category='meat')
+    assert [(item['product_id'], item['quantity'], item['stock_status']) for item in inventory['items']] == [
+        (11, 0, 'out_of_stock')]
+    assert inventory['out_of_stock_count'] == 1
+    assert [item['product_id'] for item in service.get_store_inventory(1, low_stock_only=True)['items']] == [10, 11]
+
+
+def test_update_product_inventory_sets_stock_for_the_store_only(engine):
+    service = make_service(engine)
+
+    assert service.update_product_inventory(1, 12, 8) is True
+    assert service.update_product_inventory(2, 12, 1) is False
+    assert service.update_product_inventory(1, 12, -1) is False
+    assert stock(engine)[12] == 8
+    assert service.redis_manager.deleted == ['product:12']
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(not os.getenv("INVENTORY_TEST_DATABASE_URL"),
+                    reason="set INVENTORY_TEST_DATABASE_URL to a PostgreSQL database to run the checkout stress test")
+def test_concurrent_checkouts_never_oversell():
+    schema = f"inventory_stress_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(os.environ["INVENTORY_TEST_DATABASE_URL"])
+    with admin.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_engine(os.environ["INVENTORY_TEST_DATABASE_URL"], pool_size=20, max_overflow=20,
+                           connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        Store.__table__.create(engine)
+        StoreProduct.__table__.create(engine)
+        initial = {1: 60, 2: 35, 3: 15}
+        add_store(engine, 1, [(product_id, "5.00", units, "bakery") for product_id, units in initial.items()])
+        service = make_service(engine)
+        workers, orders_per_worker = 24, 12
+        barrier = threading.Barrier(workers)
+        sold = {product_id: 0 for product_id in initial}
+        outcomes = []
+        lock = threading.Lock()
+
+        def checkout(worker):
+            rng = random.Random(worker)
+            barrier.wait()
+            for _ in range(orders_per_worker):
+                # Overlapping products listed in random order, to provoke lock-order deadlocks
+                items = [{'product_id': product_id, 'quantity': rng.randint(1, 3)}
+                         for product_id in rng.sample(list(initial), rng.randint(1, 3))]
+                result = service.reserve_inventory(1, items)
+                with lock:
+                    outcomes.append(result.get('error', 'reserved'))
+                    if result['success']:
+                        for item in items:
+                            sold[item['product_id']] += item['quantity']
+
+        threads = [threading.Thread(target=checkout, args=(worker,)) for worker in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        remaining = stock(engine)
+        assert set(outcomes) <= {'reserved', 'insufficient_stock'}
+        assert outcomes.count('reserved') > 0 and outcomes.count('insufficient_stock') > 0
+        for product_id, units in initial.items():
+            assert remaining[product_id] >= 0
+            assert sold[product_id] + remaining[product_id] == units
+    finally:
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        admin.dispose()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Tests for the shared, memoized timezone lookup and write-time timezone resolution."""
+import pytest
+
+import utils.hours as hours
+from database.models import Restaurant, _compile_restaurant_hours
+from utils.restaurant_status import get_restaurant_status
+
+
+class CountingFinder:
+    """Stand-in TimezoneFinder that counts constructions and lookups."""
+
+    instances = 0
+    lookups = 0
+
+    def __init__(self):
+        CountingFinder.instances += 1
+
+    def timezone_at(self, lat, lng):
+        CountingFinder.lookups += 1
+        return "America/Chicago" if lng < -85 else "America/New_York"
+
+
+@pytest.fixture
+def finder(monkeypatch):
+    CountingFinder.instances = CountingFinder.lookups = 0
+    monkeypatch.setattr(hours, "TimezoneFinder", CountingFinder)
+    monkeypatch.setattr(hours, "TIMEZONEFINDER_AVAILABLE", True)
+    monkeypatch.setattr(hours, "_timezone_finder", None)
+    hours._timezone_at.cache_clear()
+    yield CountingFinder
+    hours._timezone_at.cache_clear()
+
+
+class TestLookupTimezone:
+    """Test the process-wide finder and rounded-coordinate LRU."""
+
+    def test_finder_is_built_once_and_nearby_coordinates_share_a_lookup(self, finder):
+        assert hours.lookup_timezone(25.79012, -80.13004) == "America/New_York"
+        assert hours.lookup_timezone(25.79031, -80.12998) == "America/New_York"
+        assert hours.get_timezone(41.88, -87.63, "Chicago", "IL") == "America/Chicago"
+
+        assert finder.instances == 1
+        assert finder.lookups == 2
+
+    def test_missing_coordinates_or_library_skip_lookup(self, finder, monkeypatch):
+        assert hours.lookup_timezone(None, -80.1) is None
+        monkeypatch.setattr(hours, "TIMEZONEFINDER_AVAILABLE", False)
+        assert hours.lookup_timezone(25.79, -80.13) is None
+        assert finder.instances == 0
+
+
+class TestWriteTimeTimezone:
+    """Test that the ORM listener persists the timezone when coordinates change."""
+
+    def test_insert_resolves_timezone_before_compiling_hours(self, finder):
+        restaurant = Restaurant(latitude=41.88, longitude=-87.63, hours_of_operation="Daily: 9 AM - 5 PM")
+
+        _compile_restaurant_hours(None, None, restaurant)
+
+        assert restaurant.timezone == "America/Chicago"
+        assert restaurant.hours_timezone == "America/Chicago"
+
+    def test_explicit_timezone_is_kept(self, finder):
+        restaurant = Restaurant(latitude=41.88, longitude=-87.63, timezone="America/New_York")
+
+        _compile_restaurant_hours(None, None, restaurant)
+
+        assert restaurant.timezone == "America/New_York"
+        assert finder.lookups == 0
+
+
+def test_status_check_uses_persisted_timezone(finder):
+    status = get_restaurant_status({
+        "latitude": 34.05,
+        "longitude": -118.24,
+        "timezone": "America/Los_Angeles",
+        "hours": "Daily: Open 24 hours",
+    })
+
+    assert status["timezone"] == "America/Los_Angeles"
+    assert status["is_open"] is True
+    assert finder.instances == 0
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Conformance tests for the shared weekly-hours compiler and open-now checks."""
+from datetime import datetime
+
+import pytest
+import pytz
+
+from database.google_places_manager import GooglePlacesManager
+from database.models import Restaurant, _compile_restaurant_hours
+from services.hours_compute import is_open_now as hours_doc_is_open
+from services.open_now_service import OpenNowService
+from utils.restaurant_status import get_restaurant_status
+from utils.weekly_hours import (
+    MINUTES_PER_WEEK,
+    SLOTS_PER_WEEK,
+    WeeklyHours,
+    compile_hours,
+    compile_restaurant_hours,
+    parse_clock,
+    slot_start_minute,
+)
+
+MON, TUE, WED, FRI, SAT, SUN = (d * 1440 for d in (0, 1, 2, 4, 5, 6))
+
+# (input, expected minute-of-week ranges); every supported stored shape
+CONFORMANCE_CASES = [
+    # Google Places weekday_text (note the narrow no-break spaces and en dash)
+    (
+        {"weekday_text": ["Monday: 9:00 AM – 5:00 PM", "Tuesday: Closed"]},
+        [(MON + 540, MON + 1020)],
+    ),
+    # Google Places periods: Sunday = 0, overnight close on the next day
+    (
+        {"periods": [
+            {"open": {"day": 5, "time": "1800"}, "close": {"day": 6, "time": "0100"}},
+            {"open": {"day": 1, "time": "1130"}, "close": {"day": 1, "time": "2200"}},
+        ]},
+        [(MON + 690, MON + 1320), (FRI + 1080, SAT + 60)],
+    ),
+    # Google Places 24/7: a single period without close
+    ({"periods": [{"open": {"day": 0, "time": "0000"}}]}, [(0, MINUTES_PER_WEEK)]),
+    # Normalized weekly document
+    (
+        {"timezone": "America/Chicago", "weekly": {
+            "mon": [{"open": "09:00", "close": "14:30"}, {"open": "17:00", "close": "22:00"}],
+            "sat": [],
+        }},
+        [(MON + 540, MON + 870), (MON + 1020, MON + 1320)],
+    ),
+    # Hours document consumed by HoursFormatter
+    (
+        {"hours": {"mon": {"open": "11:00 AM", "close": "2:00 AM", "is_open": True},
+                   "tue": {"open": "11:00 AM", "close": "9:00 PM", "is_open": False}}},
+        [(MON + 660, TUE + 120)],
+    ),
+    # RestaurantServiceV5 per-day dicts (raw text wins over am/pm-less open_time)
+    (
+        {"monday": {"closed": True}, "tuesday": {"open_24h": True},
+         "wednesday": {"open_time": "9:00", "close_time": "5:00", "raw": "9am - 5pm"}},
+        [(TUE, TUE + 1440), (WED + 540, WED + 1020)],
+    ),
+    # parse_hours_blob output
+    ({"Friday": ["09:00-14:00"], "Sunday": ["6PM-10PM"]}, [(FRI + 540, FRI + 840), (SUN + 1080, SUN + 1320)]),
+    # OpenNowService structured list (Monday = 0)
+    (
+        [{"day": 0, "open_time": "08:00", "close_time": "16:00"}, {"day": 6, "is_closed": True}],
+        [(MON + 480, MON + 960)],
+    ),
+    # Free text: ranges of days, shared am/pm, split shifts, comma-joined lines
+    (
+        "Sun-Thu: 11:30am - 9:30pm, Fri: 11am-2pm",
+        [(0 * 1440 + 690, 0 * 1440 + 1290), (1440 + 690, 1440 + 1290), (2 * 1440 + 690, 2 * 1440 + 1290),
+         (3 * 1440 + 690, 3 * 1440 + 1290), (FRI + 660, FRI + 840), (SUN + 690, SUN + 1290)],
+    ),
+    ("Daily: 6 - 10 PM", [(d * 1440 + 1080, d * 1440 + 1320) for d in range(7)]),
+    ("Monday: 7 AM - 11 AM, 5 PM - 9 PM", [(MON + 420, MON + 660), (MON + 1020, MON + 1260)]),
+    # Saturday night past midnight wraps into Monday morning after Sunday
+    ("Sunday: 8 PM - 2 AM", [(0, 120), (SUN + 1200, MINUTES_PER_WEEK)]),
+    # JSON text is decoded first
+    ('{"Monday": ["09:00-17:00"]}', [(MON + 540, MON + 1020)]),
+    # Every day explicitly closed compiles to "never open", not unknown
+    ("Monday: Closed\nTuesday: Closed", []),
+]
+
+
+class TestConformance:
+    """Every stored hours shape compiles to the same representation."""
+
+    @pytest.mark.parametrize("value,expected", CONFORMANCE_CASES)
+    def test_compiles(self, value, expected):
+        assert compile_hours(value).ranges == sorted(expected)
+
+    @pytest.mark.parametrize("value", [None, "", "call for hours", {}, [], {"periods": []}])
+    def test_unknown_hours_compile_to_none(self, value):
+        assert compile_hours(value) is None
+
+    @pytest.mark.parametrize("text,minutes", [
+        ("9", 540), ("9:30 PM", 1290), ("0930", 570), ("21:30", 1290), ("12 AM", 0),
+        ("12:00 PM", 720), ("noon", 720), ("24:00", 1440), ("9 p.m.", 1260), ("25:00", None), ("9:75", None),
+    ])
+    def test_clock_parsing(self, text, minutes):
+        assert parse_clock(text) == minutes
+
+
+class TestWeeklyHours:
+    """Test the bitmap, multirange round trip and transitions."""
+
+    def test_bitmap_matches_ranges_for_every_slot(self):
+        weekly = compile_hours("Mon-Fri: 9:07 AM - 5 PM\nSunday: 10 PM - 1:30 AM")
+        for slot in range(SLOTS_PER_WEEK):
+            minute = slot * 5
+            in_ranges = any(start <= minute < end for start, end in weekly.ranges)
+            assert weekly.is_open_slot(slot) == in_ranges
+
+    def test_multirange_round_trip(self):
+        weekly = compile_hours("Sunday: 8 PM - 2 AM")
+        assert weekly.to_multirange() == "{[0,120),[9840,10080)}"
+        assert WeeklyHours.from_multirange(weekly.to_multirange()) == weekly
+        assert WeeklyHours.from_multirange("{}").is_always_closed
+
+    def test_overnight_hours_are_open_after_midnight(self):
+        weekly = compile_hours("Saturday: 6 PM - 2 AM")
+        assert weekly.is_open_at(datetime(2025, 1, 5, 1, 30))  # Sunday 1:30
+        assert not weekly.is_open_at(datetime(2025, 1, 5, 2, 0))
+
+    def test_next_transitions(self):
+        weekly = compile_hours("Mon-Fri: 9 AM - 5 PM")
+        friday_evening = datetime(2025, 1, 10, 18, 3)
+        assert weekly.next_open_after(friday_evening) == datetime(2025, 1, 13, 9, 0)
+        assert weekly.next_close_after(datetime(2025, 1, 13, 9, 0)) == datetime(2025, 1, 13, 17, 0)
+        assert compile_hours({"periods": [{"open": {"day": 0, "time": "0000"}}]}).next_close_after(
+            friday_evening) is None
+
+
+class TestOpenNow:
+    """In-process checks and the SQL predicate agree on local time."""
+
+    def test_compiled_columns_are_used_with_their_timezone(self):
+        restaurant = {"hours_week_ranges": "{[540,1020)}", "hours_timezone": "America/Los_Angeles"}
+        # Monday 17:30 UTC = 09:30 in Los Angeles
+        monday = pytz.UTC.localize(datetime(2025, 1, 6, 17, 30))
+        assert OpenNowService().is_open_now(restaurant, monday) is True
+        assert OpenNowService().is_open_now({"name": "no hours"}, monday) is None
+
+    def test_filter_binds_local_slot_minute_per_timezone(self):
+        monday = pytz.UTC.localize(datetime(2025, 1, 6, 17, 32))
+        clause = OpenNowService().build_open_now_filter(
+            ["America/New_York", "America/Los_Angeles"], monday
+        )
+        params = clause.compile().params
+        assert "restaurants.hours_week_ranges @> :open_now_minute_0" in str(clause)
+        assert params["open_now_tz_0"] == "America/Los_Angeles"
+        assert params["open_now_minute_0"] == 9 * 60 + 30
+        assert params["open_now_minute_1"] == 12 * 60 + 30
+        assert slot_start_minute(datetime(2025, 1, 6, 9, 34)) == 570
+
+    def test_filter_without_compiled_timezones_matches_nothing(self):
+        assert str(OpenNowService().build_open_now_filter([])) == "false"
+
+    def test_status_and_hours_doc_use_shared_compiler(self):
+        always = {"hours": {"mon": "Open 24 hours", "tue": "Open 24 hours", "wed": "Open 24 hours",
+                            "thu": "Open 24 hours", "fri": "Open 24 hours", "sat": "Open 24 hours",
+                            "sun": "Open 24 hours"}, "timezone": "America/New_York"}
+        assert hours_doc_is_open(always) is True
+        status = get_restaurant_status({"hours": "Daily: Closed", "state": "FL"})
+        assert (status["status"], status["hours_parsed"]) == ("closed", True)
+
+
+def test_orm_writes_compile_hours():
+    restaurant = Restaurant(
+        name="Bagel Bros",
+        hours_json={"weekday_text": ["Monday: 9 AM - 5 PM"]},
+        timezone="America/Chicago",
+    )
+
+    _compile_restaurant_hours(None, None, restaurant)
+
+    assert restaurant.hours_week_ranges == "{[540,1020)}"
+    assert restaurant.hours_timezone == "America/Chicago"
+    assert compile_restaurant_hours(None, "unparseable", None) == (None, None)
+
+
+def test_google_places_manager_formats_weekday_text():
+    manager = GooglePlacesManager(database_url="sqlite://")
+    weekday_text = ["Monday: 9:00 AM – 5:00 PM", "Tuesday: Closed"]
+
+    assert manager._format_hours_text({"weekday_text": weekday_text, "open_now": True}) == "\n".join(weekday_text)
+    assert manager._format_hours_text({"periods": []}) == ""
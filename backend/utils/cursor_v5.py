@@ -117,6 +117,13 @@ class CursorV5Manager:
             'tiebreaker': 'id',
             'tiebreaker_direction': 'DESC',
             'canonicalization': 'numeric_id'
+        },
+        'relevance_desc': {
+            'primary': 'rank',
+            'direction': 'DESC',
+            'tiebreaker': 'id',
+            'tiebreaker_direction': 'DESC',
+            'canonicalization': 'numeric_id'
         }
     }
     
@@ -289,7 +296,7 @@ class CursorV5Manager:
                 pass
             elif canonicalization == 'numeric_id':
                 # Numeric values might need type conversion
-                if sort_key in ['rating_desc', 'distance_asc']:
+                if sort_key in ['rating_desc', 'distance_asc', 'relevance_desc']:
                     primary_value = float(primary_value) if primary_value is not None else None
             
             return primary_value, record_id
@@ -514,9 +521,13 @@ class CursorV5Manager:
         except Exception as e:
             raise CursorV5ValidationError("Invalid base64 encoding") from e
         
-        try:
-            payload_bytes, signature = cursor_data.rsplit(b'|', 1)
-        except ValueError:
+        # The signature is a raw SHA-256 digest that may itself contain b'|',
+        # so split at its fixed length rather than at the last separator.
+        digest_size = hashlib.sha256().digest_size
+        payload_bytes, separator, signature = (
+            cursor_data[:-digest_size - 1], cursor_data[-digest_size - 1:-digest_size], cursor_data[-digest_size:]
+        )
+        if separator != b'|':
             raise CursorV5ValidationError("Invalid cursor format")
         
         # Verify HMAC signature
@@ -9,10 +9,16 @@ rollback mechanisms. Built upon existing v4 patterns with v5 enhancements.
 from __future__ import annotations
 
 import hashlib
+import json
 import os
+import threading
+import time
+import zlib
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional, Set
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
 
 from utils.logging_config import get_logger
 
@@ -42,8 +48,93 @@ class FeatureFlagType(Enum):
     MIGRATION = "migration"        # API migration control
 
 
+_TRUE_VALUES = ("true", "1", "yes", "on")
+
+# Redis keys (under the 'feature_flags' prefix) and pub/sub channel for shared flag state
+STATE_KEY = "state"
+VERSION_KEY = "version"
+VERSION_CHANNEL = "flags_v5:version"
+
+
+@lru_cache(maxsize=65536)
+def _rollout_bucket(flag_name: str, user_id: str) -> int:
+    """Stable 0-9999 bucket for a user within a flag's rollout."""
+    return zlib.crc32(f"{flag_name}:{user_id}:rollout".encode()) % 10000
+
+
+class _FlagGate:
+    """One flag's own conditions (segments, overrides, rollout, stage), compiled."""
+
+    __slots__ = ("name", "segments", "override_users", "threshold", "anonymous", "fallback")
+
+    def __init__(self, name, segments, override_users, threshold, anonymous, fallback):
+        self.name = name
+        self.segments = segments
+        self.override_users = override_users
+        self.threshold = threshold
+        self.anonymous = anonymous
+        self.fallback = fallback
+
+    @property
+    def constant(self) -> Optional[bool]:
+        """The gate's answer when it cannot depend on the caller, else None."""
+        if self.segments is not None or self.override_users:
+            return None
+        if self.threshold >= 10000:
+            user_result = True
+        elif self.threshold <= 0:
+            user_result = self.fallback
+        else:
+            return None
+        return user_result if user_result == self.anonymous else None
+
+    def allows(self, user_id: Optional[str], user_roles: Optional[List[str]]) -> bool:
+        if self.segments is not None and not (user_roles and not self.segments.isdisjoint(user_roles)):
+            return False
+        if not user_id:
+            return self.anonymous
+        if user_id in self.override_users or _rollout_bucket(self.name, user_id) < self.threshold:
+            return True
+        return self.fallback
+
+
+class _CompiledFlag:
+    """A flag with its dependency chain flattened into gates that must all allow."""
+
+    __slots__ = ("constant", "gates")
+
+    def __init__(self, constant: Optional[bool], gates: Tuple[_FlagGate, ...] = ()):
+        self.constant = constant
+        self.gates = gates
+
+    def evaluate(self, user_id: Optional[str], user_roles: Optional[List[str]]) -> bool:
+        if self.constant is not None:
+            return self.constant
+        for gate in self.gates:
+            if not gate.allows(user_id, user_roles):
+                return False
+        return True
+
+
+class FlagSnapshot:
+    """Immutable compiled view of every flag for one environment."""
+
+    def __init__(self, generation: int, environment: str, flags: Dict[str, _CompiledFlag]):
+        self.generation = generation
+        self.environment = environment
+        self.flags: Mapping[str, _CompiledFlag] = MappingProxyType(flags)
+
+
 class FeatureFlagsV5:
-    """Enhanced feature flag manager for v5 API consolidation."""
+    """Enhanced feature flag manager for v5 API consolidation.
+    
+    Flags are evaluated against a compiled FlagSnapshot: dependencies are
+    flattened, environment overrides (emergency disables, per-user overrides)
+    are read once, and flags that cannot depend on the caller fold to
+    constants. Any change bumps the generation and the next evaluation
+    recompiles. With Redis attached, changes are stored there and announced
+    by a published version so every process swaps to the same snapshot.
+    """
     
     def __init__(self):
         self._load_environment_config()
@@ -51,6 +142,13 @@ class FeatureFlagsV5:
         self.dependencies = self._initialize_flag_dependencies()
         self._load_flags_from_env()
         self._validate_flag_dependencies()
+        
+        self.redis_manager = None
+        self._runtime_state: Dict[str, Dict[str, Any]] = {}
+        self._generation = 0
+        self._compile_lock = threading.Lock()
+        self._snapshot = self._compile(self._generation)
+        self._environment_snapshots: Dict[str, FlagSnapshot] = {}
     
     def _initialize_v5_flags(self) -> Dict[str, Dict[str, Any]]:
         """Initialize all v5 feature flags with their configurations."""
@@ -484,54 +582,17 @@ class FeatureFlagsV5:
         Returns:
             True if flag is enabled, False otherwise
         """
-        if flag_name not in self.flags:
+        snapshot = self._snapshot
+        if snapshot.generation != self._generation:
+            snapshot = self._recompile()
+        if environment is not None and environment != snapshot.environment:
+            snapshot = self._environment_snapshot(snapshot.generation, environment)
+        
+        compiled = snapshot.flags.get(flag_name)
+        if compiled is None:
             logger.warning(f"Unknown v5 feature flag: {flag_name}")
             return default
-        
-        flag_config = self.flags[flag_name]
-        
-        # Check emergency disable
-        if flag_config.get("emergency_disable") and self._is_emergency_disabled(flag_name):
-            logger.info(f"Feature flag {flag_name} emergency disabled")
-            return False
-        
-        # Check environment constraints
-        env = environment or self.environment
-        allowed_envs = flag_config.get("environments", ["development", "staging", "production"])
-        if env not in allowed_envs:
-            return False
-        
-        # Check dependencies
-        if not self._check_dependencies(flag_name, user_id, user_roles, environment):
-            return False
-        
-        # Check user segment targeting
-        if not self._check_user_segment(flag_config, user_roles):
-            return False
-        
-        # Check user-specific override
-        if user_id and self._get_user_override(flag_name, user_id):
-            return True
-        
-        # Check percentage rollout
-        if user_id and self._is_in_rollout_percentage(flag_name, user_id, flag_config):
-            return True
-        
-        # Check stage-based enablement
-        stage = flag_config["stage"]
-        if stage == FeatureFlagStageV5.DISABLED:
-            return False
-        elif stage == FeatureFlagStageV5.DEVELOPMENT:
-            return env in ["development"]
-        elif stage in [FeatureFlagStageV5.FULL, FeatureFlagStageV5.DEPRECATED]:
-            return flag_config["default"]
-        else:
-            # For testing/canary/partial/majority stages, use rollout percentage
-            if user_id:
-                return self._is_in_rollout_percentage(flag_name, user_id, flag_config)
-            else:
-                # Anonymous users get default behavior for non-rollout stages
-                return flag_config["default"]
+        return compiled.evaluate(user_id, user_roles)
     
     def get_experiment_variant(
         self,
@@ -566,78 +627,177 @@ class FeatureFlagsV5:
         
         return variants[variant_index]
     
-    def _check_dependencies(
-        self,
-        flag_name: str,
-        user_id: Optional[str],
-        user_roles: Optional[List[str]],
-        environment: Optional[str]
-    ) -> bool:
-        """Check if all dependencies for a flag are satisfied."""
-        deps = self.dependencies.get(flag_name, set())
+    def _compile(self, generation: int, environment: Optional[str] = None) -> FlagSnapshot:
+        """Compile every flag for one environment from the current configuration."""
+        env = environment or self.environment
+        gates: Dict[str, Optional[_FlagGate]] = {}
+        blocked: Set[str] = set()
         
-        for dep in deps:
-            if not self.is_enabled(dep, user_id, user_roles, environment):
-                logger.debug(f"Flag {flag_name} disabled due to dependency {dep}")
-                return False
+        for flag_name, config in self.flags.items():
+            config = dict(config, **self._runtime_state.get(flag_name, {}))
+            allowed_envs = config.get("environments", ["development", "staging", "production"])
+            if (config.get("emergency_disable") and self._is_emergency_disabled(flag_name)) or env not in allowed_envs:
+                blocked.add(flag_name)
+                continue
+            gates[flag_name] = self._compile_gate(flag_name, config, env)
+        
+        compiled = {}
+        for flag_name in self.flags:
+            chain = []
+            for name in self._dependency_closure(flag_name):
+                if name in blocked or gates[name].constant is False:
+                    compiled[flag_name] = _CompiledFlag(False)
+                    break
+                if gates[name].constant is None:
+                    chain.append(gates[name])
+            else:
+                compiled[flag_name] = _CompiledFlag(None, tuple(chain)) if chain else _CompiledFlag(True)
         
-        return True
+        return FlagSnapshot(generation, env, compiled)
     
-    def _check_user_segment(self, flag_config: Dict[str, Any], user_roles: Optional[List[str]]) -> bool:
-        """Check if user belongs to required segments."""
-        required_segments = flag_config.get("user_segments")
-        if not required_segments:
-            return True  # No segment restriction
-        
-        if not user_roles:
-            return False  # User has no roles but flag requires segments
-        
-        # Check if user has any of the required roles
-        return any(role in required_segments for role in user_roles)
+    def _compile_gate(self, flag_name: str, config: Dict[str, Any], env: str) -> _FlagGate:
+        stage = config["stage"]
+        if stage == FeatureFlagStageV5.DISABLED:
+            anonymous = fallback = False
+        elif stage == FeatureFlagStageV5.DEVELOPMENT:
+            anonymous = fallback = env in ["development"]
+        elif stage in [FeatureFlagStageV5.FULL, FeatureFlagStageV5.DEPRECATED]:
+            anonymous = fallback = config["default"]
+        else:
+            # Rollout stages: users outside the rollout are off, anonymous callers get the default
+            anonymous, fallback = config["default"], False
+        
+        segments = config.get("user_segments")
+        return _FlagGate(
+            name=flag_name,
+            segments=frozenset(segments) if segments else None,
+            override_users=self._user_overrides(flag_name),
+            threshold=config.get("rollout_percentage", 0.0) * 100,
+            anonymous=anonymous,
+            fallback=fallback,
+        )
     
-    def _get_user_override(self, flag_name: str, user_id: str) -> bool:
-        """Check if user has a specific override for this flag."""
-        env_var = f"FEATURE_FLAG_V5_{flag_name.upper()}_USER_{user_id}"
-        if env_var in os.environ:
-            value = os.environ[env_var].lower()
-            return value in ("true", "1", "yes", "on")
-        return False
+    def _dependency_closure(self, flag_name: str) -> List[str]:
+        """The flag followed by every flag it transitively depends on."""
+        closure, stack = [], [flag_name]
+        while stack:
+            name = stack.pop()
+            if name in closure:
+                continue
+            closure.append(name)
+            stack.extend(self.dependencies.get(name, ()))
+        return closure
     
-    def _is_in_rollout_percentage(
-        self,
-        flag_name: str,
-        user_id: str,
-        flag_config: Dict[str, Any]
-    ) -> bool:
-        """Check if user is in the rollout percentage for this flag."""
-        rollout_percentage = flag_config.get("rollout_percentage", 0.0)
-        
-        if rollout_percentage <= 0:
-            return False
-        if rollout_percentage >= 100:
-            return True
-        
-        # Use consistent hashing to determine user assignment
-        hash_input = f"{flag_name}:{user_id}:rollout"
-        hash_value = int(hashlib.md5(hash_input.encode()).hexdigest(), 16)
-        user_percentage = (hash_value % 10000) / 100.0  # 0.00-99.99
-        
-        return user_percentage < rollout_percentage
+    def _user_overrides(self, flag_name: str) -> frozenset:
+        """User ids force-enabled via FEATURE_FLAG_V5_<FLAG>_USER_<id>."""
+        prefix = f"FEATURE_FLAG_V5_{flag_name.upper()}_USER_"
+        return frozenset(
+            key[len(prefix):] for key, value in os.environ.items()
+            if key.startswith(prefix) and value.lower() in _TRUE_VALUES
+        )
+    
+    def _recompile(self) -> FlagSnapshot:
+        with self._compile_lock:
+            generation = self._generation
+            if self._snapshot.generation != generation:
+                if self.redis_manager is not None:
+                    self._load_shared_state()
+                self._snapshot = self._compile(generation)
+            return self._snapshot
+    
+    def _environment_snapshot(self, generation: int, environment: str) -> FlagSnapshot:
+        """Snapshot for an explicitly requested environment, compiled once per generation."""
+        snapshot = self._environment_snapshots.get(environment)
+        if snapshot is None or snapshot.generation != generation:
+            with self._compile_lock:
+                snapshot = self._environment_snapshots.get(environment)
+                if snapshot is None or snapshot.generation != generation:
+                    snapshot = self._compile(generation, environment)
+                    self._environment_snapshots[environment] = snapshot
+        return snapshot
+    
+    def refresh(self) -> None:
+        """Recompile on the next evaluation (call after changing flags or overrides directly)."""
+        self._generation += 1
     
     def _is_emergency_disabled(self, flag_name: str) -> bool:
         """Check if flag is emergency disabled."""
+        if self._runtime_state.get(flag_name, {}).get("emergency_disabled"):
+            return True
         env_var = f"EMERGENCY_DISABLE_{flag_name.upper()}"
         if env_var in os.environ:
             value = os.environ[env_var].lower()
-            return value in ("true", "1", "yes", "on")
+            return value in _TRUE_VALUES
         return False
     
+    # Shared state via Redis
+    
+    def attach_redis(self, redis_manager) -> None:
+        """Share flag changes through Redis and follow changes made by other processes."""
+        first = self.redis_manager is None
+        self.redis_manager = redis_manager
+        self.refresh()
+        if first:
+            self._start_listener()
+            # Forked workers (gunicorn preload) need their own listener thread
+            os.register_at_fork(after_in_child=self._start_listener)
+    
+    def _load_shared_state(self) -> None:
+        try:
+            raw = self.redis_manager.get_client().hgetall(self.redis_manager.build_key(STATE_KEY, prefix='feature_flags'))
+        except Exception as e:
+            logger.warning(f"Could not load shared feature flag state, keeping previous: {e}")
+            return
+        state = {}
+        for name, value in raw.items():
+            name = name.decode() if isinstance(name, bytes) else name
+            entry = json.loads(value)
+            if "stage" in entry:
+                entry["stage"] = FeatureFlagStageV5(entry["stage"])
+            state[name] = entry
+        self._runtime_state = state
+    
+    def _publish_change(self, flag_name: str, **changes: Any) -> None:
+        """Store a flag change in Redis and announce the new version."""
+        self._runtime_state[flag_name] = dict(self._runtime_state.get(flag_name, {}), **changes)
+        self.refresh()
+        if self.redis_manager is None:
+            return
+        entry = {k: (v.value if isinstance(v, Enum) else v) for k, v in self._runtime_state[flag_name].items()}
+        try:
+            client = self.redis_manager.get_client()
+            client.hset(self.redis_manager.build_key(STATE_KEY, prefix='feature_flags'), flag_name, json.dumps(entry))
+            version = client.incr(self.redis_manager.build_key(VERSION_KEY, prefix='feature_flags'))
+            client.publish(VERSION_CHANNEL, version)
+        except Exception as e:
+            logger.warning(f"Feature flag change for {flag_name} applied locally only: {e}")
+    
+    def _start_listener(self) -> None:
+        threading.Thread(target=self._listen, name="feature-flags-v5", daemon=True).start()
+    
+    def _listen(self) -> None:
+        backoff = 1
+        while True:
+            try:
+                pubsub = self.redis_manager.get_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(VERSION_CHANNEL)
+                # Changes missed while unsubscribed are picked up by reloading the state
+                self.refresh()
+                backoff = 1
+                for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.refresh()
+            except Exception as e:
+                logger.warning(f"Feature flag version listener disconnected: {e}")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+    
     def get_flag_info(self, flag_name: str) -> Optional[Dict[str, Any]]:
         """Get detailed information about a feature flag."""
         if flag_name not in self.flags:
             return None
         
-        config = self.flags[flag_name].copy()
+        config = dict(self.flags[flag_name], **self._runtime_state.get(flag_name, {}))
         config["dependencies"] = list(self.dependencies.get(flag_name, set()))
         config["emergency_disabled"] = self._is_emergency_disabled(flag_name)
         
@@ -686,8 +846,19 @@ class FeatureFlagsV5:
         if stage in rollout_percentages:
             self.flags[flag_name]["rollout_percentage"] = rollout_percentages[stage]
         
+        self._publish_change(flag_name, stage=stage, rollout_percentage=self.flags[flag_name]["rollout_percentage"])
         logger.info(f"Changed flag {flag_name} stage: {old_stage.value} -> {stage.value}")
     
+    def set_rollout_percentage(self, flag_name: str, rollout_percentage: float):
+        """Set the rollout percentage (0-100) for a feature flag."""
+        if flag_name not in self.flags:
+            logger.warning(f"Unknown v5 feature flag: {flag_name}")
+            return
+        
+        self.flags[flag_name]["rollout_percentage"] = rollout_percentage
+        self._publish_change(flag_name, rollout_percentage=rollout_percentage)
+        logger.info(f"Changed flag {flag_name} rollout: {rollout_percentage}%")
+    
     def emergency_disable(self, flag_name: str):
         """Emergency disable a feature flag."""
         if flag_name not in self.flags:
@@ -696,6 +867,7 @@ class FeatureFlagsV5:
         
         env_var = f"EMERGENCY_DISABLE_{flag_name.upper()}"
         os.environ[env_var] = "true"
+        self._publish_change(flag_name, emergency_disabled=True)
         
         logger.critical(f"EMERGENCY DISABLE: Feature flag {flag_name} has been emergency disabled")
     
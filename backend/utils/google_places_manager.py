@@ -10,6 +10,7 @@ Last Updated: 2024
 import json
 import os
 import re
+import threading
 import time
 from datetime import datetime
 from typing import Any
@@ -30,6 +31,38 @@ Last Updated: 2024
 # Configure logging using unified logging configuration
 logger = get_logger(__name__)
 
+# One pooled engine per database URL, shared by all manager instances
+_engines: dict[str, Any] = {}
+_engines_lock = threading.Lock()
+
+
+def _get_shared_engine(database_url: str):
+    """Get (creating once) the pooled engine for a database URL."""
+    with _engines_lock:
+        engine = _engines.get(database_url)
+        if engine is None:
+            connect_url = database_url
+            if "api.jewgo.app" in connect_url and "sslmode=" not in connect_url:
+                connect_url = (
+                    connect_url
+                    + ("&" if "?" in connect_url else "?")
+                    + "sslmode=require"
+                )
+            engine = create_engine(
+                connect_url,
+                echo=False,
+                pool_size=5,
+                max_overflow=10,
+                pool_pre_ping=True,
+                pool_recycle=3600,
+                connect_args={
+                    "connect_timeout": 30,
+                    "application_name": "jewgo-utils-google-places",
+                },
+            )
+            _engines[database_url] = engine
+        return engine
+
 
 class GooglePlacesManager:
     """Manager for Google Places API interactions."""
@@ -46,6 +79,10 @@ class GooglePlacesManager:
         self.database_url = database_url or os.environ.get("DATABASE_URL")
         logger.info("Google Places Manager initialized", api_key_length=len(api_key))
 
+    def _get_engine(self):
+        """Get the shared engine for this manager's database."""
+        return _get_shared_engine(self.database_url)
+
     def _normalize_name(self, name: str) -> str:
         """Normalize restaurant name for better search matching."""
         if not name:
@@ -256,25 +293,7 @@ class GooglePlacesManager:
             if not place_id:
                 # Get restaurant info from database
                 # Use resilient engine per backend standards
-                connect_url = self.database_url
-                if "api.jewgo.app" in connect_url and "sslmode=" not in connect_url:
-                    connect_url = (
-                        connect_url
-                        + ("&" if "?" in connect_url else "?")
-                        + "sslmode=require"
-                    )
-                engine = create_engine(
-                    connect_url,
-                    echo=False,
-                    pool_size=5,
-                    max_overflow=10,
-                    pool_pre_ping=True,
-                    pool_recycle=3600,
-                    connect_args={
-                        "connect_timeout": 30,
-                        "application_name": "jewgo-utils-google-places",
-                    },
-                )
+                engine = self._get_engine()
                 with engine.begin() as conn:
                     result = conn.execute(
                         text(
@@ -306,25 +325,7 @@ class GooglePlacesManager:
                 )
                 return False
             # Update database
-            connect_url = self.database_url
-            if "api.jewgo.app" in connect_url and "sslmode=" not in connect_url:
-                connect_url = (
-                    connect_url
-                    + ("&" if "?" in connect_url else "?")
-                    + "sslmode=require"
-                )
-            engine = create_engine(
-                connect_url,
-                echo=False,
-                pool_size=5,
-                max_overflow=10,
-                pool_pre_ping=True,
-                pool_recycle=3600,
-                connect_args={
-                    "connect_timeout": 30,
-                    "application_name": "jewgo-utils-google-places",
-                },
-            )
+            engine = self._get_engine()
             with engine.begin() as conn:
                 # Update the google_reviews, google_rating, and google_review_count fields in restaurants table
                 result = conn.execute(
@@ -334,12 +335,13 @@ class GooglePlacesManager:
                     SET google_reviews = :reviews_data,
                         google_rating = :overall_rating,
                         google_review_count = :total_reviews,
+                        last_google_sync_at = NOW(),
                         updated_at = NOW()
                     WHERE id = :restaurant_id
                 """,
                     ),
                     {
-                        "reviews_data": str(reviews_data),
+                        "reviews_data": json.dumps(reviews_data),
                         "overall_rating": reviews_data.get("overall_rating"),
                         "total_reviews": reviews_data.get("total_reviews"),
                         "restaurant_id": restaurant_id,
@@ -363,117 +365,26 @@ class GooglePlacesManager:
             return False
 
     def batch_update_google_reviews(self, limit: int = 10) -> dict[str, Any]:
-        """Update Google reviews for multiple restaurants in batch.
+        """Update Google reviews for the stalest restaurants in batch.
+        Restaurants not synced within 7 days are fetched concurrently under the
+        sync pipeline's request budget and written back in batches.
         Args:
             limit: Maximum number of restaurants to process
         Returns:
             Dictionary with update results
         """
+        from services.google_places_sync import GooglePlacesSyncPipeline
+
         try:
             if not self.database_url:
                 logger.error("Database URL not configured")
                 return {"success": False, "error": "Database URL not configured"}
-            connect_url = self.database_url
-            if "api.jewgo.app" in connect_url and "sslmode=" not in connect_url:
-                connect_url = (
-                    connect_url
-                    + ("&" if "?" in connect_url else "?")
-                    + "sslmode=require"
-                )
-            engine = create_engine(
-                connect_url,
-                echo=False,
-                pool_size=5,
-                max_overflow=10,
-                pool_pre_ping=True,
-                pool_recycle=3600,
-                connect_args={
-                    "connect_timeout": 30,
-                    "application_name": "jewgo-utils-google-places",
-                },
+            pipeline = GooglePlacesSyncPipeline(
+                api_key=self.api_key,
+                engine=self._get_engine(),
+                base_url=self.base_url,
             )
-            # Get restaurants that need review updates
-            with engine.begin() as conn:
-                result = conn.execute(
-                    text(
-                        """
-                    SELECT id, name, address, google_reviews
-                    FROM restaurants
-                    WHERE status = 'active'
-                    ORDER BY updated_at ASC
-                    LIMIT :limit
-                """,
-                    ),
-                    {"limit": limit},
-                )
-                restaurants = result.fetchall()
-            results = {
-                "processed": 0,
-                "updated": 0,
-                "errors": [],
-                "details": [],
-            }
-            for restaurant in restaurants:
-                try:
-                    results["processed"] += 1
-                    # Check if we have recent reviews (less than 7 days old)
-                    current_reviews = restaurant.google_reviews
-                    if current_reviews:
-                        # Parse existing reviews to check age
-                        try:
-                            reviews_data = json.loads(current_reviews)
-                            fetched_at = reviews_data.get("fetched_at", 0)
-                            if time.time() - fetched_at < 604800:  # 7 days in seconds
-                                logger.debug(
-                                    "Skipping restaurant - reviews are recent",
-                                    restaurant_id=restaurant.id,
-                                )
-                                results["details"].append(
-                                    {
-                                        "restaurant_id": restaurant.id,
-                                        "name": restaurant.name,
-                                        "status": "skipped_recent",
-                                    },
-                                )
-                                continue
-                        except (json.JSONDecodeError, TypeError):
-                            pass  # Invalid JSON, proceed with update
-                    # Update reviews
-                    success = self.update_restaurant_google_reviews(restaurant.id)
-                    if success:
-                        results["updated"] += 1
-                        results["details"].append(
-                            {
-                                "restaurant_id": restaurant.id,
-                                "name": restaurant.name,
-                                "status": "updated",
-                            },
-                        )
-                    else:
-                        results["details"].append(
-                            {
-                                "restaurant_id": restaurant.id,
-                                "name": restaurant.name,
-                                "status": "failed",
-                            },
-                        )
-                    # Rate limiting - pause between requests
-                    time.sleep(1)
-                except Exception as e:
-                    error_msg = f"Error processing restaurant {restaurant.id}: {e!s}"
-                    results["errors"].append(error_msg)
-                    logger.exception(
-                        "Error in batch review update",
-                        restaurant_id=restaurant.id,
-                        error=str(e),
-                    )
-            logger.info(
-                "Completed batch Google reviews update",
-                processed=results["processed"],
-                updated=results["updated"],
-                errors=len(results["errors"]),
-            )
-            return results
+            return pipeline.run(limit=limit)
         except Exception as e:
             logger.exception("Error in batch review update", error=str(e))
             return {"success": False, "error": str(e)}
@@ -498,25 +409,7 @@ class GooglePlacesManager:
             if not self.database_url:
                 logger.error("Database URL not configured")
                 return False
-            connect_url = self.database_url
-            if "api.jewgo.app" in connect_url and "sslmode=" not in connect_url:
-                connect_url = (
-                    connect_url
-                    + ("&" if "?" in connect_url else "?")
-                    + "sslmode=require"
-                )
-            engine = create_engine(
-                connect_url,
-                echo=False,
-                pool_size=5,
-                max_overflow=10,
-                pool_pre_ping=True,
-                pool_recycle=3600,
-                connect_args={
-                    "connect_timeout": 30,
-                    "application_name": "jewgo-utils-google-places",
-                },
-            )
+            engine = self._get_engine()
             with engine.begin() as conn:
                 # Update the website field
                 result = conn.execute(
@@ -560,7 +453,7 @@ class GooglePlacesManager:
             if not self.database_url:
                 logger.error("Database URL not configured")
                 return []
-            engine = create_engine(self.database_url)
+            engine = self._get_engine()
             with engine.connect() as conn:
                 query = """
                     SELECT id, name, address, city, state, website
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+In-process Hebrew calendar: dates, holidays and the weekly parsha.
+
+Everything is computed arithmetically, so calendar lookups no longer call
+HebCal from the request thread. The date arithmetic follows Reingold and
+Dershowitz, "Calendrical Calculations": the molad of Tishrei plus the four
+dechiyot give each year's start. From that come month lengths, holidays
+(with their fast-day and Yom HaAtzmaut postponements) and the Shabbat
+readings (with the standard rules for combining parshiot). Israel and the
+diaspora differ in yom tov days, and so sometimes in the parsha.
+
+HebrewCalendar precomputes one CalendarDay per Gregorian date for a
+rolling window (31 days back, 365 ahead), so a lookup is a dict read. Dates
+outside the window are computed on demand. Times of day (candle lighting,
+havdalah, zmanim) depend on location and come from utils.zmanim.
+
+Months are numbered as in the Torah and in Reingold: Nisan = 1 ...
+Elul = 6, Tishrei = 7 ... Adar = 12 (Adar I in leap years), Adar II = 13.
+The year number changes at Tishrei.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# R.D. (date.toordinal()) of 1 Tishrei AM 1, from Calendrical Calculations
+HEBREW_EPOCH = -1373427
+
+NISAN, IYYAR, SIVAN, TAMUZ, AV, ELUL = 1, 2, 3, 4, 5, 6
+TISHREI, CHESHVAN, KISLEV, TEVET, SHVAT, ADAR, ADAR_II = 7, 8, 9, 10, 11, 12, 13
+
+SATURDAY = 5  # date.weekday()
+THURSDAY = 3
+FRIDAY = 4
+SUNDAY = 6
+MONDAY = 0
+
+MONTH_NAMES = {
+    NISAN: ('Nisan', 'ניסן'), IYYAR: ('Iyyar', 'אייר'), SIVAN: ('Sivan', 'סיון'),
+    TAMUZ: ('Tamuz', 'תמוז'), AV: ('Av', 'אב'), ELUL: ('Elul', 'אלול'),
+    TISHREI: ('Tishrei', 'תשרי'), CHESHVAN: ('Cheshvan', 'חשון'), KISLEV: ('Kislev', 'כסלו'),
+    TEVET: ('Tevet', 'טבת'), SHVAT: ("Sh'vat", 'שבט'), ADAR: ('Adar', 'אדר'),
+    ADAR_II: ('Adar II', 'אדר ב׳'),
+}
+
+PARSHIOT = [
+    ('Bereshit', 'בראשית'), ('Noach', 'נח'), ('Lech-Lecha', 'לך לך'), ('Vayera', 'וירא'),
+    ('Chayei Sara', 'חיי שרה'), ('Toldot', 'תולדות'), ('Vayetzei', 'ויצא'), ('Vayishlach', 'וישלח'),
+    ('Vayeshev', 'וישב'), ('Miketz', 'מקץ'), ('Vayigash', 'ויגש'), ('Vayechi', 'ויחי'),
+    ('Shemot', 'שמות'), ('Vaera', 'וארא'), ('Bo', 'בא'), ('Beshalach', 'בשלח'),
+    ('Yitro', 'יתרו'), ('Mishpatim', 'משפטים'), ('Terumah', 'תרומה'), ('Tetzaveh', 'תצוה'),
+    ('Ki Tisa', 'כי תשא'), ('Vayakhel', 'ויקהל'), ('Pekudei', 'פקודי'), ('Vayikra', 'ויקרא'),
+    ('Tzav', 'צו'), ('Shmini', 'שמיני'), ('Tazria', 'תזריע'), ('Metzora', 'מצורע'),
+    ('Achrei Mot', 'אחרי מות'), ('Kedoshim', 'קדושים'), ('Emor', 'אמור'), ('Behar', 'בהר'),
+    ('Bechukotai', 'בחוקותי'), ('Bamidbar', 'במדבר'), ('Nasso', 'נשא'), ("Beha'alotcha", 'בהעלותך'),
+    ("Sh'lach", 'שלח'), ('Korach', 'קרח'), ('Chukat', 'חקת'), ('Balak', 'בלק'),
+    ('Pinchas', 'פינחס'), ('Matot', 'מטות'), ('Masei', 'מסעי'), ('Devarim', 'דברים'),
+    ('Vaetchanan', 'ואתחנן'), ('Eikev', 'עקב'), ("Re'eh", 'ראה'), ('Shoftim', 'שופטים'),
+    ('Ki Teitzei', 'כי תצא'), ('Ki Tavo', 'כי תבוא'), ('Nitzavim', 'נצבים'), ('Vayeilech', 'וילך'),
+    ("Ha'azinu", 'האזינו'),
+]
+VAYAKHEL, TAZRIA, ACHREI_MOT, BEHAR, CHUKAT, MATOT, NITZAVIM, VAYEILECH, HAAZINU = 21, 26, 28, 31, 38, 41, 50, 51, 52
+
+_GEMATRIA = [(400, 'ת'), (300, 'ש'), (200, 'ר'), (100, 'ק'), (90, 'צ'), (80, 'פ'), (70, 'ע'), (60, 'ס'),
+             (50, 'נ'), (40, 'מ'), (30, 'ל'), (20, 'כ'), (10, 'י'), (9, 'ט'), (8, 'ח'), (7, 'ז'),
+             (6, 'ו'), (5, 'ה'), (4, 'ד'), (3, 'ג'), (2, 'ב'), (1, 'א')]
+
+
+# --- Date arithmetic -------------------------------------------------------
+
+def is_leap_year(year: int) -> bool:
+    return (7 * year + 1) % 19 < 7
+
+
+def last_month_of_year(year: int) -> int:
+    return ADAR_II if is_leap_year(year) else ADAR
+
+
+def _elapsed_days(year: int) -> int:
+    """Days from the epoch to the molad of Tishrei of `year`, after the molad zaken and lo ADU rules."""
+    months_elapsed = (235 * year - 234) // 19
+    parts_elapsed = 12084 + 13753 * months_elapsed
+    days = 29 * months_elapsed + parts_elapsed // 25920
+    return days + 1 if (3 * (days + 1)) % 7 < 3 else days
+
+
+def _new_year_delay(year: int) -> int:
+    """Postponement that keeps year lengths within 353-355 / 383-385 days."""
+    ny0, ny1, ny2 = _elapsed_days(year - 1), _elapsed_days(year), _elapsed_days(year + 1)
+    if ny2 - ny1 == 356:
+        return 2
+    if ny1 - ny0 == 382:
+        return 1
+    return 0
+
+
+def new_year(year: int) -> int:
+    """R.D. of 1 Tishrei `year`."""
+    return HEBREW_EPOCH + _elapsed_days(year) + _new_year_delay(year)
+
+
+def days_in_year(year: int) -> int:
+    return new_year(year + 1) - new_year(year)
+
+
+def days_in_month(year: int, month: int) -> int:
+    length = days_in_year(year)
+    if month in (IYYAR, TAMUZ, ELUL, TEVET, ADAR_II):
+        return 29
+    if month == ADAR and not is_leap_year(year):
+        return 29
+    if month == CHESHVAN and length % 10 != 5:
+        return 29
+    if month == KISLEV and length % 10 == 3:
+        return 29
+    return 30
+
+
+def _months_from_tishrei(year: int) -> List[int]:
+    return list(range(TISHREI, last_month_of_year(year) + 1)) + list(range(NISAN, TISHREI))
+
+
+@dataclass(frozen=True, order=True)
+class HebrewDate:
+    """A date in the Hebrew calendar."""
+
+    year: int
+    month: int
+    day: int
+
+    @classmethod
+    def from_gregorian(cls, gregorian: date) -> "HebrewDate":
+        fixed = gregorian.toordinal()
+        approx = int((fixed - HEBREW_EPOCH) / (35975351 / 98496)) + 1
+        year = approx - 1
+        while new_year(year + 1) <= fixed:
+            year += 1
+        day_of_year = fixed - new_year(year)
+        for month in _months_from_tishrei(year):
+            length = days_in_month(year, month)
+            if day_of_year < length:
+                return cls(year, month, day_of_year + 1)
+            day_of_year -= length
+        raise ValueError(f"Cannot convert {gregorian} to a Hebrew date")
+
+    def to_gregorian(self) -> date:
+        fixed = new_year(self.year) + self.day - 1
+        for month in _months_from_tishrei(self.year):
+            if month == self.month:
+                return date.fromordinal(fixed)
+            fixed += days_in_month(self.year, month)
+        raise ValueError(f"Invalid Hebrew month {self.month} for year {self.year}")
+
+    @property
+    def month_name(self) -> str:
+        if self.month == ADAR and is_leap_year(self.year):
+            return 'Adar I'
+        return MONTH_NAMES[self.month][0]
+
+    @property
+    def month_name_hebrew(self) -> str:
+        if self.month == ADAR and is_leap_year(self.year):
+            return 'אדר א׳'
+        return MONTH_NAMES[self.month][1]
+
+    def english(self) -> str:
+        return f"{self.day} {self.month_name} {self.year}"
+
+    def hebrew(self) -> str:
+        return f"{gematria(self.day)} {self.month_name_hebrew} {gematria(self.year % 1000)}"
+
+
+def hebrew_date(year: int, month: int, day: int) -> date:
+    """Gregorian date of a Hebrew date."""
+    return HebrewDate(year, month, day).to_gregorian()
+
+
+def gematria(number: int) -> str:
+    """Hebrew numeral with geresh/gershayim, e.g. 15 -> ט״ו, 785 -> תשפ״ה."""
+    letters = []
+    remaining = number
+    for value, letter in _GEMATRIA:
+        while remaining >= value:
+            if remaining in (15, 16):  # avoid spelling the divine name
+                letters.extend(['ט', 'ו' if remaining == 15 else 'ז'])
+                remaining = 0
+                break
+            letters.append(letter)
+            remaining -= value
+    if len(letters) == 1:
+        return letters[0] + '׳'
+    return ''.join(letters[:-1]) + '״' + letters[-1]
+
+
+# --- Holidays ----------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Holiday:
+    """A holiday, fast, Rosh Chodesh or modern Israeli observance on a given day."""
+
+    name: str
+    hebrew: str
+    category: str  # 'holiday', 'fast', 'roshchodesh', 'modern'
+    yom_tov: bool = False
+
+
+def _yom_tov_days(israel: bool) -> Dict[Tuple[int, int], None]:
+    days = [(TISHREI, 1), (TISHREI, 2), (TISHREI, 10), (TISHREI, 15), (TISHREI, 22),
+            (NISAN, 15), (NISAN, 21), (SIVAN, 6)]
+    if not israel:
+        days += [(TISHREI, 16), (TISHREI, 23), (NISAN, 16), (NISAN, 22), (SIVAN, 7)]
+    return dict.fromkeys(days)
+
+
+def holidays_for_year(year: int, israel: bool = False) -> Dict[date, List[Holiday]]:
+    """Every holiday of Hebrew `year` (Tishrei through Elul), keyed by Gregorian date."""
+    result: Dict[date, List[Holiday]] = {}
+    leap = is_leap_year(year)
+    adar = ADAR_II if leap else ADAR
+    yom_tov = _yom_tov_days(israel)
+
+    def add(month, day, name, hebrew, category='holiday'):
+        when = hebrew_date(year, month, day)
+        result.setdefault(when, []).append(Holiday(name, hebrew, category, (month, day) in yom_tov))
+
+    def postponed_fast(month, day):
+        return day + 1 if hebrew_date(year, month, day).weekday() == SATURDAY else day
+
+    add(TISHREI, 1, 'Rosh Hashana', 'ראש השנה')
+    add(TISHREI, 2, 'Rosh Hashana II', 'ראש השנה ב׳')
+    add(TISHREI, postponed_fast(TISHREI, 3), 'Tzom Gedaliah', 'צום גדליה', 'fast')
+    add(TISHREI, 9, 'Erev Yom Kippur', 'ערב יום כפור')
+    add(TISHREI, 10, 'Yom Kippur', 'יום כפור')
+    add(TISHREI, 14, 'Erev Sukkot', 'ערב סוכות')
+    add(TISHREI, 15, 'Sukkot I', 'סוכות א׳')
+    first_chol_hamoed = 16 if israel else 17
+    if not israel:
+        add(TISHREI, 16, 'Sukkot II', 'סוכות ב׳')
+    for day in range(first_chol_hamoed, 21):
+        add(TISHREI, day, f"Sukkot {_roman(day - 14)} (CH''M)", f"סוכות {gematria(day - 14)} (חוה״מ)")
+    add(TISHREI, 21, 'Sukkot VII (Hoshana Raba)', 'הושענא רבה')
+    add(TISHREI, 22, 'Shmini Atzeret', 'שמיני עצרת')
+    add(TISHREI, 22 if israel else 23, 'Simchat Torah', 'שמחת תורה')
+
+    chanukah = hebrew_date(year, KISLEV, 25)
+    for night in range(8):
+        when = chanukah + timedelta(days=night)
+        result.setdefault(when, []).append(Holiday(f"Chanukah: Day {night + 1}", f"חנוכה: יום {gematria(night + 1)}", 'holiday'))
+    add(TEVET, 10, "Asara B'Tevet", 'עשרה בטבת', 'fast')
+    add(SHVAT, 15, 'Tu BiShvat', 'ט״ו בשבט')
+
+    if leap:
+        add(ADAR, 14, 'Purim Katan', 'פורים קטן')
+    esther = 11 if hebrew_date(year, adar, 13).weekday() == SATURDAY else 13
+    add(adar, esther, "Ta'anit Esther", 'תענית אסתר', 'fast')
+    add(adar, 14, 'Purim', 'פורים')
+    add(adar, 15, 'Shushan Purim', 'שושן פורים')
+
+    add(NISAN, 14, 'Erev Pesach', 'ערב פסח')
+    add(NISAN, 15, 'Pesach I', 'פסח א׳')
+    first_chol_hamoed = 16 if israel else 17
+    if not israel:
+        add(NISAN, 16, 'Pesach II', 'פסח ב׳')
+    for day in range(first_chol_hamoed, 21):
+        add(NISAN, day, f"Pesach {_roman(day - 14)} (CH''M)", f"פסח {gematria(day - 14)} (חוה״מ)")
+    add(NISAN, 21, 'Pesach VII', 'פסח ז׳')
+    if not israel:
+        add(NISAN, 22, 'Pesach VIII', 'פסח ח׳')
+
+    shoah = {FRIDAY: 26, SUNDAY: 28}.get(hebrew_date(year, NISAN, 27).weekday(), 27)
+    add(NISAN, shoah, 'Yom HaShoah', 'יום השואה', 'modern')
+    atzmaut = {FRIDAY: 4, SATURDAY: 3, MONDAY: 6}.get(hebrew_date(year, IYYAR, 5).weekday(), 5)
+    add(IYYAR, atzmaut - 1, 'Yom HaZikaron', 'יום הזכרון', 'modern')
+    add(IYYAR, atzmaut, "Yom HaAtzma'ut", 'יום העצמאות', 'modern')
+    add(IYYAR, 14, 'Pesach Sheni', 'פסח שני')
+    add(IYYAR, 18, 'Lag BaOmer', 'ל״ג בעומר')
+    add(IYYAR, 28, 'Yom Yerushalayim', 'יום ירושלים', 'modern')
+
+    add(SIVAN, 5, 'Erev Shavuot', 'ערב שבועות')
+    add(SIVAN, 6, 'Shavuot I', 'שבועות א׳')
+    if not israel:
+        add(SIVAN, 7, 'Shavuot II', 'שבועות ב׳')
+
+    add(TAMUZ, postponed_fast(TAMUZ, 17), 'Tzom Tammuz', 'צום תמוז', 'fast')
+    add(AV, postponed_fast(AV, 9), "Tish'a B'Av", 'תשעה באב', 'fast')
+    add(AV, 15, "Tu B'Av", 'ט״ו באב')
+    add(ELUL, 29, 'Erev Rosh Hashana', 'ערב ראש השנה')
+
+    months = _months_from_tishrei(year)
+    for previous, month in zip(months, months[1:]):
+        current = HebrewDate(year, month, 1)
+        name = f"Rosh Chodesh {current.month_name}"
+        hebrew = f"ראש חודש {current.month_name_hebrew}"
+        if days_in_month(year, previous) == 30:
+            add(previous, 30, name, hebrew, 'roshchodesh')
+        add(month, 1, name, hebrew, 'roshchodesh')
+    return result
+
+
+def _roman(number: int) -> str:
+    return ['I', 'II', 'III', 'IV', 'V', 'VI', 'VII', 'VIII'][number - 1]
+
+
+# --- Parsha ------------------------------------------------------------------
+
+def _no_parsha(day: HebrewDate, israel: bool) -> bool:
+    """Shabbatot that fall on a festival or chol hamoed read a holiday portion instead."""
+    if israel and (day.month, day.day) in ((TISHREI, 23), (NISAN, 22), (SIVAN, 7)):
+        return False
+    if day.month == TISHREI and (day.day in (1, 2, 10) or 15 <= day.day <= 23):
+        return True
+    if day.month == NISAN and 15 <= day.day <= 22:
+        return True
+    return day.month == SIVAN and day.day in (6, 7)
+
+
+def parsha_table(year: int, israel: bool = False) -> Dict[date, Optional[Tuple[int, ...]]]:
+    """Reading for every Shabbat of Hebrew `year`: parsha indexes into PARSHIOT, or None on holidays."""
+    leap = is_leap_year(year)
+    rosh_hashana = hebrew_date(year, TISHREI, 1)
+    pesach_weekday = hebrew_date(year, NISAN, 15).weekday()
+    erev_pesach = hebrew_date(year, NISAN, 14)
+    tisha_bav = hebrew_date(year, AV, 9)
+    next_rosh_hashana = hebrew_date(year + 1, TISHREI, 1)
+
+    # Vayeilech and Ha'azinu close the cycle begun last year; Vayeilech was
+    # already read with Nitzavim when Rosh Hashana falls on Thursday or Shabbat
+    queue = [VAYEILECH, HAAZINU] + list(range(VAYEILECH + 1))
+    if rosh_hashana.weekday() in (THURSDAY, SATURDAY):
+        queue.pop(0)
+
+    table: Dict[date, Optional[Tuple[int, ...]]] = {}
+    shabbat = rosh_hashana + timedelta(days=(SATURDAY - rosh_hashana.weekday()) % 7)
+    while shabbat < next_rosh_hashana:
+        if _no_parsha(HebrewDate.from_gregorian(shabbat), israel):
+            table[shabbat] = None
+        else:
+            parsha = queue.pop(0)
+            combined = (
+                (parsha == VAYAKHEL and (erev_pesach - shabbat).days // 7 < 3)
+                or (parsha in (TAZRIA, ACHREI_MOT) and not leap)
+                or (parsha == BEHAR and not leap and (not israel or pesach_weekday != SATURDAY))
+                or (parsha == CHUKAT and not israel and pesach_weekday == THURSDAY)
+                or (parsha == MATOT and (tisha_bav - shabbat).days // 7 < 2)
+                or (parsha == NITZAVIM and next_rosh_hashana.weekday() in (THURSDAY, SATURDAY))
+            )
+            table[shabbat] = (parsha, queue.pop(0)) if combined else (parsha,)
+        shabbat += timedelta(days=7)
+    return table
+
+
+def parsha_names(reading: Tuple[int, ...]) -> Tuple[str, str]:
+    """English and Hebrew names of a (possibly combined) reading."""
+    return (
+        '-'.join(PARSHIOT[index][0] for index in reading),
+        '-'.join(PARSHIOT[index][1] for index in reading),
+    )
+
+
+# --- Per-day table -----------------------------------------------------------
+
+@dataclass(frozen=True)
+class CalendarDay:
+    """Everything location-independent about one civil day."""
+
+    gregorian: date
+    hebrew: HebrewDate
+    holidays: Tuple[Holiday, ...] = ()
+    parsha: Optional[Tuple[str, str]] = None  # this week's reading, from the coming Shabbat
+    is_shabbat: bool = False
+    is_yom_tov: bool = False
+    candle_lighting: Optional[str] = None  # 'before_sunset', or 'after_nightfall' from Shabbat/yom tov into yom tov
+    havdalah: bool = False
+
+    @property
+    def rest_day(self) -> bool:
+        return self.is_shabbat or self.is_yom_tov
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'date': self.gregorian.isoformat(),
+            'hebrew_date': {'english': self.hebrew.english(), 'hebrew': self.hebrew.hebrew()},
+            'hebrew_year': self.hebrew.year,
+            'hebrew_month': self.hebrew.month_name,
+            'hebrew_day': self.hebrew.day,
+            'parsha': {'english': self.parsha[0], 'hebrew': self.parsha[1]} if self.parsha else None,
+            'holidays': [
+                {'name': holiday.name, 'hebrew': holiday.hebrew, 'category': holiday.category}
+                for holiday in self.holidays
+            ],
+            'is_shabbat': self.is_shabbat,
+            'is_yom_tov': self.is_yom_tov,
+            'candle_lighting': self.candle_lighting,
+            'havdalah': self.havdalah,
+        }
+
+
+class HebrewCalendar:
+    """Per-day calendar table for a rolling window around today."""
+
+    def __init__(self, days_behind: int = 31, days_ahead: int = 365):
+        self.days_behind = days_behind
+        self.days_ahead = days_ahead
+        self._tables: Dict[bool, Dict[date, CalendarDay]] = {}
+        self._window: Optional[Tuple[date, date]] = None
+        self._lock = threading.Lock()
+
+    def day(self, gregorian: date, israel: bool = False) -> CalendarDay:
+        """Calendar information for `gregorian`; a table read inside the window."""
+        if hasattr(gregorian, 'date'):
+            gregorian = gregorian.date()
+        self._ensure_window(date.today())
+        entry = self._tables.get(israel, {}).get(gregorian)
+        if entry is not None:
+            return entry
+        return build_days(gregorian, gregorian, israel)[gregorian]
+
+    def _ensure_window(self, today: date) -> None:
+        window = self._window
+        if window and window[0] <= today - timedelta(days=self.days_behind) and today + timedelta(days=self.days_ahead) <= window[1]:
+            return
+        with self._lock:
+            if self._window is window:
+                # Build a month beyond the window so the table is not rebuilt daily
+                start = today - timedelta(days=self.days_behind)
+                end = today + timedelta(days=self.days_ahead + 30)
+                self._tables = {israel: build_days(start, end, israel) for israel in (False, True)}
+                self._window = (start, end)
+                logger.info("Built Hebrew calendar table", start=start.isoformat(), end=end.isoformat())
+
+
+def build_days(start: date, end: date, israel: bool = False) -> Dict[date, CalendarDay]:
+    """CalendarDay for every date from `start` to `end` inclusive."""
+    first_year = HebrewDate.from_gregorian(start).year
+    last_year = HebrewDate.from_gregorian(end + timedelta(days=8)).year
+    holidays: Dict[date, List[Holiday]] = {}
+    readings: Dict[date, Optional[Tuple[int, ...]]] = {}
+    for year in range(first_year, last_year + 1):
+        holidays.update(holidays_for_year(year, israel))
+        readings.update(parsha_table(year, israel))
+
+    def is_rest(day: date) -> bool:
+        return day.weekday() == SATURDAY or any(h.yom_tov for h in holidays.get(day, ()))
+
+    days: Dict[date, CalendarDay] = {}
+    current = start
+    while current <= end:
+        rest_today, rest_tomorrow = is_rest(current), is_rest(current + timedelta(days=1))
+        candles = None
+        if rest_tomorrow:
+            candles = 'after_nightfall' if rest_today else 'before_sunset'
+        coming_shabbat = current + timedelta(days=(SATURDAY - current.weekday()) % 7)
+        reading = readings.get(coming_shabbat)
+        days[current] = CalendarDay(
+            gregorian=current,
+            hebrew=HebrewDate.from_gregorian(current),
+            holidays=tuple(holidays.get(current, ())),
+            parsha=parsha_names(reading) if reading else None,
+            is_shabbat=current.weekday() == SATURDAY,
+            is_yom_tov=any(h.yom_tov for h in holidays.get(current, ())),
+            candle_lighting=candles,
+            havdalah=rest_today and not rest_tomorrow,
+        )
+        current += timedelta(days=1)
+    return days
+
+
+_calendar: Optional[HebrewCalendar] = None
+
+
+def get_hebrew_calendar() -> HebrewCalendar:
+    """Process-wide calendar table."""
+    global _calendar
+    if _calendar is None:
+        _calendar = HebrewCalendar()
+    return _calendar
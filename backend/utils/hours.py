@@ -1,7 +1,8 @@
 import json
-import logging
 import re
+import threading
 from datetime import datetime, time, timedelta
+from functools import lru_cache
 import pytz
 from dateutil import parser as date_parser
 
@@ -23,8 +24,51 @@ Features:
 - Status calculation helpers
 - Caching for performance optimization
 """
-# Configure logging
-logger = logging.getLogger(__name__)
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Coordinates are rounded to this many decimals (~110 m) before timezone lookup,
+# so nearby listings share one cached answer
+TIMEZONE_COORDINATE_PRECISION = 3
+
+_timezone_finder = None
+_timezone_finder_lock = threading.Lock()
+
+
+def _get_timezone_finder():
+    """Process-wide TimezoneFinder; its polygon data is loaded once, on first use."""
+    global _timezone_finder
+    if _timezone_finder is None:
+        with _timezone_finder_lock:
+            if _timezone_finder is None:
+                _timezone_finder = TimezoneFinder()
+    return _timezone_finder
+
+
+@lru_cache(maxsize=8192)
+def _timezone_at(latitude: float, longitude: float) -> str | None:
+    """Polygon lookup for already-rounded coordinates (memoized)."""
+    return _get_timezone_finder().timezone_at(lat=latitude, lng=longitude)
+
+
+def lookup_timezone(latitude: float | None, longitude: float | None) -> str | None:
+    """Precise timezone for coordinates, or None without coordinates or timezonefinder."""
+    if latitude is None or longitude is None or not TIMEZONEFINDER_AVAILABLE:
+        return None
+    try:
+        return _timezone_at(
+            round(float(latitude), TIMEZONE_COORDINATE_PRECISION),
+            round(float(longitude), TIMEZONE_COORDINATE_PRECISION),
+        )
+    except Exception as e:
+        logger.warning(
+            "TimezoneFinder lookup failed",
+            error=str(e),
+            latitude=latitude,
+            longitude=longitude,
+        )
+        return None
 
 
 class HoursParser:
@@ -293,19 +337,10 @@ class TimezoneHelper:
             if state and state.upper() == "FL":
                 return default_tz
             return default_tz
-        if TIMEZONEFINDER_AVAILABLE:
-            try:
-                # Use timezonefinder for precise timezone lookup
-                tf = TimezoneFinder()
-                tz_name = tf.timezone_at(lat=latitude, lng=longitude)
-                return tz_name or default_tz
-            except Exception as e:
-                logger.warning(
-                    "TimezoneFinder failed, falling back to manual lookup",
-                    error=str(e),
-                    latitude=latitude,
-                    longitude=longitude,
-                )
+        # Precise lookup (shared finder, memoized by rounded coordinates)
+        tz_name = lookup_timezone(latitude, longitude)
+        if tz_name:
+            return tz_name
         # Fallback to manual mapping
         return TimezoneHelper._manual_timezone_lookup(
             latitude,
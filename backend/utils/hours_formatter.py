@@ -2,6 +2,7 @@ import datetime
 from typing import Any, Dict, List, Optional
 import pytz
 from .logging_config import get_logger
+from .weekly_hours import is_open_at
 
 """Unified hours formatting utilities.
 This module provides a centralized location for all hours formatting functions
@@ -287,27 +288,8 @@ class HoursFormatter:
         try:
             if not hours_doc:
                 return False
-            hours_data = hours_doc.get("hours", {})
-            timezone = hours_doc.get("timezone", "America/New_York")
-            # Get current time in restaurant's timezone
-            tz = pytz.timezone(timezone)
-            now = datetime.datetime.now(tz)
-            current_day = now.strftime("%A").lower()
-            current_time = now.time()
-            # Get today's hours
-            day_abbr = HoursFormatter._get_day_abbreviation(current_day)
-            today_hours = hours_data.get(day_abbr, {})
-            if not today_hours.get("is_open", False):
-                return False
-            # Parse open and close times
-            open_time = HoursFormatter._parse_time_string(today_hours.get("open", ""))
-            close_time = HoursFormatter._parse_time_string(today_hours.get("close", ""))
-            if not open_time or not close_time:
-                return False
-            # Handle overnight hours (e.g., 11PM - 2AM)
-            if close_time < open_time:
-                return current_time >= open_time or current_time <= close_time
-            return open_time <= current_time <= close_time
+            # One shared parser (utils.weekly_hours), memoized per hours document
+            return bool(is_open_at(hours_doc))
         except Exception as e:
             logger.exception("Error checking if open now", error=str(e))
             return False
@@ -9,7 +9,6 @@ role-based access control.
 import os
 import secrets
 import jwt
-import bcrypt
 import logging
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
@@ -18,6 +17,7 @@ from sqlalchemy.types import JSON
 from sqlalchemy.exc import IntegrityError
 from utils.logging_config import get_logger
 from utils.error_handler import AuthenticationError, ValidationError
+from services.auth.password_pool import PasswordPoolSaturated, get_password_pool, needs_rehash
 
 logger = get_logger(__name__)
 
@@ -26,30 +26,37 @@ class PasswordSecurity:
     """Password security utilities for hashing and validation."""
     
     @staticmethod
-    def hash_password(password: str) -> str:
-        """Hash password using bcrypt with salt."""
-        if not password or len(password) < 8:
-            raise ValidationError("Password must be at least 8 characters long")
-        
-        # Generate salt and hash password with configurable cost factor
-        import os
+    def bcrypt_rounds() -> int:
+        """Target bcrypt cost factor for new hashes."""
         cost_factor = int(os.getenv('BCRYPT_ROUNDS', '10'))  # Default to 10 for performance
         if os.getenv('FLASK_ENV') == 'development':
             cost_factor = max(8, cost_factor - 2)  # Reduce for development
+        return cost_factor
+    
+    @staticmethod
+    def hash_password(password: str) -> str:
+        """Hash password using bcrypt with salt (off the request thread, see password_pool)."""
+        if not password or len(password) < 8:
+            raise ValidationError("Password must be at least 8 characters long")
         
-        salt = bcrypt.gensalt(rounds=cost_factor)
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return password_hash.decode('utf-8')
+        return get_password_pool().hash_password(password, PasswordSecurity.bcrypt_rounds())
     
     @staticmethod
     def verify_password(password: str, password_hash: str) -> bool:
         """Verify password against hash."""
         try:
-            return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+            return get_password_pool().verify_password(password, password_hash)
+        except PasswordPoolSaturated:
+            raise
         except Exception as e:
             logger.error(f"Password verification error: {e}")
             return False
     
+    @staticmethod
+    def needs_rehash(password_hash: str) -> bool:
+        """True when the stored hash was made with a cost below bcrypt_rounds()."""
+        return needs_rehash(password_hash, PasswordSecurity.bcrypt_rounds())
+    
     @staticmethod
     def validate_password_strength(password: str) -> Dict[str, Any]:
         """Validate password strength and return feedback."""
@@ -463,13 +470,42 @@ class PostgresAuthManager:
                 
                 self._log_auth_event(user_id, 'login_success', True, {'email': email}, ip_address)
                 logger.info(f"User authenticated successfully: {email}")
+            
+            # Hashes made with an old cost factor are upgraded while we have the password
+            if self.password_security.needs_rehash(user_data['password_hash']):
+                self._upgrade_password_hash(user_id, password, user_data['password_hash'])
+            
+            return user_info
                 
-                return user_info
-                
+        except PasswordPoolSaturated:
+            raise
         except Exception as e:
             logger.error(f"Authentication error: {e}")
             return None
     
+    def _upgrade_password_hash(self, user_id: str, password: str, old_hash: str) -> None:
+        """Re-hash a just-verified password whose stored hash uses an outdated cost.
+        
+        Runs after the login transaction and never fails the login: strength
+        rules are not re-applied (legacy passwords may be shorter than today's
+        minimum), and a busy pool defers the upgrade to a later login.
+        """
+        try:
+            new_hash = get_password_pool().hash_password(password, PasswordSecurity.bcrypt_rounds())
+            with self.db.session_scope() as session:
+                # Skip if the password changed while we were hashing
+                session.execute(
+                    text("""
+                        UPDATE users SET password_hash = :new_hash
+                        WHERE id = :user_id AND password_hash = :old_hash
+                    """),
+                    {'user_id': user_id, 'new_hash': new_hash, 'old_hash': old_hash}
+                )
+        except PasswordPoolSaturated:
+            pass
+        except Exception as e:
+            logger.warning(f"Password hash upgrade failed for user {user_id}: {e}")
+    
     def generate_tokens(self, user_info: Dict[str, Any]) -> Dict[str, str]:
         """Generate access and refresh tokens for authenticated user."""
         access_token = self.token_manager.generate_access_token(
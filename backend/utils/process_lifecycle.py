@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Per-process lifecycle for pooled database and Redis connections.
+
+Gunicorn runs with preload_app, so module-level singletons (connection
+managers, Redis managers, the services entity_api builds at import time) are
+created in the master and inherited by every worker. Their pools still hold
+the master's sockets. Two workers that use the same inherited socket
+interleave bytes on one server session.
+
+Pooled resources register themselves here when they are created. The
+gunicorn post_fork hook calls after_fork(), which makes each one drop the
+inherited connections without closing them, since the master still owns
+them. Workers then open their own connections lazily on first use. With
+POOL_PREWARM_CONNECTIONS set, a fixed number are opened up front instead.
+
+A registered resource implements reset_after_fork() and optionally
+prewarm(target).
+
+Because a fresh worker no longer starts from stale sockets, engines no
+longer need pool_pre_ping's round trip on every checkout.
+install_idle_liveness_check() pings only connections that have sat idle in
+the pool for longer than DB_POOL_IDLE_PING_SECONDS.
+
+Configuration (environment):
+    POOL_PREWARM_CONNECTIONS     default: 0 (connect lazily)
+    DB_POOL_IDLE_PING_SECONDS    default: 30
+"""
+
+import os
+import time
+import weakref
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DisconnectionError
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_resources: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def register_fork_resource(resource):
+    """Reset `resource` in every forked worker; returns it for chaining."""
+    _resources.add(resource)
+    return resource
+
+
+def after_fork(prewarm_target: Optional[int] = None) -> None:
+    """Drop inherited connections in a freshly forked worker, then optionally prewarm."""
+    for resource in list(_resources):
+        try:
+            resource.reset_after_fork()
+        except Exception as e:
+            logger.warning("Failed to reset pool after fork", resource=type(resource).__name__, error=str(e))
+    if prewarm_target is None:
+        prewarm_target = int(os.getenv('POOL_PREWARM_CONNECTIONS', '0'))
+    if prewarm_target > 0:
+        prewarm(prewarm_target)
+
+
+def prewarm(target: int) -> None:
+    """Open up to `target` connections in every registered pool that supports it."""
+    for resource in list(_resources):
+        warm = getattr(resource, 'prewarm', None)
+        if warm is None:
+            continue
+        try:
+            warm(target)
+        except Exception as e:
+            logger.warning("Failed to prewarm pool", resource=type(resource).__name__, error=str(e))
+
+
+def prewarm_engine(engine: Engine, target: int) -> None:
+    """Check out `target` connections at once and return them, leaving them pooled."""
+    connections = []
+    try:
+        for _ in range(target):
+            connections.append(engine.connect())
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def install_idle_liveness_check(engine: Engine, idle_seconds: Optional[float] = None) -> None:
+    """Ping pooled connections on checkout only when they have been idle for a while.
+
+    A replacement for pool_pre_ping. Connections the driver already knows
+    are closed are always discarded. Connections checked in less than
+    `idle_seconds` ago are handed out without a round trip.
+    """
+    if idle_seconds is None:
+        idle_seconds = float(os.getenv('DB_POOL_IDLE_PING_SECONDS', '30'))
+
+    @event.listens_for(engine, "checkin")
+    def mark_idle(dbapi_connection, connection_record):
+        connection_record.info['checked_in_at'] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def check_liveness(dbapi_connection, connection_record, connection_proxy):
+        if getattr(dbapi_connection, 'closed', 0):
+            raise DisconnectionError("connection closed while pooled")
+        checked_in_at = connection_record.info.get('checked_in_at')
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception as e:
+            # The pool invalidates this connection and retries with a fresh one
+            raise DisconnectionError(f"idle connection failed liveness check: {e}") from e
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
@@ -0,0 +1,550 @@
+"""
+Compiled weekly opening hours.
+
+One parser for every hours shape stored in the restaurants table (Google
+Places ``periods``/``weekday_text``, the normalized ``weekly`` document, per-day
+dicts, ``Day: range`` text) that compiles hours once into minute-of-week ranges.
+
+Week minutes count from Monday 00:00 local time (0..10080). Compiled hours are
+persisted as an ``int4multirange`` (``restaurants.hours_week_ranges``) plus the
+timezone they are local to (``restaurants.hours_timezone``), so "open now" is an
+indexed containment test in SQL. In process they are a 2016-slot bitmap
+(5-minute slots): a slot is open when its first minute is inside a range, and
+the SQL predicate queries the same slot-start minute, so both agree.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Tuple
+
+import pytz
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+MINUTES_PER_DAY = 1440
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+SLOT_MINUTES = 5
+SLOTS_PER_WEEK = MINUTES_PER_WEEK // SLOT_MINUTES  # 2016
+DEFAULT_TIMEZONE = "America/New_York"
+
+DAY_KEYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+_DAY_ALIASES = {
+    "mon": 0, "monday": 0,
+    "tue": 1, "tues": 1, "tuesday": 1,
+    "wed": 2, "weds": 2, "wednesday": 2,
+    "thu": 3, "thur": 3, "thurs": 3, "thursday": 3,
+    "fri": 4, "friday": 4,
+    "sat": 5, "saturday": 5,
+    "sun": 6, "sunday": 6,
+}
+_DAY_GROUPS = {
+    "daily": range(7),
+    "everyday": range(7),
+    "every day": range(7),
+    "weekdays": range(5),
+    "weekends": (5, 6),
+}
+
+_SPACES_RE = re.compile(r"[     ]")
+_DASHES_RE = re.compile(r"[–—−]")
+_CLOCK_RE = re.compile(r"^(\d{1,2})(?::?(\d{2}))?\s*(am|pm|a|p)?$")
+_DAY_WORD = r"(?:mon|tue|wed|thu|fri|sat|sun)[a-z]*\.?"
+_DAY_SPEC_RE = re.compile(
+    rf"(?<![a-z])(daily|every\s?day|weekdays|weekends|"
+    rf"{_DAY_WORD}(?:\s*(?:-|to|,|&|and)\s*{_DAY_WORD})*)\s*:\s*",
+    re.IGNORECASE,
+)
+_CLOSED_RE = re.compile(r"^(closed|close|none)$")
+_ALL_DAY_RE = re.compile(r"^(open\s*)?(24\s*hours?|24/7|all\s*day|24\s*hrs?)$")
+
+
+def _normalize_text(value: str) -> str:
+    value = _SPACES_RE.sub(" ", value)
+    value = _DASHES_RE.sub("-", value)
+    return re.sub(r"\s+", " ", value).strip()
+
+
+def parse_clock(value: Any) -> Optional[int]:
+    """Parse a clock time ("9", "9:30 PM", "0930", "21:30", "noon") to minutes of day.
+
+    "24:00" parses to 1440 (end of day). Returns None when the value is not a time.
+    """
+    if value is None:
+        return None
+    text = _normalize_text(str(value)).lower().replace(".", "")
+    if text == "noon":
+        return 720
+    if text == "midnight":
+        return 0
+    match = _CLOCK_RE.match(text)
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    suffix = match.group(3)
+    if minute >= 60:
+        return None
+    if suffix:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if suffix.startswith("p") else 0)
+    elif hour == 24 and minute == 0:
+        return MINUTES_PER_DAY
+    elif hour > 23:
+        return None
+    return hour * 60 + minute
+
+
+def _suffix(value: str) -> Optional[str]:
+    match = re.search(r"(am|pm|a|p)\.?$", value.strip().lower().replace(".", ""))
+    return match.group(1)[0] if match else None
+
+
+def parse_time_range(value: str) -> Optional[Tuple[int, int]]:
+    """Parse one "open - close" range to (open, close) minutes of day.
+
+    An open time without am/pm borrows the close time's ("6 - 10 PM").
+    """
+    parts = re.split(r"\s*-\s*|\s+to\s+", _normalize_text(value).lower(), maxsplit=1)
+    if len(parts) != 2:
+        return None
+    open_text, close_text = parts
+    close = parse_clock(close_text)
+    open_ = parse_clock(open_text)
+    if open_ is not None and close is not None and not _suffix(open_text) and _suffix(close_text):
+        same = parse_clock(f"{open_text} {_suffix(close_text)}m")
+        other = parse_clock(f"{open_text} {'a' if _suffix(close_text) == 'p' else 'p'}m")
+        if same is not None and same <= close:
+            open_ = same
+        elif other is not None:
+            open_ = other
+    if open_ is None or close is None:
+        return None
+    return open_, close
+
+
+def parse_day_ranges(value: Any) -> Optional[List[Tuple[int, int]]]:
+    """Parse one day's hours: "Closed", "Open 24 hours", "9 AM - 2 PM, 5 - 10 PM".
+
+    Returns a (possibly empty) list of (open, close) minutes, or None if unparseable.
+    """
+    text = _normalize_text(str(value)).lower()
+    if not text:
+        return None
+    if _CLOSED_RE.match(text):
+        return []
+    if _ALL_DAY_RE.match(text):
+        return [(0, MINUTES_PER_DAY)]
+    ranges = []
+    for part in re.split(r"\s*(?:,|;|\band\b|&)\s*", text):
+        if not part:
+            continue
+        parsed = parse_time_range(part)
+        if parsed is None:
+            return None
+        ranges.append(parsed)
+    return ranges or None
+
+
+def parse_day_spec(value: str) -> List[int]:
+    """Parse "Mon-Fri", "Sun - Thu", "Mon, Wed & Fri", "Daily" to day indexes (Monday = 0)."""
+    text = _normalize_text(value).lower().rstrip(":").strip()
+    if text in _DAY_GROUPS:
+        return list(_DAY_GROUPS[text])
+    days: List[int] = []
+    for chunk in re.split(r"\s*(?:,|&|\band\b)\s*", text):
+        ends = [e.strip(" .") for e in re.split(r"\s*(?:-|\bto\b)\s*", chunk) if e.strip(" .")]
+        indexes = [_day_index(e) for e in ends]
+        if not indexes or None in indexes:
+            continue
+        if len(indexes) == 2:
+            start, end = indexes
+            days.extend((start + i) % 7 for i in range((end - start) % 7 + 1))
+        else:
+            days.extend(indexes)
+    return days
+
+
+def _day_index(value: Any) -> Optional[int]:
+    key = str(value).strip().lower().rstrip(".")
+    if key in _DAY_ALIASES:
+        return _DAY_ALIASES[key]
+    return _DAY_ALIASES.get(key[:3]) if len(key) >= 3 and key[:3] in _DAY_ALIASES else None
+
+
+class WeeklyHours:
+    """Compiled weekly hours: merged minute-of-week ranges plus their slot bitmap."""
+
+    __slots__ = ("ranges", "bitmap")
+
+    def __init__(self, ranges: Iterable[Tuple[int, int]] = ()):
+        self.ranges = _merge(ranges)
+        bitmap = 0
+        for start, end in self.ranges:
+            first = -(-start // SLOT_MINUTES)
+            last = -(-end // SLOT_MINUTES)
+            if last > first:
+                bitmap |= ((1 << (last - first)) - 1) << first
+        self.bitmap = bitmap
+
+    @classmethod
+    def from_days(cls, days: dict) -> "WeeklyHours":
+        """Build from {day index: [(open, close), ...]}; close <= open runs past midnight."""
+        ranges = []
+        for day, day_ranges in days.items():
+            base = day * MINUTES_PER_DAY
+            for open_, close in day_ranges:
+                end = close if close > open_ else close + MINUTES_PER_DAY
+                ranges.append((base + open_, base + end))
+        return cls(ranges)
+
+    @classmethod
+    def from_multirange(cls, literal: Optional[str]) -> Optional["WeeklyHours"]:
+        """Parse a Postgres int4multirange literal such as "{[540,1020),[1980,2460)}"."""
+        if literal is None:
+            return None
+        return _weekly_hours_from_multirange(literal)
+
+    def to_multirange(self) -> str:
+        return "{" + ",".join(f"[{start},{end})" for start, end in self.ranges) + "}"
+
+    def is_open_slot(self, slot: int) -> bool:
+        return bool((self.bitmap >> slot) & 1)
+
+    def is_open_at(self, local_time: datetime) -> bool:
+        """O(1) open check for a wall-clock time in the hours' timezone."""
+        return self.is_open_slot(slot_of(local_time))
+
+    def next_open_after(self, local_time: datetime) -> Optional[datetime]:
+        """Start of the next open slot after `local_time` (None if never open)."""
+        return self._next_transition(local_time, opening=True)
+
+    def next_close_after(self, local_time: datetime) -> Optional[datetime]:
+        """Start of the next closed slot after `local_time` (None if always open)."""
+        return self._next_transition(local_time, opening=False)
+
+    def _next_transition(self, local_time: datetime, opening: bool) -> Optional[datetime]:
+        mask = (1 << SLOTS_PER_WEEK) - 1
+        bits = self.bitmap if opening else ~self.bitmap & mask
+        if not bits:
+            return None
+        current = slot_of(local_time)
+        # Rotate so the slot after `current` is bit 0, then take the lowest set bit
+        start = (current + 1) % SLOTS_PER_WEEK
+        rotated = ((bits >> start) | (bits << (SLOTS_PER_WEEK - start))) & mask
+        offset = (rotated & -rotated).bit_length()
+        slot_start = local_time.replace(second=0, microsecond=0) - timedelta(
+            minutes=local_time.minute % SLOT_MINUTES
+        )
+        return slot_start + timedelta(minutes=offset * SLOT_MINUTES)
+
+    @property
+    def is_always_closed(self) -> bool:
+        return not self.ranges
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, WeeklyHours) and self.ranges == other.ranges
+
+    def __hash__(self) -> int:
+        return hash(tuple(self.ranges))
+
+    def __repr__(self) -> str:
+        return f"WeeklyHours({self.to_multirange()})"
+
+
+def _merge(ranges: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Clip ranges to the week (wrapping Sunday night into Monday) and merge overlaps."""
+    split: List[Tuple[int, int]] = []
+    for start, end in ranges:
+        if end <= start:
+            continue
+        if end - start >= MINUTES_PER_WEEK:
+            return [(0, MINUTES_PER_WEEK)]
+        duration = end - start
+        start %= MINUTES_PER_WEEK
+        end = start + duration
+        if end > MINUTES_PER_WEEK:
+            split.append((start, MINUTES_PER_WEEK))
+            split.append((0, end - MINUTES_PER_WEEK))
+        else:
+            split.append((start, end))
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(split):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+@lru_cache(maxsize=4096)
+def _weekly_hours_from_multirange(literal: str) -> WeeklyHours:
+    return WeeklyHours(
+        (int(start), int(end)) for start, end in re.findall(r"\[(\d+),(\d+)\)", literal)
+    )
+
+
+def minute_of_week(local_time: datetime) -> int:
+    return local_time.weekday() * MINUTES_PER_DAY + local_time.hour * 60 + local_time.minute
+
+
+def slot_of(local_time: datetime) -> int:
+    return minute_of_week(local_time) // SLOT_MINUTES
+
+
+def slot_start_minute(local_time: datetime) -> int:
+    """Minute of week at the start of the slot; the value the SQL predicate tests."""
+    return slot_of(local_time) * SLOT_MINUTES
+
+
+def resolve_timezone(*candidates: Optional[str]) -> str:
+    """First valid timezone name among the candidates, else DEFAULT_TIMEZONE."""
+    for candidate in candidates:
+        if not candidate or not isinstance(candidate, str):
+            continue
+        try:
+            pytz.timezone(candidate)
+            return candidate
+        except pytz.UnknownTimeZoneError:
+            logger.debug("Ignoring unknown timezone", timezone=candidate)
+    return DEFAULT_TIMEZONE
+
+
+# ---------------------------------------------------------------------------
+# Parsing of stored hours shapes
+# ---------------------------------------------------------------------------
+
+def compile_hours(value: Any) -> Optional[WeeklyHours]:
+    """Compile any supported hours value to WeeklyHours.
+
+    Returns None when the value is missing or cannot be understood (unknown
+    hours), and an always-closed WeeklyHours when every listed day is closed.
+    Days that are not mentioned are closed.
+    """
+    try:
+        days = _parse_value(value)
+    except Exception as e:
+        logger.debug("Could not compile hours", error=str(e))
+        return None
+    if days is None:
+        return None
+    if isinstance(days, WeeklyHours):
+        return days
+    return WeeklyHours.from_days(days)
+
+
+def _parse_value(value: Any):
+    if value is None:
+        return None
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("utf-8", "replace")
+    if isinstance(value, str):
+        stripped = value.strip()
+        if not stripped:
+            return None
+        if stripped[0] in "{[":
+            try:
+                return _parse_value(json.loads(stripped))
+            except ValueError:
+                pass
+        return _parse_text(stripped)
+    if isinstance(value, dict):
+        return _parse_dict(value)
+    if isinstance(value, list):
+        return _parse_list(value)
+    return None
+
+
+def _parse_text(text: str) -> Optional[dict]:
+    """Parse "Monday: 9 AM - 5 PM" lines (newline- or comma-separated)."""
+    text = _normalize_text(text.replace("\r", "\n").replace("\n", " ; "))
+    matches = list(_DAY_SPEC_RE.finditer(text))
+    if not matches:
+        return None
+    days: dict = {}
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        ranges = parse_day_ranges(text[match.end():end].strip(" ;,"))
+        if ranges is None:
+            continue
+        for day in parse_day_spec(match.group(1)):
+            days.setdefault(day, []).extend(ranges)
+    return days or None
+
+
+def _parse_dict(data: dict):
+    if isinstance(data.get("periods"), list) and data["periods"]:
+        return _parse_google_periods(data["periods"])
+    if isinstance(data.get("weekday_text"), list) and data["weekday_text"]:
+        return _parse_list(data["weekday_text"])
+    for key in ("weekly", "hours"):
+        if isinstance(data.get(key), (dict, list)):
+            return _parse_value(data[key])
+
+    days: dict = {}
+    for key, day_value in data.items():
+        day_list = [_day_index(key)] if _day_index(key) is not None else parse_day_spec(str(key))
+        if not day_list:
+            continue
+        ranges = _parse_day_value(day_value)
+        if ranges is None:
+            continue
+        for day in day_list:
+            days.setdefault(day, []).extend(ranges)
+    return days or None
+
+
+def _parse_day_value(value: Any) -> Optional[List[Tuple[int, int]]]:
+    """One day's value in a per-day dict: text, a list of ranges, or a range dict."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return parse_day_ranges(value)
+    if isinstance(value, list):
+        ranges = []
+        for item in value:
+            parsed = _parse_day_value(item)
+            if parsed is None:
+                return None
+            ranges.extend(parsed)
+        return ranges
+    if isinstance(value, dict):
+        if value.get("closed") or value.get("is_closed") or value.get("is_open") is False:
+            return []
+        if value.get("open_24h") or value.get("is_24_hours"):
+            return [(0, MINUTES_PER_DAY)]
+        # Prefer the original text: derived open_time/close_time may have lost am/pm
+        if value.get("raw"):
+            ranges = parse_day_ranges(value["raw"])
+            if ranges is not None:
+                return ranges
+        open_ = parse_clock(value.get("open", value.get("open_time")))
+        close = parse_clock(value.get("close", value.get("close_time")))
+        if open_ is not None and close is not None:
+            return [(open_, close)]
+    return None
+
+
+def _parse_list(items: list):
+    if all(isinstance(item, str) for item in items):
+        return _parse_text("\n".join(items))
+    if items and all(isinstance(item, dict) and isinstance(item.get("open"), dict) for item in items):
+        return _parse_google_periods(items)
+
+    days: dict = {}
+    for item in items:
+        if not isinstance(item, dict) or "day" not in item:
+            continue
+        day = item["day"]
+        # Integer days follow Python's weekday() (Monday = 0)
+        day_list = [day] if isinstance(day, int) and 0 <= day <= 6 else parse_day_spec(str(day))
+        ranges = _parse_day_value(item["hours"]) if "hours" in item else _parse_day_value(item)
+        if ranges is None or not day_list:
+            continue
+        for index in day_list:
+            days.setdefault(index, []).extend(ranges)
+    return days or None
+
+
+def _parse_google_periods(periods: list) -> Optional[WeeklyHours]:
+    """Google Places periods: day 0 = Sunday, time "HHMM"; close may be on a later day."""
+    ranges = []
+    for period in periods:
+        opening = period.get("open") or {}
+        closing = period.get("close")
+        open_minute = _google_minute(opening)
+        if open_minute is None:
+            continue
+        if not closing:
+            # A single open period with no close means open 24/7
+            return WeeklyHours([(0, MINUTES_PER_WEEK)])
+        close_minute = _google_minute(closing)
+        if close_minute is None:
+            continue
+        if close_minute <= open_minute:
+            close_minute += MINUTES_PER_WEEK
+        ranges.append((open_minute, close_minute))
+    return WeeklyHours(ranges) if ranges else None
+
+
+def _google_minute(point: dict) -> Optional[int]:
+    try:
+        day = (int(point["day"]) + 6) % 7
+        clock = str(point["time"]).zfill(4)
+        return day * MINUTES_PER_DAY + int(clock[:2]) * 60 + int(clock[2:])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Restaurant helpers
+# ---------------------------------------------------------------------------
+
+def compile_restaurant_hours(
+    hours_json: Any = None,
+    hours_of_operation: Any = None,
+    timezone: Optional[str] = None,
+) -> Tuple[Optional[str], Optional[str]]:
+    """Compile a restaurant's stored hours for the hours_week_ranges/hours_timezone columns.
+
+    Structured hours_json wins over hours_of_operation. Returns (None, None) when
+    neither can be compiled.
+    """
+    for value in (hours_json, hours_of_operation):
+        weekly = compile_hours(value)
+        if weekly is not None:
+            document_tz = value.get("timezone") if isinstance(value, dict) else None
+            return weekly.to_multirange(), resolve_timezone(timezone, document_tz)
+    return None, None
+
+
+@lru_cache(maxsize=4096)
+def _compile_cached(serialized: str) -> Optional[WeeklyHours]:
+    return compile_hours(serialized)
+
+
+def weekly_hours_for(restaurant: dict) -> Tuple[Optional[WeeklyHours], str]:
+    """WeeklyHours and timezone for a restaurant row/dict.
+
+    Uses the precompiled columns when present; otherwise compiles the raw hours
+    (memoized on their serialized form, so repeated rows are parsed once).
+    """
+    compiled = restaurant.get("hours_week_ranges")
+    if compiled is not None:
+        return (
+            WeeklyHours.from_multirange(compiled),
+            resolve_timezone(restaurant.get("hours_timezone"), restaurant.get("timezone")),
+        )
+    for key in ("hours_json", "hours", "hours_structured", "hours_of_operation", "hours_open"):
+        value = restaurant.get(key)
+        if not value:
+            continue
+        serialized = value if isinstance(value, str) else json.dumps(value, sort_keys=True, default=str)
+        weekly = _compile_cached(serialized)
+        if weekly is not None:
+            document_tz = value.get("timezone") if isinstance(value, dict) else None
+            return weekly, resolve_timezone(restaurant.get("timezone"), document_tz)
+    return None, resolve_timezone(restaurant.get("timezone"))
+
+
+def is_open_at(restaurant: dict, reference_time: Optional[datetime] = None) -> Optional[bool]:
+    """Open/closed for a restaurant at `reference_time` (now by default); None if hours are unknown."""
+    weekly, timezone = weekly_hours_for(restaurant)
+    if weekly is None:
+        return None
+    return weekly.is_open_at(local_time_in(timezone, reference_time))
+
+
+def local_time_in(timezone: str, reference_time: Optional[datetime] = None) -> datetime:
+    tz = pytz.timezone(timezone)
+    if reference_time is None:
+        return datetime.now(tz)
+    if reference_time.tzinfo is None:
+        reference_time = pytz.UTC.localize(reference_time)
+    return reference_time.astimezone(tz)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Solar zmanim for a location: sunrise, sunset, candle lighting and havdalah.
+
+Sun positions use the NOAA solar calculator equations (Meeus, "Astronomical
+Algorithms"). Each event is computed at solar noon first, then refined once
+at the event time. Results are within about a minute of published tables
+between the polar circles. On days when the sun never reaches the requested
+angle (polar summer or winter), the affected zmanim are None.
+
+Conventions match HebCal's defaults:
+    sunrise/sunset      geometric horizon plus 0.833° refraction and semi-diameter
+    alot hashachar      sun 16.1° below the horizon
+    tzeit hakochavim    sun 8.5° below the horizon (also havdalah)
+    candle lighting     CANDLE_LIGHTING_MINUTES before sunset
+    proportional hours  sunrise to sunset / 12 (GRA)
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo
+
+from utils.hebrew_calendar import CalendarDay
+
+SUNRISE_ZENITH = 90.833
+ALOT_DEPRESSION = 16.1
+TZEIT_DEPRESSION = 8.5
+CANDLE_LIGHTING_MINUTES = 18
+
+
+def _julian_century(day: date, minutes_utc: float) -> float:
+    julian_day = day.toordinal() + 1721424.5 + minutes_utc / 1440.0
+    return (julian_day - 2451545.0) / 36525.0
+
+
+def _sun_position(t: float):
+    """Solar declination (radians) and equation of time (minutes) at Julian century `t`."""
+    mean_longitude = math.radians((280.46646 + t * (36000.76983 + t * 0.0003032)) % 360)
+    mean_anomaly = math.radians(357.52911 + t * (35999.05029 - 0.0001537 * t))
+    eccentricity = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+    center = (
+        math.sin(mean_anomaly) * (1.914602 - t * (0.004817 + 0.000014 * t))
+        + math.sin(2 * mean_anomaly) * (0.019993 - 0.000101 * t)
+        + math.sin(3 * mean_anomaly) * 0.000289
+    )
+    omega = math.radians(125.04 - 1934.136 * t)
+    apparent_longitude = math.radians(math.degrees(mean_longitude) + center - 0.00569 - 0.00478 * math.sin(omega))
+    mean_obliquity = 23 + (26 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60) / 60
+    obliquity = math.radians(mean_obliquity + 0.00256 * math.cos(omega))
+    declination = math.asin(math.sin(obliquity) * math.sin(apparent_longitude))
+
+    y = math.tan(obliquity / 2) ** 2
+    equation_of_time = 4 * math.degrees(
+        y * math.sin(2 * mean_longitude)
+        - 2 * eccentricity * math.sin(mean_anomaly)
+        + 4 * eccentricity * y * math.sin(mean_anomaly) * math.cos(2 * mean_longitude)
+        - 0.5 * y * y * math.sin(4 * mean_longitude)
+        - 1.25 * eccentricity * eccentricity * math.sin(2 * mean_anomaly)
+    )
+    return declination, equation_of_time
+
+
+def _event_minutes(day: date, latitude: float, longitude: float, zenith: float, rising: bool, minutes: float) -> Optional[float]:
+    declination, equation_of_time = _sun_position(_julian_century(day, minutes))
+    lat = math.radians(latitude)
+    cos_hour_angle = (math.cos(math.radians(zenith)) / (math.cos(lat) * math.cos(declination))
+                      - math.tan(lat) * math.tan(declination))
+    if not -1.0 <= cos_hour_angle <= 1.0:
+        return None
+    hour_angle = math.degrees(math.acos(cos_hour_angle))
+    noon = 720 - 4 * longitude - equation_of_time
+    return noon - 4 * hour_angle if rising else noon + 4 * hour_angle
+
+
+def sun_event(day: date, latitude: float, longitude: float, zenith: float = SUNRISE_ZENITH,
+              rising: bool = False) -> Optional[datetime]:
+    """UTC time the sun crosses `zenith` degrees on civil date `day` at the location."""
+    first = _event_minutes(day, latitude, longitude, zenith, rising, 720 - 4 * longitude)
+    if first is None:
+        return None
+    refined = _event_minutes(day, latitude, longitude, zenith, rising, first)
+    if refined is None:
+        return None
+    return datetime.combine(day, time(), tzinfo=timezone.utc) + timedelta(minutes=refined)
+
+
+def solar_noon(day: date, longitude: float) -> datetime:
+    """UTC time of solar transit on civil date `day`."""
+    minutes = 720 - 4 * longitude
+    _, equation_of_time = _sun_position(_julian_century(day, minutes))
+    minutes = 720 - 4 * longitude - equation_of_time
+    return datetime.combine(day, time(), tzinfo=timezone.utc) + timedelta(minutes=minutes)
+
+
+def zmanim_for_day(day: date, latitude: float, longitude: float, tz: Optional[str] = None) -> Dict[str, Optional[datetime]]:
+    """Daily zmanim for a location, as aware datetimes in `tz` (UTC when not given)."""
+    zone = ZoneInfo(tz) if tz else timezone.utc
+    sunrise = sun_event(day, latitude, longitude, rising=True)
+    sunset = sun_event(day, latitude, longitude)
+    times: Dict[str, Optional[datetime]] = {
+        'alot_hashachar': sun_event(day, latitude, longitude, 90 + ALOT_DEPRESSION, rising=True),
+        'sunrise': sunrise,
+        'chatzot': solar_noon(day, longitude),
+        'sunset': sunset,
+        'tzeit_hakochavim': sun_event(day, latitude, longitude, 90 + TZEIT_DEPRESSION),
+    }
+    if sunrise and sunset:
+        hour = (sunset - sunrise) / 12
+        times['sof_zman_shma'] = sunrise + 3 * hour
+        times['sof_zman_tfilla'] = sunrise + 4 * hour
+        times['mincha_gedola'] = sunrise + 6.5 * hour
+        times['mincha_ketana'] = sunrise + 9.5 * hour
+        times['plag_hamincha'] = sunrise + 10.75 * hour
+    return {name: value.astimezone(zone) if value else None for name, value in times.items()}
+
+
+def shabbat_times(calendar_day: CalendarDay, latitude: float, longitude: float, tz: Optional[str] = None,
+                  candle_lighting_minutes: int = CANDLE_LIGHTING_MINUTES) -> Dict[str, Optional[datetime]]:
+    """Candle lighting and havdalah for one day, when that day has them."""
+    times = zmanim_for_day(calendar_day.gregorian, latitude, longitude, tz)
+    result: Dict[str, Optional[datetime]] = {'candle_lighting': None, 'havdalah': None}
+    if calendar_day.candle_lighting == 'before_sunset' and times['sunset']:
+        result['candle_lighting'] = times['sunset'] - timedelta(minutes=candle_lighting_minutes)
+    elif calendar_day.candle_lighting == 'after_nightfall':
+        result['candle_lighting'] = times['tzeit_hakochavim']
+    if calendar_day.havdalah:
+        result['havdalah'] = times['tzeit_hakochavim']
+    return result
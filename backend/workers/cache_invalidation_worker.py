@@ -4,6 +4,11 @@ PostgreSQL LISTEN/NOTIFY worker for Redis cache invalidation.
 Listens for database changes via LISTEN/NOTIFY and invalidates relevant cache
 entries, supporting multiple notification channels, intelligent cache key pattern
 matching, and integration with Redis cache service patterns.
+
+Notifications are coalesced per debounce window: a burst of entity changes is
+flushed as one batch, each key pattern is scanned once per batch, and search
+results are removed through the search cache index (only entries containing a
+changed entity or covering its location) instead of SCANning all search keys.
 """
 
 from __future__ import annotations
@@ -14,11 +19,12 @@ import sys
 import threading
 import time
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Callable
+from typing import Any, Dict, List, Optional, Callable, Tuple
 
 import psycopg2
 import psycopg2.extensions
 
+from cache.search_cache_index import SearchCacheIndex
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -44,7 +50,6 @@ class CacheInvalidationWorker:
         'restaurant': [
             'restaurants:*',
             'entity_v5:restaurants:*',
-            'search:*restaurants*',
             'etag_v5:watermark:restaurants',
             'etag_v5:entity:restaurants:*',
             'restaurant_hours:*',
@@ -53,7 +58,6 @@ class CacheInvalidationWorker:
         'synagogue': [
             'synagogues:*',
             'entity_v5:synagogues:*',
-            'search:*synagogues*',
             'etag_v5:watermark:synagogues',
             'etag_v5:entity:synagogues:*',
             'synagogue_hours:*'
@@ -61,7 +65,6 @@ class CacheInvalidationWorker:
         'mikvah': [
             'mikvahs:*',
             'entity_v5:mikvahs:*',
-            'search:*mikvahs*',
             'etag_v5:watermark:mikvahs',
             'etag_v5:entity:mikvahs:*',
             'mikvah_hours:*'
@@ -69,7 +72,6 @@ class CacheInvalidationWorker:
         'store': [
             'stores:*',
             'entity_v5:stores:*',
-            'search:*stores*',
             'etag_v5:watermark:stores',
             'etag_v5:entity:stores:*',
             'store_hours:*'
@@ -95,15 +97,33 @@ class CacheInvalidationWorker:
         ]
     }
     
+    # Statistics and aggregated data caches
+    STATISTICS_PATTERNS = [
+        'stats:*',
+        'statistics:*',
+        'aggregated_data:*',
+        'dashboard_data:*',
+        'analytics:*'
+    ]
+    
+    # Entity types whose search cache entries are tracked by the search index
+    SEARCH_INDEXED_ENTITY_TYPES = ['restaurant', 'synagogue', 'mikvah', 'store']
+    
+    # Default window for coalescing bursts of notifications (seconds)
+    DEFAULT_DEBOUNCE_SECONDS = 0.5
+    
     def __init__(
         self,
         database_url: str,
         redis_client=None,
-        invalidation_strategies: Optional[Dict[str, Callable]] = None
+        invalidation_strategies: Optional[Dict[str, Callable]] = None,
+        debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+        search_index: Optional[SearchCacheIndex] = None
     ):
         self.database_url = database_url
         self.redis_client = redis_client
         self.invalidation_strategies = invalidation_strategies or {}
+        self.debounce_seconds = max(debounce_seconds, 0.0)
         
         # Worker state
         self.connection = None
@@ -113,10 +133,17 @@ class CacheInvalidationWorker:
         self.max_reconnect_attempts = 10
         self.reconnect_delay = 5  # seconds
         
+        # Pending invalidations for the current debounce window
+        self._pending_lock = threading.Lock()
+        self._pending = self._new_pending_batch()
+        self._pending_since = None
+        
         # Statistics
         self.stats = {
             'notifications_received': 0,
             'cache_keys_invalidated': 0,
+            'search_entries_invalidated': 0,
+            'batches_flushed': 0,
             'errors': 0,
             'reconnections': 0,
             'uptime_start': None
@@ -126,6 +153,8 @@ class CacheInvalidationWorker:
         if not self.redis_client:
             self._init_redis_client()
         
+        self.search_index = search_index or SearchCacheIndex(self.redis_client)
+        
         # Register signal handlers for graceful shutdown
         signal.signal(signal.SIGTERM, self._signal_handler)
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -197,12 +226,16 @@ class CacheInvalidationWorker:
                 
             except psycopg2.OperationalError as e:
                 logger.error(f"Database connection error: {e}")
+                self._flush_pending()
                 self._handle_connection_error()
                 
             except Exception as e:
                 logger.error(f"Unexpected error in cache invalidation worker: {e}")
                 self.stats['errors'] += 1
                 time.sleep(5)  # Brief pause before retry
+        
+        # Don't drop invalidations collected before shutdown
+        self._flush_pending()
     
     def _connect_to_database(self):
         """Connect to PostgreSQL and set up LISTEN statements."""
@@ -239,22 +272,22 @@ class CacheInvalidationWorker:
         
         while self.running:
             try:
-                # Use select to wait for socket readiness
-                ready, _, _ = select.select([self.connection], [], [], 1.0)  # 1 second timeout
+                # Wait for socket readiness, waking up in time to flush the pending batch
+                ready, _, _ = select.select([self.connection], [], [], self._next_wait_timeout())
                 
                 if ready:
                     # Socket is ready, check for notifications
                     if self.connection.poll() == psycopg2.extensions.POLL_OK:
-                        # Process all available notifications
+                        # Process all available notifications in arrival order
                         while self.connection.notifies:
-                            notification = self.connection.notifies.pop()
+                            notification = self.connection.notifies.pop(0)
                             self._process_notification(notification)
                     else:
                         # Connection issue, will trigger reconnection
                         raise psycopg2.OperationalError("Connection poll failed")
-                else:
-                    # No notifications, continue loop
-                    continue
+                
+                if self._pending_due():
+                    self._flush_pending()
                     
             except psycopg2.OperationalError as e:
                 logger.error(f"Database connection lost: {e}")
@@ -293,7 +326,11 @@ class CacheInvalidationWorker:
             self.stats['errors'] += 1
     
     def _default_invalidation_strategy(self, channel: str, data: Dict[str, Any]):
-        """Default cache invalidation strategy based on notification channel."""
+        """Default cache invalidation strategy based on notification channel.
+        
+        Invalidations are queued into the pending batch and applied when the
+        debounce window closes (immediately when debouncing is disabled).
+        """
         if not self.redis_client:
             logger.warning("Redis client not available, skipping cache invalidation")
             return
@@ -305,23 +342,89 @@ class CacheInvalidationWorker:
             # Get cache key patterns for this entity type
             patterns = self._get_cache_patterns(entity_type, data)
             
-            # Invalidate cache keys
-            invalidated_count = 0
-            for pattern in patterns:
-                count = self._invalidate_cache_pattern(pattern)
-                invalidated_count += count
-            
-            if invalidated_count > 0:
-                logger.info(f"Invalidated {invalidated_count} cache keys for {channel}")
-                self.stats['cache_keys_invalidated'] += invalidated_count
+            with self._pending_lock:
+                batch = self._pending
+                for pattern in patterns:
+                    if '*' in pattern:
+                        batch['patterns'].add(pattern)
+                    else:
+                        batch['keys'].add(pattern)
+                
+                # Special handling for specific notifications
+                self._handle_special_invalidations(channel, data, batch)
+                
+                batch['notifications'] += 1
+                if self._pending_since is None:
+                    self._pending_since = time.monotonic()
             
-            # Special handling for specific notifications
-            self._handle_special_invalidations(channel, data)
+            if self._pending_due():
+                self._flush_pending()
             
         except Exception as e:
             logger.error(f"Error in default invalidation strategy: {e}")
             self.stats['errors'] += 1
     
+    @staticmethod
+    def _new_pending_batch() -> Dict[str, Any]:
+        """Create an empty batch of pending invalidations."""
+        return {
+            'patterns': set(),
+            'keys': set(),
+            'search_changes': {},
+            'notifications': 0
+        }
+    
+    def _pending_due(self) -> bool:
+        """Check whether the pending batch's debounce window has closed."""
+        since = self._pending_since
+        return since is not None and time.monotonic() - since >= self.debounce_seconds
+    
+    def _next_wait_timeout(self) -> float:
+        """Get the select() timeout: 1 second, or less if a batch is due sooner."""
+        since = self._pending_since
+        if since is None:
+            return 1.0
+        remaining = self.debounce_seconds - (time.monotonic() - since)
+        return min(max(remaining, 0.0), 1.0)
+    
+    def _flush_pending(self) -> int:
+        """Apply all invalidations collected in the current debounce window."""
+        with self._pending_lock:
+            batch = self._pending
+            self._pending = self._new_pending_batch()
+            self._pending_since = None
+        
+        if not batch['notifications'] or not self.redis_client:
+            return 0
+        
+        invalidated_count = 0
+        try:
+            # Each pattern is scanned once per batch, however many notifications asked for it
+            for pattern in sorted(batch['patterns']):
+                invalidated_count += self._invalidate_cache_pattern(pattern)
+            
+            if batch['keys']:
+                invalidated_count += self.redis_client.delete(*sorted(batch['keys']))
+            
+            if batch['search_changes']:
+                search_count = self.search_index.invalidate(batch['search_changes'].values())
+                self.stats['search_entries_invalidated'] += search_count
+                invalidated_count += search_count
+            
+            self.stats['batches_flushed'] += 1
+            if invalidated_count > 0:
+                logger.info(
+                    f"Invalidated {invalidated_count} cache keys for "
+                    f"{batch['notifications']} notifications"
+                )
+                self.stats['cache_keys_invalidated'] += invalidated_count
+                
+        except Exception as e:
+            logger.error(f"Error flushing pending cache invalidations: {e}")
+            self.stats['errors'] += 1
+        
+        return invalidated_count
+    
     def _extract_entity_type(self, channel: str) -> str:
         """Extract entity type from notification channel."""
         if channel.startswith('restaurant'):
@@ -343,7 +446,7 @@ class CacheInvalidationWorker:
     
     def _get_cache_patterns(self, entity_type: str, data: Dict[str, Any]) -> List[str]:
         """Get cache key patterns for invalidation."""
-        patterns = self.CACHE_KEY_PATTERNS.get(entity_type, [])
+        patterns = list(self.CACHE_KEY_PATTERNS.get(entity_type, []))
         
         # Add entity-specific patterns if ID is provided
         entity_id = data.get('id') or data.get('entity_id')
@@ -386,64 +489,66 @@ class CacheInvalidationWorker:
             logger.error(f"Error invalidating cache pattern {pattern}: {e}")
             return 0
     
-    def _handle_special_invalidations(self, channel: str, data: Dict[str, Any]):
-        """Handle special invalidation cases."""
+    def _handle_special_invalidations(self, channel: str, data: Dict[str, Any], batch: Dict[str, Any]):
+        """Queue special invalidation cases into the pending batch."""
         try:
-            # Invalidate search results when entities change
-            if channel in ['restaurant_change', 'synagogue_change', 'mikvah_change', 'store_change']:
-                self._invalidate_search_caches()
+            entity_type = self._extract_entity_type(channel)
+            
+            # Invalidate only the search results that include the entity or cover its location
+            if entity_type in self.SEARCH_INDEXED_ENTITY_TYPES:
+                for change in self._extract_search_changes(entity_type, data):
+                    dedupe_key = (
+                        change['entity_type'],
+                        change.get('entity_id'),
+                        change.get('latitude'),
+                        change.get('longitude')
+                    )
+                    batch['search_changes'][dedupe_key] = change
             
             # Invalidate watermark caches for ETag system
-            if '_change' in channel:
-                entity_type = self._extract_entity_type(channel)
-                if entity_type != 'general':
-                    watermark_key = f"etag_v5:watermark:{entity_type}s"
-                    self.redis_client.delete(watermark_key)
-                    logger.debug(f"Invalidated watermark cache: {watermark_key}")
+            if '_change' in channel and entity_type != 'general':
+                batch['keys'].add(f"etag_v5:watermark:{entity_type}s")
             
             # Invalidate aggregated statistics
             if channel in ['restaurant_change', 'review_change', 'order_change']:
-                self._invalidate_statistics_caches()
+                batch['patterns'].update(self.STATISTICS_PATTERNS)
                 
         except Exception as e:
             logger.error(f"Error handling special invalidations: {e}")
     
-    def _invalidate_search_caches(self):
-        """Invalidate search-related caches."""
-        try:
-            search_patterns = [
-                'search:*',
-                'unified_search:*',
-                'entity_search:*',
-                'faceted_search:*'
-            ]
-            
-            for pattern in search_patterns:
-                count = self._invalidate_cache_pattern(pattern)
-                if count > 0:
-                    logger.debug(f"Invalidated {count} search cache keys")
-                    
-        except Exception as e:
-            logger.error(f"Error invalidating search caches: {e}")
+    def _extract_search_changes(self, entity_type: str, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Extract entity id and location(s) for search index invalidation.
+        
+        Supports both flat row payloads and payloads carrying 'old_data'/'new_data',
+        so a moved entity invalidates searches around both its old and new location.
+        """
+        rows = [row for row in (data.get('old_data'), data.get('new_data')) if isinstance(row, dict)]
+        if not rows:
+            rows = [data]
+        
+        changes = []
+        for row in rows:
+            entity_id = row.get('id') or row.get('entity_id') or data.get('id') or data.get('entity_id')
+            latitude, longitude = self._extract_location(row)
+            changes.append({
+                'entity_type': entity_type,
+                'entity_id': entity_id,
+                'latitude': latitude,
+                'longitude': longitude
+            })
+        return changes
     
-    def _invalidate_statistics_caches(self):
-        """Invalidate statistics and aggregated data caches."""
+    @staticmethod
+    def _extract_location(row: Dict[str, Any]) -> Tuple[Optional[float], Optional[float]]:
+        """Extract (latitude, longitude) from a row payload, if present and valid."""
         try:
-            stats_patterns = [
-                'stats:*',
-                'statistics:*',
-                'aggregated_data:*',
-                'dashboard_data:*',
-                'analytics:*'
-            ]
-            
-            for pattern in stats_patterns:
-                count = self._invalidate_cache_pattern(pattern)
-                if count > 0:
-                    logger.debug(f"Invalidated {count} statistics cache keys")
-                    
-        except Exception as e:
-            logger.error(f"Error invalidating statistics caches: {e}")
+            latitude = row.get('latitude', row.get('lat'))
+            longitude = row.get('longitude', row.get('lng'))
+            if latitude is None or longitude is None:
+                return None, None
+            return float(latitude), float(longitude)
+        except (TypeError, ValueError):
+            return None, None
     
     def _handle_connection_error(self):
         """Handle database connection errors with exponential backoff."""
@@ -475,6 +580,9 @@ class CacheInvalidationWorker:
             'database_connected': self.connection is not None and not self.connection.closed,
             'listening_channels': self.NOTIFICATION_CHANNELS,
             'reconnect_attempts': self.reconnect_attempts,
+            'debounce_seconds': self.debounce_seconds,
+            'pending_notifications': self._pending['notifications'],
+            'search_index': self.search_index.get_stats(),
         }
     
     def add_custom_strategy(self, channel: str, strategy_func: Callable):
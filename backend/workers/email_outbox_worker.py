@@ -0,0 +1,260 @@
+"""
+Background sender for the transactional email outbox.
+
+Claims due messages from services.email_outbox in batches, sends them in
+parallel over a pool of persistent SMTP connections (or the configured HTTP
+provider), acknowledges successes in one round trip and reschedules failures
+with exponential backoff.
+
+EmailService starts the sender lazily in each process on its first queued
+message (a thread started before gunicorn forks does not survive the fork).
+The sender refreshes the outbox heartbeat while it runs and, at interpreter
+exit, sends what is already due for up to EMAIL_OUTBOX_EXIT_FLUSH_SECONDS
+(default 5) before stopping.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from services.email_outbox import EmailOutbox, SMTPConnectionPool, get_email_outbox
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class EmailOutboxWorker:
+    """Batching email sender with pooled SMTP connections."""
+
+    def __init__(
+        self,
+        outbox: Optional[EmailOutbox] = None,
+        email_service=None,
+        smtp_pool: Optional[SMTPConnectionPool] = None,
+        batch_size: int = 50,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 120.0,
+        heartbeat_ttl: float = 30.0
+    ):
+        if email_service is None:
+            from services.email_service import email_service as default_email_service
+            email_service = default_email_service
+
+        self.outbox = outbox or get_email_outbox()
+        self.email_service = email_service
+        self.smtp_pool = smtp_pool if smtp_pool is not None else (
+            SMTPConnectionPool.from_env() if email_service.provider == 'smtp' else None
+        )
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.heartbeat_ttl = heartbeat_ttl
+
+        # One send thread per pooled connection
+        self.send_concurrency = self.smtp_pool.size if self.smtp_pool else 4
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._last_beat = 0.0
+        self._pid: Optional[int] = None
+        self.running = False
+
+        self.stats = {
+            'sent': 0,
+            'failed_attempts': 0,
+            'dead_lettered': 0,
+            'batches': 0,
+            'last_batch_at': None,
+            'start_time': None
+        }
+
+    def _send(self, message: Dict[str, Any]) -> Optional[str]:
+        """Send one message; returns an error string on failure."""
+        try:
+            if self.email_service.deliver(message, smtp_pool=self.smtp_pool):
+                return None
+            return "provider rejected message or is misconfigured"
+        except Exception as e:
+            return str(e) or e.__class__.__name__
+
+    def run_once(self) -> Tuple[int, int]:
+        """Claim and send one batch.
+
+        Returns:
+            (messages sent, messages failed)
+        """
+        messages = self.outbox.claim(self.batch_size, self.lease_seconds)
+        if not messages:
+            return 0, 0
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.send_concurrency,
+                                                thread_name_prefix="EmailOutboxSend")
+        errors = list(self._executor.map(self._send, messages))
+
+        sent_ids = [m['id'] for m, error in zip(messages, errors) if error is None]
+        self.outbox.ack(sent_ids)
+
+        failed = 0
+        for message, error in zip(messages, errors):
+            if error is None:
+                continue
+            failed += 1
+            logger.warning(f"Email {message['id']} to {message['to_email']} failed: {error}")
+            if not self.outbox.retry(message, error):
+                self.stats['dead_lettered'] += 1
+
+        self.stats['sent'] += len(sent_ids)
+        self.stats['failed_attempts'] += failed
+        self.stats['batches'] += 1
+        self.stats['last_batch_at'] = datetime.now().isoformat()
+        return len(sent_ids), failed
+
+    def _beat(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if force or now - self._last_beat >= self.heartbeat_ttl / 3:
+            self.outbox.beat(self.heartbeat_ttl)
+            self._last_beat = now
+
+    def _run_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self._beat()
+                sent, failed = self.run_once()
+                if sent or failed:
+                    # More may be due right away; only idle when the batch was empty
+                    continue
+            except Exception as e:
+                logger.error(f"Error in email outbox worker: {e}")
+            self._stop_event.wait(self.poll_interval)
+
+    @property
+    def running_here(self) -> bool:
+        """Whether the sender thread runs in this process (not one inherited across fork)."""
+        return self.running and self._pid == os.getpid()
+
+    def start(self):
+        """Start the sender thread."""
+        if self.running_here:
+            logger.warning("Email outbox worker already running")
+            return
+        if not self.outbox.available:
+            logger.warning("Email outbox unavailable (no Redis); not starting worker")
+            return
+
+        # State copied from the parent across fork has no threads behind it
+        self._executor = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._beat(force=True)
+        self._pid = os.getpid()
+        self.running = True
+        self.stats['start_time'] = time.time()
+        self._thread = threading.Thread(target=self._run_loop, name="EmailOutboxWorker", daemon=True)
+        self._thread.start()
+        logger.info(f"Email outbox worker started (batch size {self.batch_size}, "
+                    f"{self.send_concurrency} concurrent sends)")
+
+    def flush(self, timeout: float) -> int:
+        """Send due messages until none are left or `timeout` has passed.
+
+        Returns:
+            Number of messages sent
+        """
+        deadline = time.monotonic() + timeout
+        sent_total = 0
+        while time.monotonic() < deadline:
+            sent, failed = self.run_once()
+            sent_total += sent
+            if not sent and not failed:
+                break
+        return sent_total
+
+    def stop(self, flush_seconds: float = 0.0):
+        """Stop the sender thread and close pooled connections.
+
+        Args:
+            flush_seconds: First send already-due messages for up to this long
+        """
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+        if flush_seconds > 0 and self.outbox.available:
+            try:
+                self.flush(flush_seconds)
+            except Exception as e:
+                logger.error(f"Error flushing email outbox on stop: {e}")
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self.smtp_pool is not None:
+            self.smtp_pool.close_all()
+        self.running = False
+        logger.info("Email outbox worker stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats, running=self.running)
+        if self.smtp_pool is not None:
+            stats['smtp_pool'] = dict(self.smtp_pool.stats, size=self.smtp_pool.size)
+        try:
+            stats['outbox'] = self.outbox.get_stats()
+        except Exception as e:
+            stats['outbox'] = {'error': str(e)}
+        return stats
+
+
+# Global worker instance
+email_outbox_worker = None
+_start_lock = threading.Lock()
+_exit_hook_registered = False
+
+def start_email_outbox_worker(**kwargs) -> EmailOutboxWorker:
+    """Start the global email outbox worker."""
+    global email_outbox_worker, _exit_hook_registered
+
+    if email_outbox_worker and email_outbox_worker.running_here:
+        logger.warning("Email outbox worker is already running")
+        return email_outbox_worker
+
+    email_outbox_worker = EmailOutboxWorker(**kwargs)
+    email_outbox_worker.start()
+
+    if not _exit_hook_registered:
+        atexit.register(_stop_at_exit)
+        _exit_hook_registered = True
+
+    return email_outbox_worker
+
+def ensure_email_outbox_worker(**kwargs) -> Optional[EmailOutboxWorker]:
+    """Start the global email outbox worker in this process unless it already runs here."""
+    worker = email_outbox_worker
+    if worker is not None and worker.running_here:
+        return worker
+    with _start_lock:
+        worker = email_outbox_worker
+        if worker is not None and worker.running_here:
+            return worker
+        try:
+            return start_email_outbox_worker(**kwargs)
+        except Exception as e:
+            logger.error(f"Failed to start email outbox worker: {e}")
+            return None
+
+def stop_email_outbox_worker(flush_seconds: float = 0.0):
+    """Stop the global email outbox worker."""
+    global email_outbox_worker
+
+    if email_outbox_worker:
+        email_outbox_worker.stop(flush_seconds=flush_seconds)
+        email_outbox_worker = None
+
+def _stop_at_exit():
+    if email_outbox_worker is not None and email_outbox_worker.running_here:
+        stop_email_outbox_worker(flush_seconds=float(os.getenv('EMAIL_OUTBOX_EXIT_FLUSH_SECONDS', '5')))